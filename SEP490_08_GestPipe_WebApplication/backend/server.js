@@ -3,9 +3,9 @@ const express = require('express');
 const cors = require('cors');
 const http = require('http');
 const socketIo = require('socket.io');
-const { PythonShell } = require('python-shell');
 const connectDB = require('./src/config/db');
-const { PYTHON_BIN } = require('./src/utils/pythonRunner');
+const gesturePredictionPool = require('./src/services/gesturePredictionPool');
+const practicePythonService = require('./src/services/practicePythonService');
 
 // Connect to Database
 connectDB();
@@ -66,32 +66,8 @@ app.post('/api/test-predict', async (req, res) => {
 
     console.log('🎯 Test Evaluating gesture:', target_gesture);
 
-    // Call Python script
-    const scriptPath = './src/utils/gesture_prediction.py';
-
-    const results = await new Promise((resolve, reject) => {
-      const pyshell = new PythonShell(scriptPath, {
-        mode: 'json',
-        pythonPath: PYTHON_BIN,
-        pythonOptions: ['-u'],
-        scriptPath: __dirname  // Set working directory to backend root
-      });
-
-      pyshell.send({
-        left_fingers, right_fingers, motion_features, target_gesture, duration: duration || 1.0
-      });
-
-      pyshell.on('message', (message) => {
-        resolve(message);
-      });
-
-      pyshell.on('error', (error) => {
-        reject(error);
-      });
-
-      pyshell.end((err) => {
-        if (err) reject(err);
-      });
+    const results = await gesturePredictionPool.predict({
+      left_fingers, right_fingers, motion_features, target_gesture, duration: duration || 1.0
     });
 
     res.json(results);
@@ -105,76 +81,79 @@ app.post('/api/test-predict', async (req, res) => {
 io.on('connection', (socket) => {
   console.log('Client connected:', socket.id);
 
+  const stopSocketPractice = () => {
+    if (socket.practice) {
+      practicePythonService.off('message', socket.practice.onMessage);
+      practicePythonService.stopPracticeSession(socket.id, socket.practice.gestureName);
+      socket.practice = null;
+    }
+  };
+
   // Handle gesture practice session start
-  socket.on('start-practice', (data) => {
+  socket.on('start-practice', async (data) => {
     console.log('Starting practice session:', data);
-    // Start Python process for gesture recognition
-    const { spawn } = require('child_process');
-    
-    // Fix: Use configured PYTHON_BIN and correct path
-    const path = require('path');
-    const scriptPath = path.resolve(__dirname, '../../hybrid_realtime_pipeline/web_gesture_processor.py');
-    
-    console.log(`[Socket] Spawning python: ${PYTHON_BIN} ${scriptPath}`);
-    
-    const pythonProcess = spawn(PYTHON_BIN, [
-      scriptPath,
-      data.gestureName
-    ], { stdio: ['pipe', 'pipe', 'pipe'] });
-
-    socket.pythonProcess = pythonProcess;
-
-    // Handle Python process output
-    pythonProcess.stdout.on('data', (data) => {
-      try {
-        const message = JSON.parse(data.toString().trim());
-        socket.emit('gesture-result', message);
-      } catch (e) {
-        console.log('Python output:', data.toString());
+    stopSocketPractice();
+
+    // Sessions share the gesture_session_server processes; this socket only
+    // sees the messages of its own session
+    const sessionKey = `${socket.id}_${data.gestureName}`;
+    const onMessage = (key, message) => {
+      if (key !== sessionKey) return;
+      socket.emit('gesture-result', message);
+      if (message.type === 'closed') {
+        socket.emit('practice-ended');
       }
-    });
-
-    pythonProcess.stderr.on('data', (data) => {
-      console.error('Python error:', data.toString());
-    });
-
-    pythonProcess.on('close', (code) => {
-      console.log(`Python process exited with code ${code}`);
+    };
+    socket.practice = { gestureName: data.gestureName, onMessage };
+    practicePythonService.on('message', onMessage);
+
+    try {
+      await practicePythonService.startPracticeSession(data.gestureName, socket.id);
+      socket.emit('practice-started', { message: 'Practice session started' });
+    } catch (error) {
+      console.error('Failed to start practice session:', error.message);
+      stopSocketPractice();
       socket.emit('practice-ended');
-    });
-
-    socket.emit('practice-started', { message: 'Practice session started' });
+    }
   });
 
   // Handle frame data from client
   socket.on('frame', (data) => {
-    if (socket.pythonProcess && !socket.pythonProcess.killed) {
-      // Send frame data to Python process
-      const frameCommand = JSON.stringify({
-        type: 'frame',
-        data: data.frameData
-      });
-      socket.pythonProcess.stdin.write(frameCommand + '\n');
+    if (socket.practice) {
+      // Send frame data to the shared server as a session-tagged binary frame
+      try {
+        practicePythonService.sendFrameToSession(socket.id, socket.practice.gestureName, data.frameData);
+      } catch (error) {
+        console.error('Invalid frame data:', error.message);
+      }
     }
   });
 
   // Handle practice stop
   socket.on('stop-practice', () => {
-    if (socket.pythonProcess) {
-      socket.pythonProcess.kill();
-      socket.pythonProcess = null;
-    }
+    stopSocketPractice();
     socket.emit('practice-stopped');
   });
 
   socket.on('disconnect', () => {
     console.log('Client disconnected:', socket.id);
-    if (socket.pythonProcess) {
-      socket.pythonProcess.kill();
-    }
+    stopSocketPractice();
   });
 });
 
 const PORT = process.env.PORT || 5001;
 
-server.listen(PORT, () => console.log(`Server running on port ${PORT}`));
+server.listen(PORT, () => {
+  console.log(`Server running on port ${PORT}`);
+  // Warm up inference workers so the first prediction does not pay for model loading
+  gesturePredictionPool.start();
+});
+
+// Python workers, session servers and the practice zygote (with its forked sessions) end with the server
+const shutdown = () => {
+  gesturePredictionPool.stop();
+  practicePythonService.stop();
+  process.exit(0);
+};
+process.on('SIGINT', shutdown);
+process.on('SIGTERM', shutdown);
@@ -1,8 +1,6 @@
 const GestureSample = require('../models/GestureSample');
 const GestureType = require('../models/GestureType');
-const path = require('path');
-const { PythonShell } = require('python-shell');
-const { PYTHON_BIN } = require('../utils/pythonRunner');
+const gesturePredictionPool = require('../services/gesturePredictionPool');
 
 const toPositiveInt = (value, fallback) => {
   const parsed = Number(value);
@@ -157,33 +155,8 @@ exports.predictGesture = async (req, res) => {
       duration: duration || 1.0
     };
 
-    // Path to Python script
-    const scriptPath = path.resolve(__dirname, '../utils/gesture_prediction.py');
-    console.log('🔍 Script path:', scriptPath);
-    console.log('🔍 File exists:', require('fs').existsSync(scriptPath));
-
-    // Run Python script
-    const results = await new Promise((resolve, reject) => {
-      const pyshell = new PythonShell(scriptPath, {
-        mode: 'json',
-        pythonPath: PYTHON_BIN,
-        pythonOptions: ['-u'],
-      });
-
-      pyshell.send(inputData);
-
-      pyshell.on('message', (message) => {
-        resolve(message);
-      });
-
-      pyshell.on('error', (error) => {
-        reject(error);
-      });
-
-      pyshell.end((err) => {
-        if (err) reject(err);
-      });
-    });
+    // Evaluate on a warm inference worker (models stay loaded between requests)
+    const results = await gesturePredictionPool.predict(inputData);
 
     console.log('✅ Evaluation result:', results);
     res.json(results);
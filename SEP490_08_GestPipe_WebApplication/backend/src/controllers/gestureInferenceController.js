@@ -8,14 +8,25 @@ const PIPELINE_ROOT = path.resolve(__dirname, '../../../../hybrid_realtime_pipel
 const MODELS_DIR = path.join(PIPELINE_ROOT, 'models');
 
 const ARTIFACTS = {
+  // Single-file bundle (models + transform constants + templates); the pickles are the fallback
+  bundle: path.join(MODELS_DIR, 'gesture_model.bundle'),
   model: path.join(MODELS_DIR, 'motion_svm_model.pkl'),
   scaler: path.join(MODELS_DIR, 'motion_scaler.pkl'),
   staticDynamicClassifier: path.join(MODELS_DIR, 'static_dynamic_classifier.pkl'),
 };
 
+const statOrNull = (filePath) => fs.stat(filePath).catch(() => null);
+
+const describeArtifact = (filePath, stat) =>
+  stat ? { path: filePath, size: stat.size, lastModified: stat.mtime } : null;
+
 // Check if all required model files exist
 const checkModelsExist = async () => {
   try {
+    if (await statOrNull(ARTIFACTS.bundle)) {
+      return true;
+    }
+
     const modelChecks = await Promise.all([
       fs.access(ARTIFACTS.model).then(() => true).catch(() => false),
       fs.access(ARTIFACTS.scaler).then(() => true).catch(() => false),
@@ -41,28 +52,20 @@ exports.getModelInfo = async (req, res) => {
       });
     }
 
-    const modelStat = await fs.stat(ARTIFACTS.model);
-    const scalerStat = await fs.stat(ARTIFACTS.scaler);
-    const classifierStat = await fs.stat(ARTIFACTS.staticDynamicClassifier);
+    const [bundleStat, modelStat, scalerStat, classifierStat] = await Promise.all([
+      statOrNull(ARTIFACTS.bundle),
+      statOrNull(ARTIFACTS.model),
+      statOrNull(ARTIFACTS.scaler),
+      statOrNull(ARTIFACTS.staticDynamicClassifier),
+    ]);
 
     res.json({
       available: true,
       models: {
-        mainModel: {
-          path: ARTIFACTS.model,
-          size: modelStat.size,
-          lastModified: modelStat.mtime,
-        },
-        scaler: {
-          path: ARTIFACTS.scaler,
-          size: scalerStat.size,
-          lastModified: scalerStat.mtime,
-        },
-        classifier: {
-          path: ARTIFACTS.staticDynamicClassifier,
-          size: classifierStat.size,
-          lastModified: classifierStat.mtime,
-        },
+        bundle: describeArtifact(ARTIFACTS.bundle, bundleStat),
+        mainModel: describeArtifact(ARTIFACTS.model, modelStat),
+        scaler: describeArtifact(ARTIFACTS.scaler, scalerStat),
+        classifier: describeArtifact(ARTIFACTS.staticDynamicClassifier, classifierStat),
       },
       message: 'Trained models are ready to use.',
     });
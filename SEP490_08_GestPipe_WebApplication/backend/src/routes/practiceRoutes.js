@@ -6,7 +6,7 @@ const { protect: authMiddleware } = require('../middlewares/authMiddleware');
 // Start practice session
 router.post('/start', authMiddleware, async (req, res) => {
   try {
-    const { gestureId } = req.body;
+    const { gestureId, input } = req.body;
     const userId = req.user?.id || 'test-user-123'; // Fallback for development
     
     if (!gestureId) {
@@ -16,7 +16,7 @@ router.post('/start', authMiddleware, async (req, res) => {
       });
     }
     
-    const result = await practicePythonService.startPracticeSession(gestureId, userId);
+    const result = await practicePythonService.startPracticeSession(gestureId, userId, { input });
     res.json(result);
   } catch (error) {
     console.error('Start practice session error:', error);
@@ -76,6 +76,34 @@ router.post('/frame', authMiddleware, async (req, res) => {
   }
 });
 
+// Send hand landmarks tracked in the browser (instead of a frame)
+router.post('/landmarks', authMiddleware, async (req, res) => {
+  try {
+    const { gestureId, hands } = req.body;
+    const userId = req.user?.id || 'test-user-123';
+    
+    if (!gestureId || !Array.isArray(hands)) {
+      return res.status(400).json({ 
+        success: false, 
+        message: 'Gesture ID and hands are required' 
+      });
+    }
+    
+    const success = practicePythonService.sendLandmarksToSession(userId, gestureId, hands);
+    
+    res.json({ 
+      success, 
+      message: success ? 'Landmarks sent' : 'No active session found' 
+    });
+  } catch (error) {
+    console.error('Send landmarks error:', error);
+    res.status(500).json({ 
+      success: false, 
+      message: 'Failed to send landmarks' 
+    });
+  }
+});
+
 // Get session status
 router.get('/status/:gestureId', authMiddleware, (req, res) => {
   try {
@@ -0,0 +1,221 @@
+const { spawn } = require('child_process');
+const os = require('os');
+const path = require('path');
+const readline = require('readline');
+const { PYTHON_BIN } = require('../utils/pythonRunner');
+
+const SCRIPT_PATH = path.resolve(__dirname, '../utils/gesture_prediction.py');
+const DEFAULT_POOL_SIZE = Math.max(1, Math.min(2, os.cpus().length - 1));
+const POOL_SIZE = Number(process.env.GESTURE_WORKERS) || DEFAULT_POOL_SIZE;
+const REQUEST_TIMEOUT_MS = Number(process.env.GESTURE_WORKER_TIMEOUT_MS) || 15000;
+const RESPAWN_DELAY_MS = 1000;
+// A worker that fails before it is ready (e.g. missing models) is retried ever more slowly
+const MAX_RESPAWN_DELAY_MS = 5 * 60 * 1000;
+
+// Keeps a few gesture_prediction.py processes alive in --serve mode so the
+// interpreter start-up, sklearn import and pickle loading are paid once per
+// worker instead of once per HTTP request.
+class GesturePredictionPool {
+  constructor(size = POOL_SIZE) {
+    this.size = size;
+    this.workers = [];
+    this.startFailures = []; // per slot: consecutive workers that exited before reporting ready
+    this.nextRequestId = 1;
+    this.started = false;
+    this.stopping = false;
+  }
+
+  start() {
+    if (this.started) return;
+    this.started = true;
+    this.stopping = false;
+    for (let i = 0; i < this.size; i++) {
+      this.workers.push(this.spawnWorker(i));
+    }
+    console.log(`[gesturePredictionPool] Started ${this.size} inference worker(s)`);
+  }
+
+  spawnWorker(slot) {
+    const child = spawn(PYTHON_BIN, ['-u', SCRIPT_PATH, '--serve'], {
+      cwd: path.dirname(SCRIPT_PATH),
+      env: {
+        ...process.env,
+        PYTHONIOENCODING: 'utf-8',
+        PYTHONUTF8: '1',
+      },
+      stdio: ['pipe', 'pipe', 'pipe'],
+    });
+
+    const worker = {
+      slot,
+      process: child,
+      ready: false,
+      fatal: null, // load error reported by the worker; it takes no more requests
+      exited: false, // process is gone; the slot waits for its respawn
+      pending: new Map(), // request id -> { resolve, reject, timer }
+      queue: [], // requests sent before the worker reported ready
+    };
+
+    readline.createInterface({ input: child.stdout }).on('line', (line) => {
+      this.handleWorkerLine(worker, line);
+    });
+
+    child.stderr.on('data', (data) => {
+      const text = data.toString().trim();
+      if (text && !text.includes('InconsistentVersionWarning')) {
+        console.error(`[gesturePredictionPool#${slot}] ${text}`);
+      }
+    });
+
+    child.stdin.on('error', (error) => {
+      console.error(`[gesturePredictionPool#${slot}] Worker stdin error:`, error.message);
+    });
+
+    child.on('error', (error) => {
+      worker.exited = true;
+      console.error(`[gesturePredictionPool#${slot}] Failed to start worker:`, error);
+    });
+
+    child.on('close', (code) => {
+      worker.exited = true;
+      this.failPending(worker, new Error(`Inference worker exited with code ${code}`));
+      if (this.stopping || this.workers[slot] !== worker) return;
+
+      // Exponential backoff while workers keep dying during start-up, reset once one is ready
+      const failures = worker.ready ? 0 : (this.startFailures[slot] || 0) + 1;
+      this.startFailures[slot] = failures;
+      const delay = Math.min(RESPAWN_DELAY_MS * 2 ** Math.max(0, failures - 1), MAX_RESPAWN_DELAY_MS);
+      if (failures > 1) {
+        console.error(`[gesturePredictionPool#${slot}] Worker failed ${failures} times in a row, retrying in ${delay} ms`);
+      }
+
+      setTimeout(() => {
+        if (!this.stopping && this.workers[slot] === worker) {
+          this.workers[slot] = this.spawnWorker(slot);
+        }
+      }, delay);
+    });
+
+    return worker;
+  }
+
+  handleWorkerLine(worker, line) {
+    if (!line.startsWith('{')) return;
+
+    let message;
+    try {
+      message = JSON.parse(line);
+    } catch (error) {
+      console.error(`[gesturePredictionPool#${worker.slot}] Bad worker output:`, line);
+      return;
+    }
+
+    if (message.type === 'ready') {
+      worker.ready = true;
+      this.startFailures[worker.slot] = 0;
+      worker.queue.splice(0).forEach((payload) => this.write(worker, payload));
+      return;
+    }
+
+    if (message.type === 'fatal') {
+      console.error(`[gesturePredictionPool#${worker.slot}] Worker failed to load models:`, message.error);
+      worker.fatal = message.error || 'unknown error';
+      this.failPending(worker, new Error(`Inference worker failed to load models: ${worker.fatal}`));
+      return;
+    }
+
+    const entry = worker.pending.get(message.id);
+    if (!entry) return;
+
+    worker.pending.delete(message.id);
+    clearTimeout(entry.timer);
+    const { id, type, ...result } = message;
+    entry.resolve(result);
+  }
+
+  failPending(worker, error) {
+    for (const entry of worker.pending.values()) {
+      clearTimeout(entry.timer);
+      entry.reject(error);
+    }
+    worker.pending.clear();
+    worker.queue = [];
+  }
+
+  write(worker, payload) {
+    worker.process.stdin.write(JSON.stringify(payload) + '\n');
+  }
+
+  pickWorker() {
+    // Least outstanding requests wins; ready workers are preferred over warming ones.
+    // Workers that exited or reported a fatal load error are skipped until their slot is respawned
+    return this.workers.reduce((best, worker) => {
+      if (worker.fatal || worker.exited) return best;
+      if (!best) return worker;
+      if (worker.ready !== best.ready) return worker.ready ? worker : best;
+      return worker.pending.size < best.pending.size ? worker : best;
+    }, null);
+  }
+
+  predict(input) {
+    if (!this.started) this.start();
+
+    return new Promise((resolve, reject) => {
+      const worker = this.pickWorker();
+      if (!worker) {
+        // Fail now rather than wait out the timeout on a worker that cannot answer
+        const fatal = this.workers.find((candidate) => candidate.fatal);
+        return reject(new Error(fatal
+          ? `Inference worker failed to load models: ${fatal.fatal}`
+          : 'No inference worker available (restarting)'));
+      }
+
+      const id = this.nextRequestId++;
+      const payload = { id, op: 'evaluate', ...input };
+      const timer = setTimeout(() => {
+        worker.pending.delete(id);
+        reject(new Error('Inference worker timeout'));
+      }, REQUEST_TIMEOUT_MS);
+
+      worker.pending.set(id, { resolve, reject, timer });
+
+      try {
+        if (worker.ready) {
+          this.write(worker, payload);
+        } else {
+          worker.queue.push(payload);
+        }
+      } catch (error) {
+        worker.pending.delete(id);
+        clearTimeout(timer);
+        reject(error);
+      }
+    });
+  }
+
+  getStatus() {
+    return this.workers.map((worker) => ({
+      slot: worker.slot,
+      pid: worker.process.pid,
+      ready: worker.ready,
+      fatal: worker.fatal,
+      exited: worker.exited,
+      pending: worker.pending.size,
+    }));
+  }
+
+  stop() {
+    this.stopping = true;
+    this.started = false;
+    for (const worker of this.workers) {
+      this.failPending(worker, new Error('Inference pool stopped'));
+      if (!worker.process.killed) {
+        worker.process.kill();
+      }
+    }
+    this.workers = [];
+    this.startFailures = [];
+  }
+}
+
+module.exports = new GesturePredictionPool();
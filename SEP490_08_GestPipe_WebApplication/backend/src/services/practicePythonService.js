@@ -1,95 +1,243 @@
 const { spawn } = require('child_process');
+const { EventEmitter } = require('events');
+const net = require('net');
+const os = require('os');
 const path = require('path');
+const readline = require('readline');
+const { encodeJpegFrame, encodeLandmarkFrame } = require('../utils/frameProtocol');
+const { PYTHON_BIN } = require('../utils/pythonRunner');
 
-class PracticePythonService {
+const PIPELINE_ROOT = path.resolve(__dirname, '../../../../hybrid_realtime_pipeline');
+const SERVER_SCRIPT = path.join(PIPELINE_ROOT, 'gesture_session_server.py');
+// One gesture_session_server per couple of cores; each one serves many sessions
+const SERVER_COUNT = Number(process.env.PRACTICE_SERVERS) || Math.max(1, Math.floor(os.cpus().length / 2));
+const SERVER_THREADS = Number(process.env.PRACTICE_SERVER_THREADS) || 2;
+const SESSION_START_TIMEOUT_MS = 10000;
+// PRACTICE_ZYGOTE=1: each session is a pre-forked web_gesture_processor.py --zygote
+// child reached over a Unix socket instead of a slot in a session server (POSIX only)
+const PROCESSOR_SCRIPT = path.join(PIPELINE_ROOT, 'web_gesture_processor.py');
+const USE_ZYGOTE = process.env.PRACTICE_ZYGOTE === '1' && process.platform !== 'win32';
+const ZYGOTE_SOCKET = path.join(os.tmpdir(), `gestpipe-practice-${process.pid}.sock`);
+
+class PracticePythonService extends EventEmitter {
   constructor() {
+    super();
     this.activeSessions = new Map(); // userId_gestureId -> session
+    this.servers = [];
+    this.zygote = null; // { process, ready: Promise } in zygote mode
+  }
+
+  spawnServer(slot) {
+    const child = spawn(PYTHON_BIN, [SERVER_SCRIPT, '--workers', String(SERVER_THREADS)], {
+      cwd: PIPELINE_ROOT,
+      env: {
+        ...process.env,
+        PYTHONIOENCODING: 'utf-8',
+      },
+      stdio: ['pipe', 'pipe', 'pipe']
+    });
+
+    const server = { slot, process: child, sessions: new Set() };
+
+    readline.createInterface({ input: child.stdout }).on('line', (line) => {
+      if (!line.startsWith('{')) return;
+      try {
+        const message = JSON.parse(line);
+        if (message.session) {
+          this.handlePythonMessage(message.session, message);
+        }
+      } catch (error) {
+        console.error('Error parsing Python output:', error);
+      }
+    });
+
+    child.stdin.on('error', (error) => {
+      console.error(`Practice server #${slot} stdin error:`, error.message);
+    });
+
+    child.stderr.on('data', (data) => {
+      console.error(`Practice server #${slot} stderr:`, data.toString());
+    });
+
+    child.on('close', () => {
+      // Sessions hosted by a dead server cannot continue
+      for (const sessionKey of server.sessions) {
+        this.handlePythonMessage(sessionKey, { type: 'error', error: 'Practice server exited' });
+        this.activeSessions.delete(sessionKey);
+      }
+      if (this.servers[slot] === server) {
+        this.servers[slot] = null;
+      }
+    });
+
+    child.on('error', (error) => {
+      console.error(`Practice server #${slot} error:`, error);
+    });
+
+    return server;
+  }
+
+  // Least loaded live server, spawning it on first use
+  acquireServer() {
+    for (let slot = 0; slot < SERVER_COUNT; slot++) {
+      if (!this.servers[slot]) {
+        this.servers[slot] = this.spawnServer(slot);
+      }
+    }
+    return this.servers.reduce((best, server) => (
+      !best || server.sessions.size < best.sessions.size ? server : best
+    ), null);
+  }
+
+  // Zygote mode: started once, resolves when its first warm spare waits on the socket
+  acquireZygote() {
+    if (this.zygote) return this.zygote.ready;
+
+    const child = spawn(PYTHON_BIN, [PROCESSOR_SCRIPT, '--zygote', ZYGOTE_SOCKET], {
+      cwd: PIPELINE_ROOT,
+      env: {
+        ...process.env,
+        PYTHONIOENCODING: 'utf-8',
+      },
+      stdio: ['pipe', 'pipe', 'pipe']
+    });
+    const zygote = { process: child };
+    zygote.ready = new Promise((resolve, reject) => {
+      readline.createInterface({ input: child.stdout }).on('line', (line) => {
+        if (!line.startsWith('{')) return;
+        try {
+          const message = JSON.parse(line);
+          if (message.type === 'zygote_ready') resolve();
+          if (message.type === 'error') reject(new Error(message.error));
+        } catch (error) {
+          console.error('Error parsing zygote output:', error);
+        }
+      });
+      child.on('close', (code) => {
+        reject(new Error(`Practice zygote exited with code ${code}`));
+        if (this.zygote === zygote) this.zygote = null;
+      });
+    });
+    // Callers that are not waiting must not turn a failed start into an unhandled rejection
+    zygote.ready.catch(() => {});
+
+    child.stdin.on('error', (error) => {
+      console.error('Practice zygote stdin error:', error.message);
+    });
+    child.stderr.on('data', (data) => {
+      console.error('Practice zygote stderr:', data.toString());
+    });
+    child.on('error', (error) => {
+      console.error('Practice zygote error:', error);
+    });
+
+    this.zygote = zygote;
+    return zygote.ready;
+  }
+
+  // Connects a session to the zygote; its forked process speaks the plain (untagged) protocol
+  connectZygoteSession(session) {
+    const socket = net.createConnection(ZYGOTE_SOCKET);
+    session.socket = socket;
+
+    readline.createInterface({ input: socket }).on('line', (line) => {
+      if (!line.startsWith('{')) return;
+      try {
+        this.handlePythonMessage(session.key, JSON.parse(line));
+      } catch (error) {
+        console.error('Error parsing Python output:', error);
+      }
+    });
+
+    socket.on('error', (error) => {
+      console.error(`Practice session ${session.key} socket error:`, error.message);
+    });
+
+    socket.on('close', () => {
+      // The forked process ends with its connection
+      if (this.activeSessions.get(session.key) === session) {
+        this.handlePythonMessage(session.key, { type: 'error', error: 'Practice session process exited' });
+        this.releaseSession(session);
+      }
+    });
+  }
+
+  send(session, command) {
+    if (session.socket) {
+      session.socket.write(JSON.stringify(command) + '\n');
+      return;
+    }
+    session.server.process.stdin.write(JSON.stringify({ ...command, session: session.key }) + '\n');
   }
 
-  startPracticeSession(gestureId, userId) {
+  // encode(sessionId) builds the binary frame; zygote sessions send it untagged
+  writeFrame(session, encode) {
+    if (session.socket) {
+      session.socket.write(encode());
+    } else {
+      session.server.process.stdin.write(encode(session.key));
+    }
+  }
+
+  // options.input === 'landmarks': the browser tracks hands and sends landmarks only
+  startPracticeSession(gestureId, userId, options = {}) {
     return new Promise((resolve, reject) => {
       const sessionKey = `${userId}_${gestureId}`;
-      
+
       // Check if session already exists
       if (this.activeSessions.has(sessionKey)) {
         return reject(new Error('Practice session already active for this gesture'));
       }
 
-      const pythonScriptPath = path.join(__dirname, '../../hybrid_realtime_pipeline/web_gesture_processor.py');
-      
-      // Spawn Python process with gesture parameter (using 'py' launcher on Windows)
-      const pythonProcess = spawn('py', [pythonScriptPath, gestureId], {
-        cwd: path.join(__dirname, '../../hybrid_realtime_pipeline'),
-        stdio: ['pipe', 'pipe', 'pipe']
-      });
-      
-      // Store process reference
-      this.activeSessions.set(sessionKey, {
-        process: pythonProcess,
+      const server = USE_ZYGOTE ? null : this.acquireServer();
+      const session = {
+        key: sessionKey,
+        server,
         gestureId,
         userId,
         startTime: new Date(),
         status: 'starting',
         stats: { correct: 0, wrong: 0, total: 0 }
-      });
+      };
+      this.activeSessions.set(sessionKey, session);
+      if (server) server.sessions.add(sessionKey);
 
       let isResolved = false;
-
-      // Handle Python output
-      pythonProcess.stdout.on('data', (data) => {
-        const output = data.toString().trim();
-        // console.log(`Python output [${gestureId}]:`, output);
-        
-        try {
-          // Parse JSON messages from Python
-          const lines = output.split('\n');
-          lines.forEach(line => {
-            if (line.startsWith('{') && line.endsWith('}')) {
-              const message = JSON.parse(line);
-              this.handlePythonMessage(sessionKey, message);
-            }
+      const settle = (message) => {
+        if (isResolved) return;
+        isResolved = true;
+        clearTimeout(timer);
+        this.off(`ready:${sessionKey}`, settle);
+        if (message.type === 'ready') {
+          resolve({
+            success: true,
+            sessionId: sessionKey,
+            message: `Practice session started for ${gestureId}`
           });
-
-          // If this is the first successful output, resolve the promise
-          if (!isResolved) {
-            isResolved = true;
-            resolve({
-              success: true,
-              sessionId: sessionKey,
-              message: `Practice session started for ${gestureId}`
-            });
-          }
-        } catch (error) {
-          console.error('Error parsing Python output:', error);
+        } else {
+          // Close before releasing, or Python keeps the session and every retry gets 'Session already open'
+          this.closeSession(session);
+          reject(new Error(message.error || 'Failed to start practice session'));
         }
-      });
-
-      pythonProcess.stderr.on('data', (data) => {
-        console.error(`Python stderr [${gestureId}]:`, data.toString());
-      });
+      };
 
-      pythonProcess.on('close', (code) => {
-        // console.log(`Python process [${gestureId}] exited with code ${code}`);
-        this.activeSessions.delete(sessionKey);
-      });
+      // Timeout after 10 seconds if Python doesn't respond
+      const timer = setTimeout(() => {
+        settle({ type: 'error', error: 'Python process timeout' });
+      }, SESSION_START_TIMEOUT_MS);
 
-      pythonProcess.on('error', (error) => {
-        console.error(`Python process error [${gestureId}]:`, error);
-        if (!isResolved) {
-          isResolved = true;
-          reject(error);
-        }
-        this.activeSessions.delete(sessionKey);
-      });
+      this.on(`ready:${sessionKey}`, settle);
 
-      // Timeout after 10 seconds if Python doesn't respond
-      setTimeout(() => {
-        if (!isResolved) {
-          isResolved = true;
-          reject(new Error('Python process timeout'));
-          this.stopPracticeSession(userId, gestureId);
-        }
-      }, 10000);
+      const open = { type: 'open', gesture: gestureId };
+      if (options.input === 'landmarks') open.input = 'landmarks';
+      const connected = USE_ZYGOTE
+        ? this.acquireZygote().then(() => this.connectZygoteSession(session))
+        : Promise.resolve();
+      connected
+        .then(() => {
+          if (!isResolved) this.send(session, open);
+        })
+        .catch((error) => settle({ type: 'error', error: error.message }));
     });
   }
 
@@ -98,11 +246,11 @@ class PracticePythonService {
     if (!session) return;
 
     switch (message.type) {
-      case 'status_update':
+      case 'status':
         session.status = message.status;
         break;
-      case 'gesture_result':
-        if (message.correct) {
+      case 'result':
+        if (message.success) {
           session.stats.correct++;
         } else {
           session.stats.wrong++;
@@ -110,14 +258,23 @@ class PracticePythonService {
         session.stats.total++;
         session.lastResult = message;
         break;
-      case 'session_ready':
+      case 'ready':
         session.status = 'ready';
         break;
       case 'error':
         session.status = 'error';
         session.error = message.error;
         break;
+      case 'closed':
+        this.releaseSession(session);
+        break;
+    }
+
+    // Start-up waits on the first ready/error for its session
+    if (message.type === 'ready' || message.type === 'error') {
+      this.emit(`ready:${sessionKey}`, message);
     }
+    this.emit('message', sessionKey, message);
 
     // Broadcast update to connected clients (implement with socket.io)
     this.broadcastUpdate(sessionKey, {
@@ -132,22 +289,43 @@ class PracticePythonService {
     });
   }
 
+  releaseSession(session) {
+    if (session.server) session.server.sessions.delete(session.key);
+    if (this.activeSessions.get(session.key) === session) {
+      this.activeSessions.delete(session.key);
+    }
+  }
+
   stopPracticeSession(userId, gestureId) {
     const sessionKey = `${userId}_${gestureId}`;
     const session = this.activeSessions.get(sessionKey);
-    
-    if (session && session.process) {
-      session.process.kill('SIGTERM');
-      this.activeSessions.delete(sessionKey);
+
+    if (session) {
+      this.closeSession(session);
       return true;
     }
     return false;
   }
 
+  closeSession(session) {
+    try {
+      if (session.socket) {
+        // The forked process exits after 'stop'
+        this.send(session, { type: 'stop' });
+        session.socket.end();
+      } else if (session.server) {
+        this.send(session, { type: 'close' });
+      }
+    } catch (error) {
+      console.error(`Error closing session ${session.key}:`, error);
+    }
+    this.releaseSession(session);
+  }
+
   getSessionStatus(userId, gestureId) {
     const sessionKey = `${userId}_${gestureId}`;
     const session = this.activeSessions.get(sessionKey);
-    
+
     if (!session) {
       return { active: false };
     }
@@ -180,18 +358,14 @@ class PracticePythonService {
   sendFrameToSession(userId, gestureId, frameData) {
     const sessionKey = `${userId}_${gestureId}`;
     const session = this.activeSessions.get(sessionKey);
-    
-    if (!session || !session.process) {
+
+    if (!session) {
       return false;
     }
-    
+
     try {
-      const command = {
-        type: 'frame',
-        data: frameData
-      };
-      
-      session.process.stdin.write(JSON.stringify(command) + '\n');
+      // Binary frame, tagged with the session id when a session server routes it
+      this.writeFrame(session, (id) => encodeJpegFrame(frameData, id));
       return true;
     } catch (error) {
       console.error(`Error sending frame to session ${sessionKey}:`, error);
@@ -199,18 +373,35 @@ class PracticePythonService {
     }
   }
 
+  // hands: landmarks tracked in the browser, see encodeLandmarkFrame
+  sendLandmarksToSession(userId, gestureId, hands) {
+    const sessionKey = `${userId}_${gestureId}`;
+    const session = this.activeSessions.get(sessionKey);
+
+    if (!session) {
+      return false;
+    }
+
+    try {
+      this.writeFrame(session, (id) => encodeLandmarkFrame(hands, id));
+      return true;
+    } catch (error) {
+      console.error(`Error sending landmarks to session ${sessionKey}:`, error);
+      return false;
+    }
+  }
+
   resetSession(userId, gestureId) {
     const sessionKey = `${userId}_${gestureId}`;
     const session = this.activeSessions.get(sessionKey);
-    
-    if (!session || !session.process) {
+
+    if (!session) {
       return false;
     }
-    
+
     try {
-      const command = { type: 'reset' };
-      session.process.stdin.write(JSON.stringify(command) + '\n');
-      
+      this.send(session, { type: 'reset' });
+
       // Reset local stats
       session.stats = { correct: 0, wrong: 0, total: 0 };
       return true;
@@ -220,6 +411,22 @@ class PracticePythonService {
     }
   }
 
+  // Ends every Python process; the zygote terminates all of its forked sessions on SIGTERM
+  stop() {
+    for (const session of this.activeSessions.values()) {
+      if (session.socket) session.socket.destroy();
+    }
+    this.activeSessions.clear();
+    for (const server of this.servers) {
+      if (server && !server.process.killed) server.process.kill();
+    }
+    this.servers = [];
+    if (this.zygote && !this.zygote.process.killed) {
+      this.zygote.process.kill();
+    }
+    this.zygote = null;
+  }
+
   broadcastUpdate(sessionKey, update) {
     // This will be implemented with socket.io
     // For now, just store the update for polling
@@ -231,4 +438,4 @@ class PracticePythonService {
   }
 }
 
-module.exports = new PracticePythonService();
\ No newline at end of file
+module.exports = new PracticePythonService();
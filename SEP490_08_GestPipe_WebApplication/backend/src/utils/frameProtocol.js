@@ -0,0 +1,94 @@
+// Binary frame messages for web_gesture_processor.py (see frame_protocol.py).
+// Header: kind (uint8), width (uint16 BE), height (uint16 BE), length (uint32 BE).
+// With a session id, SESSION_FLAG is set on kind and the header is followed by
+// the id length (uint16 BE) and the UTF-8 id, for gesture_session_server.py.
+// FRAME_LANDMARKS carries hands tracked in the browser: width is the hand
+// count, and each hand is label (uint8, 0 Left / 1 Right), score (uint8,
+// score * 255) and 63 int16 BE values (x, y, z * LANDMARK_SCALE).
+const FRAME_JPEG = 0x01;
+const FRAME_RGB = 0x02;
+const FRAME_LANDMARKS = 0x03;
+const SESSION_FLAG = 0x80;
+const HEADER_SIZE = 9;
+const LANDMARK_SCALE = 16384;
+const LANDMARK_VALUES = 21 * 3;
+const HAND_RECORD_SIZE = 2 + LANDMARK_VALUES * 2;
+
+const buildMessage = (kind, width, height, payload, sessionId) => {
+  const header = Buffer.alloc(HEADER_SIZE);
+  header.writeUInt8(sessionId == null ? kind : kind | SESSION_FLAG, 0);
+  header.writeUInt16BE(width, 1);
+  header.writeUInt16BE(height, 3);
+  header.writeUInt32BE(payload.length, 5);
+  if (sessionId == null) {
+    return Buffer.concat([header, payload]);
+  }
+
+  const id = Buffer.from(String(sessionId), 'utf8');
+  const idLength = Buffer.alloc(2);
+  idLength.writeUInt16BE(id.length, 0);
+  return Buffer.concat([header, idLength, id, payload]);
+};
+
+// Accepts raw bytes (Buffer / ArrayBuffer / typed array) or a
+// "data:image/jpeg;base64,..." string from canvas.toDataURL.
+const toBuffer = (frameData) => {
+  if (Buffer.isBuffer(frameData)) return frameData;
+  if (frameData instanceof ArrayBuffer) return Buffer.from(frameData);
+  if (ArrayBuffer.isView(frameData)) {
+    return Buffer.from(frameData.buffer, frameData.byteOffset, frameData.byteLength);
+  }
+  if (typeof frameData === 'string') {
+    const commaIndex = frameData.indexOf(',');
+    return Buffer.from(commaIndex >= 0 ? frameData.slice(commaIndex + 1) : frameData, 'base64');
+  }
+  throw new Error('Unsupported frame data');
+};
+
+const encodeJpegFrame = (frameData, sessionId) => (
+  buildMessage(FRAME_JPEG, 0, 0, toBuffer(frameData), sessionId)
+);
+
+const encodeRgbFrame = (pixels, width, height, sessionId) => {
+  const payload = toBuffer(pixels);
+  if (payload.length !== width * height * 3) {
+    throw new Error(`RGB frame size mismatch: ${payload.length} bytes for ${width}x${height}`);
+  }
+  return buildMessage(FRAME_RGB, width, height, payload, sessionId);
+};
+
+const clamp = (value, min, max) => Math.min(max, Math.max(min, value));
+
+// hands: [{ label: 'Left' | 'Right', score, landmarks: [[x, y, z] x 21] or [{ x, y, z } x 21] }]
+// as produced by MediaPipe Hands in the browser
+const encodeLandmarkFrame = (hands, sessionId) => {
+  const payload = Buffer.alloc(hands.length * HAND_RECORD_SIZE);
+  hands.forEach((hand, index) => {
+    const offset = index * HAND_RECORD_SIZE;
+    if (hand.label !== 'Left' && hand.label !== 'Right') {
+      throw new Error(`Unknown hand label: ${hand.label}`);
+    }
+    const points = hand.landmarks.flatMap((point) => (
+      Array.isArray(point) ? point : [point.x, point.y, point.z]
+    ));
+    if (points.length !== LANDMARK_VALUES) {
+      throw new Error(`Expected 21 landmarks with x, y, z, got ${points.length} values`);
+    }
+    payload.writeUInt8(hand.label === 'Right' ? 1 : 0, offset);
+    payload.writeUInt8(clamp(Math.round((hand.score ?? 1) * 255), 0, 255), offset + 1);
+    points.forEach((value, i) => {
+      payload.writeInt16BE(clamp(Math.round(value * LANDMARK_SCALE), -32768, 32767), offset + 2 + i * 2);
+    });
+  });
+  return buildMessage(FRAME_LANDMARKS, hands.length, 0, payload, sessionId);
+};
+
+module.exports = {
+  FRAME_JPEG,
+  FRAME_RGB,
+  FRAME_LANDMARKS,
+  SESSION_FLAG,
+  encodeJpegFrame,
+  encodeRgbFrame,
+  encodeLandmarkFrame,
+};
@@ -1,31 +1,103 @@
 import os
 import pickle
+import hashlib
+import threading
+import time
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, NamedTuple, Tuple, Optional
 import sys
 
 # Constants
-DELTA_WEIGHT = 10.0
+DELTA_WEIGHT = 10.0  # Fallback only: bundles and pickles record the weight they were trained with
 CONFIDENCE_THRESHOLD = 0.65
-MODELS_DIR = os.path.join(os.path.dirname(__file__), '../../../../hybrid_realtime_pipeline/code/models')
+BATCH_SIZE = 1024  # Attempts per predict_proba call in --batch mode
+PIPELINE_DIR = os.path.join(os.path.dirname(__file__), '../../../../hybrid_realtime_pipeline')
+MODELS_DIR = os.path.join(PIPELINE_DIR, 'code/models')
 MODEL_PKL = os.path.join(MODELS_DIR, 'motion_svm_model.pkl')
 SCALER_PKL = os.path.join(MODELS_DIR, 'motion_scaler.pkl')
 STATIC_DYNAMIC_PKL = os.path.join(MODELS_DIR, 'static_dynamic_classifier.pkl')
 GESTURE_TEMPLATES_CSV = os.path.join(os.path.dirname(__file__), '../../../../hybrid_realtime_pipeline/code/training_results/gesture_data_compact.csv')
 
-# Global variables for loaded models
+# Hot reload (--serve mode): how often the artifacts are polled, and how long
+# they must stay unchanged before a reload starts (trainers write them one by one)
+RELOAD_POLL_SECONDS = float(os.environ.get('GESTURE_MODEL_POLL_SECONDS', 2.0))
+RELOAD_SETTLE_SECONDS = float(os.environ.get('GESTURE_MODEL_SETTLE_SECONDS', 1.0))
+
+# 'svc' runs the exact model; 'table' reads the bundle's precomputed probability
+# table (probability_table.py) and only falls back to the SVC for rows it does not cover
+INFERENCE_ENGINE = os.environ.get('GESTURE_INFERENCE_ENGINE', 'svc')
+
+# NumPy-only SVM evaluator shared with the pipeline scripts
+sys.path.append(os.path.abspath(PIPELINE_DIR))
+from svm_inference import COMPILED_MODEL, COMPILED_STATIC_DYNAMIC, load_compiled_models
+from model_bundle import BUNDLE_FILE, load_fresh_bundle
+from probability_memo import ProbabilityMemo
+from gesture_cascade import GestureCascade, StageCounter
+
+MODEL_ARTIFACTS = [
+    os.path.join(MODELS_DIR, BUNDLE_FILE), MODEL_PKL, SCALER_PKL, STATIC_DYNAMIC_PKL,
+    os.path.join(MODELS_DIR, COMPILED_MODEL), os.path.join(MODELS_DIR, COMPILED_STATIC_DYNAMIC),
+    GESTURE_TEMPLATES_CSV,
+]
+
+# Global variables for loaded models (mirror of model_cache.current(), kept for callers of load_models)
 svm_model = None
 label_encoder = None
 scaler = None
 static_dynamic_data = None
 gesture_templates = None
 
-def load_models():
-    """Load trained SVM model, scaler, and static/dynamic classifier"""
-    global svm_model, label_encoder, scaler, static_dynamic_data
-
-    if svm_model is not None:
-        return  # Already loaded
+# predict_proba rows per quantized SVM input; emptied whenever a new model version is served
+probability_memo = ProbabilityMemo.from_env()
+
+# Which cascade stage decided each attempt, across model reloads
+stage_counter = StageCounter()
+
+class ModelSet(NamedTuple):
+    """Everything one evaluation needs, loaded together and swapped as a unit"""
+    svm_model: object
+    label_encoder: object
+    scaler: object
+    static_dynamic_data: Optional[Dict]
+    gesture_templates: Dict
+    delta_weight: float
+    version: str
+    probability_table: Optional[object] = None
+    cascade: Optional[GestureCascade] = None
+
+def is_interactive() -> bool:
+    try:
+        return sys.stdin.isatty()
+    except Exception:
+        return False
+
+def artifact_version() -> str:
+    """Short hash of (path, mtime, size) for every model artifact; changes whenever a file is rewritten"""
+    signature = []
+    for path in MODEL_ARTIFACTS:
+        try:
+            stat = os.stat(path)
+            signature.append(f"{os.path.basename(path)}:{stat.st_mtime_ns}:{stat.st_size}")
+        except OSError:
+            signature.append(f"{os.path.basename(path)}:missing")
+    return hashlib.sha1('|'.join(signature).encode()).hexdigest()[:12]
+
+def read_models() -> Tuple:
+    """Load (svm_model, label_encoder, scaler, static_dynamic_data, delta_weight, templates,
+    probability_table) from MODELS_DIR.
+
+    templates and probability_table are None unless they come from the model bundle.
+    """
+    # Prefer the single memory-mapped bundle: one open, constants and templates included
+    bundle = load_fresh_bundle(MODELS_DIR)
+    if bundle is not None:
+        templates = templates_from_rows(bundle.templates) if bundle.templates else None
+        return (*bundle.models(), bundle.delta_weight, templates, bundle.probability_table())
+
+    # Then the NumPy-only export: skips importing scikit-learn entirely
+    compiled = load_compiled_models(MODELS_DIR)
+    if compiled is not None:
+        return (*compiled, compiled[0].metadata.get('delta_weight', DELTA_WEIGHT), None, None)
 
     if not os.path.exists(MODEL_PKL) or not os.path.exists(SCALER_PKL):
         raise FileNotFoundError(f"Model files not found! Please check:\n{MODEL_PKL}\n{SCALER_PKL}")
@@ -34,42 +106,31 @@ def load_models():
         model_data = pickle.load(f)
 
     with open(SCALER_PKL, 'rb') as f:
-        scaler = pickle.load(f)
-
-    svm_model = model_data['model']
-    label_encoder = model_data['label_encoder']
+        loaded_scaler = pickle.load(f)
 
     # Load static/dynamic classifier
+    loaded_static_dynamic = None
     if os.path.exists(STATIC_DYNAMIC_PKL):
         with open(STATIC_DYNAMIC_PKL, 'rb') as f:
-            static_dynamic_data = pickle.load(f)
+            loaded_static_dynamic = pickle.load(f)
 
-    # Only print in interactive mode, not when called via CLI
-    try:
-        import sys
-        if sys.stdin.isatty():  # Only print if running interactively
-            print("Models loaded successfully!")
-            print(f"   - SVM Model: {len(label_encoder.classes_)} classes")
-            print(f"   - Classes: {list(label_encoder.classes_)}")
-    except:
-        pass  # Don't print if stdin check fails
+    return (model_data['model'], model_data['label_encoder'], loaded_scaler, loaded_static_dynamic,
+            model_data.get('delta_weight', DELTA_WEIGHT), None, None)
 
-def load_gesture_templates():
+def read_gesture_templates() -> Dict:
     """Load gesture templates for validation"""
-    global gesture_templates
-
-    if gesture_templates is not None:
-        return  # Already loaded
-
     import pandas as pd
 
     if not os.path.exists(GESTURE_TEMPLATES_CSV):
         raise FileNotFoundError(f"Gesture templates not found: {GESTURE_TEMPLATES_CSV}")
 
-    df = pd.read_csv(GESTURE_TEMPLATES_CSV)
+    return templates_from_rows(pd.read_csv(GESTURE_TEMPLATES_CSV).to_dict('records'))
+
+def templates_from_rows(rows: List[Dict]) -> Dict:
+    """Template per gesture from gesture_data_compact rows"""
     templates = {}
 
-    for _, row in df.iterrows():
+    for row in rows:
         gesture = row['pose_label']
         templates[gesture] = {
             'left_fingers': [int(row[f'left_finger_state_{i}']) for i in range(5)],
@@ -81,41 +142,200 @@ def load_gesture_templates():
             'is_static': abs(float(row['delta_x'])) < 0.02 and abs(float(row['delta_y'])) < 0.02
         }
 
-    gesture_templates = templates
+    return templates
+
+def validate_models(models: ModelSet):
+    """Smoke-test a freshly loaded ModelSet before it serves requests; raises on a bad set"""
+    n_classes = len(models.label_encoder.classes_)
+    if n_classes == 0 or len(models.svm_model.classes_) != n_classes:
+        raise ValueError(f"Model has {len(models.svm_model.classes_)} classes, label encoder {n_classes}")
+    if not models.gesture_templates:
+        raise ValueError("No gesture templates")
+
+    # One probe row per template through the same path as a real attempt
+    finger_rows, motion_rows = [], []
+    for template in models.gesture_templates.values():
+        finger_rows.append(template['left_fingers'] + template['right_fingers'])
+        motion_rows.append({
+            'main_axis_x': template['main_axis_x'], 'main_axis_y': template['main_axis_y'],
+            'delta_x': template['delta_x'], 'delta_y': template['delta_y'],
+            'motion_left': float(template['delta_x'] < 0), 'motion_right': float(template['delta_x'] > 0),
+            'motion_up': float(template['delta_y'] < 0), 'motion_down': float(template['delta_y'] > 0),
+        })
+    X = prepare_features_batch(finger_rows, motion_rows, models.scaler, models.delta_weight)
+    probabilities = np.asarray(models.svm_model.predict_proba(X))
+    if probabilities.shape != (len(finger_rows), n_classes) or not np.all(np.isfinite(probabilities)):
+        raise ValueError(f"predict_proba returned {probabilities.shape}, expected {(len(finger_rows), n_classes)}")
+    if not np.allclose(probabilities.sum(axis=1), 1.0, atol=1e-3):
+        raise ValueError("predict_proba rows do not sum to 1")
+    if models.probability_table is not None and models.probability_table.probabilities.shape[-1] != n_classes:
+        raise ValueError(f"Probability table has {models.probability_table.probabilities.shape[-1]} classes, "
+                         f"model {n_classes}")
+
+    if models.static_dynamic_data and 'model' in models.static_dynamic_data:
+        models.static_dynamic_data['model'].predict(np.array([finger_rows[0] + [0.0]], dtype=float))
+
+class ModelCache:
+    """Current ModelSet plus a background reloader that follows retrains.
+
+    Readers take one snapshot with current() and use it for the whole request,
+    so a reload never mixes an old model with a new scaler. A new set is only
+    published after it loaded completely from files that stopped changing and
+    passed validate_models(); until then the old set keeps serving.
+    """
+
+    def __init__(self):
+        self.models: Optional[ModelSet] = None
+        self.lock = threading.Lock()
+        self.reloading = False
+        self.failed_version = None
+        self.watcher = None
+
+    def load(self) -> ModelSet:
+        """Read a complete ModelSet from stable files (retries while a trainer is still writing)"""
+        version = artifact_version()
+        while True:
+            *loaded, delta_weight, templates, probability_table = read_models()
+            if templates is None:
+                templates = read_gesture_templates()
+            current = artifact_version()
+            if current == version:
+                # Horizontal attempts with raw dx == 0 are not a wrong direction here
+                cascade = GestureCascade(templates, stage_counter, zero_dx_passes=True)
+                return ModelSet(*loaded, templates, float(delta_weight), version, probability_table, cascade)
+            version = current  # Files changed while loading: wait for them to settle and read again
+            self.wait_until_stable(version)
+
+    @staticmethod
+    def wait_until_stable(version: str) -> str:
+        while True:
+            time.sleep(RELOAD_SETTLE_SECONDS)
+            current = artifact_version()
+            if current == version:
+                return version
+            version = current
+
+    def current(self) -> ModelSet:
+        models = self.models
+        if models is None:
+            with self.lock:
+                if self.models is None:
+                    self.publish(self.load())
+                models = self.models
+        return models
+
+    def publish(self, models: ModelSet):
+        global svm_model, label_encoder, scaler, static_dynamic_data, gesture_templates
+        self.models = models  # Single reference assignment: readers see the old or the new set, never a mix
+        svm_model, label_encoder, scaler, static_dynamic_data = models[:4]
+        gesture_templates = models.gesture_templates
+
+    def refresh(self, wait: bool = False) -> bool:
+        """Start a reload if the artifacts changed since the current set. Returns True if one was started"""
+        version = artifact_version()
+        with self.lock:
+            if (self.models is not None and version == self.models.version) or version == self.failed_version \
+                    or self.reloading:
+                return False
+            self.reloading = True
+
+        if wait:
+            self.reload(version)
+        else:
+            threading.Thread(target=self.reload, args=(version,), daemon=True).start()
+        return True
+
+    def reload(self, version: str):
+        try:
+            self.wait_until_stable(version)
+            models = self.load()
+            validate_models(models)
+            with self.lock:
+                old_version = self.models.version if self.models else None
+                self.publish(models)
+                self.failed_version = None
+            print(f"[model-cache] Reloaded models {old_version} -> {models.version} "
+                  f"({len(models.label_encoder.classes_)} classes)", file=sys.stderr, flush=True)
+        except Exception as e:
+            # Keep serving the previous set; retry once the files change again
+            self.failed_version = version
+            print(f"[model-cache] Reload of {version} rejected, keeping current models: {e}", file=sys.stderr, flush=True)
+        finally:
+            with self.lock:
+                self.reloading = False
+
+    def start_watcher(self, poll_seconds: float = RELOAD_POLL_SECONDS):
+        """Poll the artifacts from a daemon thread and reload in the background when they change"""
+        if self.watcher is not None or poll_seconds <= 0:
+            return
+
+        def watch():
+            while True:
+                time.sleep(poll_seconds)
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"[model-cache] Watcher error: {e}", file=sys.stderr, flush=True)
+
+        self.watcher = threading.Thread(target=watch, name='model-cache-watcher', daemon=True)
+        self.watcher.start()
+
+model_cache = ModelCache()
+
+def load_models():
+    """Load trained SVM model, scaler, and static/dynamic classifier"""
+    if svm_model is not None:
+        return  # Already loaded
+
+    models = model_cache.current()
+
     # Only print in interactive mode, not when called via CLI
-    try:
-        import sys
-        if sys.stdin.isatty():  # Only print if running interactively
-            print(f"Gesture templates loaded: {len(templates)} gestures")
-    except:
-        pass  # Don't print if stdin check fails
+    if is_interactive():
+        print("Models loaded successfully!")
+        print(f"   - SVM Model: {len(models.label_encoder.classes_)} classes")
+        print(f"   - Classes: {list(models.label_encoder.classes_)}")
+
+def load_gesture_templates():
+    """Load gesture templates for validation"""
+    if gesture_templates is not None:
+        return  # Already loaded
 
-def prepare_features(left_states: List[int], right_states: List[int], motion_features: Dict, scaler, use_expected_left: bool = False, expected_left: List[int] = None) -> np.ndarray:
+    models = model_cache.current()
+    # Only print in interactive mode, not when called via CLI
+    if is_interactive():
+        print(f"Gesture templates loaded: {len(models.gesture_templates)} gestures")
+
+def prepare_features(left_states: List[int], right_states: List[int], motion_features: Dict, scaler, use_expected_left: bool = False, expected_left: List[int] = None, delta_weight: float = DELTA_WEIGHT) -> np.ndarray:
     """Prepare features for SVM prediction"""
     # Use expected left states instead of actual for trigger hand
     actual_left = expected_left if (use_expected_left and expected_left) else left_states
 
-    # Combine finger states
-    finger_feats = np.array(actual_left + right_states, dtype=float).reshape(1, -1)
+    return prepare_features_batch([actual_left + right_states], [motion_features], scaler, delta_weight)
+
+def prepare_features_batch(finger_rows: List[List[int]], motion_rows: List[Dict], scaler,
+                           delta_weight: float = DELTA_WEIGHT) -> np.ndarray:
+    """Prepare an (N x 18) SVM feature matrix from N finger rows and N motion feature dicts"""
+    finger_feats = np.array(finger_rows, dtype=float).reshape(len(finger_rows), -1)
 
-    # Apply delta weight and add direction features
     motion_array = np.array([[
-        motion_features['main_axis_x'],
-        motion_features['main_axis_y'],
-        motion_features['delta_x'] * DELTA_WEIGHT,
-        motion_features['delta_y'] * DELTA_WEIGHT,
-        motion_features['motion_left'] * DELTA_WEIGHT,
-        motion_features['motion_right'] * DELTA_WEIGHT,
-        motion_features['motion_up'] * DELTA_WEIGHT,
-        motion_features['motion_down'] * DELTA_WEIGHT
-    ]], dtype=float)
+        mf['main_axis_x'],
+        mf['main_axis_y'],
+        mf['delta_x'],
+        mf['delta_y'],
+        mf['motion_left'],
+        mf['motion_right'],
+        mf['motion_up'],
+        mf['motion_down']
+    ] for mf in motion_rows], dtype=float).reshape(len(motion_rows), 8)
+
+    # Apply delta weight to the delta and direction columns
+    motion_array[:, 2:] *= delta_weight
 
     # Scale motion features
     motion_scaled = scaler.transform(motion_array)
 
     # Combine features
-    X = np.hstack([finger_feats, motion_scaled])
-    return X
+    return np.hstack([finger_feats, motion_scaled])
 
 def prepare_static_features(left_states: List[int], right_states: List[int], delta_magnitude: float, static_scaler=None, use_expected_left: bool = False, expected_left: List[int] = None):
     """Prepare features for static/dynamic classification"""
@@ -130,107 +350,115 @@ def prepare_static_features(left_states: List[int], right_states: List[int], del
 
     return features
 
-def evaluate_gesture(left_states: List[int], right_states: List[int], motion_features: Dict,
-                    target_gesture: str, duration: float) -> Tuple[bool, str, str]:
-    """Evaluate gesture against target for practice session"""
-
-    # Ensure models are loaded
-    load_models()
-    load_gesture_templates()
-
-    # Get expected template for target gesture
-    if target_gesture not in gesture_templates:
-        return False, "no_template", f"No template found for {target_gesture}"
-
-    expected = gesture_templates[target_gesture]
-
-    # Step 1: Finger validation (only check RIGHT hand, LEFT is trigger only)
-    if right_states != expected['right_fingers']:
-        return False, "right_fingers", f"Wrong right fingers: got {right_states}, expected {expected['right_fingers']}"
-
-    # Step 2: Static/Dynamic classification
-    is_static_expected = expected['is_static']
-
-    if static_dynamic_data and 'model' in static_dynamic_data:
+def check_gesture_rules(left_states: List[int], right_states: List[int], motion_features: Dict,
+                        target_gesture: str, duration: float, models: ModelSet) -> Optional[Tuple[bool, str, str]]:
+    """Run the template checks that come before the ML step.
+
+    Returns the final verdict when a rule decides the attempt, or None when the
+    attempt passed every rule and still needs the SVM confidence check.
+    """
+    verdict = models.cascade.check(target_gesture, right_states, motion_features, duration)
+    if verdict is None:
+        # Add delta_x and delta_y to motion_features for prepare_features
+        motion_features['delta_x'] = motion_features['raw_dx']
+        motion_features['delta_y'] = motion_features['raw_dy']
+    return verdict
+
+def score_ml_prediction(target_gesture: str, probabilities: np.ndarray, models: ModelSet) -> Tuple[bool, str, str]:
+    """Step 6: ML confidence validation from one row of predict_proba output"""
+    best = int(np.argmax(probabilities))
+    confidence = float(probabilities[best])
+    predicted_label = models.label_encoder.inverse_transform([models.svm_model.classes_[best]])[0]
+
+    # Check confidence threshold
+    if confidence < CONFIDENCE_THRESHOLD:
+        return False, "low_confidence", f"Too uncertain: {confidence:.1%} < {CONFIDENCE_THRESHOLD:.0%}"
+
+    # Check prediction matches target
+    if predicted_label != target_gesture:
+        return False, "wrong_prediction", f"ML predicted: {predicted_label} ({confidence:.1%})"
+
+    return True, "ml_correct", f"Perfect! ({confidence:.1%} confidence)"
+
+def evaluate_gestures_batch(attempts: List[Dict]) -> List[Tuple[bool, str, str]]:
+    """Evaluate many recorded attempts with a single scaler + predict_proba call.
+
+    Each attempt is a dict with the same keys as the CLI input: left_fingers,
+    right_fingers, motion_features, target_gesture and optional duration.
+    Results are returned in the same order as the attempts.
+    """
+
+    # One snapshot for the whole batch: a concurrent reload swaps in a new set for the next call
+    models = model_cache.current()
+
+    results: List[Optional[Tuple[bool, str, str]]] = [None] * len(attempts)
+    ml_indices = []
+    finger_rows = []
+    motion_rows = []
+
+    for i, attempt in enumerate(attempts):
         try:
-            static_features = prepare_static_features(
-                left_states, right_states, motion_features['delta_magnitude'],
-                use_expected_left=True, expected_left=expected['left_fingers']
+            target_gesture = attempt['target_gesture']
+            right_states = list(attempt['right_fingers'])
+            motion_features = attempt['motion_features']
+            verdict = check_gesture_rules(
+                list(attempt['left_fingers']), right_states, motion_features,
+                target_gesture, attempt.get('duration', 1.0), models
             )
-            is_static_predicted = static_dynamic_data['model'].predict(static_features)[0] == 'static'
-        except:
-            is_static_predicted = is_static_expected  # Fallback to template
-    else:
-        is_static_predicted = is_static_expected
-
-    # Step 3: Static gesture validation
-    if is_static_expected:
-        # Check duration
-        if duration < 1.0:  # STATIC_HOLD_SECONDS
-            return False, "static_duration", f"Hold longer: {duration:.1f}s < 1.0s"
-
-        # Check minimal motion
-        if motion_features['delta_magnitude'] > 0.05:
-            return False, "static_motion", f"Too much motion: {motion_features['delta_magnitude']:.3f}"
-
-        return True, "static_correct", f"Static gesture held for {duration:.1f}s"
-
-    # Step 4: Dynamic gesture validation
-    # Check if motion is sufficient
-    if motion_features['delta_magnitude'] < 0.05:  # MIN_DELTA_MAG
-        return False, "motion_small", f"Movement too small: {motion_features['delta_magnitude']:.3f}"
-
-    # Step 5: Direction validation
-    expected_dx = expected['delta_x']
-    expected_dy = expected['delta_y']
-    actual_dx = motion_features['raw_dx']
-    actual_dy = motion_features['raw_dy']
-
-    # Add delta_x and delta_y to motion_features for prepare_features
-    motion_features['delta_x'] = actual_dx
-    motion_features['delta_y'] = actual_dy
-
-    # Check main axis matches
-    expected_main_x = expected['main_axis_x']
-    actual_main_x = motion_features['main_axis_x']
-
-    if expected_main_x != actual_main_x:
-        axis_name = "horizontal" if expected_main_x else "vertical"
-        return False, "wrong_axis", f"Wrong axis: expected {axis_name} movement"
-
-    # Check direction matches (flipped for intuitive gesture control)
-    if expected_main_x == 1:  # Horizontal movement
-        if (expected_dx > 0 and actual_dx < 0) or (expected_dx < 0 and actual_dx > 0):
-            direction = "right" if expected_dx > 0 else "left"  # positive delta_x = move right (left-to-right for next_slide)
-            return False, "wrong_direction", f"Wrong direction: expected {direction}"
-    else:  # Vertical movement
-        if (expected_dy > 0 and actual_dy <= 0) or (expected_dy < 0 and actual_dy >= 0):
-            direction = "down" if expected_dy > 0 else "up"
-            return False, "wrong_direction", f"Wrong direction: expected {direction}"    # Step 6: ML confidence validation
-    try:
-        X = prepare_features(
-            left_states, right_states, motion_features, scaler,
-            use_expected_left=True, expected_left=expected['left_fingers']
-        )
+        except Exception as e:
+            results[i] = (False, "error", f"Invalid attempt: {str(e)}")
+            continue
 
-        # Predict gesture
-        prediction = svm_model.predict(X)[0]
-        probabilities = svm_model.predict_proba(X)[0]
-        confidence = np.max(probabilities)
-        predicted_label = label_encoder.inverse_transform([prediction])[0]
+        if verdict is not None:
+            results[i] = verdict
+            continue
 
-        # Check confidence threshold
-        if confidence < CONFIDENCE_THRESHOLD:
-            return False, "low_confidence", f"Too uncertain: {confidence:.1%} < {CONFIDENCE_THRESHOLD:.0%}"
+        # Use expected left states instead of actual for trigger hand
+        ml_indices.append(i)
+        finger_rows.append(models.gesture_templates[target_gesture]['left_fingers'] + right_states)
+        motion_rows.append(motion_features)
 
-        # Check prediction matches target
-        if predicted_label != target_gesture:
-            return False, "wrong_prediction", f"ML predicted: {predicted_label} ({confidence:.1%})"
-
-        return True, "ml_correct", f"Perfect! ({confidence:.1%} confidence)"
+    if ml_indices:
+        try:
+            probabilities = [None] * len(ml_indices)
+            if INFERENCE_ENGINE == 'table' and models.probability_table is not None:
+                table_rows, found = models.probability_table.predict_proba(finger_rows, motion_rows)
+                probabilities = [probs if covered else None for probs, covered in zip(table_rows, found)]
+
+            # Memoized rows skip the kernel; the rest go through one predict_proba call
+            probability_memo.sync(models.version)
+            keys = {row: probability_memo.key(finger_rows[row], motion_rows[row])
+                    for row, probs in enumerate(probabilities) if probs is None}
+            for row, key in keys.items():
+                probabilities[row] = probability_memo.get(key)
+            misses = [row for row in keys if probabilities[row] is None]
+            if misses:
+                X = prepare_features_batch([finger_rows[row] for row in misses],
+                                           [motion_rows[row] for row in misses],
+                                           models.scaler, models.delta_weight)
+                for row, probs in zip(misses, models.svm_model.predict_proba(X)):
+                    probability_memo.put(keys[row], probs.copy())
+                    probabilities[row] = probs
+            for row, i in enumerate(ml_indices):
+                results[i] = score_ml_prediction(attempts[i]['target_gesture'], probabilities[row], models)
+        except Exception as e:
+            for i in ml_indices:
+                results[i] = (False, "ml_error", f"Prediction failed: {str(e)}")
+        for i in ml_indices:
+            models.cascade.record(results[i][1])
+
+    return results
 
-    except Exception as e:
-        return False, "ml_error", f"Prediction failed: {str(e)}"
+def evaluate_gesture(left_states: List[int], right_states: List[int], motion_features: Dict,
+                    target_gesture: str, duration: float) -> Tuple[bool, str, str]:
+    """Evaluate gesture against target for practice session"""
+    return evaluate_gestures_batch([{
+        'left_fingers': left_states,
+        'right_fingers': right_states,
+        'motion_features': motion_features,
+        'target_gesture': target_gesture,
+        'duration': duration
+    }])[0]
 
 def evaluate_gesture_cli():
     """CLI interface for gesture evaluation"""
@@ -271,5 +499,136 @@ def evaluate_gesture_cli():
         }
         print(json.dumps(error_result))
 
+def format_result(result: Tuple[bool, str, str], target_gesture: str) -> Dict:
+    """Shape an evaluation tuple as the JSON result the backend expects"""
+    success, reason_code, reason_msg = result
+    return {
+        'success': success,
+        'reason_code': reason_code,
+        'reason_msg': reason_msg,
+        'target_gesture': target_gesture
+    }
+
+def evaluate_batch_cli(batch_size: int = BATCH_SIZE):
+    """JSON-lines batch mode: one attempt per stdin line, one result per stdout line, same order.
+
+    Attempts are scored in chunks of batch_size so a replay of thousands of
+    stored attempts costs a handful of predict_proba calls.
+    """
+    import json
+
+    def flush(chunk):
+        results = evaluate_gestures_batch([attempt for _, attempt in chunk if attempt is not None])
+        results_iter = iter(results)
+        for line_no, attempt in chunk:
+            if attempt is None:
+                output = format_result((False, 'error', f'Invalid JSON on line {line_no}'), 'unknown')
+            else:
+                output = format_result(next(results_iter), attempt.get('target_gesture', 'unknown'))
+                if 'id' in attempt:
+                    output['id'] = attempt['id']
+            print(json.dumps(output))
+        sys.stdout.flush()
+
+    chunk = []
+    for line_no, line in enumerate(sys.stdin, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            chunk.append((line_no, json.loads(line)))
+        except json.JSONDecodeError:
+            chunk.append((line_no, None))
+        if len(chunk) >= batch_size:
+            flush(chunk)
+            chunk = []
+
+    if chunk:
+        flush(chunk)
+
+    memo = probability_memo.stats()
+    print(f"[probability-memo] {memo['hits']} hits / {memo['misses']} misses "
+          f"(hit rate {memo['hit_rate']:.1%})", file=sys.stderr, flush=True)
+    cascade = stage_counter.stats()
+    print(f"[cascade] {cascade['decided_by_rules']}/{cascade['attempts']} attempts decided by rules, "
+          f"{cascade['reached_ml']} reached the SVM: {cascade['stages']}", file=sys.stderr, flush=True)
+
+def handle_request(request: Dict) -> Dict:
+    """Evaluate one request from the persistent worker protocol"""
+    if request.get('op') == 'ping':
+        models = model_cache.current()
+        return {'type': 'pong', 'model_version': models.version,
+                'engine': 'table' if INFERENCE_ENGINE == 'table' and models.probability_table is not None else 'svc',
+                'probability_memo': probability_memo.stats(), 'cascade': stage_counter.stats()}
+
+    if request.get('op') == 'reload':
+        # Explicit nudge after a retrain; waits so the reply reports the version now serving
+        reloaded = model_cache.refresh(wait=True)
+        return {'type': 'reloaded', 'changed': reloaded, 'model_version': model_cache.current().version}
+
+    if request.get('op') == 'evaluate_batch':
+        attempts = request.get('attempts', [])
+        results = evaluate_gestures_batch(attempts)
+        return {
+            'type': 'batch_result',
+            'results': [format_result(result, attempt.get('target_gesture', 'unknown'))
+                        for result, attempt in zip(results, attempts)]
+        }
+
+    target_gesture = request.get('target_gesture', 'unknown')
+    try:
+        result = evaluate_gesture(
+            request['left_fingers'], request['right_fingers'], request['motion_features'],
+            target_gesture, request.get('duration', 1.0)
+        )
+    except Exception as e:
+        result = (False, 'error', f'Worker Error: {str(e)}')
+
+    return {'type': 'result', **format_result(result, target_gesture)}
+
+def serve_cli():
+    """Persistent worker mode: one JSON request per stdin line, one JSON reply per stdout line.
+
+    Models and templates are loaded once before the 'ready' line is written, so
+    every request after that only pays for the evaluation itself. Replies echo
+    the request 'id' so the caller can match them to pending requests. A
+    background watcher reloads the models when a retrain rewrites them.
+    """
+    import json
+
+    try:
+        models = model_cache.current()
+        print(json.dumps({'type': 'ready', 'pid': os.getpid(), 'classes': len(models.label_encoder.classes_),
+                          'model_version': models.version}), flush=True)
+    except Exception as e:
+        print(json.dumps({'type': 'fatal', 'error': str(e)}), flush=True)
+        sys.exit(1)
+
+    # Follow retrains without restarting the worker
+    model_cache.start_watcher()
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError:
+            print(json.dumps({'type': 'error', 'error': 'Invalid JSON request'}), flush=True)
+            continue
+
+        if request.get('op') == 'shutdown':
+            break
+
+        response = handle_request(request)
+        response['id'] = request.get('id')
+        print(json.dumps(response), flush=True)
+
 if __name__ == "__main__":
-    evaluate_gesture_cli()
\ No newline at end of file
+    if '--serve' in sys.argv[1:]:
+        serve_cli()
+    elif '--batch' in sys.argv[1:]:
+        evaluate_batch_cli()
+    else:
+        evaluate_gesture_cli()
\ No newline at end of file
@@ -1,4 +1,5 @@
 import os
+import sys
 import csv
 import collections
 
@@ -7,6 +8,11 @@ import mediapipe as mp
 import numpy as np
 import pandas as pd
 
+# Shared hand tracking lives in hybrid_realtime_pipeline/hand_roi.py;
+# appended (not prepended) so same-named scripts in this folder still win
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hand_roi import HandROITracker
+
 # === CONFIG ===
 CAPTURE_CSV = 'gesture_data_09_10_2025.csv'
 BUFFER_SIZE = 60
@@ -21,6 +27,8 @@ hands = mp_hands.Hands(
     min_detection_confidence=0.7,
     min_tracking_confidence=0.5,
 )
+# Run MediaPipe on a downscaled crop around the previous frame's hands
+hand_roi = HandROITracker.from_env(hands)
 mp_drawing = mp.solutions.drawing_utils
 
 LEFT_COLUMNS = [f'left_finger_state_{i}' for i in range(5)]
@@ -184,7 +192,7 @@ def main():
 
             frame = cv2.flip(frame, 1)
             rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = hands.process(rgb)
+            results = hand_roi.process(rgb)
 
             left_landmarks = None
             right_landmarks = None
@@ -262,6 +270,7 @@ def main():
     finally:
         cap.release()
         cv2.destroyAllWindows()
+        print(f"[INFO] Hand ROI: {hand_roi.stats()}")
         print(f"\nDa thoat. Tong so lan ghi pose '{pose_label}': {saved_count}.")
 
 
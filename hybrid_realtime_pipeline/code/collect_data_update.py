@@ -9,6 +9,13 @@ import mediapipe as mp
 import numpy as np
 import pandas as pd
 
+# Shared feature extraction lives in hybrid_realtime_pipeline/landmark_features.py;
+# appended (not prepended) so same-named scripts in this folder still win
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from landmark_features import get_basic_finger_states as get_finger_states, is_fist
+from hand_roi import HandROITracker
+from gesture_conflict_index import GestureConflictIndex
+
 # === CONFIG ===
 DEFAULT_CSV = 'training_results/gesture_data_compact.csv'  # Base dataset (read-only)
 BUFFER_SIZE = 60
@@ -32,6 +39,9 @@ CUSTOM_CSV = ""  # Will be set based on user name
 
 # Conflict detection - load reference data once
 REFERENCE_DATA = None  # Will be loaded from gesture_data_compact.csv
+REFERENCE_INDEX = None  # (finger pattern, direction) -> gesture, built from REFERENCE_DATA
+USER_INDEX = None       # Same lookup for the current user's saved gestures
+USER_INDEX_OWNER = None
 
 mp_hands = mp.solutions.hands
 hands = mp_hands.Hands(
@@ -40,6 +50,8 @@ hands = mp_hands.Hands(
     min_detection_confidence=0.7,
     min_tracking_confidence=0.5,
 )
+# Run MediaPipe on a downscaled crop around the previous frame's hands
+hand_roi = HandROITracker.from_env(hands)
 mp_drawing = mp.solutions.drawing_utils
 
 LEFT_COLUMNS = [f'left_finger_state_{i}' for i in range(5)]
@@ -238,102 +250,43 @@ def get_motion_direction(delta_x, delta_y, threshold=0.01):
     else:
         return "down" if delta_y > 0 else "up"
 
+def get_reference_index():
+    """Conflict index over the reference dataset (built once)"""
+    global REFERENCE_INDEX
+    if REFERENCE_INDEX is None:
+        REFERENCE_INDEX = GestureConflictIndex(load_reference_data())
+    return REFERENCE_INDEX
+
+def get_user_index(username):
+    """Conflict index over the user's saved gestures (built once per user)"""
+    global USER_INDEX, USER_INDEX_OWNER
+    if USER_INDEX is None or USER_INDEX_OWNER != username:
+        USER_INDEX = GestureConflictIndex(load_user_gesture_data(username))
+        USER_INDEX_OWNER = username
+    return USER_INDEX
+
 def check_gesture_conflict(left_states, right_states, delta_x, delta_y, target_gesture, username=None):
     """
     Check if gesture conflicts with existing reference data and user data
     Returns: (has_conflict, conflict_message)
     """
-    # Check against reference data
-    ref_data = load_reference_data()
-    if not ref_data.empty:
-        # Get motion direction of current gesture
-        current_direction = get_motion_direction(delta_x, delta_y)
-        
-        # Check against all reference samples
-        for _, row in ref_data.iterrows():
-            # Check finger pattern match (both hands)
-            ref_left = [int(row[f'left_finger_state_{i}']) for i in range(5)]
-            ref_right = [int(row[f'right_finger_state_{i}']) for i in range(5)]
-            
-            if ref_left == left_states and ref_right == right_states:
-                # Same finger pattern! Check motion direction
-                ref_direction = get_motion_direction(row['delta_x'], row['delta_y'])
-                ref_gesture = row['pose_label']
-                
-                if current_direction == ref_direction:
-                    # Same finger + same direction = CONFLICT!
-                    return True, f"🚨 CONFLICT with REFERENCE '{ref_gesture}': Same pattern + {ref_direction} direction"
-                # If different direction, continue checking (no conflict with this sample)
+    current_direction = get_motion_direction(delta_x, delta_y)
+    
+    # Same finger pattern (both hands) + same direction = CONFLICT!
+    # Rows of the gesture being updated are its own samples, not a conflict
+    ref_gesture = get_reference_index().lookup(left_states, right_states, current_direction,
+                                               exclude=target_gesture)
+    if ref_gesture is not None:
+        return True, f"🚨 CONFLICT with REFERENCE '{ref_gesture}': Same pattern + {current_direction} direction"
     
     # Check against user data if username provided
     if username:
-        user_data = load_user_gesture_data(username)
-        if not user_data.empty:
-            current_direction = get_motion_direction(delta_x, delta_y)
-            
-            # Check against all user samples
-            for _, row in user_data.iterrows():
-                # Check finger pattern match (both hands)
-                user_left = [int(row[f'left_finger_state_{i}']) for i in range(5)]
-                user_right = [int(row[f'right_finger_state_{i}']) for i in range(5)]
-                
-                if user_left == left_states and user_right == right_states:
-                    # Same finger pattern! Check motion direction
-                    user_direction = get_motion_direction(row['delta_x'], row['delta_y'])
-                    user_gesture = row['pose_label']
-                    
-                    if current_direction == user_direction:
-                        # Same finger + same direction = CONFLICT!
-                        return True, f"⚠️ CONFLICT with YOUR '{user_gesture}': Same pattern + {user_direction} direction"
-                    # If different direction, continue checking (no conflict with this sample)
-    
-    return False, f"[OK] No conflicts found (direction: {get_motion_direction(delta_x, delta_y)})"
-
-def get_finger_states(hand_landmarks, handedness_label):
-    states = [0, 0, 0, 0, 0]
-    if hand_landmarks is None:
-        return states
-
-    wrist = hand_landmarks.landmark[0]
-    mcp_middle = hand_landmarks.landmark[9]
-    mcp_pinky = hand_landmarks.landmark[17]
-    v1 = [mcp_middle.x - wrist.x, mcp_middle.y - wrist.y]
-    v2 = [mcp_pinky.x - wrist.x, mcp_pinky.y - wrist.y]
-    cross_z = v1[0] * v2[1] - v1[1] * v2[0]
-    palm_facing = 1 if cross_z > 0 else -1
-
-    if handedness_label == 'Right':
-        if palm_facing > 0:
-            states[0] = 1 if hand_landmarks.landmark[4].x < hand_landmarks.landmark[3].x else 0
-        else:
-            states[0] = 1 if hand_landmarks.landmark[4].x > hand_landmarks.landmark[3].x else 0
-    else:
-        if palm_facing > 0:
-            states[0] = 1 if hand_landmarks.landmark[4].x < hand_landmarks.landmark[3].x else 0
-        else:
-            states[0] = 1 if hand_landmarks.landmark[4].x > hand_landmarks.landmark[3].x else 0
-
-    states[1] = 1 if hand_landmarks.landmark[8].y < hand_landmarks.landmark[6].y else 0
-    states[2] = 1 if hand_landmarks.landmark[12].y < hand_landmarks.landmark[10].y else 0
-    states[3] = 1 if hand_landmarks.landmark[16].y < hand_landmarks.landmark[14].y else 0
-    states[4] = 1 if hand_landmarks.landmark[20].y < hand_landmarks.landmark[18].y else 0
-    return states
-
-
-def is_fist(hand_landmarks):
-    if hand_landmarks is None:
-        return False
-    bent = 0
-    if hand_landmarks.landmark[8].y > hand_landmarks.landmark[5].y:
-        bent += 1
-    if hand_landmarks.landmark[12].y > hand_landmarks.landmark[9].y:
-        bent += 1
-    if hand_landmarks.landmark[16].y > hand_landmarks.landmark[13].y:
-        bent += 1
-    if hand_landmarks.landmark[20].y > hand_landmarks.landmark[17].y:
-        bent += 1
-    return bent >= 3
-
+        user_gesture = get_user_index(username).lookup(left_states, right_states, current_direction,
+                                                       exclude=target_gesture)
+        if user_gesture is not None:
+            return True, f"⚠️ CONFLICT with YOUR '{user_gesture}': Same pattern + {current_direction} direction"
+    
+    return False, f"[OK] No conflicts found (direction: {current_direction})"
 
 def ensure_capture_csv_exists(csv_path):
     if os.path.isfile(csv_path):
@@ -595,6 +548,10 @@ def save_session_to_user_folder(pose_label):
     individual_df = pd.DataFrame(standard_rows, columns=columns)
     individual_df.to_csv(user_csv, index=False)
     
+    # Keep the conflict index in sync without reloading every user file
+    if USER_INDEX is not None and USER_INDEX_OWNER == USER_NAME:
+        USER_INDEX.add_rows(individual_df)
+    
     print(f"\n[SAVE] Da luu {len(SESSION_SAMPLES)} mau (format chuan) vao: {user_csv}")
     
     # Also update master CSV file in user folder
@@ -780,7 +737,7 @@ def main():
         return
     
     # Load existing user gesture data for conflict detection
-    load_user_gesture_data(USER_NAME)
+    get_user_index(USER_NAME)
     
     # Select gesture to update
     pose_label = select_gesture_to_update()
@@ -827,7 +784,7 @@ def main():
 
             frame = cv2.flip(frame, 1)
             rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = hands.process(rgb)
+            results = hand_roi.process(rgb)
 
             left_landmarks = None
             right_landmarks = None
@@ -1012,6 +969,7 @@ def main():
     finally:
         cap.release()
         cv2.destroyAllWindows()
+        print(f"[INFO] Hand ROI: {hand_roi.stats()}")
         print(f"\nĐã thoát. Tổng số lần ghi cho '{pose_label}': {saved_count}.")
         
         # Save all session samples to ONE CSV file (only if validation passed)
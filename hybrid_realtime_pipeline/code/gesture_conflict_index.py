@@ -0,0 +1,113 @@
+"""
+Gesture conflict index
+Chỉ mục tra cứu xung đột cử chỉ theo (finger pattern, hướng chuyển động)
+
+Two gestures conflict when both hands show the same finger states and the
+motion goes the same way (static/right/left/down/up). Instead of scanning
+every dataset row per check, rows are packed once into a dict keyed by
+
+    (10-bit finger pattern, direction) -> pose_labels, in first-seen order
+
+Bit i of the pattern is left_finger_state_i, bit 5+i is right_finger_state_i.
+Lookups are O(1) and new samples are added without rebuilding. A lookup can
+exclude the gesture being recorded, whose own rows never conflict with it.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+LEFT_COLUMNS = [f'left_finger_state_{i}' for i in range(5)]
+RIGHT_COLUMNS = [f'right_finger_state_{i}' for i in range(5)]
+STATE_COLUMNS = LEFT_COLUMNS + RIGHT_COLUMNS
+PATTERN_WEIGHTS = 1 << np.arange(len(STATE_COLUMNS), dtype=np.int64)
+
+DIRECTION_THRESHOLD = 0.01
+
+ConflictKey = Tuple[int, str]
+
+
+def pack_pattern(left_states: Sequence[int], right_states: Sequence[int]) -> Optional[int]:
+    """Pack 5 left + 5 right finger states into one int (None if a state is not 0/1)"""
+    pattern = 0
+    for bit, state in enumerate(list(left_states) + list(right_states)):
+        if state not in (0, 1):
+            return None
+        pattern |= int(state) << bit
+    return pattern
+
+
+def motion_directions(delta_x, delta_y, threshold: float = DIRECTION_THRESHOLD) -> np.ndarray:
+    """Vectorised get_motion_direction: same rules, one label per row"""
+    delta_x = np.asarray(delta_x, dtype=float)
+    delta_y = np.asarray(delta_y, dtype=float)
+    abs_x, abs_y = np.abs(delta_x), np.abs(delta_y)
+    horizontal = abs_x > abs_y
+    return np.select(
+        [(abs_x < threshold) & (abs_y < threshold),
+         horizontal & (delta_x > 0),
+         horizontal,
+         delta_y > 0],
+        ["static", "right", "left", "down"],
+        default="up",
+    )
+
+
+class GestureConflictIndex:
+    """(pattern, direction) -> pose_labels lookup built from gesture CSV rows"""
+
+    def __init__(self, data: Optional[pd.DataFrame] = None):
+        self.entries: Dict[ConflictKey, List[str]] = {}
+        self.rows = 0
+        if data is not None:
+            self.add_rows(data)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add_rows(self, data: pd.DataFrame) -> int:
+        """Index dataset rows. Returns rows indexed"""
+        required = STATE_COLUMNS + ['delta_x', 'delta_y', 'pose_label']
+        if data is None or data.empty or any(col not in data.columns for col in required):
+            return 0
+
+        states = data[STATE_COLUMNS].to_numpy(dtype=float)
+        # Rows with missing or non-binary finger states can never match a captured sample
+        valid = np.all((states == 0) | (states == 1), axis=1)
+        if not valid.any():
+            return 0
+
+        patterns = states[valid].astype(np.int64) @ PATTERN_WEIGHTS
+        directions = motion_directions(data['delta_x'].to_numpy()[valid], data['delta_y'].to_numpy()[valid])
+        labels = data['pose_label'].to_numpy()[valid]
+        for pattern, direction, label in zip(patterns.tolist(), directions.tolist(), labels.tolist()):
+            self.insert((pattern, direction), label)
+        self.rows += int(valid.sum())
+        return int(valid.sum())
+
+    def add(self, left_states: Sequence[int], right_states: Sequence[int],
+            delta_x: float, delta_y: float, pose_label: str):
+        """Index one sample"""
+        pattern = pack_pattern(left_states, right_states)
+        if pattern is None:
+            return
+        direction = str(motion_directions(delta_x, delta_y))
+        self.insert((pattern, direction), pose_label)
+        self.rows += 1
+
+    def insert(self, key: ConflictKey, pose_label: str):
+        labels = self.entries.setdefault(key, [])
+        if pose_label not in labels:
+            labels.append(pose_label)
+
+    def lookup(self, left_states: Sequence[int], right_states: Sequence[int],
+               direction: str, exclude: Optional[str] = None) -> Optional[str]:
+        """Label of the first indexed gesture with this pattern and direction other than exclude, or None"""
+        pattern = pack_pattern(left_states, right_states)
+        if pattern is None:
+            return None
+        for label in self.entries.get((pattern, direction), ()):
+            if label != exclude:
+                return label
+        return None
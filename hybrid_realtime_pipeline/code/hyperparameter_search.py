@@ -0,0 +1,219 @@
+"""
+Hyperparameter search engines for the SVM trainers
+Tìm siêu tham số SVM: grid đầy đủ hoặc successive halving
+
+All engines take the same param_grid / cv / scoring as GridSearchCV and
+return a fitted search object exposing best_params_, best_score_ and
+cv_results_. The grid stays the default; the halving engines are opt-in
+(--search-engine or SVM_SEARCH_ENGINE).
+
+- 'grid':    exhaustive GridSearchCV (default)
+- 'halving': successive halving over training samples. Every candidate is
+             scored on a small stratified subsample, and only the best
+             1/HALVING_FACTOR move on to the next rung with HALVING_FACTOR
+             times more samples. The last rung uses the full training set
+             (up to rounding). When the data is too small for at least two rungs (each
+             fold must still see MIN_CLASS_PER_FOLD samples of every class)
+             the engine falls back to the grid.
+- 'folds':   successive halving over CV folds (FoldHalvingSearch). Every
+             candidate is scored on the first few folds of cv, and only the
+             best 1/HALVING_FACTOR are scored on the next folds. A fold's
+             score is never recomputed, and the last rung has every fold,
+             so the winner's score is the same full-CV mean the grid
+             reports. Works on the small per-pose datasets where sample
+             halving has no room.
+
+Candidates are always scored without Platt scaling (probability=False,
+which would otherwise run an extra internal 5-fold CV per fit). Call
+refit_best() to train the final model with probability calibration once
+the winning parameters are known.
+"""
+
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.metrics import check_scoring
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, ParameterGrid
+
+SEARCH_ENGINES = ("grid", "halving", "folds")
+DEFAULT_SEARCH_ENGINE = os.environ.get("SVM_SEARCH_ENGINE", "grid")
+HALVING_FACTOR = 3
+MIN_CLASS_PER_FOLD = 2
+# Cores one search may use. training_scheduler sets this for every job so
+# concurrent trainings stay inside its global core budget.
+SEARCH_N_JOBS = int(os.environ.get("SVM_N_JOBS", "0")) or None
+
+
+def search_n_jobs(default):
+    """n_jobs for a search: the scheduler's per-job budget if set, else the caller's default"""
+    return SEARCH_N_JOBS or default
+
+
+def count_candidates(param_grid):
+    return int(np.prod([len(values) for values in param_grid.values()]))
+
+
+def halving_min_resources(y, n_splits, n_candidates, factor=HALVING_FACTOR, min_class_per_fold=MIN_CLASS_PER_FOLD):
+    """Smallest first-rung sample count, or None if halving has no room to work"""
+    n_samples = len(y)
+    _, class_counts = np.unique(y, return_counts=True)
+    # Stratified subsamples keep class ratios, so the rarest class sets the floor
+    floor = math.ceil(min_class_per_fold * n_splits * n_samples / class_counts.min())
+
+    # Add rungs (dividing by factor) while the first one stays above the floor
+    # and there are still candidates left to eliminate
+    required_rungs = 1 + math.ceil(math.log(max(n_candidates, 1), factor))
+    rungs = 1
+    while rungs < required_rungs and n_samples // factor ** rungs >= floor:
+        rungs += 1
+    if rungs < 2:
+        return None
+    return n_samples // factor ** (rungs - 1)
+
+
+def fold_budgets(n_splits, n_candidates, factor=HALVING_FACTOR):
+    """Cumulative folds scored per rung, e.g. [2, 4, 10] for 10 folds; [n_splits] if there is nothing to halve"""
+    required_rungs = 1 + math.ceil(math.log(max(n_candidates, 1), factor))
+    rungs = 1
+    while rungs < required_rungs and n_splits // factor ** rungs >= 1:
+        rungs += 1
+    return sorted({math.ceil(n_splits / factor ** (rungs - 1 - rung)) for rung in range(rungs)})
+
+
+def fit_and_score(estimator, params, X, y, train, test, scorer):
+    model = clone(estimator).set_params(**params).fit(X[train], y[train])
+    return scorer(model, X[test], y[test])
+
+
+class FoldHalvingSearch:
+    """Successive halving with CV folds as the budget (the 'folds' engine)"""
+
+    def __init__(self, estimator, param_grid, cv, scoring, factor=HALVING_FACTOR, n_jobs=None, verbose=0):
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.cv = cv
+        self.scoring = scoring
+        self.factor = factor
+        self.n_jobs = n_jobs
+        self.verbose = verbose
+
+    def fit(self, X, y, groups=None):
+        X, y = np.asarray(X), np.asarray(y)
+        scorer = check_scoring(self.estimator, scoring=self.scoring)
+        folds = list(self.cv.split(X, y, groups))
+        candidates = list(ParameterGrid(self.param_grid))
+        budgets = fold_budgets(len(folds), len(candidates), self.factor)
+
+        scores = [[] for _ in candidates]  # per candidate, one score per fold scored so far
+        alive = list(range(len(candidates)))
+        rows = []
+        self.n_resources_, self.n_candidates_ = [], []
+        self.n_fits_ = 0
+        for rung, n_folds in enumerate(budgets):
+            jobs = [(index, fold) for index in alive for fold in range(len(scores[index]), n_folds)]
+            if self.verbose:
+                print(f"Rung {rung}: {len(alive)} candidates x {n_folds} folds ({len(jobs)} new fits)")
+            new_scores = Parallel(n_jobs=self.n_jobs)(
+                delayed(fit_and_score)(self.estimator, candidates[index], X, y, *folds[fold], scorer)
+                for index, fold in jobs)
+            self.n_fits_ += len(jobs)
+            for (index, _), score in zip(jobs, new_scores):
+                scores[index].append(score)
+
+            for index in alive:
+                rows.append({"iter": rung, "n_resources": n_folds, "params": candidates[index],
+                             **{f"param_{key}": value for key, value in candidates[index].items()},
+                             "mean_test_score": float(np.mean(scores[index])),
+                             "std_test_score": float(np.std(scores[index]))})
+            self.n_resources_.append(n_folds)
+            self.n_candidates_.append(len(alive))
+
+            # Stable sort: ties keep grid order, as GridSearchCV's rank does
+            alive = sorted(alive, key=lambda index: -np.mean(scores[index]))
+            if rung < len(budgets) - 1:
+                alive = alive[:max(1, math.ceil(len(alive) / self.factor))]
+
+        best = alive[0]
+        self.n_iterations_ = len(budgets)
+        self.best_params_ = candidates[best]
+        self.best_score_ = float(np.mean(scores[best]))
+        self.cv_results_ = {key: [row[key] for row in rows] for key in rows[0]}
+        return self
+
+
+def build_search(estimator, param_grid, cv, scoring, y, engine=DEFAULT_SEARCH_ENGINE,
+                 n_jobs=-1, verbose=1, random_state=42):
+    """Create an unfitted search object for the requested engine"""
+    if engine not in SEARCH_ENGINES:
+        raise ValueError(f"Unknown search engine '{engine}', expected one of {SEARCH_ENGINES}")
+
+    estimator = clone(estimator).set_params(probability=False)
+
+    if engine == "halving":
+        min_resources = halving_min_resources(y, cv.get_n_splits(), count_candidates(param_grid))
+        if min_resources is not None:
+            return HalvingGridSearchCV(
+                estimator,
+                param_grid,
+                cv=cv,
+                scoring=scoring,
+                factor=HALVING_FACTOR,
+                resource="n_samples",
+                min_resources=min_resources,
+                refit=False,
+                n_jobs=n_jobs,
+                verbose=verbose,
+                random_state=random_state,
+            )
+        print("[INFO] Not enough samples for successive halving, using full grid search")
+
+    if engine == "folds":
+        return FoldHalvingSearch(estimator, param_grid, cv=cv, scoring=scoring, n_jobs=n_jobs, verbose=verbose)
+
+    return GridSearchCV(
+        estimator,
+        param_grid,
+        cv=cv,
+        scoring=scoring,
+        refit=False,
+        n_jobs=n_jobs,
+        verbose=verbose,
+    )
+
+
+def run_search(estimator, param_grid, X, y, cv, scoring, engine=DEFAULT_SEARCH_ENGINE, n_jobs=-1, verbose=1):
+    """Fit a search and return it with its results sorted best-first"""
+    search = build_search(estimator, param_grid, cv, scoring, y, engine=engine, n_jobs=n_jobs, verbose=verbose)
+
+    start_time = time.time()
+    search.fit(X, y)
+    elapsed_time = time.time() - start_time
+
+    results = pd.DataFrame(search.cv_results_)
+    if "iter" in results:
+        # Halving: candidates that reached the last rung rank first
+        results = results.sort_values(["iter", "mean_test_score"], ascending=[False, False])
+        resource = "folds" if isinstance(search, FoldHalvingSearch) else "samples"
+        print(f"Successive halving: {search.n_iterations_} rungs, "
+              f"{resource} per rung {list(search.n_resources_)}, candidates {list(search.n_candidates_)}")
+    else:
+        results = results.sort_values("mean_test_score", ascending=False)
+    if isinstance(search, FoldHalvingSearch):
+        print(f"Search time: {elapsed_time:.1f}s ({search.n_fits_} fits instead of "
+              f"{count_candidates(param_grid) * cv.get_n_splits()})")
+    else:
+        print(f"Search time: {elapsed_time:.1f}s ({len(results)} candidate evaluations x {cv.get_n_splits()} folds)")
+
+    return search, results
+
+
+def refit_best(estimator, best_params, X, y, probability=True):
+    """Train the final model on all training data, with probability calibration"""
+    model = clone(estimator).set_params(**best_params, probability=probability)
+    return model.fit(X, y)
@@ -0,0 +1,135 @@
+"""
+Incremental (warm-start) retraining helpers
+Huấn luyện lại tăng dần: chỉ tìm lại tham số cho gesture có dữ liệu thay đổi
+
+A full retrain runs the multiclass coarse/fine search and one adaptive
+search per pose, even when a user re-recorded a single gesture. In
+incremental mode the trainers instead:
+
+- hash the rows of every pose (content only, row order does not matter)
+  and compare against the hashes saved by the previous run;
+- reuse the previous per-pose hyperparameters (best_hyperparameters_lookup.csv
+  + optimal_hyperparameters_per_pose.csv) for poses whose hash matches,
+  skipping their search;
+- search only the changed / new poses. Every pose is still refit and
+  scored on the current split, since each one-vs-rest model uses the
+  other poses' rows as negatives;
+- refit the multiclass model directly with the kernel/C/gamma of the
+  previously saved model instead of searching again.
+
+Anything missing from the previous run (no hashes, no lookup row, no
+model) simply falls back to the full search for that part.
+"""
+
+import hashlib
+import json
+import pickle
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+HASHES_FILE = "pose_data_hashes.json"
+LOOKUP_FILE = "best_hyperparameters_lookup.csv"
+SUMMARY_FILE = "optimal_hyperparameters_per_pose.csv"
+
+
+def pose_content_hashes(df: pd.DataFrame, columns: Iterable[str], salt: str = "") -> Dict[str, str]:
+    """SHA-1 of each pose's rows over the given columns, independent of row order"""
+    columns = list(columns)
+    hashes = {}
+    for pose, rows in df.groupby("pose_label"):
+        row_hashes = np.sort(pd.util.hash_pandas_object(rows[columns], index=False).to_numpy())
+        digest = hashlib.sha1(salt.encode("utf-8"))
+        digest.update(row_hashes.tobytes())
+        hashes[str(pose)] = digest.hexdigest()
+    return hashes
+
+
+def load_pose_hashes(results_dir: Path) -> Dict[str, str]:
+    path = Path(results_dir) / HASHES_FILE
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_pose_hashes(results_dir: Path, hashes: Dict[str, str]):
+    path = Path(results_dir) / HASHES_FILE
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(hashes, f, indent=2, sort_keys=True)
+    print(f"[INFO] Pose data hashes saved to {path}")
+
+
+def parse_hyperparameter(value):
+    """CSV round-trip: '0.1' -> 0.1, '10' -> 10, 'auto' stays a string"""
+    if isinstance(value, str):
+        try:
+            number = float(value)
+        except ValueError:
+            return value
+        return int(number) if number.is_integer() else number
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def load_cached_pose_results(results_dir: Path) -> Dict[str, Dict]:
+    """Previous per-pose summary rows, with hyperparameters taken from the lookup table"""
+    results_dir = Path(results_dir)
+    lookup_path = results_dir / LOOKUP_FILE
+    summary_path = results_dir / SUMMARY_FILE
+    if not lookup_path.exists() or not summary_path.exists():
+        return {}
+
+    lookup = pd.read_csv(lookup_path, dtype={"best_C": str, "best_gamma": str}).set_index("pose_label")
+    summary = pd.read_csv(summary_path, dtype={"best_C": str, "best_gamma": str})
+
+    cached = {}
+    for row in summary.to_dict("records"):
+        pose = row["pose_label"]
+        if pose not in lookup.index:
+            continue
+        params = lookup.loc[pose]
+        row.update({
+            "best_kernel": params["best_kernel"],
+            "best_C": parse_hyperparameter(params["best_C"]),
+            "best_gamma": parse_hyperparameter(params["best_gamma"]),
+            "cv_f1_score": float(params["cv_f1_score"]),
+        })
+        cached[pose] = row
+    return cached
+
+
+def load_cached_model_params(model_pkl: str) -> Optional[Dict]:
+    """kernel/C/gamma of the previously saved multiclass SVC, if any"""
+    path = Path(model_pkl)
+    if not path.exists():
+        return None
+    try:
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        model = data["model"] if isinstance(data, dict) else data
+        params = model.get_params()
+        return {"kernel": params["kernel"], "C": params["C"], "gamma": params["gamma"]}
+    except Exception as e:
+        print(f"[WARN] Could not read cached model parameters from {path}: {e}")
+        return None
+
+
+def plan_incremental_retrain(pose_hashes: Dict[str, str], results_dir: Path) -> Tuple[Set[str], Dict[str, Dict]]:
+    """Split poses into those to retrain and cached results to reuse"""
+    previous_hashes = load_pose_hashes(results_dir)
+    cached_rows = load_cached_pose_results(results_dir)
+
+    reuse = {
+        pose: cached_rows[pose]
+        for pose, digest in pose_hashes.items()
+        if previous_hashes.get(pose) == digest and pose in cached_rows
+    }
+    changed = set(pose_hashes) - set(reuse)
+
+    print(f"[INFO] Incremental retrain: {len(changed)} changed pose(s) {sorted(changed)}, "
+          f"{len(reuse)} unchanged pose(s) reuse cached hyperparameters")
+    return changed, reuse
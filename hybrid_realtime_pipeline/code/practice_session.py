@@ -6,6 +6,7 @@ Based on training_session_ml.py but allows selecting different model sources
 
 import argparse
 import os
+import sys
 import time
 import pickle
 import joblib
@@ -16,6 +17,15 @@ import cv2
 import mediapipe as mp
 import numpy as np
 
+# Shared feature extraction lives in hybrid_realtime_pipeline/landmark_features.py;
+# appended (not prepended) so same-named scripts in this folder still win
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from landmark_features import extract_wrist, get_finger_states, is_fist
+from gesture_cascade import GestureCascade, StageCounter
+from probability_memo import ProbabilityMemo
+from svm_inference import load_compiled_models
+from frame_scheduler import AdaptiveFrameScheduler
+
 # Constants
 BUFFER_SIZE = 60
 SMOOTHING_WINDOW = 3
@@ -24,9 +34,15 @@ MIN_DELTA_MAG = 0.05
 RESULT_DISPLAY_SECONDS = 2.0
 STATIC_HOLD_SECONDS = 1.0
 INSTRUCTION_WINDOW = "Pose Instructions"
-DELTA_WEIGHT = 10.0
+DELTA_WEIGHT = 10.0  # Fallback only: compiled models and pickles record the weight they were trained with
 CONFIDENCE_THRESHOLD = 0.65
 
+# (prediction, confidence) per quantized SVM input; emptied when another model is loaded
+probability_memo = ProbabilityMemo.from_env()
+
+# Which rule (or ML step) decided each attempt
+stage_counter = StageCounter()
+
 class AttemptStats:
     def __init__(self) -> None:
         self.correct = 0
@@ -158,67 +174,79 @@ def load_models_from_source(model_source):
     scaler_pkl = models_dir / 'motion_scaler.pkl'
     static_dynamic_pkl = models_dir / 'static_dynamic_classifier.pkl'
     
-    if not model_pkl.exists() or not scaler_pkl.exists():
+    compiled = load_compiled_models(models_dir)
+
+    if compiled is None and (not model_pkl.exists() or not scaler_pkl.exists()):
         raise FileNotFoundError(f"Model files not found in {models_dir}")
     
-    try:
-        # Try loading with joblib first (new format)
-        svm_model = joblib.load(model_pkl)
-        scaler = joblib.load(scaler_pkl)
+    if compiled is not None:
+        # NumPy-only export written by the trainers: no scikit-learn import needed
+        svm_model, label_encoder, scaler, static_dynamic_model = compiled
+        delta_weight = svm_model.metadata.get('delta_weight', DELTA_WEIGHT)
+        print("✅ Models loaded successfully (compiled NumPy format)!")
+
+    else:
+        try:
+            # Try loading with joblib first (new format); bare estimators record no delta weight
+            svm_model = joblib.load(model_pkl)
+            delta_weight = DELTA_WEIGHT
+            scaler = joblib.load(scaler_pkl)
         
-        # Load static/dynamic classifier
-        static_dynamic_model = None
-        if static_dynamic_pkl.exists():
-            static_dynamic_model = joblib.load(static_dynamic_pkl)
+            # Load static/dynamic classifier
+            static_dynamic_model = None
+            if static_dynamic_pkl.exists():
+                static_dynamic_model = joblib.load(static_dynamic_pkl)
         
-        # For joblib models, we need to extract the label encoder from the model
-        if hasattr(svm_model, 'classes_'):
-            label_encoder = type('LabelEncoder', (), {
-                'classes_': svm_model.classes_,
-                'inverse_transform': lambda self, y: svm_model.classes_[y]
-            })()
-        else:
-            # Fallback - create simple label encoder
-            from sklearn.preprocessing import LabelEncoder
-            label_encoder = LabelEncoder()
-            label_encoder.classes_ = np.array(['end', 'home', 'next_slide', 'previous_slide', 
-                                              'rotate_down', 'rotate_left', 'rotate_right', 'rotate_up', 
-                                              'zoom_in', 'zoom_out'])
+            # For joblib models, we need to extract the label encoder from the model
+            if hasattr(svm_model, 'classes_'):
+                label_encoder = type('LabelEncoder', (), {
+                    'classes_': svm_model.classes_,
+                    'inverse_transform': lambda self, y: svm_model.classes_[y]
+                })()
+            else:
+                # Fallback - create simple label encoder
+                from sklearn.preprocessing import LabelEncoder
+                label_encoder = LabelEncoder()
+                label_encoder.classes_ = np.array(['end', 'home', 'next_slide', 'previous_slide', 
+                                                  'rotate_down', 'rotate_left', 'rotate_right', 'rotate_up', 
+                                                  'zoom_in', 'zoom_out'])
         
-        print("✅ Models loaded successfully (joblib format)!")
+            print("✅ Models loaded successfully (joblib format)!")
         
-    except:
-        # Fallback to pickle format (old format)
-        try:
-            with open(model_pkl, 'rb') as f:
-                model_data = pickle.load(f)
+        except:
+            # Fallback to pickle format (old format)
+            try:
+                with open(model_pkl, 'rb') as f:
+                    model_data = pickle.load(f)
             
-            with open(scaler_pkl, 'rb') as f:
-                scaler = pickle.load(f)
+                with open(scaler_pkl, 'rb') as f:
+                    scaler = pickle.load(f)
             
-            # Load static/dynamic classifier
-            static_dynamic_model = None
-            if static_dynamic_pkl.exists():
-                with open(static_dynamic_pkl, 'rb') as f:
-                    static_dynamic_model = pickle.load(f)
+                # Load static/dynamic classifier
+                static_dynamic_model = None
+                if static_dynamic_pkl.exists():
+                    with open(static_dynamic_pkl, 'rb') as f:
+                        static_dynamic_model = pickle.load(f)
             
-            svm_model = model_data['model']
-            label_encoder = model_data['label_encoder']
+                svm_model = model_data['model']
+                label_encoder = model_data['label_encoder']
+                delta_weight = model_data.get('delta_weight', DELTA_WEIGHT)
             
-            print("✅ Models loaded successfully (pickle format)!")
+                print("✅ Models loaded successfully (pickle format)!")
             
-        except Exception as e:
-            raise Exception(f"Failed to load models with both joblib and pickle: {e}")
+            except Exception as e:
+                raise Exception(f"Failed to load models with both joblib and pickle: {e}")
     
     print(f"   - Source: {model_source['name']}")
     print(f"   - Path: {model_source['path']}")
     print(f"   - SVM Model: {len(label_encoder.classes_)} classes")
     print(f"   - Classes: {list(label_encoder.classes_)}")
     print(f"   - SVM Model Type: {type(svm_model)}")
+    print(f"   - Delta weight: {delta_weight}")
     if static_dynamic_model:
         print(f"   - Static/Dynamic Classifier: Available")
 
-    return svm_model, label_encoder, scaler, static_dynamic_model, model_source
+    return svm_model, label_encoder, scaler, static_dynamic_model, model_source, float(delta_weight)
 def load_gesture_templates(model_source):
     """Load gesture templates based on model source"""
     script_dir = Path(__file__).parent
@@ -283,112 +311,6 @@ def load_gesture_templates(model_source):
     return templates
 
 
-def get_finger_states(hand_landmarks, handedness_label: str) -> List[int]:
-    """Extract finger states with improved thumb detection"""
-    states = [0, 0, 0, 0, 0]
-    if not hand_landmarks:
-        return states
-
-    # Get key landmarks
-    wrist = hand_landmarks.landmark[0]
-    thumb_tip = hand_landmarks.landmark[4]    # Thumb tip
-    thumb_ip = hand_landmarks.landmark[3]     # Thumb IP joint
-    thumb_mcp = hand_landmarks.landmark[2]    # Thumb MCP joint
-    index_mcp = hand_landmarks.landmark[5]    # Index MCP joint
-    
-    mcp_middle = hand_landmarks.landmark[9]
-    mcp_pinky = hand_landmarks.landmark[17]
-
-    # Determine palm orientation
-    v1 = [mcp_middle.x - wrist.x, mcp_middle.y - wrist.y]
-    v2 = [mcp_pinky.x - wrist.x, mcp_pinky.y - wrist.y]
-    cross_z = v1[0] * v2[1] - v1[1] * v2[0]
-    palm_facing = 1 if cross_z > 0 else -1
-
-    # IMPROVED THUMB DETECTION
-    # Method 1: Distance from thumb tip to palm center
-    palm_center_x = (index_mcp.x + mcp_pinky.x) / 2
-    palm_center_y = (index_mcp.y + mcp_pinky.y) / 2
-    thumb_to_palm_dist = ((thumb_tip.x - palm_center_x)**2 + (thumb_tip.y - palm_center_y)**2)**0.5
-    
-    # Method 2: Thumb extension check (tip vs MCP joint)
-    thumb_extended_x = abs(thumb_tip.x - thumb_mcp.x) > 0.04  # Extended horizontally
-    thumb_extended_y = abs(thumb_tip.y - thumb_mcp.y) > 0.03  # Extended vertically
-    
-    # Method 3: Relative position check (original method as fallback)
-    if handedness_label == "Right":
-        if palm_facing > 0:
-            thumb_position_open = thumb_tip.x < thumb_ip.x
-        else:
-            thumb_position_open = thumb_tip.x > thumb_ip.x
-    else:
-        if palm_facing > 0:
-            thumb_position_open = thumb_tip.x < thumb_ip.x
-        else:
-            thumb_position_open = thumb_tip.x > thumb_ip.x
-    
-    # Method 4: Angle-based detection (thumb joints alignment)
-    import math
-    def angle_between_points(p1, p2, p3):
-        """Calculate angle at p2 formed by p1-p2-p3"""
-        v1 = [p1.x - p2.x, p1.y - p2.y]
-        v2 = [p3.x - p2.x, p3.y - p2.y]
-        
-        dot_product = v1[0]*v2[0] + v1[1]*v2[1]
-        mag1 = (v1[0]**2 + v1[1]**2)**0.5
-        mag2 = (v2[0]**2 + v2[1]**2)**0.5
-        
-        if mag1 == 0 or mag2 == 0:
-            return 0
-        
-        cos_angle = dot_product / (mag1 * mag2)
-        cos_angle = max(-1, min(1, cos_angle))  # Clamp to [-1, 1]
-        return math.degrees(math.acos(cos_angle))
-    
-    thumb_angle = angle_between_points(thumb_mcp, thumb_ip, thumb_tip)
-    thumb_straight = thumb_angle > 140  # Straight thumb (extended)
-    
-    # COMBINED THUMB DECISION
-    distance_open = thumb_to_palm_dist > 0.08
-    extension_open = thumb_extended_x or thumb_extended_y
-    angle_open = thumb_straight
-    
-    # Use OR logic - if any method detects open thumb
-    thumb_is_open = (distance_open or extension_open or angle_open) and thumb_position_open
-    states[0] = 1 if thumb_is_open else 0
-
-    # Other fingers
-    states[1] = 1 if hand_landmarks.landmark[8].y < hand_landmarks.landmark[6].y else 0
-    states[2] = 1 if hand_landmarks.landmark[12].y < hand_landmarks.landmark[10].y else 0
-    states[3] = 1 if hand_landmarks.landmark[16].y < hand_landmarks.landmark[14].y else 0
-    states[4] = 1 if hand_landmarks.landmark[20].y < hand_landmarks.landmark[18].y else 0
-    return states
-
-
-def is_fist(hand_landmarks) -> bool:
-    """Check if hand is in fist position"""
-    if not hand_landmarks:
-        return False
-    bent = 0
-    if hand_landmarks.landmark[8].y > hand_landmarks.landmark[5].y:
-        bent += 1
-    if hand_landmarks.landmark[12].y > hand_landmarks.landmark[9].y:
-        bent += 1
-    if hand_landmarks.landmark[16].y > hand_landmarks.landmark[13].y:
-        bent += 1
-    if hand_landmarks.landmark[20].y > hand_landmarks.landmark[17].y:
-        bent += 1
-    return bent >= 3
-
-
-def extract_wrist(hand_landmarks):
-    """Extract wrist position"""
-    if not hand_landmarks:
-        return None
-    wrist = hand_landmarks.landmark[0]
-    return np.array([wrist.x, wrist.y], dtype=float)
-
-
 def smooth_sequence(seq_xy: List[np.ndarray], window: int = 3) -> List[np.ndarray]:
     """Smooth motion sequence"""
     if not seq_xy:
@@ -444,8 +366,8 @@ def compute_motion_features(smoothed_xy: List[np.ndarray]) -> Optional[Dict]:
     }
 
 
-def prepare_features(left_states: List[int], right_states: List[int], motion_features: Dict, scaler, use_expected_left: bool = False, expected_left: List[int] = None) -> np.ndarray:
-    """Prepare features for SVM prediction - auto-detect format based on scaler"""
+def prepare_features(left_states: List[int], right_states: List[int], motion_features: Dict, scaler, use_expected_left: bool = False, expected_left: List[int] = None, delta_weight: float = DELTA_WEIGHT) -> np.ndarray:
+    """Prepare features for SVM prediction - auto-detect format based on scaler (delta_weight: the model's)"""
     # Use expected left states instead of actual for trigger hand
     actual_left = expected_left if (use_expected_left and expected_left) else left_states
     
@@ -471,12 +393,12 @@ def prepare_features(left_states: List[int], right_states: List[int], motion_fea
         motion_array = np.array([[
             motion_features['main_axis_x'],
             motion_features['main_axis_y'], 
-            motion_features['delta_x'] * DELTA_WEIGHT,
-            motion_features['delta_y'] * DELTA_WEIGHT,
-            motion_features['motion_left'] * DELTA_WEIGHT,
-            motion_features['motion_right'] * DELTA_WEIGHT,
-            motion_features['motion_up'] * DELTA_WEIGHT,
-            motion_features['motion_down'] * DELTA_WEIGHT
+            motion_features['delta_x'] * delta_weight,
+            motion_features['delta_y'] * delta_weight,
+            motion_features['motion_left'] * delta_weight,
+            motion_features['motion_right'] * delta_weight,
+            motion_features['motion_up'] * delta_weight,
+            motion_features['motion_down'] * delta_weight
         ]], dtype=float)
         
         # Scale motion features only
@@ -489,8 +411,8 @@ def prepare_features(left_states: List[int], right_states: List[int], motion_fea
     elif expected_features == 18:
         # User models format (train_user_models.py): 
         # Scale ALL 18 features at once
-        weighted_delta_x = motion_features['delta_x'] * DELTA_WEIGHT
-        weighted_delta_y = motion_features['delta_y'] * DELTA_WEIGHT
+        weighted_delta_x = motion_features['delta_x'] * delta_weight
+        weighted_delta_y = motion_features['delta_y'] * delta_weight
         
         # Create complete 18-feature vector matching training format
         feature_vector = np.array([
@@ -505,10 +427,10 @@ def prepare_features(left_states: List[int], right_states: List[int], motion_fea
             weighted_delta_y,
             
             # Motion directions (4 features)
-            motion_features['motion_left'] * DELTA_WEIGHT,
-            motion_features['motion_right'] * DELTA_WEIGHT,
-            motion_features['motion_up'] * DELTA_WEIGHT,
-            motion_features['motion_down'] * DELTA_WEIGHT
+            motion_features['motion_left'] * delta_weight,
+            motion_features['motion_right'] * delta_weight,
+            motion_features['motion_up'] * delta_weight,
+            motion_features['motion_down'] * delta_weight
         ], dtype=float).reshape(1, -1)
         
         # Scale ALL 18 features at once
@@ -521,12 +443,12 @@ def prepare_features(left_states: List[int], right_states: List[int], motion_fea
         motion_array = np.array([[
             motion_features['main_axis_x'],
             motion_features['main_axis_y'], 
-            motion_features['delta_x'] * DELTA_WEIGHT,
-            motion_features['delta_y'] * DELTA_WEIGHT,
-            motion_features['motion_left'] * DELTA_WEIGHT,
-            motion_features['motion_right'] * DELTA_WEIGHT,
-            motion_features['motion_up'] * DELTA_WEIGHT,
-            motion_features['motion_down'] * DELTA_WEIGHT
+            motion_features['delta_x'] * delta_weight,
+            motion_features['delta_y'] * delta_weight,
+            motion_features['motion_left'] * delta_weight,
+            motion_features['motion_right'] * delta_weight,
+            motion_features['motion_up'] * delta_weight,
+            motion_features['motion_down'] * delta_weight
         ]], dtype=float)
         motion_scaled = scaler.transform(motion_array)
         X = np.hstack([finger_feats, motion_scaled])
@@ -535,102 +457,57 @@ def prepare_features(left_states: List[int], right_states: List[int], motion_fea
 
 def evaluate_with_ml(left_states: List[int], right_states: List[int], motion_features: Dict, 
                     target_gesture: str, svm_model, label_encoder, scaler, static_dynamic_data, 
-                    gesture_templates: Dict, duration: float) -> Tuple[bool, str, str]:
-    """Enhanced evaluation with strict validation"""
-    
-    # Get expected template for target gesture
-    if target_gesture not in gesture_templates:
-        return False, "no_template", f"No template found for {target_gesture}"
-    
-    expected = gesture_templates[target_gesture]
-    
+                    gesture_templates: Dict, duration: float,
+                    cascade: GestureCascade,
+                    delta_weight: float = DELTA_WEIGHT) -> Tuple[bool, str, str]:
+    """Enhanced evaluation with strict validation (cascade: compiled once from gesture_templates
+    by the caller; delta_weight: the weight the SVM was trained with)"""
     print(f"🎯 Target: {target_gesture}")
-    print(f"📏 Expected fingers L:{expected['left_fingers']} R:{expected['right_fingers']}")
     print(f"📏 Recorded fingers L:{left_states} R:{right_states}")
     
-    # Step 1: Finger validation (only check RIGHT hand, LEFT is trigger only)
-    if right_states != expected['right_fingers']:
-        return False, "right_fingers", f"Wrong right fingers: got {right_states}, expected {expected['right_fingers']}"
-    
-    print("✅ Right hand finger positions correct! (Left hand ignored as trigger)")
+    # Steps 1-5: compiled template rules (right fingers, static hold, motion, axis, direction).
+    # LEFT hand is trigger only - not validated
+    verdict = cascade.check(target_gesture, right_states, motion_features, duration)
+    if verdict is not None:
+        return verdict
     
-    # Step 2: Static/Dynamic classification
-    is_static_expected = expected['is_static']
-    
-    # Step 3: Static gesture validation
-    if is_static_expected:
-        print("🏠 Validating static gesture...")
-        
-        # Check duration
-        if duration < STATIC_HOLD_SECONDS:
-            return False, "static_duration", f"Hold longer: {duration:.1f}s < {STATIC_HOLD_SECONDS}s"
-        
-        # Check minimal motion
-        if motion_features['delta_magnitude'] > 0.05:  # Static threshold
-            return False, "static_motion", f"Too much motion: {motion_features['delta_magnitude']:.3f}"
-        
-        print("✅ Static gesture validated!")
-        return True, "static_correct", f"Static gesture held for {duration:.1f}s"
-    
-    # Step 4: Dynamic gesture validation
-    print("🔄 Validating dynamic gesture...")
-    
-    # Check if motion is sufficient
-    if motion_features['delta_magnitude'] < MIN_DELTA_MAG:
-        return False, "motion_small", f"Movement too small: {motion_features['delta_magnitude']:.3f}"
-    
-    # Step 5: Direction validation
-    expected_dx = expected['delta_x']
-    expected_dy = expected['delta_y']
-    actual_dx = motion_features['raw_dx']
-    actual_dy = motion_features['raw_dy']
-    
-    # Check main axis matches
-    expected_main_x = expected['main_axis_x']
-    actual_main_x = motion_features['main_axis_x']
-    
-    if expected_main_x != actual_main_x:
-        axis_name = "horizontal" if expected_main_x else "vertical"
-        return False, "wrong_axis", f"Wrong axis: expected {axis_name} movement"
-    
-    # Check direction matches
-    if expected_main_x == 1:  # Horizontal movement
-        if (expected_dx > 0 and actual_dx <= 0) or (expected_dx < 0 and actual_dx >= 0):
-            direction = "right" if expected_dx > 0 else "left"
-            return False, "wrong_direction", f"Wrong direction: expected {direction}"
-    else:  # Vertical movement  
-        if (expected_dy > 0 and actual_dy <= 0) or (expected_dy < 0 and actual_dy >= 0):
-            direction = "down" if expected_dy > 0 else "up"
-            return False, "wrong_direction", f"Wrong direction: expected {direction}"
-    
-    print("✅ Direction correct!")
+    expected = gesture_templates[target_gesture]
+    print("✅ Fingers, axis and direction correct!")
     
     # Step 6: ML confidence validation
     try:
-        X = prepare_features(
-            left_states, right_states, motion_features, scaler,
-            use_expected_left=True, expected_left=expected['left_fingers']
-        )
+        def predict():
+            X = prepare_features(
+                left_states, right_states, motion_features, scaler,
+                use_expected_left=True, expected_left=expected['left_fingers'],
+                delta_weight=delta_weight
+            )
         
-        # Predict gesture
-        prediction = svm_model.predict(X)[0]
+            # Predict gesture
+            prediction = svm_model.predict(X)[0]
         
-        # Try to get confidence if available
-        try:
-            probabilities = svm_model.predict_proba(X)[0]
-            confidence = np.max(probabilities)
-        except AttributeError:
-            # SVM was not trained with probability=True, use decision function instead
+            # Try to get confidence if available
             try:
-                decision_scores = svm_model.decision_function(X)[0]
-                # Normalize decision scores to [0, 1] range as pseudo-confidence
-                if len(decision_scores) > 1:  # Multi-class
-                    confidence = np.max(decision_scores) / (np.max(decision_scores) - np.min(decision_scores) + 1e-6)
-                else:  # Binary
-                    confidence = 1.0 / (1.0 + np.exp(-decision_scores))  # Sigmoid
-                confidence = min(1.0, max(0.5, confidence))  # Clamp to reasonable range
-            except:
-                confidence = 0.8  # Default confidence if nothing works
+                probabilities = svm_model.predict_proba(X)[0]
+                confidence = np.max(probabilities)
+            except AttributeError:
+                # SVM was not trained with probability=True, use decision function instead
+                try:
+                    decision_scores = svm_model.decision_function(X)[0]
+                    # Normalize decision scores to [0, 1] range as pseudo-confidence
+                    if len(decision_scores) > 1:  # Multi-class
+                        confidence = np.max(decision_scores) / (np.max(decision_scores) - np.min(decision_scores) + 1e-6)
+                    else:  # Binary
+                        confidence = 1.0 / (1.0 + np.exp(-decision_scores))  # Sigmoid
+                    confidence = min(1.0, max(0.5, confidence))  # Clamp to reasonable range
+                except:
+                    confidence = 0.8  # Default confidence if nothing works
+            return prediction, confidence
+        
+        # Repeated attempts reuse the memoized kernel evaluation
+        prediction, confidence = probability_memo.lookup(
+            expected['left_fingers'] + right_states, motion_features, predict, version=svm_model
+        )
         
         # Get predicted label - SVM returns string labels directly
         predicted_label = prediction if isinstance(prediction, str) else str(prediction)
@@ -640,18 +517,18 @@ def evaluate_with_ml(left_states: List[int], right_states: List[int], motion_fea
         # Check confidence threshold (lower threshold if using decision function)
         confidence_threshold = CONFIDENCE_THRESHOLD if hasattr(svm_model, 'predict_proba') else 0.5
         if confidence < confidence_threshold:
-            return False, "low_confidence", f"Too uncertain: {confidence:.1%} < {confidence_threshold:.0%}"
+            return cascade.decide("low_confidence", False, f"Too uncertain: {confidence:.1%} < {confidence_threshold:.0%}")
         
         # Check prediction matches target
         if predicted_label != target_gesture:
-            return False, "wrong_prediction", f"ML predicted: {predicted_label} ({confidence:.1%})"
+            return cascade.decide("wrong_prediction", False, f"ML predicted: {predicted_label} ({confidence:.1%})")
         
         print("✅ ML validation passed!")
-        return True, "ml_correct", f"Perfect! ({confidence:.1%} confidence)"
+        return cascade.decide("ml_correct", True, f"Perfect! ({confidence:.1%} confidence)")
         
     except Exception as e:
         print(f"❌ ML Evaluation error: {e}")
-        return False, "ml_error", f"Prediction failed: {str(e)}"
+        return cascade.decide("ml_error", False, f"Prediction failed: {str(e)}")
 
 
 def select_gesture(available_gestures: List[str]) -> Optional[str]:
@@ -716,8 +593,10 @@ def run_practice_session(camera_index: int = 0):
     
     # Load models and templates from selected source
     try:
-        svm_model, label_encoder, scaler, static_dynamic_data, model_info = load_models_from_source(model_source)
+        (svm_model, label_encoder, scaler, static_dynamic_data,
+         model_info, delta_weight) = load_models_from_source(model_source)
         gesture_templates = load_gesture_templates(model_source)
+        cascade = GestureCascade(gesture_templates, stage_counter)
         available_gestures = list(label_encoder.classes_)
         
         print(f"📊 Confidence threshold: {CONFIDENCE_THRESHOLD:.0%}")
@@ -742,6 +621,9 @@ def run_practice_session(camera_index: int = 0):
         min_tracking_confidence=0.5,
     )
     mp_drawing = mp.solutions.drawing_utils
+    # Sample only a few frames per second while nobody is gesturing
+    frame_scheduler = AdaptiveFrameScheduler.from_env(
+        on_change=lambda state, fps: print(f"[INFO] Frame scheduler: {state} ({fps} fps)"))
     
     # Initialize camera
     cap = cv2.VideoCapture(camera_index)
@@ -779,8 +661,12 @@ def run_practice_session(camera_index: int = 0):
                 break
             
             frame = cv2.flip(frame, 1)  # Mirror effect
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = hands.process(rgb)
+            frame_time = time.time()
+            processed = frame_scheduler.should_process(frame_time)
+            if processed:
+                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                results = hands.process(rgb)
+            # A skipped (idle) frame keeps the last results, which showed no one gesturing
             
             # Extract hand landmarks
             left_landmarks = None
@@ -811,6 +697,8 @@ def run_practice_session(camera_index: int = 0):
             left_confident = left_score > 0.6
             right_confident = right_score > 0.6
             left_is_fist = is_fist(left_landmarks) if left_landmarks else False
+            if processed:
+                frame_scheduler.observe(frame_time, state != "IDLE" or left_is_fist or right_landmarks is not None)
             
             # UI Elements
             gesture_type = "STATIC" if gesture_templates[target_gesture]['is_static'] else "DYNAMIC"
@@ -903,7 +791,8 @@ def run_practice_session(camera_index: int = 0):
                             recorded_left_states, recorded_right_states, 
                             motion_features, target_gesture, 
                             svm_model, label_encoder, scaler, static_dynamic_data,
-                            gesture_templates, duration
+                            gesture_templates, duration, cascade,
+                            delta_weight=delta_weight
                         )
                         
                         stats.record(success, reason_msg)
@@ -961,10 +850,16 @@ def run_practice_session(camera_index: int = 0):
     finally:
         cap.release()
         cv2.destroyAllWindows()
+        print(f"[INFO] Frame scheduler: {frame_scheduler.stats()}")
         print(f"\\n📊 Final Statistics:")
         print(f"   Target: {target_gesture}")
         print(f"   Model: {model_source['name']}")
         print(f"   {format_stats_line(stats)}")
+        memo = probability_memo.stats()
+        print(f"   ML memo: {memo['hits']}/{memo['hits'] + memo['misses']} hits ({memo['hit_rate']:.0%})")
+        cascade_stats = stage_counter.stats()
+        print(f"   Rejected before ML: {cascade_stats['decided_by_rules']}/{cascade_stats['attempts']} "
+              f"{cascade_stats['stages']}")
         print("🏁 Practice Session Complete!")
 
 
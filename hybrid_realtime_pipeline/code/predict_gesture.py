@@ -4,25 +4,39 @@ import os
 import pickle
 from pathlib import Path
 
+import numpy as np
+
 # Paths
 SCRIPT_DIR = Path(__file__).resolve().parent
 MODELS_DIR = SCRIPT_DIR / "models"
 MODEL_PKL = MODELS_DIR / "motion_svm_model.pkl"
 SCALER_PKL = MODELS_DIR / "motion_scaler.pkl"
+DELTA_WEIGHT = 15.0  # Fallback when the model files do not record the training weight
+
+# NumPy-only SVM evaluator lives in hybrid_realtime_pipeline/svm_inference.py;
+# appended (not prepended) so same-named scripts in this folder still win
+sys.path.append(str(SCRIPT_DIR.parent))
+from svm_inference import load_compiled_models
 
 def predict_gesture(features):
     """
     Predict gesture using the trained SVM model
     """
     try:
-        # Load model and scaler
-        with open(MODEL_PKL, 'rb') as f:
-            model_data = pickle.load(f)
-        model = model_data['model']
-        label_encoder = model_data['label_encoder']
-        
-        with open(SCALER_PKL, 'rb') as f:
-            scaler = pickle.load(f)
+        # Load model and scaler (compiled NumPy export first, no scikit-learn import)
+        compiled = load_compiled_models(MODELS_DIR)
+        if compiled is not None:
+            model, label_encoder, scaler, _ = compiled
+            delta_weight = model.metadata.get('delta_weight', DELTA_WEIGHT)
+        else:
+            with open(MODEL_PKL, 'rb') as f:
+                model_data = pickle.load(f)
+            model = model_data['model']
+            label_encoder = model_data['label_encoder']
+            delta_weight = model_data.get('delta_weight', DELTA_WEIGHT)
+
+            with open(SCALER_PKL, 'rb') as f:
+                scaler = pickle.load(f)
         
         # Prepare features (same as training)
         left_fingers = features.get('left_fingers', [])
@@ -35,20 +49,21 @@ def predict_gesture(features):
         # Motion features
         main_axis_x = motion_features.get('main_axis_x', 0)
         main_axis_y = motion_features.get('main_axis_y', 0)
-        delta_x = motion_features.get('delta_x', 0) * 15.0  # DELTA_WEIGHT
-        delta_y = motion_features.get('delta_y', 0) * 15.0
+        delta_x = motion_features.get('delta_x', 0) * delta_weight
+        delta_y = motion_features.get('delta_y', 0) * delta_weight
         
         # Direction features
-        motion_left = 15.0 if delta_x < 0 else 0
-        motion_right = 15.0 if delta_x > 0 else 0
-        motion_up = 15.0 if delta_y < 0 else 0
-        motion_down = 15.0 if delta_y > 0 else 0
+        motion_left = delta_weight if delta_x < 0 else 0
+        motion_right = delta_weight if delta_x > 0 else 0
+        motion_up = delta_weight if delta_y < 0 else 0
+        motion_down = delta_weight if delta_y > 0 else 0
         
+        # Scale motion features only (the scaler is fit on these 8 columns, as in training)
+        motion_array = [main_axis_x, main_axis_y, delta_x, delta_y, motion_left, motion_right, motion_up, motion_down]
+        motion_scaled = scaler.transform([motion_array])
+
         # Combine features
-        features_array = finger_states + [main_axis_x, main_axis_y, delta_x, delta_y, motion_left, motion_right, motion_up, motion_down]
-        
-        # Scale
-        features_scaled = scaler.transform([features_array])
+        features_scaled = np.hstack([[finger_states], motion_scaled])
         
         # Predict
         pred_encoded = model.predict(features_scaled)[0]
@@ -1,4 +1,5 @@
 import os
+import sys
 import pickle
 import collections
 import time
@@ -7,6 +8,13 @@ import cv2
 import mediapipe as mp
 import numpy as np
 
+# Shared feature extraction lives in hybrid_realtime_pipeline/landmark_features.py;
+# appended (not prepended) so same-named scripts in this folder still win
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from landmark_features import get_basic_finger_states as get_finger_states
+from hand_roi import HandROITracker
+from frame_scheduler import AdaptiveFrameScheduler
+
 # === CONFIG ===
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -176,6 +184,11 @@ hands = mp_hands.Hands(
     min_detection_confidence=0.7,
     min_tracking_confidence=0.5,
 )
+# Run MediaPipe on a downscaled crop around the previous frame's hands
+hand_roi = HandROITracker.from_env(hands)
+# Sample only a few frames per second while nobody is gesturing
+frame_scheduler = AdaptiveFrameScheduler.from_env(
+    on_change=lambda state, fps: print(f"[INFO] Frame scheduler: {state} ({fps} fps)"))
 mp_drawing = mp.solutions.drawing_utils
 
 LEFT_COLS = [f'left_finger_state_{i}' for i in range(5)]
@@ -299,38 +312,6 @@ def prepare_features(left_finger_states, right_finger_states, motion_features, s
     return X
 
 
-def get_finger_states(hand_landmarks, handedness_label):
-    """Extract finger states - same as collect_data_hybrid.py"""
-    states = [0, 0, 0, 0, 0]
-    if hand_landmarks is None:
-        return states
-
-    wrist = hand_landmarks.landmark[0]
-    mcp_middle = hand_landmarks.landmark[9]
-    mcp_pinky = hand_landmarks.landmark[17]
-    v1 = [mcp_middle.x - wrist.x, mcp_middle.y - wrist.y]
-    v2 = [mcp_pinky.x - wrist.x, mcp_pinky.y - wrist.y]
-    cross_z = v1[0] * v2[1] - v1[1] * v2[0]
-    palm_facing = 1 if cross_z > 0 else -1
-
-    if handedness_label == 'Right':
-        if palm_facing > 0:
-            states[0] = 1 if hand_landmarks.landmark[4].x < hand_landmarks.landmark[3].x else 0
-        else:
-            states[0] = 1 if hand_landmarks.landmark[4].x > hand_landmarks.landmark[3].x else 0
-    else:
-        if palm_facing > 0:
-            states[0] = 1 if hand_landmarks.landmark[4].x < hand_landmarks.landmark[3].x else 0
-        else:
-            states[0] = 1 if hand_landmarks.landmark[4].x > hand_landmarks.landmark[3].x else 0
-
-    states[1] = 1 if hand_landmarks.landmark[8].y < hand_landmarks.landmark[6].y else 0
-    states[2] = 1 if hand_landmarks.landmark[12].y < hand_landmarks.landmark[10].y else 0
-    states[3] = 1 if hand_landmarks.landmark[16].y < hand_landmarks.landmark[14].y else 0
-    states[4] = 1 if hand_landmarks.landmark[20].y < hand_landmarks.landmark[18].y else 0
-    return states
-
-
 def is_trigger_closed(hand_landmarks):
     """Check if left hand is in trigger position (flexible fist detection)
     
@@ -599,8 +580,12 @@ def main():
                 break
 
             frame = cv2.flip(frame, 1)
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = hands.process(rgb)
+            frame_time = time.time()
+            processed = frame_scheduler.should_process(frame_time)
+            if processed:
+                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                results = hand_roi.process(rgb)
+            # A skipped (idle) frame keeps the last results, which showed no one gesturing
 
             left_landmarks = None
             right_landmarks = None
@@ -622,6 +607,8 @@ def main():
                     mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
 
             left_is_trigger = is_trigger_closed(left_landmarks)
+            if processed:
+                frame_scheduler.observe(frame_time, state != 'WAIT' or left_is_trigger or right_landmarks is not None)
 
             if state == 'WAIT':
                 # No text display - clean interface
@@ -839,6 +826,8 @@ def main():
     finally:
         cap.release()
         cv2.destroyAllWindows()
+        print(f"[INFO] Hand ROI: {hand_roi.stats()}")
+        print(f"[INFO] Frame scheduler: {frame_scheduler.stats()}")
         print("\nExited gesture recognition.")
 
 
@@ -1,5 +1,6 @@
 import os
 import pickle
+import sys
 from pathlib import Path
 
 import argparse
@@ -7,10 +8,20 @@ import argparse
 import numpy as np
 import pandas as pd
 from sklearn.metrics import classification_report, confusion_matrix
-from sklearn.model_selection import GridSearchCV, StratifiedKFold
+from sklearn.model_selection import StratifiedKFold
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.svm import SVC
 
+from hyperparameter_search import DEFAULT_SEARCH_ENGINE, SEARCH_ENGINES, refit_best, run_search, search_n_jobs
+from incremental_training import (load_cached_model_params, plan_incremental_retrain, pose_content_hashes,
+                                  save_pose_hashes)
+
+# svm_inference and model_bundle live in hybrid_realtime_pipeline/; appended
+# (not prepended) so same-named scripts in this folder still win
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from svm_inference import COMPILED_MODEL, COMPILED_STATIC_DYNAMIC, export_compiled_svc
+from model_bundle import BUNDLE_FILE, build_bundle
+
 # === Config ===
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DEFAULT_DATASET = os.path.join(BASE_DIR, "gesture_motion_dataset_realistic.csv")
@@ -20,6 +31,7 @@ MODELS_DIR = Path(BASE_DIR) / "models"
 LEFT_COLS = [f"left_finger_state_{i}" for i in range(5)]
 RIGHT_COLS = [f"right_finger_state_{i}" for i in range(5)]
 MOTION_COLS = ["main_axis_x", "main_axis_y", "delta_x", "delta_y"]
+HASH_COLS = LEFT_COLS + RIGHT_COLS + ["delta_x", "delta_y"]  # Raw columns that define a pose's data
 
 DELTA_WEIGHT = 15.0  # Increased from 5.0 to emphasize motion direction
 MIN_DELTA_MAG = 0.001  # Lowered to preserve static gesture data (was 0.05)
@@ -197,16 +209,19 @@ def get_adaptive_search_params(pose, total_samples, positive_samples, static_ges
             'strategy': 'balanced_comprehensive'
         }
 
-def run_adaptive_grid_search(pose, estimator, X, y, groups, output_name, static_gestures=None):
+def run_adaptive_grid_search(pose, estimator, X, y, groups, output_name, static_gestures=None,
+                             search_engine=DEFAULT_SEARCH_ENGINE):
     """
-    Adaptive grid search that adjusts strategy per pose
+    Adaptive grid search that adjusts strategy per pose.
+    The search space comes from get_adaptive_search_params; search_engine
+    decides how it is explored (see hyperparameter_search.py).
     """
     total_samples = len(y)
     positive_samples = y.sum()
     
     params = get_adaptive_search_params(pose, total_samples, positive_samples, static_gestures)
     
-    print(f"\n=== Adaptive GridSearch for {pose} ===")
+    print(f"\n=== Adaptive search ({search_engine}) for {pose} ===")
     print(f"Samples: {positive_samples}/{total_samples} (ratio 1:{total_samples/positive_samples:.1f})")
     print(f"Strategy: {params['strategy']}")
     print(f"Search space: {len(params['kernels'])} kernels x {len(params['Cs'])} C x {len(params['gammas'])} gamma = {len(params['kernels']) * len(params['Cs']) * len(params['gammas'])} combinations")
@@ -218,24 +233,20 @@ def run_adaptive_grid_search(pose, estimator, X, y, groups, output_name, static_
     }
     
     cv = StratifiedKFold(n_splits=min(10, len(np.unique(groups))))  # Use StratifiedKFold instead
-    grid = GridSearchCV(
+    grid, results = run_search(
         estimator,
         param_grid,
+        X,
+        y,
         cv=cv,
         scoring="f1",  # F1 better for imbalanced data
-        n_jobs=-1,  # Use all cores
+        engine=search_engine,
+        n_jobs=search_n_jobs(-1),  # Use all cores
         verbose=1  # Show progress
     )
+    display_cols = [col for col in ["iter", "n_resources", "mean_test_score", "std_test_score",
+                                    "param_kernel", "param_C", "param_gamma"] if col in results]
     
-    import time
-    start_time = time.time()
-    grid.fit(X, y)  # Remove groups for StratifiedKFold
-    elapsed_time = time.time() - start_time
-    
-    results = pd.DataFrame(grid.cv_results_).sort_values("mean_test_score", ascending=False)
-    display_cols = ["mean_test_score", "std_test_score", "param_kernel", "param_C", "param_gamma"]
-    
-    print(f"Training time: {elapsed_time:.1f}s")
     print("Top 5 combinations:")
     print(results[display_cols].head(5).to_string(index=False))
     
@@ -254,26 +265,28 @@ def run_grid_search(description: str,
                     kernels=None,
                     Cs=None,
                     gammas=None,
-                    output_name: str = None):
-    print(f"\n=== {description} ===")
+                    output_name: str = None,
+                    search_engine: str = DEFAULT_SEARCH_ENGINE):
+    print(f"\n=== {description} ({search_engine}) ===")
     param_grid = {
         "kernel": kernels,
         "C": Cs,
         "gamma": gammas,
     }
     cv = StratifiedKFold(n_splits=10)  # Keep original 10 folds
-    grid = GridSearchCV(
+    grid, results = run_search(
         estimator,
         param_grid,
+        X,
+        y,
         cv=cv,
         scoring="accuracy",
-        n_jobs=1,  # Use single core to prevent hanging
+        engine=search_engine,
+        n_jobs=search_n_jobs(1),  # Use single core to prevent hanging
         verbose=1,  # Add progress output
     )
-    grid.fit(X, y)  # Remove groups parameter for StratifiedKFold
-
-    results = pd.DataFrame(grid.cv_results_).sort_values("mean_test_score", ascending=False)
-    display_cols = ["mean_test_score", "std_test_score", "param_kernel", "param_C", "param_gamma"]
+    display_cols = [col for col in ["iter", "n_resources", "mean_test_score", "std_test_score",
+                                    "param_kernel", "param_C", "param_gamma"] if col in results]
     print("Top 10 combinations:")
     print(results[display_cols].head(10).to_string(index=False))
 
@@ -377,11 +390,20 @@ def train_static_dynamic_classifier(X, labels, groups, train_idx, test_idx, scal
     
     with open(STATIC_DYNAMIC_PKL, 'wb') as f:
         pickle.dump(static_data, f)
+    export_compiled_svc(
+        os.path.join(os.path.dirname(STATIC_DYNAMIC_PKL), COMPILED_STATIC_DYNAMIC),
+        static_model,
+        scaler=static_scaler,
+        static_gestures=list(static_gestures),
+        dynamic_gestures=list(dynamic_gestures),
+        static_threshold=STATIC_THRESHOLD,
+    )
     
     print(f"[INFO] Static/Dynamic classifier saved to {STATIC_DYNAMIC_PKL}")
     return static_model, static_scaler
 
-def train_multiclass(X, labels, groups, train_idx, test_idx, scaler):
+def train_multiclass(X, labels, groups, train_idx, test_idx, scaler, search_engine=DEFAULT_SEARCH_ENGINE,
+                     cached_params=None):
     print("=== MULTICLASS TRAINING ===")
     label_encoder = LabelEncoder()
     y_encoded = label_encoder.fit_transform(labels)
@@ -394,6 +416,13 @@ def train_multiclass(X, labels, groups, train_idx, test_idx, scaler):
     print(f"[INFO] Hold-out test groups: {len(np.unique(test_groups))}")
     print(f"[INFO] CV train groups: {len(np.unique(train_groups))}")
 
+    if cached_params:
+        # Incremental retrain: warm-start from the previous model's hyperparameters
+        print(f"[INFO] Reusing cached multiclass params -> kernel: {cached_params['kernel']}, "
+              f"C: {cached_params['C']}, gamma: {cached_params['gamma']}")
+        best_model = refit_best(SVC(max_iter=10000), cached_params, X_train, y_train)
+        return finish_multiclass(best_model, label_encoder, X_test, y_test, scaler)
+
     estimator = SVC(probability=True, max_iter=10000)  # Add max_iter to prevent infinite loops
     coarse_grid, coarse_results = run_grid_search(
         "Coarse GridSearch (multiclass)",
@@ -405,6 +434,7 @@ def train_multiclass(X, labels, groups, train_idx, test_idx, scaler):
         Cs=COARSE_C_VALUES,
         gammas=COARSE_GAMMA_VALUES,
         output_name="grid_results_coarse_multiclass.csv",
+        search_engine=search_engine,
     )
 
     best_params = coarse_grid.best_params_
@@ -427,10 +457,17 @@ def train_multiclass(X, labels, groups, train_idx, test_idx, scaler):
         Cs=fine_cs,
         gammas=fine_gammas,
         output_name="grid_results_fine_multiclass.csv",
+        search_engine=search_engine,
     )
 
-    best_model = fine_grid.best_estimator_
-    best_model.fit(X_train, y_train)
+    # Probability calibration is only needed by the saved model, so it is
+    # turned on for this final refit and never during the search
+    best_model = refit_best(SVC(max_iter=10000), fine_grid.best_params_, X_train, y_train)
+    return finish_multiclass(best_model, label_encoder, X_test, y_test, scaler)
+
+
+def finish_multiclass(best_model, label_encoder, X_test, y_test, scaler):
+    """Evaluate the final multiclass model on the hold-out set and save it"""
     y_pred = best_model.predict(X_test)
 
     all_label_indices = np.arange(len(label_encoder.classes_))
@@ -461,13 +498,29 @@ def train_multiclass(X, labels, groups, train_idx, test_idx, scaler):
     with open(SCALER_PKL, "wb") as f:
         pickle.dump(scaler, f)
 
+    # Same model for inference processes that should not import scikit-learn
+    export_compiled_svc(
+        os.path.join(os.path.dirname(MODEL_PKL), COMPILED_MODEL),
+        best_model,
+        scaler=scaler,
+        label_names=label_encoder.classes_,
+        delta_weight=DELTA_WEIGHT,
+        min_delta_mag=MIN_DELTA_MAG,
+    )
+
     print("\n[INFO] Multiclass model and scaler have been saved.")
 
     return label_encoder, y_test, y_pred, best_model
 
 
-def evaluate_pose_binary(X, labels, groups, train_idx, test_idx, label_encoder, static_gestures=None):
+def evaluate_pose_binary(X, labels, groups, train_idx, test_idx, label_encoder, static_gestures=None,
+                         search_engine=DEFAULT_SEARCH_ENGINE, reuse_rows=None):
+    """One-vs-rest search per pose. Poses in reuse_rows (incremental mode)
+    skip the search and keep their previous hyperparameters, but are still
+    refit and scored on the current split: the other poses' rows are their
+    negatives, so their metrics go stale when any pose changes."""
     print("\n=== PER-POSE ONE-VS-REST EVALUATION ===")
+    reuse_rows = reuse_rows or {}
     poses = np.unique(labels)
 
     X_train, X_test = X[train_idx], X[test_idx]
@@ -484,6 +537,7 @@ def evaluate_pose_binary(X, labels, groups, train_idx, test_idx, label_encoder,
 
     for pose in poses:
         print(f"\n--- Pose: {pose} ---")
+
         y_binary = (labels == pose).astype(int)
         y_train = y_binary[train_idx]
         y_test = y_binary[test_idx]
@@ -496,22 +550,30 @@ def evaluate_pose_binary(X, labels, groups, train_idx, test_idx, label_encoder,
 
         estimator = SVC(class_weight='balanced', probability=True, random_state=42)
         
-        # Use adaptive grid search strategy per pose
-        grid, _ = run_adaptive_grid_search(
-            pose,
-            estimator,
-            X_train,
-            y_train,
-            train_groups,
-            output_name=f"adaptive_grid_results_{pose}.csv",
-            static_gestures=static_gestures
-        )
+        if pose in reuse_rows:
+            cached = reuse_rows[pose]
+            print(f"[INFO] Data unchanged, refitting with cached params: kernel={cached['best_kernel']}, "
+                  f"C={cached['best_C']}, gamma={cached['best_gamma']}")
+            best_params = {"kernel": cached['best_kernel'], "C": cached['best_C'], "gamma": cached['best_gamma']}
+            best_score = float(cached['cv_f1_score'])
+        else:
+            # Use adaptive grid search strategy per pose
+            grid, _ = run_adaptive_grid_search(
+                pose,
+                estimator,
+                X_train,
+                y_train,
+                train_groups,
+                output_name=f"adaptive_grid_results_{pose}.csv",
+                static_gestures=static_gestures,
+                search_engine=search_engine
+            )
+            best_params = grid.best_params_
+            best_score = grid.best_score_
 
-        best_params = grid.best_params_
         best_kernel = best_params["kernel"]
         best_c = best_params["C"]
         best_gamma = best_params["gamma"]
-        best_score = grid.best_score_
         
         print(f"OPTIMAL PARAMS for {pose}:")
         print(f"   Kernel: {best_kernel}")
@@ -519,11 +581,8 @@ def evaluate_pose_binary(X, labels, groups, train_idx, test_idx, label_encoder,
         print(f"   Gamma: {best_gamma}")
         print(f"   CV F1-Score: {best_score:.4f}")
         
-        # Train final model with best params
-        fine_grid = grid  # Use the already trained best model
-
-        best_model = fine_grid.best_estimator_
-        # Model already trained by GridSearchCV
+        # Train final model with best params (probability calibration only here)
+        best_model = refit_best(estimator, best_params, X_train, y_train)
         y_pred = best_model.predict(X_test)
 
         labels_order = [0, 1]
@@ -633,9 +692,10 @@ def report_full_dataset(model, label_encoder, X_full, labels_full):
 
 
 # === Main ===
-def main(dataset_path: str = DEFAULT_DATASET):
+def main(dataset_path: str = DEFAULT_DATASET, search_engine: str = DEFAULT_SEARCH_ENGINE, incremental: bool = False):
     print("=== TRAIN MOTION SVM WITH FINGER CONTEXT ===")
     print(f"[INFO] Using dataset: {dataset_path}")
+    print(f"[INFO] Hyperparameter search engine: {search_engine}")
 
     # Auto-detect dataset - try new data first, fallback to old
     datasets_to_try = [
@@ -658,6 +718,12 @@ def main(dataset_path: str = DEFAULT_DATASET):
     X, labels, scaler, groups = prepare_features(df)
     train_idx, test_idx = stratified_group_split(labels, groups, test_fraction=TEST_FRACTION, random_state=42)
 
+    pose_hashes = pose_content_hashes(df, HASH_COLS, salt=f"{DELTA_WEIGHT}|{MIN_DELTA_MAG}")
+    reuse_rows, cached_params = {}, None
+    if incremental:
+        _, reuse_rows = plan_incremental_retrain(pose_hashes, RESULTS_DIR)
+        cached_params = load_cached_model_params(MODEL_PKL)
+
     # Fix groups to be consecutive integers for GroupKFold
     unique_groups = np.unique(groups)
     group_mapping = {old: new for new, old in enumerate(unique_groups)}
@@ -672,23 +738,35 @@ def main(dataset_path: str = DEFAULT_DATASET):
     static_gestures, dynamic_gestures = auto_detect_gesture_types(df)
     
     # Then train main multiclass model
-    label_encoder, y_test_enc, y_pred_enc, best_model = train_multiclass(X, labels, groups, train_idx, test_idx, scaler)
-    evaluate_pose_binary(X, labels, groups, train_idx, test_idx, label_encoder, static_gestures)
+    label_encoder, y_test_enc, y_pred_enc, best_model = train_multiclass(
+        X, labels, groups, train_idx, test_idx, scaler, search_engine=search_engine, cached_params=cached_params)
+    evaluate_pose_binary(X, labels, groups, train_idx, test_idx, label_encoder, static_gestures,
+                         search_engine=search_engine, reuse_rows=reuse_rows)
+    save_pose_hashes(RESULTS_DIR, pose_hashes)
     report_full_dataset(best_model, label_encoder, X, labels)
     
     # Create compact dataset with accuracy
     print(f"\n=== CREATING COMPACT DATASET WITH ACCURACY ===")
     create_compact_dataset_with_accuracy(df, RESULTS_DIR)
     
+    # One-file inference artifact: models, transform constants and templates
+    build_bundle(MODELS_DIR, RESULTS_DIR / "gesture_data_compact.csv")
+    
     print(f"\n=== TRAINING COMPLETE ===")
     print(f"Static/Dynamic classifier: {STATIC_DYNAMIC_PKL}")
     print(f"Main gesture classifier: {MODEL_PKL}")
     print(f"Feature scaler: {SCALER_PKL}")
+    print(f"Model bundle: {MODELS_DIR / BUNDLE_FILE}")
 
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Train motion SVM models with finger context.")
     parser.add_argument("--dataset", default=DEFAULT_DATASET, help="Path to the merged dataset CSV.")
+    parser.add_argument("--search-engine", choices=SEARCH_ENGINES, default=DEFAULT_SEARCH_ENGINE,
+                        help="Hyperparameter search: 'grid' (exhaustive, default), 'halving' "
+                             "(successive halving over samples) or 'folds' (successive halving over CV folds).")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only search poses whose data changed since the last run; reuse cached hyperparameters.")
     return parser.parse_args()
 
 
@@ -775,4 +853,4 @@ def create_compact_dataset_with_accuracy(df, results_dir):
 
 if __name__ == "__main__":
     args = parse_args()
-    main(dataset_path=args.dataset)
+    main(dataset_path=args.dataset, search_engine=args.search_engine, incremental=args.incremental)
@@ -1,5 +1,6 @@
 import os
 import pickle
+import sys
 from pathlib import Path
 
 import argparse
@@ -11,6 +12,17 @@ from sklearn.model_selection import GridSearchCV, GroupKFold
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.svm import SVC
 
+from hyperparameter_search import refit_best, search_n_jobs
+from incremental_training import (load_cached_model_params, plan_incremental_retrain, pose_content_hashes,
+                                  save_pose_hashes)
+from training_scheduler import run_training_schedule
+
+# svm_inference and model_bundle live in hybrid_realtime_pipeline/; appended
+# (not prepended) so same-named scripts in this folder still win
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from svm_inference import COMPILED_MODEL, COMPILED_STATIC_DYNAMIC, export_compiled_svc
+from model_bundle import BUNDLE_FILE, build_bundle
+
 # === Config ===
 # Always use the code directory as base, regardless of where the script is run from
 CODE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -27,6 +39,7 @@ MODELS_DIR = Path(BASE_DIR) / "models"
 LEFT_COLS = [f"left_finger_state_{i}" for i in range(5)]
 RIGHT_COLS = [f"right_finger_state_{i}" for i in range(5)]
 MOTION_COLS = ["main_axis_x", "main_axis_y", "delta_x", "delta_y"]
+HASH_COLS = LEFT_COLS + RIGHT_COLS + ["delta_x", "delta_y"]  # Raw columns that define a pose's data
 
 DELTA_WEIGHT = 15.0  # Increased from 5.0 to emphasize motion direction
 MIN_DELTA_MAG = 0.001  # Lowered to preserve static gesture data (was 0.05)
@@ -230,7 +243,7 @@ def run_adaptive_grid_search(pose, estimator, X, y, groups, output_name, static_
         param_grid,
         cv=cv,
         scoring="f1",  # F1 better for imbalanced data
-        n_jobs=2,  # Limit to 2 cores to prevent system freeze
+        n_jobs=search_n_jobs(2),  # Limit to 2 cores to prevent system freeze
         verbose=1  # Show progress
     )
     
@@ -274,7 +287,7 @@ def run_grid_search(description: str,
         param_grid,
         cv=cv,
         scoring="accuracy",
-        n_jobs=2,  # Limit to 2 cores to prevent system freeze
+        n_jobs=search_n_jobs(2),  # Limit to 2 cores to prevent system freeze
     )
     grid.fit(X, y, groups=groups)
 
@@ -383,11 +396,19 @@ def train_static_dynamic_classifier(X, labels, groups, train_idx, test_idx, scal
     
     with open(STATIC_DYNAMIC_PKL, 'wb') as f:
         pickle.dump(static_data, f)
+    export_compiled_svc(
+        os.path.join(os.path.dirname(STATIC_DYNAMIC_PKL), COMPILED_STATIC_DYNAMIC),
+        static_model,
+        scaler=static_scaler,
+        static_gestures=list(static_gestures),
+        dynamic_gestures=list(dynamic_gestures),
+        static_threshold=STATIC_THRESHOLD,
+    )
     
     print(f"[INFO] Static/Dynamic classifier saved to {STATIC_DYNAMIC_PKL}")
     return static_model, static_scaler
 
-def train_multiclass(X, labels, groups, train_idx, test_idx, scaler):
+def train_multiclass(X, labels, groups, train_idx, test_idx, scaler, cached_params=None):
     print("=== MULTICLASS TRAINING ===")
     label_encoder = LabelEncoder()
     y_encoded = label_encoder.fit_transform(labels)
@@ -400,6 +421,13 @@ def train_multiclass(X, labels, groups, train_idx, test_idx, scaler):
     print(f"[INFO] Hold-out test groups: {len(np.unique(test_groups))}")
     print(f"[INFO] CV train groups: {len(np.unique(train_groups))}")
 
+    if cached_params:
+        # Incremental retrain: warm-start from the previous model's hyperparameters
+        print(f"[INFO] Reusing cached multiclass params -> kernel: {cached_params['kernel']}, "
+              f"C: {cached_params['C']}, gamma: {cached_params['gamma']}")
+        best_model = refit_best(SVC(), cached_params, X_train, y_train)
+        return finish_multiclass(best_model, label_encoder, X_test, y_test, scaler)
+
     estimator = SVC(probability=True)
     coarse_grid, coarse_results = run_grid_search(
         "Coarse GridSearch (multiclass)",
@@ -437,6 +465,11 @@ def train_multiclass(X, labels, groups, train_idx, test_idx, scaler):
 
     best_model = fine_grid.best_estimator_
     best_model.fit(X_train, y_train)
+    return finish_multiclass(best_model, label_encoder, X_test, y_test, scaler)
+
+
+def finish_multiclass(best_model, label_encoder, X_test, y_test, scaler):
+    """Evaluate the final multiclass model on the hold-out set and save it"""
     y_pred = best_model.predict(X_test)
 
     all_label_indices = np.arange(len(label_encoder.classes_))
@@ -467,13 +500,29 @@ def train_multiclass(X, labels, groups, train_idx, test_idx, scaler):
     with open(SCALER_PKL, "wb") as f:
         pickle.dump(scaler, f)
 
+    # Same model for inference processes that should not import scikit-learn
+    export_compiled_svc(
+        os.path.join(os.path.dirname(MODEL_PKL), COMPILED_MODEL),
+        best_model,
+        scaler=scaler,
+        label_names=label_encoder.classes_,
+        delta_weight=DELTA_WEIGHT,
+        min_delta_mag=MIN_DELTA_MAG,
+    )
+
     print("\n[INFO] Multiclass model and scaler have been saved.")
 
     return label_encoder, y_test, y_pred, best_model
 
 
-def evaluate_pose_binary(X, labels, groups, train_idx, test_idx, label_encoder, static_gestures=None):
+def evaluate_pose_binary(X, labels, groups, train_idx, test_idx, label_encoder, static_gestures=None,
+                         reuse_rows=None):
+    """One-vs-rest search per pose. Poses in reuse_rows (incremental mode)
+    skip the search and keep their previous hyperparameters, but are still
+    refit and scored on the current split: the other poses' rows are their
+    negatives, so their metrics go stale when any pose changes."""
     print("\n=== PER-POSE ONE-VS-REST EVALUATION ===")
+    reuse_rows = reuse_rows or {}
     poses = np.unique(labels)
 
     X_train, X_test = X[train_idx], X[test_idx]
@@ -491,6 +540,7 @@ def evaluate_pose_binary(X, labels, groups, train_idx, test_idx, label_encoder,
 
     for pose in poses:
         print(f"\n--- Pose: {pose} ---")
+
         y_binary = (labels == pose).astype(int)
         y_train = y_binary[train_idx]
         y_test = y_binary[test_idx]
@@ -503,22 +553,30 @@ def evaluate_pose_binary(X, labels, groups, train_idx, test_idx, label_encoder,
 
         estimator = SVC(class_weight='balanced', probability=True, random_state=42)
         
-        # Use adaptive grid search strategy per pose
-        grid, _ = run_adaptive_grid_search(
-            pose,
-            estimator,
-            X_train,
-            y_train,
-            train_groups,
-            output_name=f"adaptive_grid_results_{pose}.csv",
-            static_gestures=static_gestures
-        )
+        grid = None
+        if pose in reuse_rows:
+            cached = reuse_rows[pose]
+            print(f"[INFO] Data unchanged, refitting with cached params: kernel={cached['best_kernel']}, "
+                  f"C={cached['best_C']}, gamma={cached['best_gamma']}")
+            best_params = {"kernel": cached['best_kernel'], "C": cached['best_C'], "gamma": cached['best_gamma']}
+            best_score = float(cached['cv_f1_score'])
+        else:
+            # Use adaptive grid search strategy per pose
+            grid, _ = run_adaptive_grid_search(
+                pose,
+                estimator,
+                X_train,
+                y_train,
+                train_groups,
+                output_name=f"adaptive_grid_results_{pose}.csv",
+                static_gestures=static_gestures
+            )
+            best_params = grid.best_params_
+            best_score = grid.best_score_
 
-        best_params = grid.best_params_
         best_kernel = best_params["kernel"]
         best_c = best_params["C"]
         best_gamma = best_params["gamma"]
-        best_score = grid.best_score_
         
         print(f"OPTIMAL PARAMS for {pose}:")
         print(f"   Kernel: {best_kernel}")
@@ -526,11 +584,11 @@ def evaluate_pose_binary(X, labels, groups, train_idx, test_idx, label_encoder,
         print(f"   Gamma: {best_gamma}")
         print(f"   CV F1-Score: {best_score:.4f}")
         
-        # Train final model with best params
-        fine_grid = grid  # Use the already trained best model
-
-        best_model = fine_grid.best_estimator_
-        # Model already trained by GridSearchCV
+        # Train final model with best params (already trained by GridSearchCV unless reused)
+        if grid is not None:
+            best_model = grid.best_estimator_
+        else:
+            best_model = refit_best(estimator, best_params, X_train, y_train)
         y_pred = best_model.predict(X_test)
 
         labels_order = [0, 1]
@@ -889,7 +947,7 @@ def select_and_train_user():
             print("Please enter a number!")
 
 
-def train_user_model(username: str):
+def train_user_model(username: str, incremental: bool = False):
     """Train model for specific user"""
     print(f"\n{'='*60}")
     print(f"🎯 TRAINING MODEL FOR USER: {username}")
@@ -913,7 +971,7 @@ def train_user_model(username: str):
 
     try:
         # Use the training logic directly with user-specific paths
-        train_with_dataset(dataset_path)
+        train_with_dataset(dataset_path, incremental=incremental)
         print(f"✅ Successfully trained model for user '{username}'")
         return True
     except Exception as e:
@@ -921,8 +979,12 @@ def train_user_model(username: str):
         return False
 
 
-def train_with_dataset(dataset_path: str):
-    """Train models using the specified dataset path"""
+def train_with_dataset(dataset_path: str, incremental: bool = False):
+    """Train models using the specified dataset path.
+
+    With incremental=True, only poses whose data changed since the last run
+    are searched again; the others reuse their cached hyperparameters.
+    """
     print("=== TRAIN MOTION SVM WITH FINGER CONTEXT ===")
     print(f"[INFO] Using dataset: {dataset_path}")
 
@@ -955,6 +1017,12 @@ def train_with_dataset(dataset_path: str):
     X, labels, scaler, groups = prepare_features(df)
     train_idx, test_idx = stratified_group_split(labels, groups, test_fraction=TEST_FRACTION, random_state=42)
 
+    pose_hashes = pose_content_hashes(df, HASH_COLS, salt=f"{DELTA_WEIGHT}|{MIN_DELTA_MAG}")
+    reuse_rows, cached_params = {}, None
+    if incremental:
+        _, reuse_rows = plan_incremental_retrain(pose_hashes, RESULTS_DIR)
+        cached_params = load_cached_model_params(MODEL_PKL)
+
     # Train Static/Dynamic classifier first and get detected gesture types
     static_model, static_scaler = train_static_dynamic_classifier(X, labels, groups, train_idx, test_idx, scaler, df)
     
@@ -962,23 +1030,30 @@ def train_with_dataset(dataset_path: str):
     static_gestures, dynamic_gestures = auto_detect_gesture_types(df)
     
     # Then train main multiclass model
-    label_encoder, y_test_enc, y_pred_enc, best_model = train_multiclass(X, labels, groups, train_idx, test_idx, scaler)
-    pose_accuracies = evaluate_pose_binary(X, labels, groups, train_idx, test_idx, label_encoder, static_gestures)
+    label_encoder, y_test_enc, y_pred_enc, best_model = train_multiclass(
+        X, labels, groups, train_idx, test_idx, scaler, cached_params=cached_params)
+    pose_accuracies = evaluate_pose_binary(X, labels, groups, train_idx, test_idx, label_encoder, static_gestures,
+                                           reuse_rows=reuse_rows)
+    save_pose_hashes(RESULTS_DIR, pose_hashes)
     report_full_dataset(best_model, label_encoder, X, labels)
     
     # Create compact dataset for practice
     compact_path = RESULTS_DIR / "gesture_data_compact.csv"
     create_compact_dataset(df, str(compact_path), static_gestures, dynamic_gestures, pose_accuracies)
     
+    # One-file inference artifact: models, transform constants and templates
+    build_bundle(MODELS_DIR, compact_path)
+    
     print(f"\n=== TRAINING COMPLETE ===")
     print(f"Static/Dynamic classifier: {STATIC_DYNAMIC_PKL}")
     print(f"Main gesture classifier: {MODEL_PKL}")
     print(f"Feature scaler: {SCALER_PKL}")
+    print(f"Model bundle: {MODELS_DIR / BUNDLE_FILE}")
     print(f"Compact dataset: {compact_path}")
 
 
-def train_all_users():
-    """Train models for all available users"""
+def train_all_users(incremental: bool = False):
+    """Train models for all available users (in parallel, see training_scheduler.py)"""
     print("🔍 SCANNING FOR USER FOLDERS...")
     users = get_available_users()
 
@@ -989,25 +1064,19 @@ def train_all_users():
     print(f"📋 Found {len(users)} users: {', '.join(users)}")
     print()
 
-    success_count = 0
-    for username in users:
-        if train_user_model(username):
-            success_count += 1
-
-    print(f"{'='*60}")
-    print(f"📊 TRAINING SUMMARY: {success_count}/{len(users)} users trained successfully")
-    print(f"{'='*60}")
+    # Each user trains in its own process, several at a time within the core budget
+    run_training_schedule(users, incremental=incremental)
 
 
 # === Main ===
-def main(dataset_path: str = None):
+def main(dataset_path: str = None, incremental: bool = False):
     """Main function - now supports user selection"""
     print("=== TRAIN USER MOTION SVM MODELS ===")
 
     if dataset_path:
         # Direct path specified - train with that dataset
         print(f"[INFO] Using direct dataset path: {dataset_path}")
-        train_with_dataset(dataset_path)
+        train_with_dataset(dataset_path, incremental=incremental)
     else:
         # No path specified - show user selection menu
         select_and_train_user()
@@ -1073,10 +1142,14 @@ def main_legacy(dataset_path: str):
     compact_path = RESULTS_DIR / "gesture_data_compact.csv"
     create_compact_dataset(df, str(compact_path), static_gestures, dynamic_gestures, pose_accuracies)
     
+    # One-file inference artifact: models, transform constants and templates
+    build_bundle(MODELS_DIR, compact_path)
+    
     print(f"\n=== TRAINING COMPLETE ===")
     print(f"Static/Dynamic classifier: {STATIC_DYNAMIC_PKL}")
     print(f"Main gesture classifier: {MODEL_PKL}")
     print(f"Feature scaler: {SCALER_PKL}")
+    print(f"Model bundle: {MODELS_DIR / BUNDLE_FILE}")
     print(f"Compact dataset: {compact_path}")
 
 
@@ -1120,6 +1193,8 @@ def parse_args():
     parser = argparse.ArgumentParser(description="Train motion SVM models with finger context.")
     parser.add_argument("--dataset", help="Path to the merged dataset CSV. If not specified, runs interactive mode.")
     parser.add_argument("--user", help="Username to train for. If not specified, shows user selection menu.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only search poses whose data changed since the last run; reuse cached hyperparameters.")
     return parser.parse_args()
 
 
@@ -1128,10 +1203,11 @@ if __name__ == "__main__":
     
     if args.user:
         # Direct user specified
-        train_user_model(args.user)
+        success = train_user_model(args.user, incremental=args.incremental)
+        sys.exit(0 if success else 1)
     elif args.dataset:
         # Direct dataset specified
-        main(args.dataset)
+        main(args.dataset, incremental=args.incremental)
     else:
         # Interactive mode
         main()
@@ -0,0 +1,248 @@
+"""
+Parallel multi-user training scheduler
+Lập lịch huấn luyện song song cho nhiều user
+
+Runs one train_user_motion_svm_all_models.py --user <name> job per user
+on a pool of worker slots:
+
+- Core budget: the machine (or --cores) is split into slots of
+  --job-cores cores. Each job gets SVM_N_JOBS=<job-cores> for its
+  hyperparameter searches and single-threaded BLAS, so searches
+  running inside concurrent jobs never oversubscribe the CPU.
+- Timeouts: a job that runs longer than --timeout minutes is killed
+  together with its joblib workers and marked 'timeout'.
+- Resumable: job state is saved to training_results/user_training_state.json
+  after every change. Running again continues the same batch and skips
+  users already 'done'. Use --fresh to start a new batch, e.g. when a new
+  model version ships.
+- Window: with --window, no new job starts after that many minutes.
+  Unstarted users stay 'pending' for the next run.
+- Progress: every finished job prints done/total and an ETA based on the
+  average job duration in this batch.
+
+Each job's output goes to user_<name>/training_results/training.log.
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+CODE_DIR = Path(os.path.dirname(os.path.abspath(__file__)))
+TRAIN_SCRIPT = CODE_DIR / "train_user_motion_svm_all_models.py"
+STATE_FILE = CODE_DIR / "training_results" / "user_training_state.json"
+
+DEFAULT_JOB_CORES = 2
+DEFAULT_TIMEOUT_MINUTES = 60
+
+PENDING, RUNNING, DONE, FAILED, TIMEOUT = "pending", "running", "done", "failed", "timeout"
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    if minutes:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
+
+
+class TrainingScheduler:
+    """Queue of per-user training jobs with a core budget, timeouts and saved state"""
+
+    def __init__(self, users: List[str], cores: Optional[int] = None, job_cores: int = DEFAULT_JOB_CORES,
+                 timeout_minutes: float = DEFAULT_TIMEOUT_MINUTES, window_minutes: Optional[float] = None,
+                 incremental: bool = False, fresh: bool = False, state_file: Path = STATE_FILE):
+        self.cores = cores or os.cpu_count() or 1
+        self.job_cores = max(1, min(job_cores, self.cores))
+        self.workers = max(1, self.cores // self.job_cores)
+        self.timeout = timeout_minutes * 60 if timeout_minutes else None
+        self.window = window_minutes * 60 if window_minutes else None
+        self.incremental = incremental
+        self.state_file = Path(state_file)
+        self.lock = threading.Lock()
+        self.started_at = None
+
+        self.state = {} if fresh else self.load_state()
+        if not self.state:
+            self.state = {"batch": datetime.now().isoformat(timespec="seconds"), "jobs": {}}
+        jobs = self.state["jobs"]
+        for username in users:
+            job = jobs.setdefault(username, {"status": PENDING, "attempts": 0})
+            if job["status"] != DONE:
+                # Interrupted, failed or timed-out jobs are queued again on resume
+                job["status"] = PENDING
+        self.queue = [username for username in users if jobs[username]["status"] == PENDING]
+        self.save_state()
+
+    def load_state(self) -> Dict:
+        if not self.state_file.exists():
+            return {}
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Could not read scheduler state {self.state_file}: {e}")
+            return {}
+
+    def save_state(self):
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_file.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_file)
+
+    def update_job(self, username: str, **fields):
+        with self.lock:
+            self.state["jobs"][username].update(fields)
+            self.save_state()
+
+    def job_env(self) -> Dict[str, str]:
+        env = dict(os.environ)
+        env.update({
+            "SVM_N_JOBS": str(self.job_cores),
+            # libsvm is single-threaded; keep numpy's BLAS from spawning its own threads
+            "OMP_NUM_THREADS": "1",
+            "OPENBLAS_NUM_THREADS": "1",
+            "MKL_NUM_THREADS": "1",
+            "PYTHONIOENCODING": "utf-8",
+        })
+        return env
+
+    def job_command(self, username: str) -> List[str]:
+        cmd = [sys.executable, str(TRAIN_SCRIPT), "--user", username]
+        if self.incremental:
+            cmd.append("--incremental")
+        return cmd
+
+    def run_job(self, username: str) -> str:
+        if self.window is not None and time.time() - self.started_at > self.window:
+            return PENDING  # Outside the window: leave it for the next run
+
+        log_dir = CODE_DIR / f"user_{username}" / "training_results"
+        log_dir.mkdir(parents=True, exist_ok=True)
+        log_path = log_dir / "training.log"
+        attempts = self.state["jobs"][username]["attempts"] + 1
+        self.update_job(username, status=RUNNING, attempts=attempts,
+                        started=datetime.now().isoformat(timespec="seconds"), log=str(log_path))
+
+        start_time = time.time()
+        popen_kwargs = {}
+        if os.name == "posix":
+            popen_kwargs["start_new_session"] = True  # Own process group, so a timeout kills joblib workers too
+        else:
+            popen_kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+
+        with open(log_path, "w", encoding="utf-8") as log:
+            process = subprocess.Popen(self.job_command(username), cwd=str(CODE_DIR), env=self.job_env(),
+                                       stdout=log, stderr=subprocess.STDOUT, **popen_kwargs)
+            try:
+                returncode = process.wait(timeout=self.timeout)
+                status = DONE if returncode == 0 else FAILED
+            except subprocess.TimeoutExpired:
+                self.kill(process)
+                returncode = None
+                status = TIMEOUT
+
+        duration = time.time() - start_time
+        self.update_job(username, status=status, returncode=returncode, duration=round(duration, 1),
+                        finished=datetime.now().isoformat(timespec="seconds"))
+        self.report(username, status, duration)
+        return status
+
+    @staticmethod
+    def kill(process: subprocess.Popen):
+        try:
+            if os.name == "posix":
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], capture_output=True)
+        except OSError:
+            process.kill()
+        process.wait()
+
+    def report(self, username: str, status: str, duration: float):
+        with self.lock:
+            jobs = self.state["jobs"].values()
+            total = len(self.state["jobs"])
+            finished = [job for job in jobs if job["status"] in (DONE, FAILED, TIMEOUT)]
+            remaining = sum(1 for job in jobs if job["status"] in (PENDING, RUNNING))
+            durations = [job["duration"] for job in finished if job.get("duration")]
+
+        icon = {DONE: "✅", FAILED: "❌", TIMEOUT: "⏰"}[status]
+        eta = ""
+        if durations and remaining:
+            average = sum(durations) / len(durations)
+            eta = f" | ETA {format_duration(average * remaining / self.workers)}"
+        elapsed = format_duration(time.time() - self.started_at)
+        print(f"[{len(finished)}/{total}] {icon} {username} {status} in {format_duration(duration)}"
+              f" | elapsed {elapsed}{eta}", flush=True)
+
+    def run(self) -> Dict[str, int]:
+        """Run all queued jobs and return a count per final status"""
+        done_before = sum(1 for job in self.state["jobs"].values() if job["status"] == DONE)
+        print(f"📋 Batch {self.state['batch']}: {len(self.queue)} job(s) queued, {done_before} already done")
+        print(f"⚙️  {self.workers} parallel job(s) x {self.job_cores} core(s) (budget {self.cores} cores)"
+              + (f", timeout {format_duration(self.timeout)}" if self.timeout else ""))
+
+        self.started_at = time.time()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            statuses = list(pool.map(self.run_job, self.queue))
+
+        counts = {status: statuses.count(status) for status in (DONE, FAILED, TIMEOUT, PENDING)}
+        counts[DONE] += done_before
+        return counts
+
+
+def run_training_schedule(users: List[str], **options) -> Dict[str, int]:
+    scheduler = TrainingScheduler(users, **options)
+    counts = scheduler.run()
+
+    print(f"{'='*60}")
+    print(f"📊 TRAINING SUMMARY: {counts[DONE]}/{len(users)} users trained successfully"
+          f" ({counts[FAILED]} failed, {counts[TIMEOUT]} timed out, {counts[PENDING]} left for the next run)")
+    print(f"📁 State: {scheduler.state_file}")
+    print(f"{'='*60}")
+    return counts
+
+
+def get_available_users() -> List[str]:
+    """User folders (user_<name>) next to this script"""
+    return sorted(item.name.replace("user_", "", 1) for item in CODE_DIR.iterdir()
+                  if item.is_dir() and item.name.startswith("user_"))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the motion SVM models of many users in parallel.")
+    parser.add_argument("--users", nargs="+", help="Users to train (default: every user_* folder).")
+    parser.add_argument("--cores", type=int, help="Total core budget (default: all cores).")
+    parser.add_argument("--job-cores", type=int, default=DEFAULT_JOB_CORES,
+                        help="Cores given to each training job.")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_MINUTES,
+                        help="Per-job timeout in minutes (0 = no timeout).")
+    parser.add_argument("--window", type=float, help="Do not start new jobs after this many minutes.")
+    parser.add_argument("--incremental", action="store_true", help="Pass --incremental to every job.")
+    parser.add_argument("--fresh", action="store_true", help="Start a new batch instead of resuming.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    users = args.users or get_available_users()
+    if not users:
+        print("❌ No user folders found! (folders should start with 'user_')")
+        sys.exit(1)
+
+    counts = run_training_schedule(users, cores=args.cores, job_cores=args.job_cores, timeout_minutes=args.timeout,
+                                   window_minutes=args.window, incremental=args.incremental, fresh=args.fresh)
+    sys.exit(0 if counts[FAILED] == counts[TIMEOUT] == 0 else 1)
@@ -1,5 +1,6 @@
 import argparse
 import os
+import sys
 import time
 import pickle
 from collections import deque
@@ -8,6 +9,11 @@ import cv2
 import mediapipe as mp
 import numpy as np
 
+# Shared feature extraction lives in hybrid_realtime_pipeline/landmark_features.py;
+# appended (not prepended) so same-named scripts in this folder still win
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from landmark_features import extract_wrist, get_finger_states, is_fist
+
 # Constants from original training_session.py
 BUFFER_SIZE = 60
 SMOOTHING_WINDOW = 3
@@ -18,7 +24,7 @@ STATIC_HOLD_SECONDS = 1.0
 INSTRUCTION_WINDOW = "Pose Instructions"
 
 # Constants from test_gesture_recognition.py
-DELTA_WEIGHT = 10.0  # Same as training
+DELTA_WEIGHT = 10.0  # Fallback only: the model pickle records the weight it was trained with
 CONFIDENCE_THRESHOLD = 0.65  # 70% confidence minimum
 MODELS_DIR = 'models'
 MODEL_PKL = os.path.join(MODELS_DIR, 'motion_svm_model.pkl')
@@ -59,7 +65,7 @@ class AttemptStats:
 
 
 def load_models():
-    """Load trained SVM model, scaler, and static/dynamic classifier"""
+    """Load trained SVM model, scaler, static/dynamic classifier and the model's delta weight"""
     if not os.path.exists(MODEL_PKL) or not os.path.exists(SCALER_PKL):
         raise FileNotFoundError(f"Model files not found! Please check:\n{MODEL_PKL}\n{SCALER_PKL}")
     
@@ -78,10 +84,12 @@ def load_models():
     print("✅ Models loaded successfully!")
     print(f"   - SVM Model: {len(model_data['label_encoder'].classes_)} classes")
     print(f"   - Classes: {list(model_data['label_encoder'].classes_)}")
+    delta_weight = float(model_data.get('delta_weight', DELTA_WEIGHT))
+    print(f"   - Delta weight: {delta_weight}")
     if static_dynamic_data:
         print(f"   - Static/Dynamic Classifier: Available")
     
-    return model_data['model'], model_data['label_encoder'], scaler, static_dynamic_data
+    return model_data['model'], model_data['label_encoder'], scaler, static_dynamic_data, delta_weight
 
 
 def load_gesture_templates():
@@ -110,122 +118,6 @@ def load_gesture_templates():
     return templates
 
 
-def get_finger_states(hand_landmarks, handedness_label: str) -> List[int]:
-    """Extract finger states with improved thumb detection"""
-    states = [0, 0, 0, 0, 0]
-    if not hand_landmarks:
-        return states
-
-    # Get key landmarks
-    wrist = hand_landmarks.landmark[0]
-    thumb_tip = hand_landmarks.landmark[4]    # Thumb tip
-    thumb_ip = hand_landmarks.landmark[3]     # Thumb IP joint
-    thumb_mcp = hand_landmarks.landmark[2]    # Thumb MCP joint
-    index_mcp = hand_landmarks.landmark[5]    # Index MCP joint
-    
-    mcp_middle = hand_landmarks.landmark[9]
-    mcp_pinky = hand_landmarks.landmark[17]
-
-    # Determine palm orientation
-    v1 = [mcp_middle.x - wrist.x, mcp_middle.y - wrist.y]
-    v2 = [mcp_pinky.x - wrist.x, mcp_pinky.y - wrist.y]
-    cross_z = v1[0] * v2[1] - v1[1] * v2[0]
-    palm_facing = 1 if cross_z > 0 else -1
-
-    # IMPROVED THUMB DETECTION
-    # Method 1: Distance from thumb tip to palm center
-    palm_center_x = (index_mcp.x + mcp_pinky.x) / 2
-    palm_center_y = (index_mcp.y + mcp_pinky.y) / 2
-    thumb_to_palm_dist = ((thumb_tip.x - palm_center_x)**2 + (thumb_tip.y - palm_center_y)**2)**0.5
-    
-    # Method 2: Thumb extension check (tip vs MCP joint)
-    thumb_extended_x = abs(thumb_tip.x - thumb_mcp.x) > 0.04  # Extended horizontally
-    thumb_extended_y = abs(thumb_tip.y - thumb_mcp.y) > 0.03  # Extended vertically
-    
-    # Method 3: Relative position check (original method as fallback)
-    if handedness_label == "Right":
-        if palm_facing > 0:
-            thumb_position_open = thumb_tip.x < thumb_ip.x
-        else:
-            thumb_position_open = thumb_tip.x > thumb_ip.x
-    else:
-        if palm_facing > 0:
-            thumb_position_open = thumb_tip.x < thumb_ip.x
-        else:
-            thumb_position_open = thumb_tip.x > thumb_ip.x
-    
-    # Method 4: Angle-based detection (thumb joints alignment)
-    # Calculate angle between thumb MCP->IP->TIP
-    import math
-    def angle_between_points(p1, p2, p3):
-        """Calculate angle at p2 formed by p1-p2-p3"""
-        v1 = [p1.x - p2.x, p1.y - p2.y]
-        v2 = [p3.x - p2.x, p3.y - p2.y]
-        
-        dot_product = v1[0]*v2[0] + v1[1]*v2[1]
-        mag1 = (v1[0]**2 + v1[1]**2)**0.5
-        mag2 = (v2[0]**2 + v2[1]**2)**0.5
-        
-        if mag1 == 0 or mag2 == 0:
-            return 0
-        
-        cos_angle = dot_product / (mag1 * mag2)
-        cos_angle = max(-1, min(1, cos_angle))  # Clamp to [-1, 1]
-        return math.degrees(math.acos(cos_angle))
-    
-    thumb_angle = angle_between_points(thumb_mcp, thumb_ip, thumb_tip)
-    thumb_straight = thumb_angle > 140  # Straight thumb (extended)
-    
-    # COMBINED THUMB DECISION (Multiple criteria)
-    # Thumb is open if ANY of these conditions:
-    # 1. Distance from palm center is large (extended away)
-    # 2. Extended significantly in any direction  
-    # 3. Thumb joints are nearly straight (extended)
-    # 4. AND basic position check passes
-    
-    distance_open = thumb_to_palm_dist > 0.08
-    extension_open = thumb_extended_x or thumb_extended_y
-    angle_open = thumb_straight
-    
-    # Use OR logic - if any method detects open thumb
-    thumb_is_open = (distance_open or extension_open or angle_open) and thumb_position_open
-    states[0] = 1 if thumb_is_open else 0
-    
-    # Debug print for thumb detection
-    # print(f"Thumb: dist={thumb_to_palm_dist:.3f}, ext_x={thumb_extended_x}, ext_y={thumb_extended_y}, pos={thumb_position_open}, result={states[0]}")
-
-    # Other fingers (unchanged)
-    states[1] = 1 if hand_landmarks.landmark[8].y < hand_landmarks.landmark[6].y else 0
-    states[2] = 1 if hand_landmarks.landmark[12].y < hand_landmarks.landmark[10].y else 0
-    states[3] = 1 if hand_landmarks.landmark[16].y < hand_landmarks.landmark[14].y else 0
-    states[4] = 1 if hand_landmarks.landmark[20].y < hand_landmarks.landmark[18].y else 0
-    return states
-
-
-def is_fist(hand_landmarks) -> bool:
-    """Check if hand is in fist position"""
-    if not hand_landmarks:
-        return False
-    bent = 0
-    if hand_landmarks.landmark[8].y > hand_landmarks.landmark[5].y:
-        bent += 1
-    if hand_landmarks.landmark[12].y > hand_landmarks.landmark[9].y:
-        bent += 1
-    if hand_landmarks.landmark[16].y > hand_landmarks.landmark[13].y:
-        bent += 1
-    if hand_landmarks.landmark[20].y > hand_landmarks.landmark[17].y:
-        bent += 1
-    return bent >= 3
-
-
-def extract_wrist(hand_landmarks):
-    """Extract wrist position"""
-    if not hand_landmarks:
-        return None
-    wrist = hand_landmarks.landmark[0]
-    return np.array([wrist.x, wrist.y], dtype=float)
-
-
 def smooth_sequence(seq_xy: List[np.ndarray], window: int = 3) -> List[np.ndarray]:
     """Smooth motion sequence"""
     if not seq_xy:
@@ -281,8 +173,8 @@ def compute_motion_features(smoothed_xy: List[np.ndarray]) -> Optional[Dict]:
     }
 
 
-def prepare_features(left_states: List[int], right_states: List[int], motion_features: Dict, scaler, use_expected_left: bool = False, expected_left: List[int] = None) -> np.ndarray:
-    """Prepare features for SVM prediction - same preprocessing as training"""
+def prepare_features(left_states: List[int], right_states: List[int], motion_features: Dict, scaler, use_expected_left: bool = False, expected_left: List[int] = None, delta_weight: float = DELTA_WEIGHT) -> np.ndarray:
+    """Prepare features for SVM prediction - same preprocessing as training (delta_weight: the model's)"""
     # Use expected left states instead of actual for trigger hand
     actual_left = expected_left if (use_expected_left and expected_left) else left_states
     
@@ -293,12 +185,12 @@ def prepare_features(left_states: List[int], right_states: List[int], motion_fea
     motion_array = np.array([[
         motion_features['main_axis_x'],
         motion_features['main_axis_y'], 
-        motion_features['delta_x'] * DELTA_WEIGHT,
-        motion_features['delta_y'] * DELTA_WEIGHT,
-        motion_features['motion_left'] * DELTA_WEIGHT,
-        motion_features['motion_right'] * DELTA_WEIGHT,
-        motion_features['motion_up'] * DELTA_WEIGHT,
-        motion_features['motion_down'] * DELTA_WEIGHT
+        motion_features['delta_x'] * delta_weight,
+        motion_features['delta_y'] * delta_weight,
+        motion_features['motion_left'] * delta_weight,
+        motion_features['motion_right'] * delta_weight,
+        motion_features['motion_up'] * delta_weight,
+        motion_features['motion_down'] * delta_weight
     ]], dtype=float)
     
     # Scale motion features
@@ -325,8 +217,9 @@ def prepare_static_features(left_states: List[int], right_states: List[int], del
 
 def evaluate_with_ml(left_states: List[int], right_states: List[int], motion_features: Dict, 
                     target_gesture: str, svm_model, label_encoder, scaler, static_dynamic_data, 
-                    gesture_templates: Dict, duration: float) -> Tuple[bool, str, str]:
-    """Enhanced evaluation with strict validation"""
+                    gesture_templates: Dict, duration: float,
+                    delta_weight: float = DELTA_WEIGHT) -> Tuple[bool, str, str]:
+    """Enhanced evaluation with strict validation (delta_weight: the weight the SVM was trained with)"""
     
     # Get expected template for target gesture
     if target_gesture not in gesture_templates:
@@ -416,7 +309,8 @@ def evaluate_with_ml(left_states: List[int], right_states: List[int], motion_fea
     try:
         X = prepare_features(
             left_states, right_states, motion_features, scaler,
-            use_expected_left=True, expected_left=expected['left_fingers']
+            use_expected_left=True, expected_left=expected['left_fingers'],
+            delta_weight=delta_weight
         )
         
         # Predict gesture
@@ -675,7 +569,7 @@ def run_ml_training_session(camera_index: int = 0):
     
     # Load ML models and templates
     try:
-        svm_model, label_encoder, scaler, static_dynamic_data = load_models()
+        svm_model, label_encoder, scaler, static_dynamic_data, delta_weight = load_models()
         gesture_templates = load_gesture_templates()
         available_gestures = list(label_encoder.classes_)
         
@@ -879,7 +773,8 @@ def run_ml_training_session(camera_index: int = 0):
                             recorded_left_states, recorded_right_states, 
                             motion_features, target_gesture, 
                             svm_model, label_encoder, scaler, static_dynamic_data,
-                            gesture_templates, duration
+                            gesture_templates, duration,
+                            delta_weight=delta_weight
                         )
                         
                         stats.record(success, reason_msg)
@@ -0,0 +1,350 @@
+"""
+Continuous trigger-free gesture recognition
+Nhận diện cử chỉ liên tục, không cần nắm tay trái để kích hoạt
+
+The recording protocol of the practice/test scripts classifies only after
+the left fist opens: both hands are needed and the fist-release time is
+added to every command. ContinuousRecognizer instead follows the right
+wrist (the hand the training data tracks) frame by frame:
+
+- a ring buffer keeps the last BUFFER_SIZE samples (time, wrist, finger
+  pattern);
+- a speed-based segmenter marks motion onset and, after REST_FRAMES
+  still frames, the end of the motion;
+- when a motion ends, sliding windows that all end on the last moving
+  frame but start at different points around the onset are scored in one
+  batch, and non-maximum suppression keeps the best window;
+- a hand held still with one finger pattern for STATIC_HOLD_SECONDS is a
+  static candidate (once per hold);
+- a cooldown, and the rule that a new command may not reuse frames of the
+  previous one, stop repeated firing.
+
+Every event carries its latency measured from the end of the motion (or
+from the moment the hold was long enough), not from a trigger release.
+
+The recognizer does not know about models: it is given a scorer that maps
+a batch of (right finger states, motion features) to (label, confidence)
+pairs, and optionally an accept(label, right_states, motion_features,
+duration) check such as the template cascade.
+
+Live test with the webcam:
+
+    python continuous_recognizer.py [--camera 0] [--models-dir code/models]
+"""
+
+import math
+import time
+from collections import Counter, deque
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from motion_features import MotionAccumulator
+
+BUFFER_SIZE = 90                 # ~3 s at 30 fps
+SMOOTHING_WINDOW = 3
+ONSET_SPEED = 0.25               # wrist speed (frame widths / s) that starts a motion
+REST_SPEED = 0.12                # below this the wrist counts as still
+ONSET_FRAMES = 2                 # consecutive fast frames needed for an onset
+REST_FRAMES = 3                  # consecutive still frames that end a motion
+PRE_ROLL_FRAMES = 3              # frames before the onset a window may start at
+MIN_WINDOW_FRAMES = 6
+WINDOW_STRIDE = 2
+MIN_DELTA_MAG = 0.05
+STATIC_HOLD_SECONDS = 1.0
+STATIC_MOTION_MAX = 0.05
+MIN_CONFIDENCE = 0.65
+COOLDOWN_SECONDS = 0.7
+
+Scorer = Callable[[Sequence[Tuple[List[int], Dict]]], List[Tuple[str, float]]]
+AcceptCheck = Callable[[str, List[int], Dict, float], bool]
+
+
+class Sample(NamedTuple):
+    t: float
+    x: float
+    y: float
+    fingers: Tuple[int, ...]
+
+
+class Candidate(NamedTuple):
+    kind: str                # 'dynamic' or 'static'
+    start: int               # sample sequence numbers, inclusive
+    end: int
+    start_time: float
+    end_time: float
+    right_states: List[int]
+    motion_features: Dict
+
+
+def window_features(samples: Sequence[Sample]) -> Optional[Dict]:
+    """Motion features of a window, computed exactly like a recorded attempt"""
+    motion = MotionAccumulator(window=SMOOTHING_WINDOW, max_points=None)
+    for sample in samples:
+        motion.add(sample.x, sample.y)
+    return motion.features()
+
+
+def dominant_fingers(samples: Sequence[Sample]) -> List[int]:
+    """Most frequent finger pattern of a window (ties: the latest one)"""
+    counts = Counter(sample.fingers for sample in samples)
+    best = max(counts.values())
+    for sample in reversed(samples):
+        if counts[sample.fingers] == best:
+            return list(sample.fingers)
+    return []
+
+
+class ContinuousRecognizer:
+    """Sliding-window segmenter + scorer with debouncing and non-maximum suppression"""
+
+    def __init__(self, scorer: Scorer, accept: Optional[AcceptCheck] = None,
+                 min_confidence: float = MIN_CONFIDENCE, cooldown_seconds: float = COOLDOWN_SECONDS,
+                 buffer_size: int = BUFFER_SIZE, static_hold_seconds: float = STATIC_HOLD_SECONDS):
+        self.scorer = scorer
+        self.accept = accept
+        self.min_confidence = min_confidence
+        self.cooldown_seconds = cooldown_seconds
+        self.static_hold_seconds = static_hold_seconds
+        self.samples: deque = deque(maxlen=buffer_size)
+        self.sequence = 0            # sequence number of the next sample
+        self.latencies: deque = deque(maxlen=200)
+        self.fired = 0
+        self.suppressed = 0
+        self.last_fire_time = -math.inf
+        self.last_fire_end = -1       # last sample of the previous command; later commands start after it
+        self.reset()
+
+    def reset(self):
+        """Forget the trajectory (hand lost, session reset)"""
+        self.samples.clear()
+        self.moving = False
+        self.fast_run = 0
+        self.still_run = 0
+        self.motion_start = None      # sequence number of the first moving sample
+        self.last_moving = None
+        self.hold_start = None        # first sample of the current still, same-pattern hold
+        self.static_fired = False
+
+    def window(self, start: int, end: int) -> List[Sample]:
+        offset = self.sequence - len(self.samples)
+        return list(self.samples)[max(start - offset, 0):end - offset + 1]
+
+    def push(self, t: float, wrist: Optional[Tuple[float, float]], right_states: Optional[Sequence[int]]) -> Optional[Dict]:
+        """Add one frame (wrist None: right hand not detected). Returns a command event or None"""
+        if wrist is None or right_states is None:
+            event = self.end_motion(t) if self.moving else None
+            self.reset()
+            return event
+
+        sample = Sample(float(t), float(wrist[0]), float(wrist[1]), tuple(int(s) for s in right_states))
+        previous = self.samples[-1] if self.samples else None
+        self.samples.append(sample)
+        current = self.sequence
+        self.sequence += 1
+        if previous is None:
+            self.hold_start = (current, sample)
+            return None
+
+        dt = max(sample.t - previous.t, 1e-3)
+        speed = math.hypot(sample.x - previous.x, sample.y - previous.y) / dt
+
+        if speed >= ONSET_SPEED:
+            self.fast_run += 1
+        else:
+            self.fast_run = 0
+        if speed < REST_SPEED:
+            self.still_run += 1
+        else:
+            self.still_run = 0
+
+        if self.moving:
+            if speed >= REST_SPEED:
+                self.last_moving = current
+            elif self.still_run >= REST_FRAMES:
+                return self.end_motion(t)
+            return None
+
+        if self.fast_run >= ONSET_FRAMES:
+            self.moving = True
+            self.motion_start = current - ONSET_FRAMES
+            self.last_moving = current
+            self.hold_start = None
+            self.static_fired = False
+            return None
+
+        return self.check_hold(t, sample, current, speed)
+
+    def check_hold(self, t: float, sample: Sample, current: int, speed: float) -> Optional[Dict]:
+        """Static candidate: same finger pattern and a still wrist for static_hold_seconds"""
+        if speed >= REST_SPEED or self.hold_start is None or self.hold_start[1].fingers != sample.fingers:
+            self.hold_start = (current, sample)
+            self.static_fired = False
+            return None
+        if self.static_fired:
+            return None
+
+        start, start_sample = self.hold_start
+        if sample.t - start_sample.t < self.static_hold_seconds:
+            return None
+        self.static_fired = True
+        features = window_features(self.window(start, current))
+        if features is None or features['delta_magnitude'] > STATIC_MOTION_MAX:
+            return None
+        candidate = Candidate('static', start, current, start_sample.t, sample.t,
+                              list(sample.fingers), features)
+        return self.decide([candidate], t)
+
+    def end_motion(self, t: float) -> Optional[Dict]:
+        """Score sliding windows ending on the last moving sample; keep the best one"""
+        self.moving = False
+        self.hold_start = (self.sequence - 1, self.samples[-1]) if self.samples else None
+        self.static_fired = False
+        end = self.last_moving
+        first = max(self.motion_start - PRE_ROLL_FRAMES, self.sequence - len(self.samples), self.last_fire_end + 1)
+        candidates = []
+        for start in range(first, end - MIN_WINDOW_FRAMES + 2, WINDOW_STRIDE):
+            samples = self.window(start, end)
+            features = window_features(samples)
+            if features is None or features['delta_magnitude'] < MIN_DELTA_MAG:
+                continue
+            candidates.append(Candidate('dynamic', start, end, samples[0].t, samples[-1].t,
+                                        dominant_fingers(samples), features))
+        return self.decide(candidates, t) if candidates else None
+
+    def decide(self, candidates: List[Candidate], t: float) -> Optional[Dict]:
+        """Non-maximum suppression over overlapping candidates, then debounce"""
+        scores = self.scorer([(c.right_states, c.motion_features) for c in candidates])
+        best = None
+        for candidate, (label, confidence) in zip(candidates, scores):
+            if confidence < self.min_confidence:
+                continue
+            duration = candidate.end_time - candidate.start_time
+            if self.accept is not None and not self.accept(label, candidate.right_states,
+                                                           candidate.motion_features, duration):
+                continue
+            if best is None or confidence > best[2]:
+                best = (candidate, label, confidence)
+        if best is None:
+            return None
+
+        candidate, label, confidence = best
+        if t - self.last_fire_time < self.cooldown_seconds or candidate.start <= self.last_fire_end:
+            self.suppressed += 1
+            return None
+
+        self.last_fire_time = t
+        self.last_fire_end = candidate.end
+        self.fired += 1
+        latency = max(t - candidate.end_time, 0.0)
+        self.latencies.append(latency)
+        return {
+            'gesture': label,
+            'confidence': float(confidence),
+            'kind': candidate.kind,
+            'right_states': candidate.right_states,
+            'motion_features': candidate.motion_features,
+            'duration': candidate.end_time - candidate.start_time,
+            'motion_end': candidate.end_time,
+            'latency_ms': round(latency * 1000.0, 1),
+            'candidates': len(candidates),
+        }
+
+    def stats(self) -> Dict:
+        latencies = sorted(self.latencies)
+        return {
+            'fired': self.fired,
+            'suppressed': self.suppressed,
+            'latency_ms_mean': round(sum(latencies) / len(latencies) * 1000.0, 1) if latencies else None,
+            'latency_ms_p95': round(latencies[int(0.95 * (len(latencies) - 1))] * 1000.0, 1) if latencies else None,
+        }
+
+
+def svm_scorer(svm_model, label_encoder, prepare: Callable[[List[int], List[int], Dict], 'object'],
+               left_states: Optional[List[int]] = None) -> Scorer:
+    """Scorer over an SVM: prepare(left, right, motion) builds one feature row the way the caller's
+    training did; the left hand is the fist the training data was recorded with"""
+    import numpy as np
+
+    left_states = list(left_states or [0, 0, 0, 0, 0])
+
+    def score(batch):
+        X = np.vstack([prepare(left_states, list(right), motion) for right, motion in batch])
+        probabilities = np.asarray(svm_model.predict_proba(X))
+        best = probabilities.argmax(axis=1)
+        labels = label_encoder.inverse_transform(np.asarray(svm_model.classes_)[best])
+        return [(str(label), float(probabilities[row, index])) for row, (label, index) in enumerate(zip(labels, best))]
+
+    return score
+
+
+def main():
+    """Webcam demo: prints every command with its latency from the end of the motion"""
+    import argparse
+    import os
+
+    import cv2
+    import mediapipe as mp
+
+    from gesture_cascade import GestureCascade
+    from landmark_features import finger_states, results_to_array, wrist_xy
+    from training_session_web import load_session_resources, prepare_features
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description='Continuous trigger-free gesture recognition')
+    parser.add_argument('--camera', type=int, default=0)
+    parser.add_argument('--models-dir', default=os.path.join(script_dir, 'code', 'models'))
+    parser.add_argument('--training-results-dir', default=os.path.join(script_dir, 'code', 'training_results'))
+    parser.add_argument('--min-confidence', type=float, default=MIN_CONFIDENCE)
+    parser.add_argument('--cooldown', type=float, default=COOLDOWN_SECONDS)
+    args = parser.parse_args()
+
+    resources = load_session_resources(args.models_dir, args.training_results_dir)
+    cascade = GestureCascade(resources['templates'])
+
+    def accept(label, right_states, motion_features, duration):
+        verdict = cascade.check(label, right_states, motion_features, duration)
+        return verdict is None or verdict[0]
+
+    recognizer = ContinuousRecognizer(
+        svm_scorer(resources['models'], resources['label_encoder'],
+                   lambda left, right, motion: prepare_features(left, right, motion, resources['scaler'],
+                                                                delta_weight=resources['delta_weight'])),
+        accept=accept, min_confidence=args.min_confidence, cooldown_seconds=args.cooldown)
+
+    hands = mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=2,
+                                     min_detection_confidence=0.7, min_tracking_confidence=0.5)
+    cap = cv2.VideoCapture(args.camera)
+    last_command = ""
+    print("[INFO] Continuous mode: move the RIGHT hand, no left fist needed. Press 'q' to quit.")
+    try:
+        while cap.isOpened():
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frame = cv2.flip(frame, 1)
+            results = hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            wrist, right_states = None, None
+            if results.multi_hand_landmarks:
+                landmarks, labels, _ = results_to_array(results)
+                if "Right" in labels:
+                    index = labels.index("Right")
+                    wrist = wrist_xy(landmarks[index])
+                    right_states = finger_states(landmarks[index]).tolist()
+
+            event = recognizer.push(time.time(), wrist, right_states)
+            if event:
+                last_command = f"{event['gesture']} ({event['confidence']:.0%}, {event['latency_ms']:.0f} ms)"
+                print(f"🎯 {event['kind']}: {last_command}")
+
+            cv2.putText(frame, last_command, (20, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
+            cv2.imshow('Continuous Gesture Recognition', frame)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    finally:
+        cap.release()
+        cv2.destroyAllWindows()
+        hands.close()
+        print(f"[INFO] {recognizer.stats()}")
+
+
+if __name__ == '__main__':
+    main()
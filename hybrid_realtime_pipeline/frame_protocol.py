@@ -0,0 +1,269 @@
+"""
+Stdin protocol shared by web_gesture_processor and the Node backend.
+
+Two kinds of messages can be interleaved on the same byte stream:
+
+- Commands: one JSON object per line, starting with '{' (reset, stop, and the
+  legacy base64 'frame' command).
+- Binary frames: a fixed 9-byte header followed by the payload
+
+      kind   uint8   FRAME_JPEG (raw JPEG bytes), FRAME_RGB (packed RGB24) or
+                     FRAME_LANDMARKS (hand landmarks tracked by the client)
+      width  uint16  big-endian; FRAME_RGB: width, FRAME_LANDMARKS: hand count
+      height uint16  big-endian, only used by FRAME_RGB
+      length uint32  big-endian payload size in bytes
+
+When the kind byte has SESSION_FLAG set, the header is followed by a uint16
+big-endian session id length and the UTF-8 session id, which lets one
+gesture_session_server process route frames for many practice sessions.
+
+A FRAME_LANDMARKS payload holds one 128-byte record per hand:
+
+      label  uint8   0 = Left, 1 = Right (MediaPipe handedness)
+      score  uint8   handedness score * 255
+      points int16   63 big-endian values, x y z of the 21 landmarks in
+                     MediaPipe's normalized coordinates, times LANDMARK_SCALE
+
+so a client running hand tracking itself sends ~260 bytes for two hands
+instead of a whole image, and the server skips decoding and MediaPipe.
+
+The first byte of a message tells the two apart, so no JSON or base64 parsing
+is done for frames. Decoded image frames are always RGB uint8 arrays, which is what
+MediaPipe Hands consumes.
+
+LatestFrameQueue sits between the stdin reader thread and the processing
+loop: commands are always delivered in order, but only the newest frames
+since the last command are kept, so feedback never lags behind the learner.
+"""
+
+import json
+import struct
+import threading
+from collections import deque
+from typing import BinaryIO, Dict, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+FRAME_JPEG = 0x01
+FRAME_RGB = 0x02
+FRAME_LANDMARKS = 0x03
+SESSION_FLAG = 0x80
+
+HEADER = struct.Struct('>BHHI')
+SESSION_ID_LENGTH = struct.Struct('>H')
+MAX_PAYLOAD_BYTES = 16 * 1024 * 1024  # A 1080p RGB24 frame is ~6MB, webcam JPEGs are far smaller
+
+HAND_LABELS = ('Left', 'Right')
+LANDMARK_SCALE = 16384.0   # int16 fixed point: +-2.0 in steps of 6e-5
+LANDMARK_VALUES = 21 * 3
+HAND_RECORD = np.dtype([('label', 'u1'), ('score', 'u1'), ('points', '>i2', (LANDMARK_VALUES,))])
+
+# OpenCV >= 4.11 can decode straight to RGB; older builds need one conversion
+IMREAD_RGB = getattr(cv2, 'IMREAD_COLOR_RGB', None)
+
+
+class ProtocolError(Exception):
+    """Raised when the stream contains a malformed binary frame"""
+
+
+class Frame(NamedTuple):
+    """An undecoded binary frame as read from the stream"""
+    kind: int
+    width: int
+    height: int
+    payload: bytes
+    session_id: Optional[str] = None
+
+
+def _pack(kind: int, width: int, height: int, payload: bytes, session_id: Optional[str]) -> bytes:
+    if session_id is None:
+        return HEADER.pack(kind, width, height, len(payload)) + payload
+    sid = session_id.encode('utf-8')
+    return (HEADER.pack(kind | SESSION_FLAG, width, height, len(payload))
+            + SESSION_ID_LENGTH.pack(len(sid)) + sid + payload)
+
+
+def encode_jpeg_frame(jpeg_bytes: bytes, session_id: Optional[str] = None) -> bytes:
+    """Build a FRAME_JPEG message (for Python-side senders; Node has its own encoder)"""
+    return _pack(FRAME_JPEG, 0, 0, jpeg_bytes, session_id)
+
+
+def encode_rgb_frame(rgb_frame: np.ndarray, session_id: Optional[str] = None) -> bytes:
+    """Build a FRAME_RGB message from an (H, W, 3) uint8 array"""
+    height, width = rgb_frame.shape[:2]
+    payload = np.ascontiguousarray(rgb_frame, dtype=np.uint8).tobytes()
+    return _pack(FRAME_RGB, width, height, payload, session_id)
+
+
+def encode_landmark_frame(hands: np.ndarray, labels, scores, session_id: Optional[str] = None) -> bytes:
+    """Build a FRAME_LANDMARKS message from (n, 21, 3) landmarks, n labels and n scores"""
+    hands = np.asarray(hands, dtype=float).reshape(-1, LANDMARK_VALUES)
+    records = np.zeros(len(hands), dtype=HAND_RECORD)
+    records['label'] = [HAND_LABELS.index(label) for label in labels]
+    records['score'] = np.clip(np.round(np.asarray(scores, dtype=float) * 255), 0, 255)
+    records['points'] = np.clip(np.round(hands * LANDMARK_SCALE), -32768, 32767)
+    return _pack(FRAME_LANDMARKS, len(hands), 0, records.tobytes(), session_id)
+
+
+def decode_landmarks(count: int, payload: bytes) -> Tuple[np.ndarray, list, np.ndarray]:
+    """FRAME_LANDMARKS payload -> ((n, 21, 3) float32 landmarks, labels, scores), like results_to_array"""
+    if len(payload) != count * HAND_RECORD.itemsize:
+        raise ProtocolError(f"Landmark frame size mismatch: {len(payload)} bytes for {count} hands")
+    records = np.frombuffer(payload, dtype=HAND_RECORD)
+    if np.any(records['label'] > 1):
+        raise ProtocolError("Unknown hand label in landmark frame")
+    hands = (records['points'].astype(np.float32) / LANDMARK_SCALE).reshape(count, 21, 3)
+    labels = [HAND_LABELS[label] for label in records['label']]
+    return hands, labels, records['score'].astype(np.float32) / 255.0
+
+
+def decode_jpeg(payload: bytes) -> np.ndarray:
+    """Decode JPEG bytes to an RGB array"""
+    buffer = np.frombuffer(payload, dtype=np.uint8)
+    if IMREAD_RGB is not None:
+        frame = cv2.imdecode(buffer, IMREAD_RGB)
+    else:
+        frame = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+        if frame is not None:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    if frame is None:
+        raise ProtocolError("Could not decode JPEG frame")
+    return frame
+
+
+def decode_frame(kind: int, width: int, height: int, payload: bytes) -> np.ndarray:
+    """Turn a binary frame payload into an RGB array"""
+    if kind == FRAME_JPEG:
+        return decode_jpeg(payload)
+    if kind == FRAME_RGB:
+        if len(payload) != width * height * 3:
+            raise ProtocolError(f"RGB frame size mismatch: {len(payload)} bytes for {width}x{height}")
+        return np.frombuffer(payload, dtype=np.uint8).reshape(height, width, 3)
+    if kind == FRAME_LANDMARKS:
+        raise ProtocolError("Landmark frames carry no image; use decode_landmarks")
+    raise ProtocolError(f"Unknown frame kind: {kind}")
+
+
+def read_exact(stream: BinaryIO, size: int) -> Optional[bytes]:
+    """Read exactly size bytes, or None if the stream ends first"""
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        chunk = stream.read(remaining)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+def read_message(stream: BinaryIO) -> Optional[Tuple[str, object]]:
+    """Read the next message from a binary stream.
+
+    Returns ('command', dict), ('frame', Frame) or None at end of stream.
+    Frame payloads are returned undecoded so callers can decide whether a
+    frame is worth decoding at all. After a ProtocolError the stream position
+    is unknown (a rejected header's payload is left unread), so callers must
+    stop reading rather than carry on.
+    """
+    while True:
+        first = stream.read(1)
+        if not first:
+            return None
+
+        if first in (b'\n', b'\r', b' '):
+            continue
+
+        if first == b'{':
+            line = first + stream.readline()
+            return 'command', json.loads(line.decode('utf-8'))
+
+        if first[0] & ~SESSION_FLAG not in (FRAME_JPEG, FRAME_RGB, FRAME_LANDMARKS):
+            raise ProtocolError(f"Unknown message byte: {first!r}")
+
+        header_rest = read_exact(stream, HEADER.size - 1)
+        if header_rest is None:
+            return None
+
+        kind, width, height, length = HEADER.unpack(first + header_rest)
+        if length > MAX_PAYLOAD_BYTES:
+            raise ProtocolError(f"Frame too large: {length} bytes")
+
+        session_id = None
+        if kind & SESSION_FLAG:
+            kind &= ~SESSION_FLAG
+            sid_length = read_exact(stream, SESSION_ID_LENGTH.size)
+            if sid_length is None:
+                return None
+            sid = read_exact(stream, SESSION_ID_LENGTH.unpack(sid_length)[0])
+            if sid is None:
+                return None
+            session_id = sid.decode('utf-8')
+
+        payload = read_exact(stream, length)
+        if payload is None:
+            return None
+        return 'frame', Frame(kind, width, height, payload, session_id)
+
+
+class LatestFrameQueue:
+    """Thread-safe ingestion queue that drops stale frames but never commands.
+
+    Items come out in arrival order. Frames queued after the most recent
+    command are capped at max_pending_frames; when a new frame would exceed
+    the cap, the oldest of those frames is dropped. A frame that arrived
+    before a command is never delivered after it.
+    """
+
+    def __init__(self, max_pending_frames: int = 1):
+        self.max_pending_frames = max(1, int(max_pending_frames))
+        self._items = deque()
+        self._tail_frames = 0       # frames queued after the last pending command
+        self._pending_commands = 0
+        self._cond = threading.Condition()
+        self.frames_received = 0
+        self.frames_dropped = 0
+
+    def put_frame(self, frame) -> None:
+        with self._cond:
+            self.frames_received += 1
+            if self._tail_frames >= self.max_pending_frames:
+                del self._items[len(self._items) - self._tail_frames]
+                self._tail_frames -= 1
+                self.frames_dropped += 1
+            self._items.append(('frame', frame))
+            self._tail_frames += 1
+            self._cond.notify()
+
+    def put_command(self, command) -> None:
+        with self._cond:
+            self._items.append(('command', command))
+            self._pending_commands += 1
+            self._tail_frames = 0
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Tuple[str, object]]:
+        """Pop the next item, waiting up to timeout seconds; None on timeout"""
+        with self._cond:
+            if not self._items and not self._cond.wait_for(lambda: self._items, timeout):
+                return None
+            kind, item = self._items.popleft()
+            if kind == 'command':
+                self._pending_commands -= 1
+            elif self._pending_commands == 0:
+                self._tail_frames -= 1
+            return kind, item
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._items)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                'frames_received': self.frames_received,
+                'frames_dropped': self.frames_dropped,
+                'pending': len(self._items),
+                'max_pending_frames': self.max_pending_frames
+            }
@@ -0,0 +1,119 @@
+"""
+Idle-aware frame scheduling
+Giảm tần suất chạy MediaPipe khi không có ai thực hiện cử chỉ
+
+While a loop waits for the left fist (WAIT/IDLE), most frames show an
+empty scene, yet every one of them paid for a full MediaPipe detection.
+AdaptiveFrameScheduler decides per frame whether hand detection should run:
+
+- active: every frame is processed. A frame that shows a wake-up cue (the
+  caller decides: a left fist, a right hand, an attempt being recorded)
+  keeps the scheduler active;
+- idle: after idle_after_seconds without a wake-up cue, only idle_fps
+  frames per second are processed; the others are skipped before any
+  decoding or detection. The first processed frame with a cue switches
+  back to active.
+
+Callers ask should_process(t) before decoding a frame and report what the
+processed frame showed with observe(t, wake). The on_change hook is called
+with (state, effective fps) on every switch, and stats() reports the
+effective processing rate, so a multi-session server can see that its CPU
+goes to the learners who are actually gesturing.
+
+Settings (environment):
+    GESTURE_IDLE_FPS             processed frames per second while idle (default 5, 0 disables skipping)
+    GESTURE_IDLE_AFTER_SECONDS   seconds without a wake-up cue before going idle (default 2)
+"""
+
+import os
+from collections import deque
+from typing import Callable, Dict, Optional
+
+DEFAULT_IDLE_FPS = 5.0
+DEFAULT_IDLE_AFTER_SECONDS = 2.0
+FPS_WINDOW_SECONDS = 2.0
+
+ACTIVE = 'active'
+IDLE = 'idle'
+
+
+class AdaptiveFrameScheduler:
+    """Full rate while someone is gesturing, idle_fps otherwise"""
+
+    def __init__(self, idle_fps: float = DEFAULT_IDLE_FPS, idle_after_seconds: float = DEFAULT_IDLE_AFTER_SECONDS,
+                 on_change: Optional[Callable[[str, float], None]] = None):
+        self.idle_fps = max(0.0, float(idle_fps))
+        self.idle_after_seconds = float(idle_after_seconds)
+        self.on_change = on_change
+        self.state = ACTIVE
+        self.last_wake = None          # time of the last frame with a wake-up cue
+        self.last_processed = None
+        self.processed_times: deque = deque()
+        self.frames = 0
+        self.processed = 0
+        self.skipped = 0
+
+    @classmethod
+    def from_env(cls, on_change: Optional[Callable[[str, float], None]] = None) -> "AdaptiveFrameScheduler":
+        return cls(float(os.environ.get('GESTURE_IDLE_FPS', DEFAULT_IDLE_FPS)),
+                   float(os.environ.get('GESTURE_IDLE_AFTER_SECONDS', DEFAULT_IDLE_AFTER_SECONDS)),
+                   on_change=on_change)
+
+    @property
+    def enabled(self) -> bool:
+        return self.idle_fps > 0
+
+    def should_process(self, t: float) -> bool:
+        """True if hand detection should run on the frame arriving at time t"""
+        self.frames += 1
+        if (self.state == ACTIVE or not self.enabled or self.last_processed is None
+                or t - self.last_processed >= 1.0 / self.idle_fps):
+            return True
+        self.skipped += 1
+        return False
+
+    def observe(self, t: float, wake: bool):
+        """Report a processed frame; wake: it showed a reason to run at full rate"""
+        self.processed += 1
+        self.last_processed = t
+        self.processed_times.append(t)
+        while self.processed_times and t - self.processed_times[0] > FPS_WINDOW_SECONDS:
+            self.processed_times.popleft()
+
+        if wake or self.last_wake is None:
+            self.last_wake = t  # the first frame starts the idle countdown
+        if wake:
+            self.switch(ACTIVE, t)
+        elif self.enabled and t - self.last_wake >= self.idle_after_seconds:
+            self.switch(IDLE, t)
+
+    def switch(self, state: str, t: float):
+        if state == self.state:
+            return
+        self.state = state
+        if self.on_change is not None:
+            self.on_change(state, self.effective_fps(t))
+
+    def effective_fps(self, t: Optional[float] = None) -> float:
+        """Processed frames per second over the last FPS_WINDOW_SECONDS"""
+        if len(self.processed_times) < 2:
+            return 0.0
+        end = self.processed_times[-1] if t is None else max(t, self.processed_times[-1])
+        span = end - self.processed_times[0]
+        return round((len(self.processed_times) - 1) / span, 1) if span > 0 else 0.0
+
+    def reset(self):
+        """Back to full rate (new session, new target gesture)"""
+        self.last_wake = None
+        self.switch(ACTIVE, self.last_processed or 0.0)
+
+    def stats(self) -> Dict:
+        return {
+            'state': self.state,
+            'frames': self.frames,
+            'processed': self.processed,
+            'skipped': self.skipped,
+            'effective_fps': self.effective_fps(),
+            'idle_fps': self.idle_fps,
+            'idle_after_seconds': self.idle_after_seconds,
+        }
@@ -0,0 +1,178 @@
+"""
+Template-compiled rule cascade
+Chuỗi kiểm tra luật biên dịch sẵn từ gesture_data_compact.csv
+
+Every evaluator runs the same checks before the SVM: right-hand fingers,
+static hold / static motion, minimum motion, main axis and direction. The
+templates only change on retrain, so GestureCascade compiles them once
+into one CompiledTemplate per target gesture:
+
+- the right-hand finger states packed into a bitmask (one int compare),
+- the main axis and the expected sign along it,
+- the static/dynamic decision taken from the template.
+
+The static/dynamic SVC is not part of the cascade: the evaluators only
+ever printed its prediction and the template's is_static decides the
+outcome, so running it can never change a verdict.
+
+check() returns the verdict when a rule decides the attempt, or None when
+the attempt still needs the SVM. Every outcome is counted per stage in a
+StageCounter (several cascades, e.g. before and after a model reload, can
+share one), so stats() shows how many attempts each rule rejected and how
+many reached the kernel at all.
+"""
+
+import threading
+from collections import Counter
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+
+STATIC_HOLD_SECONDS = 1.0
+STATIC_MOTION_MAX = 0.05
+MIN_DELTA_MAG = 0.05
+
+# Stages in cascade order; ML verdicts are recorded after the SVM step
+RULE_STAGES = ('no_template', 'right_fingers', 'static_duration', 'static_motion', 'static_correct',
+               'motion_small', 'wrong_axis', 'wrong_direction')
+ML_STAGES = ('low_confidence', 'wrong_prediction', 'ml_correct', 'ml_error')
+
+Verdict = Tuple[bool, str, str]
+
+
+def finger_mask(states: Sequence) -> Optional[int]:
+    """Bit i set when finger i is open; None unless there are exactly 5 states of 0/1"""
+    if len(states) != 5:
+        return None
+    mask = 0
+    for bit, state in enumerate(states):
+        if state not in (0, 1):
+            return None
+        mask |= int(state) << bit
+    return mask
+
+
+def sign(value: float) -> int:
+    return (value > 0) - (value < 0)
+
+
+class CompiledTemplate(NamedTuple):
+    name: str
+    right_fingers: list
+    right_mask: int
+    is_static: bool
+    main_axis_x: int
+    expected_sign: int       # sign of the template delta along its main axis (0: not checked)
+    direction: str           # right/left/down/up, for the wrong_direction message
+
+
+def compile_template(name: str, template: Dict) -> CompiledTemplate:
+    main_axis_x = int(template['main_axis_x'])
+    expected_delta = template['delta_x'] if main_axis_x == 1 else template['delta_y']
+    if main_axis_x == 1:
+        direction = "right" if expected_delta > 0 else "left"
+    else:
+        direction = "down" if expected_delta > 0 else "up"
+    return CompiledTemplate(
+        name=name,
+        right_fingers=list(template['right_fingers']),
+        right_mask=finger_mask(template['right_fingers']),
+        is_static=bool(template['is_static']),
+        main_axis_x=main_axis_x,
+        expected_sign=sign(expected_delta),
+        direction=direction,
+    )
+
+
+class StageCounter:
+    """Thread-safe count of attempts per deciding stage"""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+    def record(self, stage: str):
+        with self.lock:
+            self.counts[stage] += 1
+
+    def stats(self) -> Dict:
+        with self.lock:
+            counts = dict(self.counts)
+        attempts = sum(counts.values())
+        rule_decided = sum(counts.get(stage, 0) for stage in RULE_STAGES)
+        return {
+            'attempts': attempts,
+            'stages': counts,
+            'decided_by_rules': rule_decided,
+            'reached_ml': attempts - rule_decided,
+        }
+
+    def reset(self):
+        with self.lock:
+            self.counts.clear()
+
+
+class GestureCascade:
+    """Rule checks for every template, compiled once"""
+
+    def __init__(self, templates: Dict[str, Dict], counter: Optional[StageCounter] = None,
+                 static_hold_seconds: float = STATIC_HOLD_SECONDS,
+                 static_motion_max: float = STATIC_MOTION_MAX,
+                 min_delta_mag: float = MIN_DELTA_MAG,
+                 zero_dx_passes: bool = False):
+        """zero_dx_passes: a horizontal attempt with raw dx == 0 is not a wrong direction
+        (gesture_prediction.py's rule; the session scripts reject it)"""
+        self.compiled = {name: compile_template(name, template) for name, template in templates.items()}
+        self.counter = counter if counter is not None else StageCounter()
+        self.static_hold_seconds = static_hold_seconds
+        self.static_motion_max = static_motion_max
+        self.min_delta_mag = min_delta_mag
+        self.zero_dx_passes = zero_dx_passes
+
+    def decide(self, stage: str, success: bool, message: str) -> Verdict:
+        self.counter.record(stage)
+        return success, stage, message
+
+    def record(self, stage: str):
+        """Count the verdict of a later (ML) stage"""
+        self.counter.record(stage)
+
+    def check(self, target_gesture: str, right_states: Sequence[int], motion_features: Dict,
+              duration: float) -> Optional[Verdict]:
+        """Verdict of the first rule that decides the attempt, or None if it needs the SVM"""
+        compiled = self.compiled.get(target_gesture)
+        if compiled is None:
+            return self.decide("no_template", False, f"No template found for {target_gesture}")
+
+        # Step 1: right hand fingers (left hand is the trigger and is not checked)
+        if compiled.right_mask is None or finger_mask(right_states) != compiled.right_mask:
+            return self.decide("right_fingers", False,
+                               f"Wrong right fingers: got {right_states}, expected {compiled.right_fingers}")
+
+        delta_magnitude = motion_features['delta_magnitude']
+
+        # Step 2: static gestures are decided by duration and residual motion alone
+        if compiled.is_static:
+            if duration < self.static_hold_seconds:
+                return self.decide("static_duration", False,
+                                   f"Hold longer: {duration:.1f}s < {self.static_hold_seconds}s")
+            if delta_magnitude > self.static_motion_max:
+                return self.decide("static_motion", False, f"Too much motion: {delta_magnitude:.3f}")
+            return self.decide("static_correct", True, f"Static gesture held for {duration:.1f}s")
+
+        # Step 3: dynamic gestures need enough motion along the template's axis and sign
+        if delta_magnitude < self.min_delta_mag:
+            return self.decide("motion_small", False, f"Movement too small: {delta_magnitude:.3f}")
+
+        if motion_features['main_axis_x'] != compiled.main_axis_x:
+            axis_name = "horizontal" if compiled.main_axis_x else "vertical"
+            return self.decide("wrong_axis", False, f"Wrong axis: expected {axis_name} movement")
+
+        if compiled.expected_sign:
+            actual = sign(motion_features['raw_dx'] if compiled.main_axis_x == 1 else motion_features['raw_dy'])
+            zero_passes = self.zero_dx_passes and compiled.main_axis_x == 1
+            if actual != compiled.expected_sign and not (zero_passes and actual == 0):
+                return self.decide("wrong_direction", False, f"Wrong direction: expected {compiled.direction}")
+
+        return None
+
+    def stats(self) -> Dict:
+        return self.counter.stats()
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+Multi-session gesture practice server
+Một process phục vụ nhiều phiên luyện tập cùng lúc, dùng chung models
+
+The SVM, scaler, static/dynamic classifier and templates are loaded once and
+shared read-only by every session. Each session ID gets its own
+GestureTrainingSession (MediaPipe tracker + recording state), its own stats
+and its own LatestFrameQueue, so a slow learner never delays the others.
+
+Protocol (stdin, see frame_protocol.py):
+  {"type": "open",  "session": "<id>", "gesture": "<pose_label>"[, "mode": "continuous"][, "input": "landmarks"]}
+  {"type": "reset", "session": "<id>"}
+  {"type": "stats", "session": "<id>"}
+  {"type": "metrics", "session": "<id>"[, "reset": true]}
+  {"type": "close", "session": "<id>"}
+  {"type": "profile"[, "duration": 5][, "interval_ms": 10]}
+  {"type": "shutdown"}
+  binary frames with SESSION_FLAG set and the session id in the header
+  (images, or FRAME_LANDMARKS from clients that track hands themselves)
+
+Every stdout message carries the 'session' it belongs to (server-level
+messages have none).
+
+"mode": "continuous" opens a trigger-free session: commands are segmented
+from the right wrist trajectory (continuous_recognizer.py) and each result
+carries the detected gesture and its latency from the end of the motion.
+"input": "landmarks" announces a client that only sends FRAME_LANDMARKS,
+so the session's MediaPipe tracker is never warmed up.
+
+'metrics' answers with the session's per-stage latency (count, mean, p50,
+p95 and p99 in ms for decode, mediapipe, landmarks, features, evaluate, svm
+and the whole frame; see stage_metrics.py); "reset": true starts a new
+window. An open command with "metrics_every": N (default --metrics-every,
+GESTURE_METRICS_EVERY) also sends it every N processed frames.
+
+'profile' is server-wide: every thread's Python stack is sampled for up to a
+minute while all sessions keep being served, then a 'profile' message
+carries collapsed-stack text for a flame graph (stack_sampler.py).
+"""
+
+import argparse
+import base64
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+from frame_protocol import (FRAME_LANDMARKS, Frame, LatestFrameQueue, ProtocolError, decode_frame, decode_jpeg,
+                            decode_landmarks, read_message)
+from stage_metrics import parse_metrics_every
+from stack_sampler import StackSampler
+from training_session_web import GestureTrainingSession, load_session_resources, probability_memo, stage_counter
+
+DEFAULT_WORKERS = 2
+STOP_WORKER = object()  # ready-queue sentinel; session ids are always non-empty strings
+DEFAULT_MAX_PENDING_FRAMES = int(os.environ.get('GESTURE_MAX_PENDING_FRAMES', '1'))
+DEFAULT_METRICS_EVERY = int(os.environ.get('GESTURE_METRICS_EVERY', '0'))
+
+
+class PracticeSession:
+    """State owned by one learner's practice session"""
+
+    def __init__(self, session_id: str, gesture_name: str, max_pending_frames: int, continuous: bool = False):
+        self.session_id = session_id
+        self.gesture_name = gesture_name
+        self.continuous = continuous
+        self.landmark_input = False
+        self.metrics_every = 0
+        self.queue = LatestFrameQueue(max_pending_frames)
+        self.training_session: Optional[GestureTrainingSession] = None
+        self.gesture_template: Optional[Dict] = None
+        self.stats = {'correct': 0, 'wrong': 0, 'total': 0}
+        self.frames_processed = 0
+        self.scheduled = False  # True while the session id sits in the ready queue or a worker owns it
+        self.closed = False
+
+    def record_result(self, success: bool) -> Dict:
+        self.stats['total'] += 1
+        if success:
+            self.stats['correct'] += 1
+        else:
+            self.stats['wrong'] += 1
+        accuracy = (self.stats['correct'] / self.stats['total'] * 100) if self.stats['total'] > 0 else 0
+        return {**self.stats, 'accuracy': round(accuracy, 1)}
+
+
+class GestureSessionServer:
+    def __init__(self, workers: int = DEFAULT_WORKERS, max_pending_frames: int = DEFAULT_MAX_PENDING_FRAMES,
+                 metrics_every: int = DEFAULT_METRICS_EVERY):
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        self.models_dir = os.path.join(script_dir, 'code', 'models')
+        self.training_results_dir = os.path.join(script_dir, 'code', 'training_results')
+
+        # Protocol messages own stdout; debug prints from the sessions go to stderr
+        # so worker threads can never interleave with a JSON line
+        self.out = sys.stdout
+        sys.stdout = sys.stderr
+
+        self.workers = max(1, int(workers))
+        self.max_pending_frames = max_pending_frames
+        self.metrics_every = max(0, int(metrics_every))
+        self.output_lock = threading.Lock()
+        self.sessions_lock = threading.Lock()
+        self.sessions: Dict[str, PracticeSession] = {}
+        self.ready = queue.Queue()  # session ids with pending work, round-robin
+        self.profiler: Optional[StackSampler] = None
+
+        self.resources = load_session_resources(self.models_dir, self.training_results_dir)
+
+    def send_message(self, message_type: str, data: Dict, session_id: Optional[str] = None):
+        message = {'type': message_type, 'timestamp': time.time(), **data}
+        if session_id is not None:
+            message['session'] = session_id
+        with self.output_lock:
+            self.out.write(json.dumps(message) + '\n')
+            self.out.flush()
+
+    def send_error(self, error_msg: str, session_id: Optional[str] = None):
+        self.send_message('error', {'error': error_msg}, session_id)
+
+    def schedule(self, session: PracticeSession):
+        with self.sessions_lock:
+            if not session.scheduled:
+                session.scheduled = True
+                self.ready.put(session.session_id)
+
+    def route_frame(self, frame, session_id: Optional[str]):
+        session = self.sessions.get(session_id) if session_id else None
+        if session is None or session.closed:
+            self.send_error("Frame for unknown session", session_id)
+            return
+        session.queue.put_frame(frame)
+        self.schedule(session)
+
+    def route_command(self, command: Dict):
+        command_type = command.get('type')
+        session_id = command.get('session')
+
+        if command_type == 'profile':
+            self.start_profile(command)
+            return
+
+        if not isinstance(session_id, str) or not session_id:
+            self.send_error(f"'{command_type}' command needs a non-empty 'session' id")
+            return
+
+        if command_type == 'open':
+            try:
+                metrics_every = parse_metrics_every(command.get('metrics_every', self.metrics_every))
+            except ValueError as e:
+                self.send_error(str(e), session_id)
+                return
+            with self.sessions_lock:
+                if session_id in self.sessions:
+                    existing = None
+                else:
+                    existing = PracticeSession(session_id, command.get('gesture'), self.max_pending_frames,
+                                               continuous=command.get('mode') == 'continuous')
+                    existing.landmark_input = command.get('input') == 'landmarks'
+                    existing.metrics_every = metrics_every
+                    self.sessions[session_id] = existing
+            if existing is None:
+                self.send_error("Session already open", session_id)
+                return
+            existing.queue.put_command(command)
+            self.schedule(existing)
+            return
+
+        if command_type == 'frame':
+            # Legacy base64 frame with a session field
+            self.route_frame(command, session_id)
+            return
+
+        session = self.sessions.get(session_id)
+        if session is None:
+            self.send_error(f"Unknown session for '{command_type}' command", session_id)
+            return
+        session.queue.put_command(command)
+        self.schedule(session)
+
+    def start_profile(self, command: Dict):
+        """Sample every thread on a background thread; the 'profile' message follows when it ends"""
+        if self.profiler is not None and self.profiler.running:
+            self.send_error("A profile is already running")
+            return
+        try:
+            self.profiler = StackSampler.from_command(
+                command, on_done=lambda profile: self.send_message('profile', profile))
+        except ValueError as e:
+            self.send_error(str(e))
+            return
+        self.profiler.start()
+
+    def read_stdin(self):
+        """Reader thread: demultiplex stdin into per-session queues"""
+        stream = sys.stdin.buffer
+        while True:
+            try:
+                message = read_message(stream)
+                if message is None:
+                    break
+
+                kind, body = message
+                if kind == 'frame':
+                    self.route_frame(body, body.session_id)
+                elif body.get('type') == 'shutdown':
+                    break
+                else:
+                    try:
+                        self.route_command(body)
+                    except Exception as e:
+                        # One client's bad command must not stop the reader shared by every session
+                        session_id = body.get('session')
+                        self.send_error(f"Command processing error: {str(e)}",
+                                        session_id if isinstance(session_id, str) else None)
+
+            except json.JSONDecodeError:
+                self.send_error("Invalid JSON command")
+            except ProtocolError as e:
+                # The stream is out of sync (e.g. an unread oversized payload): nothing after it can be trusted
+                self.send_error(f"Protocol error: {str(e)}")
+                break
+            except Exception as e:
+                self.send_error(f"Stdin read error: {str(e)}")
+                break
+
+        for _ in range(self.workers):
+            self.ready.put(STOP_WORKER)
+
+    def open_session(self, session: PracticeSession):
+        template = self.resources['templates'].get(session.gesture_name)
+        if not template:
+            self.drop_session(session)
+            self.send_error(f"Gesture '{session.gesture_name}' not found", session.session_id)
+            return
+
+        session.training_session = GestureTrainingSession(
+            models_dir=self.models_dir,
+            training_results_dir=self.training_results_dir,
+            resources=self.resources,
+            continuous=session.continuous
+        )
+        session.gesture_template = template
+        session.training_session.scheduler.on_change = lambda state, fps: self.send_message(
+            'scheduler', {'state': state, 'effective_fps': fps}, session.session_id)
+        self.send_message('ready', {
+            'gesture': session.gesture_name,
+            'mode': 'continuous' if session.continuous else 'trigger',
+            'template': {
+                'fingers': template.get('fingers', []),
+                'delta': template.get('delta', [0, 0])
+            }
+        }, session.session_id)
+        # Pay MediaPipe's lazy start-up now rather than on the learner's first frame
+        if not session.landmark_input:
+            session.training_session.warm_up()
+
+    def drop_session(self, session: PracticeSession):
+        session.closed = True
+        with self.sessions_lock:
+            if self.sessions.get(session.session_id) is session:
+                del self.sessions[session.session_id]
+
+    def close_session(self, session: PracticeSession):
+        if session.training_session is not None:
+            session.training_session.close()
+            session.training_session = None
+        self.drop_session(session)
+        self.send_message('closed', {
+            'message': 'Session ended',
+            'stats': session.stats,
+            'queue': {**session.queue.stats(), 'frames_processed': session.frames_processed}
+        }, session.session_id)
+
+    def handle_command(self, session: PracticeSession, command: Dict):
+        command_type = command.get('type')
+        if command_type == 'open':
+            self.open_session(session)
+        elif command_type == 'close':
+            self.close_session(session)
+        elif session.training_session is None:
+            self.send_error(f"Session not ready for '{command_type}' command", session.session_id)
+        elif command_type == 'reset':
+            session.training_session.reset_session()
+            session.stats = {'correct': 0, 'wrong': 0, 'total': 0}
+            self.send_message('reset', {'message': 'Session reset'}, session.session_id)
+        elif command_type == 'stats':
+            self.send_message('queue_stats', {
+                **session.queue.stats(),
+                'frames_processed': session.frames_processed,
+                'probability_memo': probability_memo.stats(),
+                'cascade': stage_counter.stats(),
+                'hand_roi': session.training_session.roi.stats(),
+                'scheduler': session.training_session.scheduler.stats(),
+                **({'continuous': session.training_session.recognizer.stats()} if session.continuous else {})
+            }, session.session_id)
+        elif command_type == 'metrics':
+            self.send_metrics(session)
+            if command.get('reset'):
+                session.training_session.metrics.reset()
+
+    def send_metrics(self, session: PracticeSession):
+        self.send_message('metrics', {
+            'frames_processed': session.frames_processed,
+            'stages': session.training_session.metrics.snapshot()
+        }, session.session_id)
+
+    def process_frame(self, session: PracticeSession, frame):
+        if session.training_session is None:
+            return
+        landmarks = isinstance(frame, Frame) and frame.kind == FRAME_LANDMARKS
+        if not landmarks and not session.training_session.wants_frame():
+            return  # Idle session: leave the CPU to learners who are gesturing
+        metrics = session.training_session.metrics
+        try:
+            with metrics.span('frame'):
+                if landmarks:
+                    # Client-side hand tracking: no image decoding, no MediaPipe
+                    with metrics.span('decode'):
+                        hands, labels, _ = decode_landmarks(frame.width, frame.payload)
+                    result = session.training_session.process_landmarks(hands, labels, session.gesture_template)
+                else:
+                    with metrics.span('decode'):
+                        if isinstance(frame, Frame):
+                            rgb_frame = decode_frame(frame.kind, frame.width, frame.height, frame.payload)
+                        else:
+                            rgb_frame = decode_jpeg(base64.b64decode(frame['data'].split(',')[1]))
+                    result = session.training_session.process_rgb_frame(rgb_frame, session.gesture_template)
+        except Exception as e:
+            self.send_error(f"Frame processing error: {str(e)}", session.session_id)
+            return
+        finally:
+            session.frames_processed += 1
+            if session.metrics_every and session.frames_processed % session.metrics_every == 0:
+                self.send_metrics(session)
+
+        if not result:
+            return
+        if result['type'] == 'status_update':
+            data = {'status': result['status']}
+            if result.get('details'):
+                data.update(result['details'])
+            self.send_message('status', data, session.session_id)
+        elif result['type'] == 'gesture_result':
+            data = {
+                'success': result['success'],
+                'message': result['message'],
+                'reason': result.get('reason', ''),
+                'stats': session.record_result(result['success'])
+            }
+            if result.get('details'):
+                data.update(result['details'])
+            self.send_message('result', data, session.session_id)
+
+    def worker_loop(self):
+        while True:
+            session_id = self.ready.get()
+            if session_id is STOP_WORKER:
+                return
+
+            session = self.sessions.get(session_id)
+            if session is None:
+                continue
+
+            item = session.queue.get(timeout=0)
+            if item is not None:
+                kind, body = item
+                try:
+                    if kind == 'command':
+                        self.handle_command(session, body)
+                    else:
+                        self.process_frame(session, body)
+                except Exception as e:
+                    self.send_error(f"Command processing error: {str(e)}", session_id)
+
+            # Hand the session back to the ready queue if more work arrived
+            with self.sessions_lock:
+                if not session.closed and len(session.queue) > 0:
+                    self.ready.put(session_id)
+                else:
+                    session.scheduled = False
+
+    def run(self):
+        self.send_message('server_ready', {'pid': os.getpid(), 'workers': self.workers})
+
+        threads = [threading.Thread(target=self.worker_loop, name=f'session-worker-{i}', daemon=True)
+                   for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        try:
+            self.read_stdin()
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for session in list(self.sessions.values()):
+                if session.training_session is not None:
+                    session.training_session.close()
+            self.send_message('shutdown', {'message': 'Server stopped'})
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Multi-session gesture practice server")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Processing threads shared by all sessions (default: %(default)s)')
+    parser.add_argument('--max-pending-frames', type=int, default=DEFAULT_MAX_PENDING_FRAMES,
+                        help='Frames kept per session while it is being processed (default: %(default)s)')
+    parser.add_argument('--metrics-every', type=int, default=DEFAULT_METRICS_EVERY,
+                        help="Send each session's per-stage latency 'metrics' message every N processed frames, "
+                             "0 = only on request (default: %(default)s)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    server = GestureSessionServer(workers=args.workers, max_pending_frames=args.max_pending_frames,
+                                  metrics_every=args.metrics_every)
+    server.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -164,13 +164,14 @@ def combine_datasets(standard_csv, augmented_user_df, output_csv):
     return combined_df
 
 
-def retrain_models(combined_csv, output_dir="models"):
+def retrain_models(combined_csv, output_dir="models", incremental=False):
     """
     Retrain all models with combined dataset using existing train script
     
     Args:
         combined_csv: Path to combined dataset
         output_dir: Output directory for trained models (will use script's default)
+        incremental: Only search gestures whose data changed, reuse cached hyperparameters for the rest
     """
     print(f"Retraining models with combined dataset...")
     
@@ -179,6 +180,8 @@ def retrain_models(combined_csv, output_dir="models"):
         sys.executable, str(TRAIN_SCRIPT),
         "--dataset", str(combined_csv)
     ]
+    if incremental:
+        cmd.append("--incremental")
     
     try:
         result = subprocess.run(cmd, capture_output=True, text=True, check=True)
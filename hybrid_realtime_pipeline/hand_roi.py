@@ -0,0 +1,218 @@
+"""
+Hand ROI tracking before MediaPipe Hands
+Cắt vùng quanh bàn tay từ frame trước và thu nhỏ trước khi chạy MediaPipe
+
+Webcams deliver 720p/1080p frames, but the hands rarely cover more than a
+small part of them. HandROITracker wraps a mp.solutions.hands.Hands object
+and, once hands are found, only sends MediaPipe a padded square around the
+previous frame's landmarks, downscaled to working_size pixels on its long
+side:
+
+- the crop is kept while the hands stay inside its inner margin, so
+  MediaPipe's own frame-to-frame tracking sees a stable image; it is
+  recomputed when the hands approach an edge or become much smaller;
+- landmarks are mapped back in place to normalized full-frame coordinates
+  (z is rescaled like x), so results_to_array, drawing and every feature
+  work unchanged;
+- when the crop loses a hand, the frame is processed again in full (the
+  frame is not lost), and while fewer than max_hands are tracked a full
+  frame is rescanned every rescan_interval frames so a new hand is found;
+- full frames go to MediaPipe as they are (it resizes them to its model
+  inputs anyway), or downscaled to full_frame_size if one is given.
+
+last holds the per-frame report (mode, processed pixels, fraction saved,
+MediaPipe time) and stats() the running totals.
+
+Settings (environment):
+    GESTURE_HAND_ROI            1 (default) / 0 to always process full frames
+    GESTURE_ROI_WORKING_SIZE    long side of the crop sent to MediaPipe (default 256)
+"""
+
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+DEFAULT_WORKING_SIZE = 256      # crops: long side in pixels (the landmark model runs at 224)
+DEFAULT_PADDING = 0.75          # per side, as a fraction of the hands' bounding box
+MIN_CROP_FRACTION = 0.25        # smallest crop side, as a fraction of the frame's short side
+MAX_CROP_FRACTION = 0.8         # a crop this large (of the frame area) is not worth it
+INNER_MARGIN = 0.1              # hands closer than this (fraction of the crop) to an edge move the crop
+SHRINK_RATIO = 2.0              # recompute the crop when it is this many times the needed size
+DEFAULT_RESCAN_INTERVAL = 30
+
+Box = Tuple[int, int, int, int]  # x0, y0, width, height in full-frame pixels
+
+
+def resize_long_side(image: np.ndarray, size: int) -> np.ndarray:
+    """Downscale (never upscale) so the long side is at most size; always C-contiguous"""
+    height, width = image.shape[:2]
+    scale = size / max(height, width)
+    if scale >= 1.0:
+        return np.ascontiguousarray(image)
+    # Bilinear, like MediaPipe's own resize; INTER_AREA costs several times more
+    return cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                      interpolation=cv2.INTER_LINEAR)
+
+
+def landmark_bounds(results) -> Optional[Tuple[float, float, float, float]]:
+    """Normalized (x_min, y_min, x_max, y_max) over every detected landmark"""
+    if not results.multi_hand_landmarks:
+        return None
+    xs = [lm.x for hand in results.multi_hand_landmarks for lm in hand.landmark]
+    ys = [lm.y for hand in results.multi_hand_landmarks for lm in hand.landmark]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def map_to_frame(results, box: Box, frame_width: int, frame_height: int):
+    """Rewrite crop-normalized landmarks as full-frame normalized ones (in place)"""
+    x0, y0, width, height = box
+    for hand in results.multi_hand_landmarks or []:
+        for lm in hand.landmark:
+            lm.x = (x0 + lm.x * width) / frame_width
+            lm.y = (y0 + lm.y * height) / frame_height
+            lm.z = lm.z * width / frame_width
+    return results
+
+
+class HandROITracker:
+    """hands.process() on a tracked, downscaled hand region instead of the whole frame"""
+
+    def __init__(self, hands, max_hands: int = 2, working_size: int = DEFAULT_WORKING_SIZE,
+                 full_frame_size: Optional[int] = None, padding: float = DEFAULT_PADDING,
+                 rescan_interval: int = DEFAULT_RESCAN_INTERVAL, enabled: bool = True):
+        self.hands = hands
+        self.max_hands = max_hands
+        self.working_size = working_size
+        self.full_frame_size = full_frame_size
+        self.padding = padding
+        self.rescan_interval = rescan_interval
+        self.enabled = enabled
+        self.last: Dict = {}
+        self.totals = {'frames': 0, 'roi': 0, 'full': 0, 'retries': 0,
+                       'pixels_full': 0, 'pixels_processed': 0, 'process_seconds': 0.0}
+        self.reset()
+
+    @classmethod
+    def from_env(cls, hands, max_hands: int = 2) -> "HandROITracker":
+        return cls(hands, max_hands=max_hands,
+                   working_size=int(os.environ.get('GESTURE_ROI_WORKING_SIZE', DEFAULT_WORKING_SIZE)),
+                   enabled=os.environ.get('GESTURE_HAND_ROI', '1') != '0')
+
+    def reset(self):
+        """Forget the tracked region; the next frame is processed in full"""
+        self.box: Optional[Box] = None
+        self.tracked_hands = 0
+        self.frames_since_full = 0
+
+    def crop_for(self, bounds, frame_width: int, frame_height: int) -> Optional[Box]:
+        """Padded square around normalized bounds, inside the frame; None if not worth cropping"""
+        x_min, y_min, x_max, y_max = bounds
+        center_x = (x_min + x_max) / 2 * frame_width
+        center_y = (y_min + y_max) / 2 * frame_height
+        extent = max((x_max - x_min) * frame_width, (y_max - y_min) * frame_height)
+        side = max(extent * (1 + 2 * self.padding), MIN_CROP_FRACTION * min(frame_width, frame_height))
+
+        width, height = min(int(side), frame_width), min(int(side), frame_height)
+        if width * height > MAX_CROP_FRACTION * frame_width * frame_height:
+            return None
+        # Shift (rather than cut) the square so it stays inside the frame
+        x0 = int(min(max(center_x - width / 2, 0), frame_width - width))
+        y0 = int(min(max(center_y - height / 2, 0), frame_height - height))
+        return x0, y0, width, height
+
+    def keeps_box(self, bounds, frame_width: int, frame_height: int) -> bool:
+        """True while the hands stay well inside the current crop and it is not far too large"""
+        x0, y0, width, height = self.box
+        margin_x, margin_y = INNER_MARGIN * width, INNER_MARGIN * height
+        x_min, y_min, x_max, y_max = (bounds[0] * frame_width, bounds[1] * frame_height,
+                                      bounds[2] * frame_width, bounds[3] * frame_height)
+        inside = (x_min >= x0 + margin_x and x_max <= x0 + width - margin_x
+                  and y_min >= y0 + margin_y and y_max <= y0 + height - margin_y)
+        needed = max(x_max - x_min, y_max - y_min) * (1 + 2 * self.padding)
+        return inside and max(width, height) <= SHRINK_RATIO * max(needed, MIN_CROP_FRACTION * min(frame_width, frame_height))
+
+    def run(self, image: np.ndarray):
+        start = time.perf_counter()
+        results = self.hands.process(image)
+        self.totals['process_seconds'] += time.perf_counter() - start
+        self.totals['pixels_processed'] += image.shape[0] * image.shape[1]
+        return results
+
+    def process_full(self, rgb_frame: np.ndarray):
+        image = resize_long_side(rgb_frame, self.full_frame_size) if self.full_frame_size else rgb_frame
+        self.totals['full'] += 1
+        self.frames_since_full = 0
+        return self.run(image), image.shape[0] * image.shape[1]
+
+    def process(self, rgb_frame: np.ndarray):
+        """MediaPipe results for rgb_frame with landmarks in full-frame normalized coordinates"""
+        frame_height, frame_width = rgb_frame.shape[:2]
+        self.totals['frames'] += 1
+        self.totals['pixels_full'] += frame_width * frame_height
+        seconds_before = self.totals['process_seconds']
+        crop = self.box if self.enabled else None
+
+        if not self.enabled:
+            results, pixels = self.run(rgb_frame), frame_width * frame_height
+            mode = 'full'
+            self.totals['full'] += 1
+        else:
+            results, pixels, mode = self.process_tracked(rgb_frame, frame_width, frame_height)
+
+        self.last = {
+            'mode': mode,
+            'crop': crop if mode == 'roi' else None,
+            'pixels': pixels,
+            'saved_fraction': round(1.0 - pixels / (frame_width * frame_height), 4),
+            'process_ms': round((self.totals['process_seconds'] - seconds_before) * 1000.0, 2),
+        }
+        return results
+
+    def process_tracked(self, rgb_frame: np.ndarray, frame_width: int, frame_height: int):
+        rescan = self.tracked_hands < self.max_hands and self.frames_since_full >= self.rescan_interval
+        results, pixels, mode = None, 0, 'full'
+        if self.box is not None and not rescan:
+            x0, y0, width, height = self.box
+            crop = resize_long_side(rgb_frame[y0:y0 + height, x0:x0 + width], self.working_size)
+            results = self.run(crop)
+            pixels = crop.shape[0] * crop.shape[1]
+            found = len(results.multi_hand_landmarks or [])
+            if found and found >= self.tracked_hands:
+                map_to_frame(results, self.box, frame_width, frame_height)
+                mode = 'roi'
+                self.totals['roi'] += 1
+                self.frames_since_full += 1
+            else:
+                # Lost a hand: process this same frame in full
+                self.totals['retries'] += 1
+                results = None
+                mode = 'full_retry'
+
+        if results is None:
+            results, full_pixels = self.process_full(rgb_frame)
+            pixels += full_pixels
+
+        self.tracked_hands = len(results.multi_hand_landmarks or [])
+        bounds = landmark_bounds(results)
+        if bounds is None:
+            self.box = None
+        elif self.box is None or mode != 'roi' or not self.keeps_box(bounds, frame_width, frame_height):
+            self.box = self.crop_for(bounds, frame_width, frame_height)
+        return results, pixels, mode
+
+    def stats(self) -> Dict:
+        totals = self.totals
+        frames = totals['frames']
+        return {
+            'enabled': self.enabled,
+            'frames': frames,
+            'roi_frames': totals['roi'],
+            'full_frames': totals['full'],
+            'retries': totals['retries'],
+            'pixels_saved_fraction': round(1.0 - totals['pixels_processed'] / totals['pixels_full'], 4)
+            if totals['pixels_full'] else 0.0,
+            'process_ms_mean': round(totals['process_seconds'] / frames * 1000.0, 2) if frames else 0.0,
+        }
@@ -0,0 +1,162 @@
+"""
+Vectorized hand landmark features
+Trích xuất đặc trưng bàn tay bằng NumPy, dùng chung cho mọi script
+
+MediaPipe results are converted once per frame into a contiguous float32
+array of shape (hands, 21, 3) (x, y, z per landmark). Every feature below
+works on any array shaped (..., 21, 3), so the same code serves a single
+hand, the hands of one frame, or thousands of recorded frames at once.
+
+The get_finger_states / is_fist / extract_wrist wrappers keep the signatures
+of the functions previously copy-pasted across the pipeline scripts. They
+accept either a MediaPipe NormalizedLandmarkList or a (21, 3) array.
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+NUM_LANDMARKS = 21
+
+WRIST = 0
+THUMB_MCP, THUMB_IP, THUMB_TIP = 2, 3, 4
+INDEX_MCP = 5
+MIDDLE_MCP = 9
+PINKY_MCP = 17
+
+# Index/middle/ring/pinky as strided slices (basic slicing, no fancy-index copies):
+# tip above PIP => open, tip below MCP => bent (fist)
+FINGER_TIPS = slice(8, 21, 4)
+FINGER_PIPS = slice(6, 19, 4)
+FINGER_MCPS = slice(5, 18, 4)
+
+THUMB_PALM_DISTANCE = 0.08   # Thumb tip far from the palm center
+THUMB_EXTENDED_X = 0.04      # Tip vs MCP, horizontal
+THUMB_EXTENDED_Y = 0.03      # Tip vs MCP, vertical
+THUMB_STRAIGHT_DEGREES = 140.0
+COS_THUMB_STRAIGHT = float(np.cos(np.radians(THUMB_STRAIGHT_DEGREES)))
+FIST_MIN_BENT = 3
+
+
+def landmarks_to_array(hand_landmarks) -> np.ndarray:
+    """Convert one MediaPipe hand (or an existing array) to a (21, 3) float32 array"""
+    if isinstance(hand_landmarks, np.ndarray):
+        return hand_landmarks
+    points = hand_landmarks.landmark
+    flat = np.fromiter((v for p in points for v in (p.x, p.y, p.z)),
+                       dtype=np.float32, count=len(points) * 3)
+    return flat.reshape(len(points), 3)
+
+
+def results_to_array(results) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """Convert MediaPipe Hands results to (hands, 21, 3) landmarks, labels and scores"""
+    if not results.multi_hand_landmarks:
+        return np.empty((0, NUM_LANDMARKS, 3), dtype=np.float32), [], np.empty(0, dtype=np.float32)
+
+    hands = np.stack([landmarks_to_array(h) for h in results.multi_hand_landmarks])
+    labels = [h.classification[0].label for h in results.multi_handedness]
+    scores = np.array([h.classification[0].score for h in results.multi_handedness], dtype=np.float32)
+    return hands, labels, scores
+
+
+def palm_facing(landmarks: np.ndarray) -> np.ndarray:
+    """True where the palm faces the camera (wrist->middle x wrist->pinky cross product > 0)"""
+    x = landmarks[..., 0]
+    y = landmarks[..., 1]
+    cross_z = ((x[..., MIDDLE_MCP] - x[..., WRIST]) * (y[..., PINKY_MCP] - y[..., WRIST])
+               - (y[..., MIDDLE_MCP] - y[..., WRIST]) * (x[..., PINKY_MCP] - x[..., WRIST]))
+    return cross_z > 0
+
+
+def thumb_angle(landmarks: np.ndarray) -> np.ndarray:
+    """Angle in degrees at the thumb IP joint (MCP-IP-TIP); 0 for degenerate points"""
+    ip = landmarks[..., THUMB_IP, :2]
+    v1 = landmarks[..., THUMB_MCP, :2] - ip
+    v2 = landmarks[..., THUMB_TIP, :2] - ip
+    norms = np.linalg.norm(v1, axis=-1) * np.linalg.norm(v2, axis=-1)
+    dot = np.sum(v1 * v2, axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cos_angle = np.clip(dot / norms, -1.0, 1.0)
+    return np.where(norms > 0, np.degrees(np.arccos(cos_angle)), 0.0)
+
+
+def thumb_position_open(landmarks: np.ndarray) -> np.ndarray:
+    """Basic thumb check: tip past the IP joint on the side given by palm orientation.
+
+    Both hands use the same rule, so handedness is not needed here.
+    """
+    tip_x = landmarks[..., THUMB_TIP, 0]
+    ip_x = landmarks[..., THUMB_IP, 0]
+    return np.where(palm_facing(landmarks), tip_x < ip_x, tip_x > ip_x)
+
+
+def thumb_open(landmarks: np.ndarray) -> np.ndarray:
+    """Improved thumb check: extended by distance, direction or angle, and positioned open"""
+    x = landmarks[..., 0]
+    y = landmarks[..., 1]
+    tip_x, tip_y = x[..., THUMB_TIP], y[..., THUMB_TIP]
+    mcp_x, mcp_y = x[..., THUMB_MCP], y[..., THUMB_MCP]
+    ip_x, ip_y = x[..., THUMB_IP], y[..., THUMB_IP]
+
+    palm_dx = tip_x - (x[..., INDEX_MCP] + x[..., PINKY_MCP]) / 2
+    palm_dy = tip_y - (y[..., INDEX_MCP] + y[..., PINKY_MCP]) / 2
+    distance_open = palm_dx * palm_dx + palm_dy * palm_dy > THUMB_PALM_DISTANCE ** 2
+
+    extension_open = (abs(tip_x - mcp_x) > THUMB_EXTENDED_X) | (abs(tip_y - mcp_y) > THUMB_EXTENDED_Y)
+
+    # angle > 140 degrees  <=>  cos(angle) < cos(140), compared without dividing
+    v1x, v1y = mcp_x - ip_x, mcp_y - ip_y
+    v2x, v2y = tip_x - ip_x, tip_y - ip_y
+    norms = np.sqrt((v1x * v1x + v1y * v1y) * (v2x * v2x + v2y * v2y))
+    angle_open = (norms > 0) & (v1x * v2x + v1y * v2y < COS_THUMB_STRAIGHT * norms)
+
+    return (distance_open | extension_open | angle_open) & thumb_position_open(landmarks)
+
+
+def finger_states(landmarks: np.ndarray, improved_thumb: bool = True) -> np.ndarray:
+    """Finger states [thumb, index, middle, ring, pinky] as int8, shape (..., 5)"""
+    y = landmarks[..., 1]
+    states = np.empty(landmarks.shape[:-2] + (5,), dtype=np.int8)
+    states[..., 0] = thumb_open(landmarks) if improved_thumb else thumb_position_open(landmarks)
+    states[..., 1:] = y[..., FINGER_TIPS] < y[..., FINGER_PIPS]
+    return states
+
+
+def fist_mask(landmarks: np.ndarray) -> np.ndarray:
+    """True where at least 3 of the 4 fingers are bent below their MCP joint"""
+    y = landmarks[..., 1]
+    bent = y[..., FINGER_TIPS] > y[..., FINGER_MCPS]
+    return np.count_nonzero(bent, axis=-1) >= FIST_MIN_BENT
+
+
+def wrist_xy(landmarks: np.ndarray) -> np.ndarray:
+    """Wrist (x, y), shape (..., 2)"""
+    return landmarks[..., WRIST, :2]
+
+
+def get_finger_states(hand_landmarks, handedness_label: str = "Right") -> List[int]:
+    """Finger states with improved thumb detection (practice sessions)"""
+    if hand_landmarks is None:
+        return [0, 0, 0, 0, 0]
+    return finger_states(landmarks_to_array(hand_landmarks)).tolist()
+
+
+def get_basic_finger_states(hand_landmarks, handedness_label: str = "Right") -> List[int]:
+    """Finger states with the position-only thumb rule used to collect the datasets"""
+    if hand_landmarks is None:
+        return [0, 0, 0, 0, 0]
+    return finger_states(landmarks_to_array(hand_landmarks), improved_thumb=False).tolist()
+
+
+def is_fist(hand_landmarks) -> bool:
+    """Check if hand is in fist position"""
+    if hand_landmarks is None:
+        return False
+    return bool(fist_mask(landmarks_to_array(hand_landmarks)))
+
+
+def extract_wrist(hand_landmarks) -> Optional[np.ndarray]:
+    """Extract wrist position"""
+    if hand_landmarks is None:
+        return None
+    return wrist_xy(landmarks_to_array(hand_landmarks)).astype(float)
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Landmark recording, deterministic replay and latency benchmark
+Ghi lại landmarks MediaPipe và phát lại để đo hiệu năng không cần camera
+
+Every practice loop is tied to a webcam or to live browser frames, so its
+speed and its verdicts could not be measured twice the same way. This tool
+separates hand tracking from everything after it:
+
+    record      run MediaPipe on a camera and save, per frame, the
+                landmarks, handedness labels/scores and timestamp
+    synthesize  build recordings from the gesture templates (a left-fist
+                trigger around a right hand posed and moved like the
+                template), so CI needs neither a camera nor data files
+    replay      push recordings through GestureTrainingSession
+                (process_landmarks -> evaluate_with_ml) in-process, and
+                through the web protocol (FRAME_LANDMARKS encode ->
+                read_message -> decode_landmarks -> process_landmarks)
+
+The session clock follows the recorded timestamps, so a replay is
+deterministic however fast it runs. replay reports throughput, latency
+percentiles per stage (protocol decode, whole frame, evaluate_with_ml) and
+verdict parity: direct vs protocol path, against the verdicts a recording
+expects, and against a --baseline saved earlier with --save-verdicts. It
+exits with status 1 on a parity failure or when a stage's p95 exceeds
+--max-p95-ms.
+
+Recording file (.npz, compressed):
+    times   (frames,)        float64 seconds
+    counts  (frames,)        uint8 hands per frame
+    hands   (hands, 21, 3)   float32 normalized landmarks, frame after frame
+    labels  (hands,)         uint8 0 = Left, 1 = Right
+    scores  (hands,)         float32 handedness scores
+    meta    JSON string: gesture, source, expected verdicts
+
+Usage:
+    python landmark_replay.py record out.npz --gesture next_slide [--camera 0] [--seconds 30]
+    python landmark_replay.py synthesize replay_data/
+    python landmark_replay.py replay replay_data/*.npz [--max-p95-ms 5] [--save-verdicts v.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from frame_protocol import HAND_LABELS, decode_landmarks, encode_landmark_frame, read_message
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(SCRIPT_DIR, 'code', 'models')
+TRAINING_RESULTS_DIR = os.path.join(SCRIPT_DIR, 'code', 'training_results')
+
+FPS = 30.0
+PERCENTILES = (50, 95, 99)
+REPLAY_SESSION_ID = 'replay'
+
+
+class Recording:
+    """Per-frame hand landmarks with their timestamps"""
+
+    def __init__(self, times, counts, hands, labels, scores, meta: Optional[Dict] = None):
+        self.times = np.asarray(times, dtype=np.float64)
+        self.counts = np.asarray(counts, dtype=np.uint8)
+        self.hands = np.asarray(hands, dtype=np.float32).reshape(-1, 21, 3)
+        self.labels = np.asarray(labels, dtype=np.uint8)
+        self.scores = np.asarray(scores, dtype=np.float32)
+        self.meta = dict(meta or {})
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts, dtype=np.int64)])
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def frame(self, index: int) -> Tuple[float, np.ndarray, List[str], np.ndarray]:
+        """(t, (n, 21, 3) landmarks, labels, scores) of one frame, like results_to_array"""
+        start, end = self.offsets[index], self.offsets[index + 1]
+        labels = [HAND_LABELS[label] for label in self.labels[start:end]]
+        return float(self.times[index]), self.hands[start:end], labels, self.scores[start:end]
+
+    def frames(self) -> Iterator[Tuple[float, np.ndarray, List[str], np.ndarray]]:
+        for index in range(len(self)):
+            yield self.frame(index)
+
+    def save(self, path: str):
+        np.savez_compressed(path, times=self.times, counts=self.counts, hands=self.hands,
+                            labels=self.labels, scores=self.scores, meta=np.array(json.dumps(self.meta)))
+
+    @classmethod
+    def load(cls, path: str) -> "Recording":
+        with np.load(path) as data:
+            return cls(data['times'], data['counts'], data['hands'], data['labels'], data['scores'],
+                       json.loads(str(data['meta'])))
+
+
+class LandmarkRecorder:
+    """Accumulates frames (as returned by results_to_array) into a Recording"""
+
+    def __init__(self, meta: Optional[Dict] = None):
+        self.meta = dict(meta or {})
+        self.times, self.counts, self.hands, self.labels, self.scores = [], [], [], [], []
+
+    def add(self, t: float, hands: np.ndarray, labels: Sequence[str], scores: Sequence[float]):
+        self.times.append(t)
+        self.counts.append(len(labels))
+        self.hands.extend(np.asarray(hands, dtype=np.float32).reshape(-1, 21, 3))
+        self.labels.extend(HAND_LABELS.index(label) for label in labels)
+        self.scores.extend(float(score) for score in scores)
+
+    def recording(self) -> Recording:
+        hands = np.stack(self.hands) if self.hands else np.empty((0, 21, 3), dtype=np.float32)
+        return Recording(self.times, self.counts, hands, self.labels, self.scores, self.meta)
+
+
+# ==================== Synthetic recordings ====================
+
+# Right hand skeleton relative to the wrist, palm facing the camera (frame widths)
+FINGER_MCPS = np.array([[-0.03, -0.08], [-0.01, -0.09], [0.01, -0.085], [0.03, -0.075]])
+THUMB_BASE = np.array([[-0.03, -0.02], [-0.05, -0.04], [-0.065, -0.055]])   # CMC, MCP, IP
+THUMB_TIP_OPEN = np.array([-0.085, -0.07])
+THUMB_TIP_CLOSED = np.array([-0.045, -0.06])
+FINGER_OPEN = np.array([-0.03, -0.05, -0.07])       # PIP, DIP, TIP above the MCP
+FINGER_CLOSED = np.array([-0.025, -0.005, 0.01])    # curled below the MCP
+
+
+def synthetic_hand(fingers: Sequence[int], wrist: Sequence[float], label: str = 'Right') -> np.ndarray:
+    """(21, 3) landmarks whose finger_states are `fingers` (a closed hand is also a fist)"""
+    points = np.zeros((21, 3), dtype=np.float32)
+    points[1:4, :2] = THUMB_BASE
+    points[4, :2] = THUMB_TIP_OPEN if fingers[0] else THUMB_TIP_CLOSED
+    for finger, (mcp, is_open) in enumerate(zip(FINGER_MCPS, fingers[1:])):
+        base = 5 + 4 * finger
+        points[base, :2] = mcp
+        points[base + 1:base + 4, 0] = mcp[0]
+        points[base + 1:base + 4, 1] = mcp[1] + (FINGER_OPEN if is_open else FINGER_CLOSED)
+    if label == 'Left':
+        points[:, 0] *= -1
+    points[:, 0] += wrist[0]
+    points[:, 1] += wrist[1]
+    return points
+
+
+def synthetic_attempt(recorder: LandmarkRecorder, t: float, right_fingers: Sequence[int],
+                      motion: Tuple[float, float], hold_seconds: float) -> float:
+    """Idle, left fist closed while the hands move by `motion` (or hold), fist released, rest.
+    Both wrists move: the web session follows the left one, the scripts the right one."""
+    left_open, left_fist = [1, 1, 1, 1, 1], [0, 0, 0, 0, 0]
+    left_start, right_start = np.array([0.3, 0.6]), np.array([0.6, 0.5])
+    moving_frames = max(int(round(hold_seconds * FPS)), 2)
+
+    def add(left_fingers, offset):
+        recorder.add(t, [synthetic_hand(left_fingers, left_start + offset, 'Left'),
+                         synthetic_hand(right_fingers, right_start + offset, 'Right')],
+                     ['Left', 'Right'], [0.97, 0.97])
+
+    for _ in range(10):
+        add(left_open, 0.0)
+        t += 1.0 / FPS
+    for frame in range(moving_frames + 1):
+        add(left_fist, np.array(motion) * frame / moving_frames)
+        t += 1.0 / FPS
+    for _ in range(10):
+        add(left_open, np.array(motion))
+        t += 1.0 / FPS
+    return t
+
+
+def synthesize_recording(name: str, template: Dict) -> Recording:
+    """Three correct attempts of a template and one with the wrong right fingers"""
+    recorder = LandmarkRecorder({'gesture': name, 'source': 'synthetic', 'expected': []})
+    if template['is_static']:
+        motion, hold = (0.0, 0.0), 1.4
+    else:
+        # A bit past the template's mean delta: smoothing trims the track's ends
+        motion, hold = (template['delta_x'] * 1.2, template['delta_y'] * 1.2), 0.6
+    wrong_fingers = list(template['right_fingers'])
+    wrong_fingers[1] = 1 - wrong_fingers[1]
+
+    t = 0.0
+    for fingers, success in ((template['right_fingers'], True),) * 3 + ((wrong_fingers, False),):
+        t = synthetic_attempt(recorder, t, fingers, motion, hold)
+        recorder.meta['expected'].append(success)
+    return recorder.recording()
+
+
+# ==================== Replay ====================
+
+class StageTimes:
+    """Wall-clock samples per pipeline stage"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+
+    def add(self, stage: str, seconds: float):
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def extend(self, other: "StageTimes"):
+        for stage, values in other.samples.items():
+            self.samples.setdefault(stage, []).extend(values)
+
+    def report(self) -> Dict[str, Dict]:
+        report = {}
+        for stage, values in self.samples.items():
+            ms = np.asarray(values) * 1000.0
+            report[stage] = {'count': len(values), 'mean_ms': round(float(ms.mean()), 4),
+                             **{f'p{p}_ms': round(float(np.percentile(ms, p)), 4) for p in PERCENTILES}}
+        return report
+
+
+@contextlib.contextmanager
+def timed_evaluate(times: StageTimes):
+    """Time every evaluate_with_ml call the session makes"""
+    import training_session_web
+
+    original = training_session_web.evaluate_with_ml
+
+    def evaluate(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            times.add('evaluate_with_ml', time.perf_counter() - start)
+
+    training_session_web.evaluate_with_ml = evaluate
+    try:
+        yield
+    finally:
+        training_session_web.evaluate_with_ml = original
+
+
+def verdict(result: Optional[Dict]) -> Optional[Dict]:
+    if not result or result.get('type') != 'gesture_result':
+        return None
+    return {'success': bool(result['success']), 'reason': result.get('reason', '')}
+
+
+def new_session(resources: Dict, continuous: bool):
+    from training_session_web import GestureTrainingSession
+
+    session = GestureTrainingSession(models_dir=MODELS_DIR, training_results_dir=TRAINING_RESULTS_DIR,
+                                     resources=resources, continuous=continuous)
+    session.scheduler.idle_fps = 0.0  # Every frame counts in a replay
+    return session
+
+
+def replay_direct(recording: Recording, resources: Dict, template: Dict, continuous: bool,
+                  times: StageTimes) -> List[Dict]:
+    """Frames straight into GestureTrainingSession.process_landmarks"""
+    session = new_session(resources, continuous)
+    verdicts = []
+    for t, hands, labels, _ in recording.frames():
+        session.clock = lambda t=t: t
+        start = time.perf_counter()
+        result = session.process_landmarks(hands, labels, template)
+        times.add('frame', time.perf_counter() - start)
+        if verdict(result):
+            verdicts.append(verdict(result))
+    session.close()
+    return verdicts
+
+
+def replay_protocol(recording: Recording, resources: Dict, template: Dict, continuous: bool,
+                    times: StageTimes) -> List[Dict]:
+    """Frames encoded as the Node backend sends them, then read and decoded like the servers do"""
+    stream = io.BytesIO(b''.join(encode_landmark_frame(hands, labels, scores, REPLAY_SESSION_ID)
+                                 for _, hands, labels, scores in recording.frames()))
+    session = new_session(resources, continuous)
+    verdicts = []
+    for t in recording.times:
+        start = time.perf_counter()
+        _, frame = read_message(stream)
+        hands, labels, _ = decode_landmarks(frame.width, frame.payload)
+        decoded = time.perf_counter()
+        session.clock = lambda t=t: t
+        result = session.process_landmarks(hands, labels, template)
+        times.add('protocol_decode', decoded - start)
+        times.add('protocol_frame', time.perf_counter() - start)
+        if verdict(result):
+            verdicts.append(verdict(result))
+    session.close()
+    return verdicts
+
+
+def replay_files(paths: Sequence[str], continuous: bool = False, baseline: Optional[Dict] = None) -> Dict:
+    from training_session_web import load_session_resources
+
+    # Session and model prints stay off the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        resources = load_session_resources(MODELS_DIR, TRAINING_RESULTS_DIR)
+
+    times = StageTimes()
+    files, failures = {}, []
+    frames, elapsed = 0, 0.0
+    for path in paths:
+        recording = Recording.load(path)
+        name = os.path.basename(path)
+        template = resources['templates'].get(recording.meta.get('gesture'))
+        if template is None:
+            failures.append(f"{name}: unknown gesture {recording.meta.get('gesture')!r}")
+            continue
+
+        file_times = StageTimes()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), timed_evaluate(file_times):
+            direct = replay_direct(recording, resources, template, continuous, file_times)
+            protocol = replay_protocol(recording, resources, template, continuous, file_times)
+        elapsed += time.perf_counter() - start
+        frames += 2 * len(recording)
+        times.extend(file_times)
+
+        entry = {'gesture': recording.meta['gesture'], 'frames': len(recording), 'verdicts': direct}
+        if protocol != direct:
+            failures.append(f"{name}: protocol path verdicts differ from the direct path")
+        expected = recording.meta.get('expected')
+        if expected is not None and not continuous:
+            entry['expected_match'] = [v['success'] for v in direct] == list(expected)
+            if not entry['expected_match']:
+                failures.append(f"{name}: verdicts {[v['success'] for v in direct]} != expected {expected}")
+        if baseline is not None and name in baseline and baseline[name] != direct:
+            failures.append(f"{name}: verdicts differ from the baseline")
+        files[name] = entry
+
+    return {
+        'files': files,
+        'frames': frames,
+        'throughput_fps': round(frames / elapsed, 1) if elapsed else 0.0,
+        'stages': times.report(),
+        'failures': failures,
+    }
+
+
+# ==================== Commands ====================
+
+def record(args):
+    import cv2
+    import mediapipe as mp
+
+    from landmark_features import results_to_array
+
+    recorder = LandmarkRecorder({'gesture': args.gesture, 'source': f'camera {args.camera}'})
+    hands = mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=2,
+                                     min_detection_confidence=0.7, min_tracking_confidence=0.5)
+    cap = cv2.VideoCapture(args.camera)
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open camera {args.camera}")
+    print("[INFO] Recording landmarks. Press 'q' to stop.")
+    start = time.time()
+    try:
+        while cap.isOpened() and (args.seconds is None or time.time() - start < args.seconds):
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frame = cv2.flip(frame, 1)
+            t = time.time() - start
+            landmarks, labels, scores = results_to_array(hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+            recorder.add(t, landmarks, labels, scores)
+            cv2.putText(frame, f"REC {t:.1f}s  hands: {len(labels)}", (20, 40), cv2.FONT_HERSHEY_SIMPLEX,
+                        1.0, (0, 0, 255), 2)
+            cv2.imshow('Landmark Recorder', frame)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    finally:
+        cap.release()
+        cv2.destroyAllWindows()
+        hands.close()
+    recording = recorder.recording()
+    recording.save(args.output)
+    print(f"✅ Saved {len(recording)} frames to {args.output}")
+
+
+def synthesize(args):
+    from training_session_web import load_gesture_templates
+
+    with contextlib.redirect_stdout(sys.stderr):
+        templates = load_gesture_templates(TRAINING_RESULTS_DIR)
+    os.makedirs(args.output_dir, exist_ok=True)
+    for name in sorted(args.gestures or templates):
+        path = os.path.join(args.output_dir, f'{name}.npz')
+        recording = synthesize_recording(name, templates[name])
+        recording.save(path)
+        print(f"✅ {path}: {len(recording)} frames")
+
+
+def replay(args):
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    report = replay_files(args.recordings, continuous=args.continuous, baseline=baseline)
+    if args.max_p95_ms is not None:
+        for stage, values in report['stages'].items():
+            if values['p95_ms'] > args.max_p95_ms:
+                report['failures'].append(f"{stage}: p95 {values['p95_ms']} ms > {args.max_p95_ms} ms")
+    if args.save_verdicts:
+        with open(args.save_verdicts, 'w') as f:
+            json.dump({name: entry['verdicts'] for name, entry in report['files'].items()}, f, indent=2)
+
+    print(json.dumps(report, indent=2))
+    return 1 if report['failures'] else 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Landmark recording, replay and latency benchmark')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help='Record MediaPipe landmarks from a camera')
+    record_parser.add_argument('output')
+    record_parser.add_argument('--gesture', required=True, help='Target gesture the recording practices')
+    record_parser.add_argument('--camera', type=int, default=0)
+    record_parser.add_argument('--seconds', type=float)
+
+    synth_parser = commands.add_parser('synthesize', help='Build recordings from the gesture templates')
+    synth_parser.add_argument('output_dir')
+    synth_parser.add_argument('--gestures', nargs='*', help='Default: every template')
+
+    replay_parser = commands.add_parser('replay', help='Replay recordings headlessly and benchmark')
+    replay_parser.add_argument('recordings', nargs='+')
+    replay_parser.add_argument('--continuous', action='store_true', help='Replay in trigger-free mode')
+    replay_parser.add_argument('--baseline', help='Verdicts JSON from an earlier --save-verdicts')
+    replay_parser.add_argument('--save-verdicts')
+    replay_parser.add_argument('--max-p95-ms', type=float, help='Fail when a stage p95 exceeds this')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.command == 'record':
+        record(args)
+    elif args.command == 'synthesize':
+        synthesize(args)
+    else:
+        return replay(args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,284 @@
+"""
+Single-file model bundle
+Gói mô hình trong một file, đọc bằng memory-map
+
+A trained model set used to be spread over motion_svm_model.pkl,
+motion_scaler.pkl, static_dynamic_classifier.pkl and
+training_results/gesture_data_compact.csv, with the feature transform
+constants (DELTA_WEIGHT, ...) repeated in every loader. gesture_model.bundle
+holds all of it:
+
+    magic (8 bytes) | manifest length (uint64 LE) | manifest JSON
+    | array payloads, each 64-byte aligned
+
+The manifest carries the bundle format version, the feature schema
+(version, column order, delta_weight and the other transform constants),
+the gesture templates, and per model its scalar parameters plus the
+dtype/shape/offset of every array. When templates are given, the bundle
+also holds the motion SVM's precomputed probability table
+(probability_table.py) and its error report against the exact model. Loading is one open: the file is
+np.memmap'ed read-only and the arrays are views into the mapping, so
+worker processes serving the same bundle share its pages through the OS
+page cache. The SVM's pair weight matrix is stored precomputed, so it is
+shared as well.
+
+On Windows a mapped file cannot be replaced while a worker holds it, so
+the bundle is read into memory there instead; trainers can then always
+swap in a new bundle.
+
+The trainers build the bundle from the .npz files they just exported
+(build_bundle). For an existing model folder:
+
+    python model_bundle.py <models_dir> [templates_csv]
+"""
+
+import csv
+import json
+import os
+import struct
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from probability_table import ProbabilityTable, build_probability_table, table_error, template_patterns
+from svm_inference import (COMPILED_MODEL, COMPILED_STATIC_DYNAMIC, MODEL_PKL, STATIC_DYNAMIC_PKL,
+                           CompiledSVC, compiled_svc_from_arrays, is_fresh)
+
+BUNDLE_FILE = "gesture_model.bundle"
+MAGIC = b"GPBUNDLE"
+HEADER = struct.Struct("<8sQ")
+FORMAT_VERSION = 1
+FEATURE_SCHEMA_VERSION = 1
+ALIGNMENT = 64
+
+MOTION_MODEL = "motion_svm"
+STATIC_DYNAMIC_MODEL = "static_dynamic"
+PROBABILITY_TABLE = "probability_table"
+
+FINGER_COLUMNS = [f"left_finger_state_{i}" for i in range(5)] + [f"right_finger_state_{i}" for i in range(5)]
+MOTION_COLUMNS = ["main_axis_x", "main_axis_y", "delta_x", "delta_y",
+                  "motion_left", "motion_right", "motion_up", "motion_down"]
+
+
+def feature_schema(delta_weight: float, min_delta_mag: Optional[float] = None,
+                   static_threshold: Optional[float] = None) -> Dict:
+    """How raw features become the SVM input, as the trainers build it"""
+    return {
+        "version": FEATURE_SCHEMA_VERSION,
+        "finger_columns": FINGER_COLUMNS,          # unscaled 0/1 states, first 10 inputs
+        "motion_columns": MOTION_COLUMNS,          # StandardScaler'd, last 8 inputs
+        "weighted_columns": MOTION_COLUMNS[2:],    # multiplied by delta_weight before scaling
+        "delta_weight": float(delta_weight),
+        "min_delta_mag": None if min_delta_mag is None else float(min_delta_mag),
+        "static_dynamic_columns": FINGER_COLUMNS + ["delta_magnitude"],
+        "static_threshold": None if static_threshold is None else float(static_threshold),
+    }
+
+
+def aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_bundle(path, models: Dict[str, Dict[str, np.ndarray]], schema: Dict, templates: List[Dict],
+                 **info) -> str:
+    """Write model arrays (as produced by compiled_svc_arrays), schema and templates as one bundle"""
+    payload = []
+    offset = 0
+    manifest_models = {}
+    for name, arrays in models.items():
+        entries = {}
+        for key, value in arrays.items():
+            value = np.asarray(value)
+            if value.ndim and value.dtype.kind in "biuf":
+                offset = aligned(offset)
+                value = np.ascontiguousarray(value)
+                entries[key] = {"dtype": value.dtype.str, "shape": list(value.shape), "offset": offset}
+                payload.append((offset, value))
+                offset += value.nbytes
+            else:
+                # Scalars and strings (kernel, label names, metadata) live in the manifest
+                entries[key] = {"dtype": value.dtype.str, "value": value.tolist()}
+        manifest_models[name] = entries
+
+    manifest = json.dumps({
+        "format_version": FORMAT_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "feature_schema": schema,
+        "templates": templates,
+        "models": manifest_models,
+        **info,
+    }).encode("utf-8")
+    data_start = aligned(HEADER.size + len(manifest))
+
+    path = str(path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(manifest)))
+        f.write(manifest)
+        for array_offset, value in payload:
+            f.seek(data_start + array_offset)
+            f.write(value.tobytes())
+    os.replace(tmp_path, path)  # Readers never see a half-written bundle
+    return path
+
+
+class ModelBundle:
+    """Read-only view of one gesture_model.bundle"""
+
+    def __init__(self, path, mmap: Optional[bool] = None):
+        self.path = str(path)
+        if mmap is None:
+            mmap = os.name != "nt"
+        if mmap:
+            self.buffer = np.memmap(self.path, dtype=np.uint8, mode="r")
+        else:
+            self.buffer = np.fromfile(self.path, dtype=np.uint8)
+
+        if len(self.buffer) < HEADER.size:
+            raise ValueError(f"{self.path} is not a model bundle")
+        magic, manifest_size = HEADER.unpack(self.buffer[:HEADER.size].tobytes())
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a model bundle")
+        self.manifest = json.loads(self.buffer[HEADER.size:HEADER.size + manifest_size].tobytes())
+        if self.manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported bundle format {self.manifest.get('format_version')}")
+        self.data_start = aligned(HEADER.size + manifest_size)
+        self.schema = self.manifest["feature_schema"]
+        self.templates = self.manifest["templates"]
+        self._models = {}
+
+    @property
+    def delta_weight(self) -> float:
+        return self.schema["delta_weight"]
+
+    def arrays(self, name: str) -> Dict[str, np.ndarray]:
+        arrays = {}
+        for key, entry in self.manifest["models"][name].items():
+            dtype = np.dtype(entry["dtype"])
+            if "value" in entry:
+                arrays[key] = np.asarray(entry["value"], dtype=dtype)
+                continue
+            shape = tuple(entry["shape"])
+            count = int(np.prod(shape))
+            if count == 0:
+                arrays[key] = np.empty(shape, dtype=dtype)
+            else:
+                arrays[key] = np.frombuffer(self.buffer, dtype=dtype, count=count,
+                                            offset=self.data_start + entry["offset"]).reshape(shape)
+        return arrays
+
+    def model(self, name: str) -> Optional[CompiledSVC]:
+        if name not in self.manifest["models"]:
+            return None
+        if name not in self._models:
+            self._models[name] = compiled_svc_from_arrays(self.arrays(name))
+        return self._models[name]
+
+    def probability_table(self) -> Optional[ProbabilityTable]:
+        """Precomputed motion SVM probabilities, if the bundle has them"""
+        if PROBABILITY_TABLE not in self.manifest["models"]:
+            return None
+        try:
+            return ProbabilityTable(self.arrays(PROBABILITY_TABLE))
+        except ValueError as e:
+            print(f"[WARN] {e}; rebuild the bundle to use it", file=sys.stderr)
+            return None
+
+    def models(self) -> Tuple:
+        """(svm_model, label_encoder, scaler, static_dynamic_data), as load_compiled_models returns"""
+        svm_model = self.model(MOTION_MODEL)
+        static_dynamic_data = None
+        static_model = self.model(STATIC_DYNAMIC_MODEL)
+        if static_model is not None:
+            static_dynamic_data = {'model': static_model, 'scaler': static_model.scaler, **static_model.metadata}
+        return svm_model, svm_model.label_encoder, svm_model.scaler, static_dynamic_data
+
+
+def load_bundle(path, mmap: Optional[bool] = None) -> ModelBundle:
+    return ModelBundle(path, mmap=mmap)
+
+
+def load_fresh_bundle(models_dir) -> Optional[ModelBundle]:
+    """Bundle of models_dir if it is at least as new as the pickles, else None"""
+    models_dir = str(models_dir)
+    path = os.path.join(models_dir, BUNDLE_FILE)
+    if not (is_fresh(path, os.path.join(models_dir, MODEL_PKL))
+            and is_fresh(path, os.path.join(models_dir, STATIC_DYNAMIC_PKL))):
+        return None
+    try:
+        return load_bundle(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[WARN] Ignoring model bundle {path}: {e}", file=sys.stderr)
+        return None
+
+
+def read_template_rows(templates_csv) -> List[Dict]:
+    """gesture_data_compact.csv rows with numbers parsed"""
+    def parse(value):
+        for cast in (int, float):
+            try:
+                return cast(value)
+            except ValueError:
+                pass
+        return value
+
+    with open(templates_csv, "r", encoding="utf-8", newline="") as f:
+        return [{key: parse(value) for key, value in row.items()} for row in csv.DictReader(f)]
+
+
+def build_bundle(models_dir, templates_csv=None) -> str:
+    """Bundle the compiled .npz models of models_dir (and the templates CSV) into BUNDLE_FILE"""
+    models_dir = str(models_dir)
+    models = {}
+    for name, filename in ((MOTION_MODEL, COMPILED_MODEL), (STATIC_DYNAMIC_MODEL, COMPILED_STATIC_DYNAMIC)):
+        npz_path = os.path.join(models_dir, filename)
+        if not os.path.exists(npz_path):
+            continue
+        with np.load(npz_path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files}
+        # Store the folded pair weights instead of the raw dual coefficients
+        compiled = compiled_svc_from_arrays(arrays)
+        arrays.pop("dual_coef")
+        arrays["pair_weights"] = compiled.pair_weights
+        arrays["sv_sq_norms"] = compiled.sv_sq_norms
+        models[name] = arrays
+    if MOTION_MODEL not in models:
+        raise FileNotFoundError(f"No compiled model in {models_dir}; run the trainer first")
+
+    motion_meta = models[MOTION_MODEL]
+    static_meta = models.get(STATIC_DYNAMIC_MODEL, {})
+    schema = feature_schema(
+        float(motion_meta["meta_delta_weight"]),
+        float(motion_meta["meta_min_delta_mag"]) if "meta_min_delta_mag" in motion_meta else None,
+        float(static_meta["meta_static_threshold"]) if "meta_static_threshold" in static_meta else None,
+    )
+    templates = read_template_rows(templates_csv) if templates_csv and os.path.exists(templates_csv) else []
+
+    info = {}
+    motion_model = compiled_svc_from_arrays(motion_meta)
+    patterns = template_patterns(templates)
+    if patterns and motion_model.scaler is not None and len(motion_model.probA_):
+        table = build_probability_table(motion_model, motion_model.scaler, patterns, schema["delta_weight"])
+        info[PROBABILITY_TABLE] = table_error(table, motion_model, motion_model.scaler, schema["delta_weight"])
+        models[PROBABILITY_TABLE] = table.arrays()
+        print(f"[INFO] Probability table: {len(patterns)} finger patterns x {table.grid_points} magnitudes x {table.ratio_points} ratios, "
+              f"max error {info[PROBABILITY_TABLE]['max_error']:.2e} "
+              f"({info[PROBABILITY_TABLE]['argmax_mismatches']} argmax mismatches in "
+              f"{info[PROBABILITY_TABLE]['samples']} samples)")
+
+    path = write_bundle(os.path.join(models_dir, BUNDLE_FILE), models, schema, templates, **info)
+    print(f"[INFO] Model bundle saved to {path} ({os.path.getsize(path) / 1024:.0f} KB, "
+          f"{len(templates)} templates)")
+    return path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python model_bundle.py <models_dir> [templates_csv]")
+        sys.exit(1)
+    models_dir = sys.argv[1]
+    templates_csv = sys.argv[2] if len(sys.argv) > 2 else os.path.join(
+        os.path.dirname(os.path.abspath(models_dir)), "training_results", "gesture_data_compact.csv")
+    build_bundle(models_dir, templates_csv)
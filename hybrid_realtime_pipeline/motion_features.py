@@ -0,0 +1,163 @@
+"""
+Streaming wrist-motion features
+Tính đặc trưng chuyển động tăng dần theo từng frame (O(1) mỗi điểm)
+
+MotionAccumulator replaces the end-of-gesture smooth_sequence() +
+compute_motion_features() pass. The motion features only depend on the
+first and last points of the smoothed track, and a centred moving average
+at either end only covers the window//2 + 1 outermost raw points. So each
+update costs the same no matter how long the recording is, and the
+features (or the current direction) can be read at any time.
+
+The accumulator keeps the same sliding window as the old
+deque(maxlen=BUFFER_SIZE) buffers, and its features() returns exactly what
+compute_motion_features(smooth_sequence(points)) returned for those points.
+"""
+
+import math
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+DEFAULT_WINDOW = 3
+DEFAULT_MAX_POINTS = 60
+DEFAULT_MIN_DELTA = 0.05
+
+
+class MotionAccumulator:
+    """Running start/end points, path length and extents of a wrist track"""
+
+    def __init__(self, window: int = DEFAULT_WINDOW, max_points: Optional[int] = DEFAULT_MAX_POINTS):
+        self.edge = window // 2 + 1        # raw points averaged at each end of the track
+        self.points = deque(maxlen=max_points)
+        self.path_length = 0.0
+        # Monotonic deques of (index, value) for sliding min/max of x and y
+        self._extremes = {key: deque() for key in ('min_x', 'max_x', 'min_y', 'max_y')}
+        self._first_index = 0
+        self._next_index = 0
+
+    def reset(self):
+        self.points.clear()
+        self.path_length = 0.0
+        for extremes in self._extremes.values():
+            extremes.clear()
+        self._first_index = 0
+        self._next_index = 0
+
+    def clear(self):
+        self.reset()
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def add(self, x: float, y: float):
+        """Add one wrist position"""
+        x = float(x)
+        y = float(y)
+        points = self.points
+
+        if points.maxlen is not None and len(points) == points.maxlen:
+            # Evict the oldest point and the segment that started at it
+            old_x, old_y = points[0]
+            next_x, next_y = points[1] if len(points) > 1 else (x, y)
+            self.path_length -= math.hypot(next_x - old_x, next_y - old_y)
+            self._first_index += 1
+            for extremes in self._extremes.values():
+                if extremes and extremes[0][0] < self._first_index:
+                    extremes.popleft()
+
+        if points:
+            last_x, last_y = points[-1]
+            self.path_length += math.hypot(x - last_x, y - last_y)
+
+        points.append((x, y))
+        index = self._next_index
+        self._next_index += 1
+        self._push_extreme('min_x', index, x, lambda kept, new: kept <= new)
+        self._push_extreme('max_x', index, x, lambda kept, new: kept >= new)
+        self._push_extreme('min_y', index, y, lambda kept, new: kept <= new)
+        self._push_extreme('max_y', index, y, lambda kept, new: kept >= new)
+
+    def append(self, point):
+        """deque-compatible alias taking an (x, y) pair"""
+        self.add(point[0], point[1])
+
+    def _push_extreme(self, key: str, index: int, value: float, keeps) -> None:
+        extremes = self._extremes[key]
+        while extremes and not keeps(extremes[-1][1], value):
+            extremes.pop()
+        extremes.append((index, value))
+
+    def _edge_mean(self, start: int, stop: int) -> Tuple[float, float]:
+        # Summed in order then divided, like np.mean over the same rows
+        sum_x = 0.0
+        sum_y = 0.0
+        for i in range(start, stop):
+            px, py = self.points[i]
+            sum_x += px
+            sum_y += py
+        count = stop - start
+        return sum_x / count, sum_y / count
+
+    def start_point(self) -> Optional[Tuple[float, float]]:
+        """First point of the smoothed track"""
+        if not self.points:
+            return None
+        return self._edge_mean(0, min(len(self.points), self.edge))
+
+    def end_point(self) -> Optional[Tuple[float, float]]:
+        """Last point of the smoothed track"""
+        if not self.points:
+            return None
+        n = len(self.points)
+        return self._edge_mean(max(0, n - self.edge), n)
+
+    def extents(self) -> Optional[Dict[str, float]]:
+        """Bounding box of the raw track"""
+        if not self.points:
+            return None
+        return {key: extremes[0][1] for key, extremes in self._extremes.items()}
+
+    def features(self) -> Optional[Dict]:
+        """Motion features for ML prediction (None with fewer than 2 points)"""
+        if len(self.points) < 2:
+            return None
+
+        start_x, start_y = self.start_point()
+        end_x, end_y = self.end_point()
+        dx = float(end_x - start_x)
+        dy = float(end_y - start_y)
+        delta_mag = float(math.sqrt(dx * dx + dy * dy))
+
+        # Determine main axis (matching training script logic)
+        if abs(dx) >= abs(dy):
+            main_x, main_y = 1, 0
+            delta_x, delta_y = dx, 0.0
+        else:
+            main_x, main_y = 0, 1
+            delta_x, delta_y = 0.0, dy
+
+        return {
+            'main_axis_x': main_x,
+            'main_axis_y': main_y,
+            'delta_x': float(delta_x),
+            'delta_y': float(delta_y),
+            'raw_dx': dx,
+            'raw_dy': dy,
+            'delta_magnitude': delta_mag,
+            'motion_left': 1.0 if dx < 0 else 0.0,
+            'motion_right': 1.0 if dx > 0 else 0.0,
+            'motion_up': 1.0 if dy < 0 else 0.0,
+            'motion_down': 1.0 if dy > 0 else 0.0,
+            'path_length': self.path_length
+        }
+
+    def direction(self, min_delta: float = DEFAULT_MIN_DELTA) -> Optional[str]:
+        """Current dominant direction: left/right/up/down, 'static' below min_delta"""
+        features = self.features()
+        if features is None:
+            return None
+        if features['delta_magnitude'] < min_delta:
+            return 'static'
+        if features['main_axis_x']:
+            return 'left' if features['motion_left'] else 'right'
+        return 'up' if features['motion_up'] else 'down'
@@ -0,0 +1,143 @@
+"""
+Memo of SVM probabilities
+Bộ nhớ đệm xác suất SVM theo đặc trưng (tuỳ chọn lượng tử hoá)
+
+The SVM input is 10 binary finger bits, 2 main-axis flags, 4 direction flags
+and two continuous deltas. Apart from delta_x/delta_y the input space is
+tiny, and the same inputs come back (replayed recordings, retried batches),
+so attempts land on the same kernel evaluation. ProbabilityMemo keeps the
+result of that evaluation in an LRU keyed by
+
+    (finger code, axis bits, direction bits, delta_x, delta_y)
+
+By default the deltas are exact, so a hit returns precisely what the model
+would. With a step > 0 they are rounded to round(delta / step) and nearby
+attempts share one bucket, trading exactness for hits: a result near the
+confidence threshold can then flip. The memo belongs to one model: call
+sync() with the model version (or the model object itself) before use and
+it empties itself when the version changes.
+
+Settings (environment):
+    GESTURE_PROBA_MEMO_SIZE   entries kept (default 4096, 0 disables the memo)
+    GESTURE_PROBA_MEMO_STEP   delta quantization step (default 0: exact deltas; e.g. 0.002 to opt in)
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Sequence, Tuple
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_DELTA_STEP = 0.0  # exact keys; quantization is opt-in
+
+AXIS_KEYS = ('main_axis_x', 'main_axis_y')
+DIRECTION_KEYS = ('motion_left', 'motion_right', 'motion_up', 'motion_down')
+
+MemoKey = Tuple[int, int, int, Hashable, Hashable]
+
+
+def pack_bits(values: Sequence) -> int:
+    """Bit i set when values[i] is truthy"""
+    code = 0
+    for bit, value in enumerate(values):
+        if value:
+            code |= 1 << bit
+    return code
+
+
+class ProbabilityMemo:
+    """Thread-safe LRU of per-attempt SVM results, invalidated on model change"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, delta_step: float = DEFAULT_DELTA_STEP):
+        self.max_entries = max(0, int(max_entries))
+        self.delta_step = max(0.0, float(delta_step))
+        self.entries: "OrderedDict[MemoKey, object]" = OrderedDict()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ProbabilityMemo":
+        return cls(int(os.environ.get('GESTURE_PROBA_MEMO_SIZE', DEFAULT_MAX_ENTRIES)),
+                   float(os.environ.get('GESTURE_PROBA_MEMO_STEP', DEFAULT_DELTA_STEP)))
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def quantize(self, value: float) -> Hashable:
+        if self.delta_step == 0.0:
+            return float(value)
+        return int(round(float(value) / self.delta_step))
+
+    def key(self, fingers: Sequence[int], motion_features: Dict) -> MemoKey:
+        """Memo key of one SVM input: the 10 finger states (left then right) and its motion features"""
+        return (
+            pack_bits(fingers),
+            pack_bits([motion_features[name] for name in AXIS_KEYS]),
+            pack_bits([motion_features[name] for name in DIRECTION_KEYS]),
+            self.quantize(motion_features['delta_x']),
+            self.quantize(motion_features['delta_y']),
+        )
+
+    def sync(self, version) -> bool:
+        """Bind the memo to a model version; drops every entry if it changed. Returns True on a change"""
+        with self.lock:
+            if self.version is version or self.version == version:
+                return False
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self.version = version
+            return True
+
+    def get(self, key: MemoKey):
+        """Stored result for key (counted as a hit or a miss), or None"""
+        with self.lock:
+            value = self.entries.get(key) if self.enabled else None
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: MemoKey, value):
+        with self.lock:
+            if not self.enabled:
+                return
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def lookup(self, fingers: Sequence[int], motion_features: Dict, compute: Callable[[], object],
+               version=None):
+        """Memoized compute() for this input; version (if given) is passed to sync() first"""
+        if version is not None:
+            self.sync(version)
+        key = self.key(fingers, motion_features)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'delta_step': self.delta_step,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'invalidations': self.invalidations,
+            }
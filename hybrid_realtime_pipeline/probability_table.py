@@ -0,0 +1,216 @@
+"""
+Precomputed SVM probability tables
+Bảng xác suất SVM tính trước cho từng mẫu ngón tay
+
+At scoring time the SVM input is almost entirely discrete: the left fingers
+come from the template, the right fingers must equal it, the main axis is
+one bit and the direction flags are the signs of raw dx/dy. What is left is
+continuous in two values: the delta along the main axis and the off-axis
+delta. gesture_prediction.py sends the raw dx/dy, so the off-axis delta is
+the raw one, no larger than the main one (the main axis is the larger
+move); the motion features the trainers use zero it (ratio 0). So for every
+finger pattern the templates can produce, predict_proba varies over
+
+    (pattern, main axis, main sign, off-axis sign) x |main delta| x |off delta| / |main delta|
+
+ProbabilityTable evaluates the exact model once per cell on a grid of main
+magnitudes and off/main ratios in [0, 1] (build_probability_table, run by
+the trainers through model_bundle.build_bundle) and answers lookups by
+bilinear interpolation. Magnitudes beyond the grid use its last point. The
+table is stored as float16; its rounding is well below the interpolation error.
+Inputs the table does not cover (a pattern missing from the templates, zero
+main delta, an off-axis delta larger than the main one or disagreeing with
+its direction flag, contradictory flags) are reported as not found so the
+caller can fall back to the exact model.
+
+table_error() compares the table against the exact model on random inputs
+from the covered space.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_GRID_POINTS = 128    # main-axis magnitudes
+DEFAULT_RATIO_POINTS = 17    # off/main ratios in [0, 1]
+DEFAULT_MAX_DELTA = 1.0   # Wrist coordinates are normalised to the frame, so |delta| <= 1
+
+FINGER_COUNT = 10
+SIGNS = np.array([-1.0, 1.0])            # main axis: negative, positive
+OFF_SIGNS = np.array([-1.0, 0.0, 1.0])   # other axis: negative, none, positive
+PATTERN_WEIGHTS = 1 << np.arange(FINGER_COUNT, dtype=np.int64)
+
+
+def pattern_codes(fingers) -> np.ndarray:
+    """Pack rows of 10 finger states (left then right) into ints; -1 for rows that are not 0/1"""
+    fingers = np.atleast_2d(np.asarray(fingers, dtype=float))
+    valid = np.all((fingers == 0) | (fingers == 1), axis=1)
+    return np.where(valid, fingers.astype(np.int64) @ PATTERN_WEIGHTS, -1)
+
+
+def pattern_fingers(codes) -> np.ndarray:
+    """Inverse of pattern_codes: (n, 10) float finger states"""
+    codes = np.asarray(codes, dtype=np.int64)
+    return ((codes[:, None] >> np.arange(FINGER_COUNT)) & 1).astype(float)
+
+
+def svm_inputs(fingers: np.ndarray, axis_x: np.ndarray, main_sign: np.ndarray, off_sign: np.ndarray,
+               magnitude: np.ndarray, scaler, delta_weight: float, ratio=0.0) -> np.ndarray:
+    """SVM input rows, built the way prepare_features builds them (off delta = off_sign * ratio * magnitude)"""
+    axis_x = axis_x.astype(bool)
+    sign_x = np.where(axis_x, main_sign, off_sign)
+    sign_y = np.where(axis_x, off_sign, main_sign)
+    main_delta = main_sign * magnitude
+    off_delta = off_sign * ratio * magnitude
+    delta_x = np.where(axis_x, main_delta, off_delta)
+    delta_y = np.where(axis_x, off_delta, main_delta)
+    motion = np.column_stack([
+        axis_x, ~axis_x,
+        delta_x * delta_weight, delta_y * delta_weight,
+        (sign_x < 0) * delta_weight, (sign_x > 0) * delta_weight,
+        (sign_y < 0) * delta_weight, (sign_y > 0) * delta_weight,
+    ]).astype(float)
+    return np.hstack([fingers, scaler.transform(motion)])
+
+
+class ProbabilityTable:
+    """predict_proba by table lookup for the finger patterns of the templates"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.patterns = np.asarray(arrays["patterns"], dtype=np.int64)       # sorted pattern codes
+        self.max_delta = float(arrays["max_delta"])
+        self.probabilities = np.asarray(arrays["probabilities"])             # (P, 2, 2, 3, G, R, C)
+        if self.probabilities.ndim != 7:
+            raise ValueError("Probability table from an older format (no off-axis ratio dimension)")
+        self.classes_ = np.asarray(arrays["classes"])
+        self.grid_points = self.probabilities.shape[4]
+        self.ratio_points = self.probabilities.shape[5]
+        self.step = self.max_delta / (self.grid_points - 1)
+        self.ratio_step = 1.0 / (self.ratio_points - 1)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "patterns": self.patterns,
+            "max_delta": np.array(self.max_delta),
+            "probabilities": self.probabilities,
+            "classes": self.classes_,
+        }
+
+    def cell_indices(self, fingers, motion_features: Sequence[Dict]) -> Tuple[Tuple, np.ndarray, np.ndarray, np.ndarray]:
+        """(cell index tuple, main-axis magnitude, off/main ratio, found mask) for each input row"""
+        codes = pattern_codes(fingers)
+        pattern_index = np.searchsorted(self.patterns, codes).clip(0, len(self.patterns) - 1)
+        found = self.patterns[pattern_index] == codes
+
+        columns = ('main_axis_x', 'delta_x', 'delta_y', 'motion_left', 'motion_right', 'motion_up', 'motion_down')
+        motion = np.array([[features[name] for name in columns] for features in motion_features],
+                          dtype=float).reshape(-1, len(columns))
+        axis_x = motion[:, 0] == 1
+        sign_x = motion[:, 4] - motion[:, 3]
+        sign_y = motion[:, 6] - motion[:, 5]
+        main_sign = np.where(axis_x, sign_x, sign_y)
+        off_sign = np.where(axis_x, sign_y, sign_x)
+        main_delta = np.where(axis_x, motion[:, 1], motion[:, 2])
+        off_delta = np.where(axis_x, motion[:, 2], motion[:, 1])
+        magnitude = np.abs(main_delta)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.where(magnitude > 0, np.abs(off_delta) / magnitude, 0.0)
+
+        flags_ok = (motion[:, 3] * motion[:, 4] == 0) & (motion[:, 5] * motion[:, 6] == 0)
+        # A non-zero delta must point the way its flag says; a zeroed off delta may carry any flag
+        signs_ok = (np.sign(main_delta) == main_sign) & ((off_delta == 0) | (np.sign(off_delta) == off_sign))
+        found &= flags_ok & signs_ok & (magnitude > 0) & (ratio <= 1.0)
+
+        cells = (pattern_index, np.where(axis_x, 0, 1), (main_sign > 0).astype(np.int64),
+                 (off_sign + 1).astype(np.int64).clip(0, 2))
+        return cells, magnitude, np.minimum(ratio, 1.0), found
+
+    def predict_proba(self, fingers, motion_features: Sequence[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """(probabilities (n, n_classes), found mask); rows that are not found hold zeros"""
+        cells, magnitude, ratio, found = self.cell_indices(fingers, motion_features)
+        m_lower, m_fraction = grid_position(magnitude / self.step, self.grid_points)
+        r_lower, r_fraction = grid_position(ratio / self.ratio_step, self.ratio_points)
+        rows = 0.0
+        for m_offset, m_weight in ((0, 1.0 - m_fraction), (1, m_fraction)):
+            for r_offset, r_weight in ((0, 1.0 - r_fraction), (1, r_fraction)):
+                rows = rows + self.probabilities[cells + (m_lower + m_offset, r_lower + r_offset)] \
+                    * (m_weight * r_weight)[:, None]
+        rows[~found] = 0.0
+        return rows.astype(np.float64), found
+
+
+def grid_position(position: np.ndarray, points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(lower grid index, fraction towards the next one), clamped to the grid"""
+    position = np.minimum(position, points - 1)
+    lower = np.minimum(position.astype(np.int64), points - 2)
+    return lower, position - lower
+
+
+def build_probability_table(svm_model, scaler, patterns: Sequence[int], delta_weight: float,
+                            grid_points: int = DEFAULT_GRID_POINTS,
+                            max_delta: float = DEFAULT_MAX_DELTA,
+                            ratio_points: int = DEFAULT_RATIO_POINTS) -> ProbabilityTable:
+    """Evaluate svm_model.predict_proba on every (pattern, axis, signs, magnitude, ratio) grid cell"""
+    patterns = np.unique(np.asarray(list(patterns), dtype=np.int64))
+    grid = np.linspace(0.0, max_delta, grid_points)
+    ratios = np.linspace(0.0, 1.0, ratio_points)
+    shape = (len(patterns), 2, len(SIGNS), len(OFF_SIGNS), grid_points, ratio_points)
+
+    pattern_index, axis, main, off, point, ratio = np.indices(shape).reshape(len(shape), -1)
+    X = svm_inputs(pattern_fingers(patterns[pattern_index]), axis == 0, SIGNS[main], OFF_SIGNS[off],
+                   grid[point], scaler, delta_weight, ratios[ratio])
+    probabilities = svm_model.predict_proba(X).astype(np.float16)
+
+    return ProbabilityTable({
+        "patterns": patterns,
+        "max_delta": np.array(float(max_delta)),
+        "probabilities": probabilities.reshape(shape + (probabilities.shape[1],)),
+        "classes": np.asarray(svm_model.classes_),
+    })
+
+
+def template_patterns(templates: List[Dict]) -> List[int]:
+    """Pattern codes (expected left + right fingers) of template rows as stored in the bundle"""
+    fingers = [[row[f"left_finger_state_{i}"] for i in range(5)] + [row[f"right_finger_state_{i}"] for i in range(5)]
+               for row in templates]
+    codes = pattern_codes(fingers) if fingers else np.empty(0, dtype=np.int64)
+    return sorted(int(code) for code in set(codes.tolist()) if code >= 0)
+
+
+def table_error(table: ProbabilityTable, svm_model, scaler, delta_weight: float,
+                n_samples: int = 5000, seed: int = 0) -> Dict[str, float]:
+    """Max/mean predict_proba difference and argmax disagreements against the exact model
+    on random inputs covered by the table"""
+    rng = np.random.RandomState(seed)
+    codes = table.patterns[rng.randint(len(table.patterns), size=n_samples)]
+    axis_x = rng.randint(2, size=n_samples) == 1
+    main_sign = SIGNS[rng.randint(2, size=n_samples)]
+    off_sign = OFF_SIGNS[rng.randint(3, size=n_samples)]
+    magnitude = rng.uniform(0.0, table.max_delta, size=n_samples)
+    magnitude[magnitude == 0] = table.step  # zero main delta is outside the table
+    # Half raw off-axis deltas (gesture_prediction.py), half zeroed ones (the motion features)
+    ratio = np.where(rng.randint(2, size=n_samples) == 1, rng.uniform(0.0, 1.0, size=n_samples), 0.0)
+
+    fingers = pattern_fingers(codes)
+    exact = svm_model.predict_proba(svm_inputs(fingers, axis_x, main_sign, off_sign, magnitude, scaler,
+                                               delta_weight, ratio))
+
+    sign_x = np.where(axis_x, main_sign, off_sign)
+    sign_y = np.where(axis_x, off_sign, main_sign)
+    motion_features = [{
+        'main_axis_x': int(ax), 'main_axis_y': int(not ax),
+        'delta_x': sx * m if ax else sx * r * m, 'delta_y': sy * r * m if ax else sy * m,
+        'motion_left': float(sx < 0), 'motion_right': float(sx > 0),
+        'motion_up': float(sy < 0), 'motion_down': float(sy > 0),
+    } for ax, sx, sy, m, r in zip(axis_x, sign_x, sign_y, magnitude, ratio)]
+    approx, found = table.predict_proba(fingers, motion_features)
+    if not found.all():
+        raise AssertionError("Probability table does not cover its own input space")
+
+    error = np.abs(approx - exact).max(axis=1)
+    return {
+        "samples": int(n_samples),
+        "max_error": float(error.max()),
+        "mean_error": float(error.mean()),
+        "argmax_mismatches": int((approx.argmax(axis=1) != exact.argmax(axis=1)).sum()),
+    }
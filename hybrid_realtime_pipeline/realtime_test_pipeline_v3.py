@@ -5,6 +5,8 @@ import pickle
 import cv2
 import mediapipe as mp
 import numpy as np
+from hand_roi import HandROITracker
+from landmark_features import extract_wrist, get_basic_finger_states as get_finger_states, is_fist
 import pandas as pd
 from collections import deque
 
@@ -43,62 +45,11 @@ hands = mp_hands.Hands(
     min_detection_confidence=0.7,
     min_tracking_confidence=0.5
 )
+# Run MediaPipe on a downscaled crop around the previous frame's hands
+hand_roi = HandROITracker.from_env(hands)
 mp_drawing = mp.solutions.drawing_utils
 
 # ==================== Utils ====================
-def is_fist(hand_landmarks):
-    if not hand_landmarks:
-        return False
-    bent = 0
-    if hand_landmarks.landmark[8].y  > hand_landmarks.landmark[5].y:  bent += 1  # index
-    if hand_landmarks.landmark[12].y > hand_landmarks.landmark[9].y:  bent += 1  # middle
-    if hand_landmarks.landmark[16].y > hand_landmarks.landmark[13].y: bent += 1  # ring
-    if hand_landmarks.landmark[20].y > hand_landmarks.landmark[17].y: bent += 1  # pinky
-    return bent >= 3
-
-def get_finger_states(hand_landmarks, handedness_label):
-    """
-    Return 5-bit finger states [thumb, index, middle, ring, pinky], 1=open, 0=closed.
-    Thumb uses x-direction depending on palm facing; others use y relative MCP-PIP.
-    """
-    states = [0, 0, 0, 0, 0]
-    if not hand_landmarks:
-        return states
-
-    wrist = hand_landmarks.landmark[0]
-    mcp_middle = hand_landmarks.landmark[9]
-    mcp_pinky = hand_landmarks.landmark[17]
-
-    v1 = [mcp_middle.x - wrist.x, mcp_middle.y - wrist.y]
-    v2 = [mcp_pinky.x - wrist.x,  mcp_pinky.y - wrist.y]
-    cross_z = v1[0]*v2[1] - v1[1]*v2[0]
-    palm_facing = 1 if cross_z > 0 else -1
-
-    # Thumb
-    if handedness_label == 'Right':
-        if palm_facing > 0:
-            states[0] = 1 if hand_landmarks.landmark[4].x < hand_landmarks.landmark[3].x else 0
-        else:
-            states[0] = 1 if hand_landmarks.landmark[4].x > hand_landmarks.landmark[3].x else 0
-    else:
-        if palm_facing > 0:
-            states[0] = 1 if hand_landmarks.landmark[4].x < hand_landmarks.landmark[3].x else 0
-        else:
-            states[0] = 1 if hand_landmarks.landmark[4].x > hand_landmarks.landmark[3].x else 0
-
-    # Index/Middle/Ring/Pinky (tip above PIP => open)
-    states[1] = 1 if hand_landmarks.landmark[8].y  < hand_landmarks.landmark[6].y  else 0
-    states[2] = 1 if hand_landmarks.landmark[12].y < hand_landmarks.landmark[10].y else 0
-    states[3] = 1 if hand_landmarks.landmark[16].y < hand_landmarks.landmark[14].y else 0
-    states[4] = 1 if hand_landmarks.landmark[20].y < hand_landmarks.landmark[18].y else 0
-    return states
-
-def extract_wrist(hand_landmarks):
-    if not hand_landmarks:
-        return None
-    w = hand_landmarks.landmark[0]
-    return np.array([w.x, w.y], dtype=float)
-
 def load_rule_csv(csv_path):
     """
     Returns: list of dict entries:
@@ -234,7 +185,7 @@ def main():
 
             frame = cv2.flip(frame, 1)
             rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = hands.process(rgb)
+            results = hand_roi.process(rgb)
 
             left_landmarks = None
             right_landmarks = None
@@ -422,6 +373,7 @@ def main():
     finally:
         cap.release()
         cv2.destroyAllWindows()
+        print(f"[INFO] Hand ROI: {hand_roi.stats()}")
         print("Exited.")
 
 
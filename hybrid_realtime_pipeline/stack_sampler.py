@@ -0,0 +1,119 @@
+"""
+In-process sampling profiler
+Lấy mẫu stack của tất cả các thread để tìm nguyên nhân CPU tăng đột biến
+
+StackSampler runs on its own daemon thread for a bounded duration and, every
+interval, reads the current Python stack of every other thread
+(sys._current_frames). Identical stacks are counted, and the result is
+returned as collapsed-stack text, one "thread;outer;...;inner count" line
+per stack, which flamegraph.pl, speedscope or inferno read directly.
+
+Processing threads never stop: a sample only holds the GIL while it walks
+the frames (tens of microseconds), so a 10 ms interval costs well under 1%
+of one core. Native work (MediaPipe, OpenCV, the SVM) is attributed to the
+Python frame that called it, e.g. HandROITracker.run.
+
+    sampler = StackSampler(duration=5.0, on_done=lambda profile: print(profile['stacks']))
+    sampler.start()
+
+from_command() builds one from a protocol command's optional "duration"
+(seconds) and "interval_ms" fields, rejecting non-numeric values.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional
+
+DEFAULT_DURATION = 5.0
+DEFAULT_INTERVAL = 0.01
+MAX_DURATION = 60.0
+MIN_INTERVAL = 0.001
+MAX_DEPTH = 128
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame) -> str:
+    """Outermost-first ';'-joined labels of a frame and its callers"""
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class StackSampler:
+    """Bounded sampling profile of every thread but its own"""
+
+    def __init__(self, duration: float = DEFAULT_DURATION, interval: float = DEFAULT_INTERVAL,
+                 on_done: Optional[Callable[[Dict], None]] = None):
+        self.duration = min(max(float(duration), 0.0), MAX_DURATION)
+        self.interval = max(float(interval), MIN_INTERVAL)
+        self.on_done = on_done
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self.thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_command(cls, command: Dict, on_done: Optional[Callable[[Dict], None]] = None) -> "StackSampler":
+        """Sampler for a {"type": "profile", "duration": s, "interval_ms": ms} command; ValueError if invalid"""
+        duration = command.get('duration', DEFAULT_DURATION)
+        interval_ms = command.get('interval_ms', DEFAULT_INTERVAL * 1000.0)
+        for name, value in (('duration', duration), ('interval_ms', interval_ms)):
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not value > 0 or value == float('inf'):
+                raise ValueError(f"'{name}' must be a positive number, got {value!r}")
+        return cls(duration, interval_ms / 1000.0, on_done=on_done)
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self) -> "StackSampler":
+        self.thread = threading.Thread(target=self.run, name='stack-sampler', daemon=True)
+        self.thread.start()
+        return self
+
+    def sample(self):
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            self.counts[f"{names.get(ident, ident)};{collapse_stack(frame)}"] += 1
+        self.samples += 1
+
+    def run(self):
+        started = time.perf_counter()
+        deadline = started + self.duration
+        next_sample = started
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if now < next_sample:
+                time.sleep(min(next_sample - now, deadline - now))
+                continue
+            self.sample()
+            next_sample += self.interval
+            if next_sample < now:
+                next_sample = now + self.interval  # fell behind: skip samples rather than burst
+        if self.on_done is not None:
+            self.on_done(self.result(time.perf_counter() - started))
+
+    def result(self, elapsed: float) -> Dict:
+        return {
+            'duration_s': round(elapsed, 3),
+            'interval_ms': round(self.interval * 1000.0, 3),
+            'samples': self.samples,
+            'stacks': self.collapsed(),
+        }
+
+    def collapsed(self) -> str:
+        """Collapsed-stack text, most frequent stacks first"""
+        return '\n'.join(f"{stack} {count}" for stack, count in self.counts.most_common())
@@ -0,0 +1,128 @@
+"""
+Per-stage latency tracing
+Đo thời gian từng bước xử lý frame (decode, MediaPipe, đặc trưng, SVM)
+
+StageMetrics keeps, per stage name, a rolling window of the last `window`
+durations measured with time.perf_counter (monotonic). Recording a span is
+one clock read and one deque append, cheap enough to leave on in
+production; percentiles are only computed when snapshot() is asked for.
+
+    metrics = StageMetrics()
+    with metrics.span('mediapipe'):
+        results = hands.process(rgb)
+    metrics.snapshot()  # {'mediapipe': {'count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'}}
+
+Stages used by the practice pipeline:
+    decode      base64 / JPEG / raw RGB / landmark payload -> array
+    mediapipe   hand ROI crop + hands.process
+    landmarks   MediaPipe results -> (hands, 21, 3) array
+    features    finger states, fist, wrist tracking, state machine
+    evaluate    evaluate_with_ml: template rules + SVM
+    svm         SVM predict/predict_proba alone (memo misses only)
+    frame       the whole frame, as seen by the processor
+
+Settings (environment):
+    GESTURE_STAGE_METRICS          1 (default) / 0 to record nothing
+    GESTURE_STAGE_METRICS_WINDOW   durations kept per stage (default 512)
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+import numpy as np
+
+DEFAULT_WINDOW = 512
+PERCENTILES = (50, 95, 99)
+
+
+def parse_metrics_every(value) -> int:
+    """Client-supplied 'metrics_every': a frame count >= 0 (0 = report on request only)"""
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise ValueError(f"'metrics_every' must be a non-negative integer, got {value!r}")
+    return value
+
+
+class Span:
+    """Reusable context manager that records one stage's duration"""
+
+    __slots__ = ('metrics', 'stage', 'start')
+
+    def __init__(self, metrics: "StageMetrics", stage: str):
+        self.metrics = metrics
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class StageMetrics:
+    """Rolling per-stage latency windows for one session"""
+
+    def __init__(self, window: int = DEFAULT_WINDOW, enabled: bool = True):
+        self.window = max(1, int(window))
+        self.enabled = enabled
+        self.durations: Dict[str, deque] = {}
+        self.counts: Dict[str, int] = {}
+        self.lock = threading.Lock()  # snapshot() may run on another thread than record()
+
+    @classmethod
+    def from_env(cls) -> "StageMetrics":
+        return cls(int(os.environ.get('GESTURE_STAGE_METRICS_WINDOW', DEFAULT_WINDOW)),
+                   enabled=os.environ.get('GESTURE_STAGE_METRICS', '1') != '0')
+
+    def span(self, stage: str):
+        return Span(self, stage) if self.enabled else NULL_SPAN
+
+    def record(self, stage: str, seconds: float):
+        if not self.enabled:
+            return
+        with self.lock:
+            durations = self.durations.get(stage)
+            if durations is None:
+                durations = self.durations[stage] = deque(maxlen=self.window)
+            durations.append(seconds)
+            self.counts[stage] = self.counts.get(stage, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """count (since start/reset) and mean/p50/p95/p99 in ms over each stage's window"""
+        with self.lock:
+            stages = {stage: list(durations) for stage, durations in self.durations.items()}
+            counts = dict(self.counts)
+        report = {}
+        for stage, values in stages.items():
+            if not values:
+                continue
+            ms = np.asarray(values) * 1000.0
+            report[stage] = {
+                'count': counts.get(stage, 0),
+                'mean_ms': round(float(ms.mean()), 3),
+                **{f'p{p}_ms': round(float(v), 3) for p, v in zip(PERCENTILES, np.percentile(ms, PERCENTILES))},
+            }
+        return report
+
+    def reset(self):
+        with self.lock:
+            self.durations.clear()
+            self.counts.clear()
@@ -0,0 +1,369 @@
+"""
+NumPy-only SVM inference
+Dự đoán SVM chỉ dùng NumPy, không cần import scikit-learn
+
+The training scripts export every SVC they pickle a second time as a
+compact .npz file. It holds the support vectors, dual coefficients,
+intercepts, kernel parameters, Platt sigmoid parameters (probA_/probB_),
+the feature scaler's mean/scale and the class labels. CompiledSVC
+reproduces SVC.predict / predict_proba from that file with plain NumPy,
+the way libsvm computes them:
+
+- one-vs-one decision values for every class pair, and votes for predict;
+- a Platt sigmoid per pair, then the pairwise coupling of Wu, Lin and
+  Weng (libsvm's multiclass_probability) for predict_proba.
+
+Inference processes then skip importing scikit-learn and unpickling the
+full estimator. The .npz is loaded with allow_pickle=False.
+
+load_compiled_models(models_dir) returns the same (svm_model,
+label_encoder, scaler, static_dynamic_data) tuple as the pickle loaders.
+It reads the single model bundle (model_bundle.py) when there is a fresh
+one, else the .npz files. It returns None when the compiled files are
+missing or older than the pickles, and callers then fall back to pickle.
+"""
+
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+COMPILED_MODEL = "motion_svm_compiled.npz"
+COMPILED_STATIC_DYNAMIC = "static_dynamic_compiled.npz"
+MODEL_PKL = "motion_svm_model.pkl"
+STATIC_DYNAMIC_PKL = "static_dynamic_classifier.pkl"
+
+KERNELS = ("linear", "poly", "rbf", "sigmoid")
+MIN_PROB = 1e-7  # libsvm clamps pairwise probabilities to [MIN_PROB, 1 - MIN_PROB]
+
+
+class CompiledScaler:
+    """StandardScaler.transform from mean_/scale_"""
+
+    def __init__(self, mean: Optional[np.ndarray], scale: Optional[np.ndarray]):
+        self.mean_ = mean
+        self.scale_ = scale
+        reference = mean if mean is not None else scale
+        if reference is not None:
+            self.n_features_in_ = len(reference)
+
+    def transform(self, X) -> np.ndarray:
+        X = np.array(X, dtype=np.float64)
+        if self.mean_ is not None:
+            X -= self.mean_
+        if self.scale_ is not None:
+            X /= self.scale_
+        return X
+
+
+class CompiledLabelEncoder:
+    """LabelEncoder.transform / inverse_transform over fixed label names"""
+
+    def __init__(self, classes: np.ndarray):
+        self.classes_ = classes
+        self._index = {label: i for i, label in enumerate(classes.tolist())}
+
+    def transform(self, labels) -> np.ndarray:
+        return np.array([self._index[label] for label in labels], dtype=np.int64)
+
+    def inverse_transform(self, y) -> np.ndarray:
+        return self.classes_[np.asarray(y, dtype=np.int64)]
+
+
+class CompiledSVC:
+    """predict / predict_proba of a fitted sklearn SVC, from exported arrays"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.kernel = str(arrays["kernel"])
+        if self.kernel not in KERNELS:
+            raise ValueError(f"Unsupported kernel '{self.kernel}'")
+        self.gamma = float(arrays["gamma"])
+        self.coef0 = float(arrays["coef0"])
+        self.degree = int(arrays["degree"])
+        self.classes_ = arrays["classes"]
+        # np.asarray keeps memory-mapped bundle arrays shared instead of copying them
+        self.support_vectors_ = np.ascontiguousarray(arrays["support_vectors"], dtype=np.float64)
+        self.n_support_ = np.asarray(arrays["n_support"], dtype=np.int64)
+        self.intercept_ = np.asarray(arrays["intercept"], dtype=np.float64)
+        self.probA_ = np.asarray(arrays["prob_a"], dtype=np.float64)
+        self.probB_ = np.asarray(arrays["prob_b"], dtype=np.float64)
+
+        n_class = len(self.classes_)
+        self.pairs = [(i, j) for i in range(n_class) for j in range(i + 1, n_class)]
+        self.pair_first = np.array([i for i, _ in self.pairs], dtype=np.int64)
+        self.pair_second = np.array([j for _, j in self.pairs], dtype=np.int64)
+
+        if "pair_weights" in arrays:
+            # Precomputed in model bundles
+            self.pair_weights = np.asarray(arrays["pair_weights"], dtype=np.float64)
+            self.sv_sq_norms = np.asarray(arrays["sv_sq_norms"], dtype=np.float64)
+        else:
+            self.pair_weights = pair_weight_matrix(arrays["dual_coef"], self.n_support_, self.pairs)
+            self.sv_sq_norms = np.einsum("ij,ij->i", self.support_vectors_, self.support_vectors_)
+
+        self.scaler = None
+        self.label_encoder = None
+        self.metadata = {}
+
+    def kernel_matrix(self, X: np.ndarray) -> np.ndarray:
+        dot = X @ self.support_vectors_.T
+        if self.kernel == "linear":
+            return dot
+        if self.kernel == "rbf":
+            sq_dist = np.einsum("ij,ij->i", X, X)[:, None] + self.sv_sq_norms[None, :] - 2.0 * dot
+            return np.exp(-self.gamma * np.maximum(sq_dist, 0.0))
+        if self.kernel == "poly":
+            return (self.gamma * dot + self.coef0) ** self.degree
+        return np.tanh(self.gamma * dot + self.coef0)
+
+    def pairwise_decision(self, X) -> np.ndarray:
+        """libsvm one-vs-one decision values, shape (n_samples, n_pairs)"""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        return self.kernel_matrix(X) @ self.pair_weights + self.intercept_
+
+    def predict(self, X) -> np.ndarray:
+        decision = self.pairwise_decision(X)
+        # Pair (i, j) votes for i when its decision value is positive
+        winners = np.where(decision > 0, self.pair_first, self.pair_second)
+        votes = np.zeros((len(decision), len(self.classes_)), dtype=np.int64)
+        np.add.at(votes, (np.arange(len(decision))[:, None], winners), 1)
+        return self.classes_[np.argmax(votes, axis=1)]
+
+    def predict_proba(self, X) -> np.ndarray:
+        if not len(self.probA_):
+            raise AttributeError("Model was trained without probability=True")
+        decision = self.pairwise_decision(X)
+
+        # Platt sigmoid per pair, written like libsvm's sigmoid_predict to stay stable
+        f_apb = decision * self.probA_ + self.probB_
+        pair_prob = np.where(f_apb >= 0,
+                             np.exp(-np.abs(f_apb)) / (1.0 + np.exp(-np.abs(f_apb))),
+                             1.0 / (1.0 + np.exp(-np.abs(f_apb))))
+        pair_prob = np.clip(pair_prob, MIN_PROB, 1.0 - MIN_PROB)
+
+        n_rows, n_class = len(decision), len(self.classes_)
+        r = np.zeros((n_rows, n_class, n_class))
+        r[:, self.pair_first, self.pair_second] = pair_prob
+        r[:, self.pair_second, self.pair_first] = 1.0 - pair_prob
+        return multiclass_probability(r)
+
+
+def pair_weight_matrix(dual_coef: np.ndarray, n_support: np.ndarray, pairs) -> np.ndarray:
+    """Fold the one-vs-one dual coefficients into one (n_SV, n_pairs) matrix,
+    so every decision value comes out of a single matmul"""
+    dual_coef = np.asarray(dual_coef, dtype=np.float64)
+    starts = np.concatenate([[0], np.cumsum(n_support)])
+    weights = np.zeros((dual_coef.shape[1], len(pairs)))
+    for p, (i, j) in enumerate(pairs):
+        weights[starts[i]:starts[i + 1], p] = dual_coef[j - 1, starts[i]:starts[i + 1]]
+        weights[starts[j]:starts[j + 1], p] = dual_coef[i, starts[j]:starts[j + 1]]
+    return weights
+
+
+def multiclass_probability(r: np.ndarray) -> np.ndarray:
+    """Pairwise coupling (libsvm multiclass_probability, method 2 of Wu, Lin and Weng).
+
+    r has shape (n_rows, k, k) with r[n, i, j] = P(class i | i or j). Each row
+    runs libsvm's iteration and stops at the same point libsvm would; rows
+    are vectorized, the coordinate updates inside a sweep stay sequential.
+    """
+    n_rows, k = r.shape[:2]
+    if n_rows == 1:
+        # One gesture attempt at a time is the common case, where per-call
+        # NumPy overhead on k-sized vectors costs more than plain floats
+        return np.array([couple_single_row(r[0].tolist())])
+
+    rows = np.arange(n_rows)
+    Q = -np.swapaxes(r, 1, 2) * r
+    Q[:, np.arange(k), np.arange(k)] = np.sum(r ** 2, axis=1)  # diagonal of r is 0
+    p = np.full((n_rows, k), 1.0 / k)
+    eps = 0.005 / k
+    active = rows
+
+    for _ in range(max(100, k)):
+        Qa, pa = Q[active], p[active]
+        Qp = np.einsum("nij,nj->ni", Qa, pa)
+        pQp = np.einsum("ni,ni->n", pa, Qp)
+        still_active = np.max(np.abs(Qp - pQp[:, None]), axis=1) >= eps
+        if not still_active.any():
+            break
+        active, Qa, pa, Qp, pQp = (active[still_active], Qa[still_active], pa[still_active],
+                                   Qp[still_active], pQp[still_active])
+        for t in range(k):
+            Qt = Qa[:, t]
+            diff = (-Qp[:, t] + pQp) / Qt[:, t]
+            pa[:, t] += diff
+            pQp = (pQp + diff * (diff * Qt[:, t] + 2 * Qp[:, t])) / (1 + diff) / (1 + diff)
+            Qp = (Qp + diff[:, None] * Qt) / (1 + diff)[:, None]
+            pa /= (1 + diff)[:, None]
+        p[active] = pa
+    return p
+
+
+def couple_single_row(r) -> list:
+    """multiclass_probability for one row, on Python floats (same steps as libsvm)"""
+    k = len(r)
+    Q = [[-r[j][t] * r[t][j] for j in range(k)] for t in range(k)]
+    for t in range(k):
+        Q[t][t] = sum(r[j][t] * r[j][t] for j in range(k) if j != t)
+    p = [1.0 / k] * k
+    eps = 0.005 / k
+
+    for _ in range(max(100, k)):
+        Qp = [sum(Q_t[j] * p[j] for j in range(k)) for Q_t in Q]
+        pQp = sum(p[t] * Qp[t] for t in range(k))
+        if max(abs(value - pQp) for value in Qp) < eps:
+            break
+        for t in range(k):
+            Q_t = Q[t]
+            diff = (-Qp[t] + pQp) / Q_t[t]
+            p[t] += diff
+            pQp = (pQp + diff * (diff * Q_t[t] + 2 * Qp[t])) / (1 + diff) / (1 + diff)
+            Qp = [(Qp[j] + diff * Q_t[j]) / (1 + diff) for j in range(k)]
+            p = [value / (1 + diff) for value in p]
+    return p
+
+
+def compiled_svc_arrays(model, scaler=None, label_names=None, **metadata) -> Dict[str, np.ndarray]:
+    """Fitted attributes of an sklearn SVC (plus optional StandardScaler and label names) as arrays.
+
+    Metadata values must be plain numbers, strings or lists of them.
+    """
+    binary = len(model.classes_) == 2
+    # sklearn flips dual_coef_/intercept_ for binary SVCs; libsvm's internal sign is used here
+    dual_coef = -model.dual_coef_ if binary else model.dual_coef_
+    intercept = -model.intercept_ if binary else model.intercept_
+    prob_a = getattr(model, "_probA", np.empty(0))
+    prob_b = getattr(model, "_probB", np.empty(0))
+
+    arrays = {
+        "kernel": np.array(model.kernel),
+        "gamma": np.array(float(model._gamma)),
+        "coef0": np.array(float(model.coef0)),
+        "degree": np.array(int(model.degree)),
+        "classes": np.asarray(model.classes_),
+        "support_vectors": np.asarray(model.support_vectors_, dtype=np.float64),
+        "n_support": np.asarray(model.n_support_, dtype=np.int64),
+        "dual_coef": np.asarray(dual_coef, dtype=np.float64),
+        "intercept": np.asarray(intercept, dtype=np.float64),
+        "prob_a": np.asarray(prob_a, dtype=np.float64),
+        "prob_b": np.asarray(prob_b, dtype=np.float64),
+    }
+    if scaler is not None:
+        if getattr(scaler, "with_mean", True) and getattr(scaler, "mean_", None) is not None:
+            arrays["scaler_mean"] = np.asarray(scaler.mean_, dtype=np.float64)
+        if getattr(scaler, "with_std", True) and getattr(scaler, "scale_", None) is not None:
+            arrays["scaler_scale"] = np.asarray(scaler.scale_, dtype=np.float64)
+        arrays["has_scaler"] = np.array(True)
+    if label_names is not None:
+        arrays["label_names"] = np.asarray(label_names).astype(str)
+    for key, value in metadata.items():
+        arrays[f"meta_{key}"] = np.asarray(value)
+    return arrays
+
+
+def export_compiled_svc(path, model, scaler=None, label_names=None, **metadata):
+    """Write a fitted sklearn SVC (plus optional StandardScaler and label names) as .npz.
+
+    Reads the fitted attributes only, so loading the file never needs scikit-learn.
+    """
+    arrays = compiled_svc_arrays(model, scaler, label_names, **metadata)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)  # Readers never see a half-written file
+    print(f"[INFO] Compiled NumPy model saved to {path}")
+
+
+def load_compiled_svc(path) -> CompiledSVC:
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {key: data[key] for key in data.files}
+    return compiled_svc_from_arrays(arrays)
+
+
+def compiled_svc_from_arrays(arrays: Dict[str, np.ndarray]) -> CompiledSVC:
+    model = CompiledSVC(arrays)
+    if "has_scaler" in arrays:
+        model.scaler = CompiledScaler(arrays.get("scaler_mean"), arrays.get("scaler_scale"))
+    if "label_names" in arrays:
+        model.label_encoder = CompiledLabelEncoder(arrays["label_names"])
+    model.metadata = {key[len("meta_"):]: value.tolist() for key, value in arrays.items() if key.startswith("meta_")}
+    return model
+
+
+def is_fresh(compiled_path: str, pickle_path: str) -> bool:
+    """Compiled file exists and was written no earlier than its pickle"""
+    if not os.path.exists(compiled_path):
+        return False
+    return not os.path.exists(pickle_path) or os.path.getmtime(compiled_path) >= os.path.getmtime(pickle_path)
+
+
+def load_compiled_models(models_dir) -> Optional[Tuple]:
+    """(svm_model, label_encoder, scaler, static_dynamic_data) from compiled files, or None"""
+    models_dir = str(models_dir)
+    from model_bundle import load_fresh_bundle  # model_bundle builds on this module
+    bundle = load_fresh_bundle(models_dir)
+    if bundle is not None:
+        return bundle.models()
+
+    compiled_path = os.path.join(models_dir, COMPILED_MODEL)
+    if not is_fresh(compiled_path, os.path.join(models_dir, MODEL_PKL)):
+        return None
+
+    svm_model = load_compiled_svc(compiled_path)
+
+    static_dynamic_data = None
+    static_path = os.path.join(models_dir, COMPILED_STATIC_DYNAMIC)
+    if is_fresh(static_path, os.path.join(models_dir, STATIC_DYNAMIC_PKL)):
+        static_model = load_compiled_svc(static_path)
+        static_dynamic_data = {'model': static_model, 'scaler': static_model.scaler, **static_model.metadata}
+    elif os.path.exists(os.path.join(models_dir, STATIC_DYNAMIC_PKL)):
+        return None  # Static/dynamic pickle is newer: let the caller load everything from pickle
+
+    return svm_model, svm_model.label_encoder, svm_model.scaler, static_dynamic_data
+
+
+def check_parity(model, compiled: CompiledSVC, n_samples: int = 2000, seed: int = 0) -> float:
+    """Compare against the sklearn model on random inputs; returns the max predict_proba difference"""
+    X = np.random.RandomState(seed).randn(n_samples, compiled.support_vectors_.shape[1]) * 2
+    if not np.array_equal(compiled.predict(X), model.predict(X)):
+        raise AssertionError("Compiled predict() disagrees with scikit-learn")
+    if not len(compiled.probA_):
+        return 0.0
+    return float(np.max(np.abs(compiled.predict_proba(X) - model.predict_proba(X))))
+
+
+if __name__ == "__main__":
+    # Compile existing pickles and check them against scikit-learn:
+    #   python svm_inference.py <models_dir> [<models_dir> ...]
+    import pickle
+    import sys
+
+    def export_and_check(path, model, **kwargs):
+        export_compiled_svc(path, model, **kwargs)
+        difference = check_parity(model, load_compiled_svc(path))
+        print(f"[INFO] Parity with scikit-learn: predict identical, max predict_proba difference {difference:.2e}")
+
+    for directory in sys.argv[1:] or ["code/models"]:
+        with open(os.path.join(directory, MODEL_PKL), "rb") as f:
+            model_data = pickle.load(f)
+        # The transform constants travel with the model; a guessed value would silently change every score
+        missing = [key for key in ("delta_weight", "min_delta_mag") if key not in model_data]
+        if missing:
+            sys.exit(f"[ERROR] {os.path.join(directory, MODEL_PKL)} does not record {', '.join(missing)}; "
+                     "retrain it with the current trainers before compiling")
+        with open(os.path.join(directory, "motion_scaler.pkl"), "rb") as f:
+            motion_scaler = pickle.load(f)
+        export_and_check(os.path.join(directory, COMPILED_MODEL), model_data["model"], scaler=motion_scaler,
+                         label_names=model_data["label_encoder"].classes_,
+                         delta_weight=model_data["delta_weight"],
+                         min_delta_mag=model_data["min_delta_mag"])
+
+        static_pkl = os.path.join(directory, STATIC_DYNAMIC_PKL)
+        if os.path.exists(static_pkl):
+            with open(static_pkl, "rb") as f:
+                static_data = pickle.load(f)
+            export_and_check(os.path.join(directory, COMPILED_STATIC_DYNAMIC), static_data["model"],
+                             scaler=static_data.get("scaler"),
+                             static_gestures=list(static_data.get("static_gestures", [])),
+                             dynamic_gestures=list(static_data.get("dynamic_gestures", [])),
+                             static_threshold=static_data.get("static_threshold", 0.0))
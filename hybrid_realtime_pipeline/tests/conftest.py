@@ -0,0 +1,8 @@
+import os
+import sys
+
+PIPELINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_UTILS_DIR = os.path.join(PIPELINE_DIR, '..', 'SEP490_08_GestPipe_WebApplication', 'backend', 'src', 'utils')
+
+sys.path.append(PIPELINE_DIR)
+sys.path.append(os.path.abspath(BACKEND_UTILS_DIR))
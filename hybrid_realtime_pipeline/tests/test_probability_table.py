@@ -0,0 +1,107 @@
+"""
+Probability table coverage and parity with the exact motion SVM
+Kiểm tra bảng xác suất so với predict_proba trên dữ liệu giống backend
+"""
+
+import numpy as np
+import pytest
+
+import gesture_prediction
+from motion_features import MotionAccumulator
+
+ATTEMPTS_PER_GESTURE = 200
+MIN_HIT_RATE = 0.95
+MAX_PROBABILITY_ERROR = 0.02
+
+
+def motion_path(dx: float, dy: float, steps: int = 30) -> dict:
+    """Motion features of a straight hand path, as the web pipeline computes them"""
+    accumulator = MotionAccumulator()
+    for t in np.linspace(0.0, 1.0, steps):
+        accumulator.add(0.5 + t * dx, 0.5 + t * dy)
+    return accumulator.features()
+
+
+def dynamic_attempts(models, rng) -> list:
+    """Noisy attempts at every dynamic template, with off-axis drift"""
+    attempts = []
+    for name, template in models.gesture_templates.items():
+        if template['is_static']:
+            continue
+        for _ in range(ATTEMPTS_PER_GESTURE):
+            main = np.sign(template['delta_x'] if template['main_axis_x'] else template['delta_y'])
+            main *= rng.uniform(0.08, 0.4)
+            off = main * rng.uniform(-0.9, 0.9)
+            dx, dy = (main, off) if template['main_axis_x'] else (off, main)
+            attempts.append({
+                'left_fingers': template['left_fingers'],
+                'right_fingers': template['right_fingers'],
+                'motion_features': motion_path(dx, dy),
+                'target_gesture': name,
+                'duration': 1.0,
+            })
+    return attempts
+
+
+@pytest.fixture(scope='module')
+def models():
+    models = gesture_prediction.model_cache.current()
+    if models.probability_table is None:
+        pytest.skip("model bundle has no probability table")
+    return models
+
+
+def ml_rows(models, attempts):
+    """(finger rows, motion rows) of the attempts that pass the rule cascade, as the backend builds them"""
+    finger_rows, motion_rows = [], []
+    for attempt in attempts:
+        motion_features = dict(attempt['motion_features'])
+        verdict = gesture_prediction.check_gesture_rules(
+            attempt['left_fingers'], attempt['right_fingers'], motion_features,
+            attempt['target_gesture'], attempt['duration'], models)
+        if verdict is None:
+            finger_rows.append(models.gesture_templates[attempt['target_gesture']]['left_fingers']
+                               + attempt['right_fingers'])
+            motion_rows.append(motion_features)
+    return finger_rows, motion_rows
+
+
+def test_table_covers_backend_rows(models):
+    finger_rows, motion_rows = ml_rows(models, dynamic_attempts(models, np.random.RandomState(0)))
+    assert len(motion_rows) > 100
+    assert any(row['delta_x'] and row['delta_y'] for row in motion_rows)  # raw off-axis deltas
+
+    approx, found = models.probability_table.predict_proba(finger_rows, motion_rows)
+    exact = models.svm_model.predict_proba(gesture_prediction.prepare_features_batch(
+        finger_rows, motion_rows, models.scaler, models.delta_weight))
+
+    assert found.mean() >= MIN_HIT_RATE
+    assert np.abs(approx[found] - exact[found]).max() < MAX_PROBABILITY_ERROR
+
+
+def test_table_covers_zeroed_off_axis_rows(models):
+    """Rows shaped like the trainers' features (off-axis delta zeroed) are covered too"""
+    finger_rows, motion_rows = ml_rows(models, dynamic_attempts(models, np.random.RandomState(1)))
+    for row in motion_rows:
+        row['delta_x' if row['main_axis_y'] else 'delta_y'] = 0.0
+
+    approx, found = models.probability_table.predict_proba(finger_rows, motion_rows)
+    exact = models.svm_model.predict_proba(gesture_prediction.prepare_features_batch(
+        finger_rows, motion_rows, models.scaler, models.delta_weight))
+
+    assert found.mean() >= MIN_HIT_RATE
+    assert np.abs(approx[found] - exact[found]).max() < MAX_PROBABILITY_ERROR
+
+
+def test_table_engine_matches_svc_verdicts(models, monkeypatch):
+    attempts = dynamic_attempts(models, np.random.RandomState(2))
+    verdicts = {}
+    for engine in ('svc', 'table'):
+        monkeypatch.setattr(gesture_prediction, 'INFERENCE_ENGINE', engine)
+        monkeypatch.setattr(gesture_prediction, 'probability_memo', gesture_prediction.ProbabilityMemo(0))
+        batch = [dict(attempt, motion_features=dict(attempt['motion_features'])) for attempt in attempts]
+        verdicts[engine] = [stage for _, stage, _ in gesture_prediction.evaluate_gestures_batch(batch)]
+
+    assert 'ml_correct' in verdicts['svc']
+    disagreements = sum(a != b for a, b in zip(verdicts['svc'], verdicts['table']))
+    assert disagreements <= 0.01 * len(attempts)
@@ -0,0 +1,64 @@
+"""
+CompiledSVC parity with scikit-learn
+Kiểm tra CompiledSVC cho kết quả giống SVC của scikit-learn
+"""
+
+import os
+import pickle
+import warnings
+
+import numpy as np
+import pytest
+from sklearn.datasets import make_blobs
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+from svm_inference import COMPILED_MODEL, MODEL_PKL, export_compiled_svc, load_compiled_svc
+
+from conftest import PIPELINE_DIR
+
+MODELS_DIR = os.path.join(PIPELINE_DIR, 'code', 'models')
+PROBA_TOLERANCE = 1e-6
+
+
+def assert_parity(model, compiled, X):
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+    np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X), atol=PROBA_TOLERANCE)
+
+
+def test_committed_model_matches_pickle():
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')  # pickles from an older scikit-learn
+        with open(os.path.join(MODELS_DIR, MODEL_PKL), 'rb') as f:
+            model_data = pickle.load(f)
+        with open(os.path.join(MODELS_DIR, 'motion_scaler.pkl'), 'rb') as f:
+            scaler = pickle.load(f)
+    model = model_data['model']
+    compiled = load_compiled_svc(os.path.join(MODELS_DIR, COMPILED_MODEL))
+
+    assert compiled.metadata['delta_weight'] == model_data['delta_weight']
+    np.testing.assert_array_equal(compiled.label_encoder.classes_, model_data['label_encoder'].classes_)
+
+    # Gesture-like rows (finger bits + scaled motion) and inputs far from the training data
+    rng = np.random.RandomState(0)
+    motion = rng.randn(500, 8) * scaler.scale_ + scaler.mean_
+    gesture_rows = np.hstack([rng.randint(2, size=(500, 10)), scaler.transform(motion)])
+    np.testing.assert_allclose(compiled.scaler.transform(motion), scaler.transform(motion))
+    assert_parity(model, compiled, gesture_rows)
+    assert_parity(model, compiled, rng.randn(500, gesture_rows.shape[1]) * 3)
+
+
+@pytest.mark.parametrize('n_classes', [2, 4])
+@pytest.mark.parametrize('kernel', ['rbf', 'linear', 'poly'])
+def test_fresh_svc_round_trip(tmp_path, n_classes, kernel):
+    X, y = make_blobs(n_samples=120, centers=n_classes, n_features=6, cluster_std=3.0, random_state=0)
+    scaler = StandardScaler().fit(X)
+    model = SVC(kernel=kernel, C=2.0, probability=True, random_state=0).fit(scaler.transform(X), y)
+
+    path = tmp_path / COMPILED_MODEL
+    export_compiled_svc(path, model, scaler=scaler, label_names=[f"gesture_{c}" for c in model.classes_])
+    compiled = load_compiled_svc(path)
+
+    X_test = np.random.RandomState(1).randn(300, 6) * 4
+    np.testing.assert_allclose(compiled.scaler.transform(X_test), scaler.transform(X_test))
+    assert_parity(model, compiled, scaler.transform(X_test))
@@ -7,6 +7,7 @@ from typing import Dict, List, Tuple, Optional
 import cv2
 import mediapipe as mp
 import numpy as np
+from landmark_features import extract_wrist, get_finger_states, is_fist
 
 # Constants from original training_session.py
 BUFFER_SIZE = 60
@@ -110,122 +111,6 @@ def load_gesture_templates():
     return templates
 
 
-def get_finger_states(hand_landmarks, handedness_label: str) -> List[int]:
-    """Extract finger states with improved thumb detection"""
-    states = [0, 0, 0, 0, 0]
-    if not hand_landmarks:
-        return states
-
-    # Get key landmarks
-    wrist = hand_landmarks.landmark[0]
-    thumb_tip = hand_landmarks.landmark[4]    # Thumb tip
-    thumb_ip = hand_landmarks.landmark[3]     # Thumb IP joint
-    thumb_mcp = hand_landmarks.landmark[2]    # Thumb MCP joint
-    index_mcp = hand_landmarks.landmark[5]    # Index MCP joint
-    
-    mcp_middle = hand_landmarks.landmark[9]
-    mcp_pinky = hand_landmarks.landmark[17]
-
-    # Determine palm orientation
-    v1 = [mcp_middle.x - wrist.x, mcp_middle.y - wrist.y]
-    v2 = [mcp_pinky.x - wrist.x, mcp_pinky.y - wrist.y]
-    cross_z = v1[0] * v2[1] - v1[1] * v2[0]
-    palm_facing = 1 if cross_z > 0 else -1
-
-    # IMPROVED THUMB DETECTION
-    # Method 1: Distance from thumb tip to palm center
-    palm_center_x = (index_mcp.x + mcp_pinky.x) / 2
-    palm_center_y = (index_mcp.y + mcp_pinky.y) / 2
-    thumb_to_palm_dist = ((thumb_tip.x - palm_center_x)**2 + (thumb_tip.y - palm_center_y)**2)**0.5
-    
-    # Method 2: Thumb extension check (tip vs MCP joint)
-    thumb_extended_x = abs(thumb_tip.x - thumb_mcp.x) > 0.04  # Extended horizontally
-    thumb_extended_y = abs(thumb_tip.y - thumb_mcp.y) > 0.03  # Extended vertically
-    
-    # Method 3: Relative position check (original method as fallback)
-    if handedness_label == "Right":
-        if palm_facing > 0:
-            thumb_position_open = thumb_tip.x < thumb_ip.x
-        else:
-            thumb_position_open = thumb_tip.x > thumb_ip.x
-    else:
-        if palm_facing > 0:
-            thumb_position_open = thumb_tip.x < thumb_ip.x
-        else:
-            thumb_position_open = thumb_tip.x > thumb_ip.x
-    
-    # Method 4: Angle-based detection (thumb joints alignment)
-    # Calculate angle between thumb MCP->IP->TIP
-    import math
-    def angle_between_points(p1, p2, p3):
-        """Calculate angle at p2 formed by p1-p2-p3"""
-        v1 = [p1.x - p2.x, p1.y - p2.y]
-        v2 = [p3.x - p2.x, p3.y - p2.y]
-        
-        dot_product = v1[0]*v2[0] + v1[1]*v2[1]
-        mag1 = (v1[0]**2 + v1[1]**2)**0.5
-        mag2 = (v2[0]**2 + v2[1]**2)**0.5
-        
-        if mag1 == 0 or mag2 == 0:
-            return 0
-        
-        cos_angle = dot_product / (mag1 * mag2)
-        cos_angle = max(-1, min(1, cos_angle))  # Clamp to [-1, 1]
-        return math.degrees(math.acos(cos_angle))
-    
-    thumb_angle = angle_between_points(thumb_mcp, thumb_ip, thumb_tip)
-    thumb_straight = thumb_angle > 140  # Straight thumb (extended)
-    
-    # COMBINED THUMB DECISION (Multiple criteria)
-    # Thumb is open if ANY of these conditions:
-    # 1. Distance from palm center is large (extended away)
-    # 2. Extended significantly in any direction  
-    # 3. Thumb joints are nearly straight (extended)
-    # 4. AND basic position check passes
-    
-    distance_open = thumb_to_palm_dist > 0.08
-    extension_open = thumb_extended_x or thumb_extended_y
-    angle_open = thumb_straight
-    
-    # Use OR logic - if any method detects open thumb
-    thumb_is_open = (distance_open or extension_open or angle_open) and thumb_position_open
-    states[0] = 1 if thumb_is_open else 0
-    
-    # Debug print for thumb detection
-    # print(f"Thumb: dist={thumb_to_palm_dist:.3f}, ext_x={thumb_extended_x}, ext_y={thumb_extended_y}, pos={thumb_position_open}, result={states[0]}")
-
-    # Other fingers (unchanged)
-    states[1] = 1 if hand_landmarks.landmark[8].y < hand_landmarks.landmark[6].y else 0
-    states[2] = 1 if hand_landmarks.landmark[12].y < hand_landmarks.landmark[10].y else 0
-    states[3] = 1 if hand_landmarks.landmark[16].y < hand_landmarks.landmark[14].y else 0
-    states[4] = 1 if hand_landmarks.landmark[20].y < hand_landmarks.landmark[18].y else 0
-    return states
-
-
-def is_fist(hand_landmarks) -> bool:
-    """Check if hand is in fist position"""
-    if not hand_landmarks:
-        return False
-    bent = 0
-    if hand_landmarks.landmark[8].y > hand_landmarks.landmark[5].y:
-        bent += 1
-    if hand_landmarks.landmark[12].y > hand_landmarks.landmark[9].y:
-        bent += 1
-    if hand_landmarks.landmark[16].y > hand_landmarks.landmark[13].y:
-        bent += 1
-    if hand_landmarks.landmark[20].y > hand_landmarks.landmark[17].y:
-        bent += 1
-    return bent >= 3
-
-
-def extract_wrist(hand_landmarks):
-    """Extract wrist position"""
-    if not hand_landmarks:
-        return None
-    wrist = hand_landmarks.landmark[0]
-    return np.array([wrist.x, wrist.y], dtype=float)
-
-
 def smooth_sequence(seq_xy: List[np.ndarray], window: int = 3) -> List[np.ndarray]:
     """Smooth motion sequence"""
     if not seq_xy:
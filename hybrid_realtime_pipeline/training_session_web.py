@@ -7,6 +7,16 @@ from typing import Dict, List, Tuple, Optional
 import cv2
 import mediapipe as mp
 import numpy as np
+from landmark_features import (extract_wrist, finger_states, fist_mask, get_finger_states, is_fist,
+                               results_to_array, wrist_xy)
+from motion_features import MotionAccumulator
+from gesture_cascade import GestureCascade, StageCounter
+from continuous_recognizer import ContinuousRecognizer, svm_scorer
+from hand_roi import HandROITracker
+from frame_scheduler import AdaptiveFrameScheduler
+from stage_metrics import StageMetrics
+from probability_memo import ProbabilityMemo
+from svm_inference import load_compiled_models
 
 # Constants from original training_session.py
 BUFFER_SIZE = 60
@@ -18,7 +28,7 @@ STATIC_HOLD_SECONDS = 1.0
 INSTRUCTION_WINDOW = "Pose Instructions"
 
 # Constants from test_gesture_recognition.py
-DELTA_WEIGHT = 10.0  # Same as training
+DELTA_WEIGHT = 10.0  # Fallback only: compiled models and pickles record the weight they were trained with
 CONFIDENCE_THRESHOLD = 0.65  # 70% confidence minimum
 MODELS_DIR = 'models'
 MODEL_PKL = os.path.join(MODELS_DIR, 'motion_svm_model.pkl')
@@ -28,6 +38,12 @@ STATIC_DYNAMIC_PKL = os.path.join(MODELS_DIR, 'static_dynamic_classifier.pkl')
 # Gesture templates dataset for strict validation
 GESTURE_TEMPLATES_CSV = os.path.join('training_results', 'gesture_data_compact.csv')
 
+# (prediction, probabilities) per quantized SVM input, shared by every session of the process
+probability_memo = ProbabilityMemo.from_env()
+
+# Which rule (or ML step) decided each attempt, shared by every session of the process
+stage_counter = StageCounter()
+
 class AttemptStats:
     def __init__(self) -> None:
         self.correct = 0
@@ -59,33 +75,42 @@ class AttemptStats:
 
 
 def load_models(models_dir='models'):
-    """Load trained SVM model, scaler, and static/dynamic classifier"""
+    """Load trained SVM model, scaler, static/dynamic classifier and the model's delta weight"""
     model_pkl = os.path.join(models_dir, 'motion_svm_model.pkl')
     scaler_pkl = os.path.join(models_dir, 'motion_scaler.pkl')
     static_dynamic_pkl = os.path.join(models_dir, 'static_dynamic_classifier.pkl')
     
-    if not os.path.exists(model_pkl) or not os.path.exists(scaler_pkl):
-        raise FileNotFoundError(f"Model files not found! Please check:\n{model_pkl}\n{scaler_pkl}")
-    
-    with open(model_pkl, 'rb') as f:
-        model_data = pickle.load(f)
-    
-    with open(scaler_pkl, 'rb') as f:
-        scaler = pickle.load(f)
-    
-    # Load static/dynamic classifier
-    static_dynamic_data = None
-    if os.path.exists(static_dynamic_pkl):
-        with open(static_dynamic_pkl, 'rb') as f:
-            static_dynamic_data = pickle.load(f)
-    
-    print("Models loaded successfully!")
-    print(f"   - SVM Model: {len(model_data['label_encoder'].classes_)} classes")
-    print(f"   - Classes: {list(model_data['label_encoder'].classes_)}")
+    # Prefer the NumPy-only export: no scikit-learn import, no full SVC unpickle
+    compiled = load_compiled_models(models_dir)
+    if compiled is not None:
+        svm_model, label_encoder, scaler, static_dynamic_data = compiled
+        delta_weight = svm_model.metadata.get('delta_weight', DELTA_WEIGHT)
+    else:
+        if not os.path.exists(model_pkl) or not os.path.exists(scaler_pkl):
+            raise FileNotFoundError(f"Model files not found! Please check:\n{model_pkl}\n{scaler_pkl}")
+
+        with open(model_pkl, 'rb') as f:
+            model_data = pickle.load(f)
+        svm_model, label_encoder = model_data['model'], model_data['label_encoder']
+        delta_weight = model_data.get('delta_weight', DELTA_WEIGHT)
+
+        with open(scaler_pkl, 'rb') as f:
+            scaler = pickle.load(f)
+
+        # Load static/dynamic classifier
+        static_dynamic_data = None
+        if os.path.exists(static_dynamic_pkl):
+            with open(static_dynamic_pkl, 'rb') as f:
+                static_dynamic_data = pickle.load(f)
+    
+    print("Models loaded successfully!" + (" (compiled NumPy model)" if compiled is not None else ""))
+    print(f"   - SVM Model: {len(label_encoder.classes_)} classes")
+    print(f"   - Classes: {list(label_encoder.classes_)}")
+    print(f"   - Delta weight: {delta_weight}")
     if static_dynamic_data:
         print(f"   - Static/Dynamic Classifier: Available")
     
-    return model_data['model'], model_data['label_encoder'], scaler, static_dynamic_data
+    return svm_model, label_encoder, scaler, static_dynamic_data, float(delta_weight)
 
 
 def load_gesture_templates(training_results_dir='training_results'):
@@ -117,179 +142,8 @@ def load_gesture_templates(training_results_dir='training_results'):
     return templates
 
 
-def get_finger_states(hand_landmarks, handedness_label: str) -> List[int]:
-    """Extract finger states with improved thumb detection"""
-    states = [0, 0, 0, 0, 0]
-    if not hand_landmarks:
-        return states
-
-    # Get key landmarks
-    wrist = hand_landmarks.landmark[0]
-    thumb_tip = hand_landmarks.landmark[4]    # Thumb tip
-    thumb_ip = hand_landmarks.landmark[3]     # Thumb IP joint
-    thumb_mcp = hand_landmarks.landmark[2]    # Thumb MCP joint
-    index_mcp = hand_landmarks.landmark[5]    # Index MCP joint
-    
-    mcp_middle = hand_landmarks.landmark[9]
-    mcp_pinky = hand_landmarks.landmark[17]
-
-    # Determine palm orientation
-    v1 = [mcp_middle.x - wrist.x, mcp_middle.y - wrist.y]
-    v2 = [mcp_pinky.x - wrist.x, mcp_pinky.y - wrist.y]
-    cross_z = v1[0] * v2[1] - v1[1] * v2[0]
-    palm_facing = 1 if cross_z > 0 else -1
-
-    # IMPROVED THUMB DETECTION
-    # Method 1: Distance from thumb tip to palm center
-    palm_center_x = (index_mcp.x + mcp_pinky.x) / 2
-    palm_center_y = (index_mcp.y + mcp_pinky.y) / 2
-    thumb_to_palm_dist = ((thumb_tip.x - palm_center_x)**2 + (thumb_tip.y - palm_center_y)**2)**0.5
-    
-    # Method 2: Thumb extension check (tip vs MCP joint)
-    thumb_extended_x = abs(thumb_tip.x - thumb_mcp.x) > 0.04  # Extended horizontally
-    thumb_extended_y = abs(thumb_tip.y - thumb_mcp.y) > 0.03  # Extended vertically
-    
-    # Method 3: Relative position check (original method as fallback)
-    if handedness_label == "Right":
-        if palm_facing > 0:
-            thumb_position_open = thumb_tip.x < thumb_ip.x
-        else:
-            thumb_position_open = thumb_tip.x > thumb_ip.x
-    else:
-        if palm_facing > 0:
-            thumb_position_open = thumb_tip.x < thumb_ip.x
-        else:
-            thumb_position_open = thumb_tip.x > thumb_ip.x
-    
-    # Method 4: Angle-based detection (thumb joints alignment)
-    # Calculate angle between thumb MCP->IP->TIP
-    import math
-    def angle_between_points(p1, p2, p3):
-        """Calculate angle at p2 formed by p1-p2-p3"""
-        v1 = [p1.x - p2.x, p1.y - p2.y]
-        v2 = [p3.x - p2.x, p3.y - p2.y]
-        
-        dot_product = v1[0]*v2[0] + v1[1]*v2[1]
-        mag1 = (v1[0]**2 + v1[1]**2)**0.5
-        mag2 = (v2[0]**2 + v2[1]**2)**0.5
-        
-        if mag1 == 0 or mag2 == 0:
-            return 0
-        
-        cos_angle = dot_product / (mag1 * mag2)
-        cos_angle = max(-1, min(1, cos_angle))  # Clamp to [-1, 1]
-        return math.degrees(math.acos(cos_angle))
-    
-    thumb_angle = angle_between_points(thumb_mcp, thumb_ip, thumb_tip)
-    thumb_straight = thumb_angle > 140  # Straight thumb (extended)
-    
-    # COMBINED THUMB DECISION (Multiple criteria)
-    # Thumb is open if ANY of these conditions:
-    # 1. Distance from palm center is large (extended away)
-    # 2. Extended significantly in any direction  
-    # 3. Thumb joints are nearly straight (extended)
-    # 4. AND basic position check passes
-    
-    distance_open = thumb_to_palm_dist > 0.08
-    extension_open = thumb_extended_x or thumb_extended_y
-    angle_open = thumb_straight
-    
-    # Use OR logic - if any method detects open thumb
-    thumb_is_open = (distance_open or extension_open or angle_open) and thumb_position_open
-    states[0] = 1 if thumb_is_open else 0
-    
-    # Debug print for thumb detection
-    # print(f"Thumb: dist={thumb_to_palm_dist:.3f}, ext_x={thumb_extended_x}, ext_y={thumb_extended_y}, pos={thumb_position_open}, result={states[0]}")
-
-    # Other fingers (unchanged)
-    states[1] = 1 if hand_landmarks.landmark[8].y < hand_landmarks.landmark[6].y else 0
-    states[2] = 1 if hand_landmarks.landmark[12].y < hand_landmarks.landmark[10].y else 0
-    states[3] = 1 if hand_landmarks.landmark[16].y < hand_landmarks.landmark[14].y else 0
-    states[4] = 1 if hand_landmarks.landmark[20].y < hand_landmarks.landmark[18].y else 0
-    return states
-
-
-def is_fist(hand_landmarks) -> bool:
-    """Check if hand is in fist position"""
-    if not hand_landmarks:
-        return False
-    bent = 0
-    if hand_landmarks.landmark[8].y > hand_landmarks.landmark[5].y:
-        bent += 1
-    if hand_landmarks.landmark[12].y > hand_landmarks.landmark[9].y:
-        bent += 1
-    if hand_landmarks.landmark[16].y > hand_landmarks.landmark[13].y:
-        bent += 1
-    if hand_landmarks.landmark[20].y > hand_landmarks.landmark[17].y:
-        bent += 1
-    return bent >= 3
-
-
-def extract_wrist(hand_landmarks):
-    """Extract wrist position"""
-    if not hand_landmarks:
-        return None
-    wrist = hand_landmarks.landmark[0]
-    return np.array([wrist.x, wrist.y], dtype=float)
-
-
-def smooth_sequence(seq_xy: List[np.ndarray], window: int = 3) -> List[np.ndarray]:
-    """Smooth motion sequence"""
-    if not seq_xy:
-        return []
-    output = []
-    pad = window // 2
-    for idx in range(len(seq_xy)):
-        start = max(0, idx - pad)
-        end = min(len(seq_xy), idx + pad + 1)
-        chunk = np.array(seq_xy[start:end], dtype=float)
-        output.append(np.mean(chunk, axis=0))
-    return output
-
-
-def compute_motion_features(smoothed_xy: List[np.ndarray]) -> Optional[Dict]:
-    """Compute motion features for ML prediction"""
-    n = len(smoothed_xy)
-    if n < 2:
-        return None
-    
-    start = smoothed_xy[0]
-    end = smoothed_xy[-1]
-    dx = float(end[0] - start[0])
-    dy = float(end[1] - start[1])
-    delta_mag = float(np.sqrt(dx*dx + dy*dy))
-    
-    # Determine main axis (matching training script logic)
-    if abs(dx) >= abs(dy):
-        main_x, main_y = 1, 0
-        delta_x, delta_y = dx, 0.0
-    else:
-        main_x, main_y = 0, 1
-        delta_x, delta_y = 0.0, dy
-    
-    # Add direction features (matching training script)
-    motion_left = 1.0 if dx < 0 else 0.0
-    motion_right = 1.0 if dx > 0 else 0.0
-    motion_up = 1.0 if dy < 0 else 0.0
-    motion_down = 1.0 if dy > 0 else 0.0
-    
-    return {
-        'main_axis_x': main_x,
-        'main_axis_y': main_y,
-        'delta_x': float(delta_x),
-        'delta_y': float(delta_y),
-        'raw_dx': dx,
-        'raw_dy': dy,
-        'delta_magnitude': delta_mag,
-        'motion_left': motion_left,
-        'motion_right': motion_right,
-        'motion_up': motion_up,
-        'motion_down': motion_down
-    }
-
-
-def prepare_features(left_states: List[int], right_states: List[int], motion_features: Dict, scaler, use_expected_left: bool = False, expected_left: List[int] = None) -> np.ndarray:
-    """Prepare features for SVM prediction - same preprocessing as training"""
+def prepare_features(left_states: List[int], right_states: List[int], motion_features: Dict, scaler, use_expected_left: bool = False, expected_left: List[int] = None, delta_weight: float = DELTA_WEIGHT) -> np.ndarray:
+    """Prepare features for SVM prediction - same preprocessing as training (delta_weight: the model's)"""
     # Use expected left states instead of actual for trigger hand
     actual_left = expected_left if (use_expected_left and expected_left) else left_states
     
@@ -300,12 +154,12 @@ def prepare_features(left_states: List[int], right_states: List[int], motion_fea
     motion_array = np.array([[
         motion_features['main_axis_x'],
         motion_features['main_axis_y'], 
-        motion_features['delta_x'] * DELTA_WEIGHT,
-        motion_features['delta_y'] * DELTA_WEIGHT,
-        motion_features['motion_left'] * DELTA_WEIGHT,
-        motion_features['motion_right'] * DELTA_WEIGHT,
-        motion_features['motion_up'] * DELTA_WEIGHT,
-        motion_features['motion_down'] * DELTA_WEIGHT
+        motion_features['delta_x'] * delta_weight,
+        motion_features['delta_y'] * delta_weight,
+        motion_features['motion_left'] * delta_weight,
+        motion_features['motion_right'] * delta_weight,
+        motion_features['motion_up'] * delta_weight,
+        motion_features['motion_down'] * delta_weight
     ]], dtype=float)
     
     # Scale motion features
@@ -332,103 +186,42 @@ def prepare_static_features(left_states: List[int], right_states: List[int], del
 
 def evaluate_with_ml(left_states: List[int], right_states: List[int], motion_features: Dict, 
                     target_gesture: str, svm_model, label_encoder, scaler, static_dynamic_data, 
-                    gesture_templates: Dict, duration: float) -> Tuple[bool, str, str]:
-    """Enhanced evaluation with strict validation"""
-    
-    # Get expected template for target gesture
-    if target_gesture not in gesture_templates:
-        return False, "no_template", f"No template found for {target_gesture}"
-    
-    expected = gesture_templates[target_gesture]
-    
+                    gesture_templates: Dict, duration: float,
+                    cascade: GestureCascade,
+                    metrics: Optional[StageMetrics] = None,
+                    delta_weight: float = DELTA_WEIGHT) -> Tuple[bool, str, str]:
+    """Enhanced evaluation with strict validation (cascade: compiled once from gesture_templates
+    by the caller, see load_session_resources; metrics: records the 'svm' stage;
+    delta_weight: the weight the SVM was trained with, see load_models)"""
     print(f"🎯 Target: {target_gesture}")
-    print(f"📏 Expected fingers L:{expected['left_fingers']} R:{expected['right_fingers']}")
     print(f"📏 Recorded fingers L:{left_states} R:{right_states}")
     
-    # Step 1: Finger validation (only check RIGHT hand, LEFT is trigger only)
-    # LEFT hand is trigger only - don't need strict validation
-    # if left_states != expected['left_fingers']:
-    #     return False, "left_fingers", f"Wrong left fingers: got {left_states}, expected {expected['left_fingers']}"
-
-    if right_states != expected['right_fingers']:
-        return False, "right_fingers", f"Wrong right fingers: got {right_states}, expected {expected['right_fingers']}"
-    
-    print("✅ Right hand finger positions correct! (Left hand ignored as trigger)")
+    # Steps 1-5: compiled template rules (right fingers, static hold, motion, axis, direction).
+    # LEFT hand is trigger only - not validated
+    verdict = cascade.check(target_gesture, right_states, motion_features, duration)
+    if verdict is not None:
+        return verdict
     
-    # Step 2: Static/Dynamic classification
-    is_static_expected = expected['is_static']
-    
-    if static_dynamic_data and 'model' in static_dynamic_data:
-        try:
-            static_features = prepare_static_features(
-                left_states, right_states, motion_features['delta_magnitude'],
-                use_expected_left=True, expected_left=expected['left_fingers']
-            )
-            is_static_predicted = static_dynamic_data['model'].predict(static_features)[0] == 'static'
-            print(f"📊 Static/Dynamic: Expected={is_static_expected}, Predicted={is_static_predicted}")
-        except:
-            is_static_predicted = is_static_expected  # Fallback to template
-    else:
-        is_static_predicted = is_static_expected
-    
-    # Step 3: Static gesture validation
-    if is_static_expected:
-        print("🏠 Validating static gesture...")
-        
-        # Check duration
-        if duration < STATIC_HOLD_SECONDS:
-            return False, "static_duration", f"Hold longer: {duration:.1f}s < {STATIC_HOLD_SECONDS}s"
-        
-        # Check minimal motion
-        if motion_features['delta_magnitude'] > 0.05:  # Static threshold
-            return False, "static_motion", f"Too much motion: {motion_features['delta_magnitude']:.3f}"
-        
-        print("✅ Static gesture validated!")
-        return True, "static_correct", f"Static gesture held for {duration:.1f}s"
-    
-    # Step 4: Dynamic gesture validation
-    print("🔄 Validating dynamic gesture...")
-    
-    # Check if motion is sufficient
-    if motion_features['delta_magnitude'] < MIN_DELTA_MAG:
-        return False, "motion_small", f"Movement too small: {motion_features['delta_magnitude']:.3f}"
-    
-    # Step 5: Direction validation
-    expected_dx = expected['delta_x']
-    expected_dy = expected['delta_y']
-    actual_dx = motion_features['raw_dx']
-    actual_dy = motion_features['raw_dy']
-    
-    # Check main axis matches
-    expected_main_x = expected['main_axis_x']
-    actual_main_x = motion_features['main_axis_x']
-    
-    if expected_main_x != actual_main_x:
-        axis_name = "horizontal" if expected_main_x else "vertical"
-        return False, "wrong_axis", f"Wrong axis: expected {axis_name} movement"
-    
-    # Check direction matches
-    if expected_main_x == 1:  # Horizontal movement
-        if (expected_dx > 0 and actual_dx <= 0) or (expected_dx < 0 and actual_dx >= 0):
-            direction = "right" if expected_dx > 0 else "left"
-            return False, "wrong_direction", f"Wrong direction: expected {direction}"
-    else:  # Vertical movement  
-        if (expected_dy > 0 and actual_dy <= 0) or (expected_dy < 0 and actual_dy >= 0):
-            direction = "down" if expected_dy > 0 else "up"
-            return False, "wrong_direction", f"Wrong direction: expected {direction}"
-    
-    print("✅ Direction correct!")
+    expected = gesture_templates[target_gesture]
+    print("✅ Fingers, axis and direction correct!")
     
     # Step 6: ML confidence validation
     try:
-        X = prepare_features(
-            left_states, right_states, motion_features, scaler,
-            use_expected_left=True, expected_left=expected['left_fingers']
-        )
+        def predict():
+            X = prepare_features(
+                left_states, right_states, motion_features, scaler,
+                use_expected_left=True, expected_left=expected['left_fingers'],
+                delta_weight=delta_weight
+            )
+            if metrics is None:
+                return svm_model.predict(X)[0], svm_model.predict_proba(X)[0]
+            with metrics.span('svm'):
+                return svm_model.predict(X)[0], svm_model.predict_proba(X)[0]
         
-        # Predict gesture
-        prediction = svm_model.predict(X)[0]
-        probabilities = svm_model.predict_proba(X)[0]
+        # Predict gesture (repeated attempts reuse the memoized kernel evaluation)
+        prediction, probabilities = probability_memo.lookup(
+            expected['left_fingers'] + right_states, motion_features, predict, version=svm_model
+        )
         confidence = np.max(probabilities)
         predicted_label = label_encoder.inverse_transform([prediction])[0]
         
@@ -436,18 +229,18 @@ def evaluate_with_ml(left_states: List[int], right_states: List[int], motion_fea
         
         # Check confidence threshold
         if confidence < CONFIDENCE_THRESHOLD:
-            return False, "low_confidence", f"Too uncertain: {confidence:.1%} < {CONFIDENCE_THRESHOLD:.0%}"
+            return cascade.decide("low_confidence", False, f"Too uncertain: {confidence:.1%} < {CONFIDENCE_THRESHOLD:.0%}")
         
         # Check prediction matches target
         if predicted_label != target_gesture:
-            return False, "wrong_prediction", f"ML predicted: {predicted_label} ({confidence:.1%})"
+            return cascade.decide("wrong_prediction", False, f"ML predicted: {predicted_label} ({confidence:.1%})")
         
         print("✅ ML validation passed!")
-        return True, "ml_correct", f"Perfect! ({confidence:.1%} confidence)"
+        return cascade.decide("ml_correct", True, f"Perfect! ({confidence:.1%} confidence)")
         
     except Exception as e:
         print(f"❌ ML Evaluation error: {e}")
-        return False, "ml_error", f"Prediction failed: {str(e)}"
+        return cascade.decide("ml_error", False, f"Prediction failed: {str(e)}")
 
 
 FINGER_NAMES = ["Thumb", "Index", "Middle", "Ring", "Pinky"]
@@ -682,8 +475,9 @@ def run_ml_training_session(camera_index: int = 0):
     
     # Load ML models and templates
     try:
-        svm_model, label_encoder, scaler, static_dynamic_data = load_models()
+        svm_model, label_encoder, scaler, static_dynamic_data, delta_weight = load_models()
         gesture_templates = load_gesture_templates()
+        cascade = GestureCascade(gesture_templates, stage_counter)
         available_gestures = list(label_encoder.classes_)
         
         print(f"📊 Confidence threshold: {CONFIDENCE_THRESHOLD:.0%}")
@@ -713,7 +507,12 @@ def run_ml_training_session(camera_index: int = 0):
         min_detection_confidence=0.7,
         min_tracking_confidence=0.5,
     )
+    # Run MediaPipe on a downscaled crop around the previous frame's hands
+    hand_roi = HandROITracker.from_env(hands)
     mp_drawing = mp.solutions.drawing_utils
+    # Sample only a few frames per second while nobody is gesturing
+    frame_scheduler = AdaptiveFrameScheduler.from_env(
+        on_change=lambda state, fps: print(f"[INFO] Frame scheduler: {state} ({fps} fps)"))
     
     # Initialize camera
     cap = cv2.VideoCapture(camera_index)
@@ -725,7 +524,7 @@ def run_ml_training_session(camera_index: int = 0):
     
     # Training session state
     stats = AttemptStats()
-    motion_buffer: deque = deque(maxlen=BUFFER_SIZE)
+    motion_buffer = MotionAccumulator(window=SMOOTHING_WINDOW, max_points=BUFFER_SIZE)
     state = "IDLE"
     recorded_left_states: Optional[List[int]] = None
     recorded_right_states: Optional[List[int]] = None
@@ -754,8 +553,12 @@ def run_ml_training_session(camera_index: int = 0):
                 break
             
             frame = cv2.flip(frame, 1)  # Mirror effect
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = hands.process(rgb)
+            frame_time = time.time()
+            processed = frame_scheduler.should_process(frame_time)
+            if processed:
+                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                results = hand_roi.process(rgb)
+            # A skipped (idle) frame keeps the last results, which showed no one gesturing
             
             # Extract hand landmarks
             left_landmarks = None
@@ -794,6 +597,8 @@ def run_ml_training_session(camera_index: int = 0):
             left_confident = left_score > 0.6
             right_confident = right_score > 0.6
             left_is_fist = is_fist(left_landmarks) if left_landmarks else False
+            if processed:
+                frame_scheduler.observe(frame_time, state != "IDLE" or left_is_fist or right_landmarks is not None)
             right_is_fist = is_fist(right_landmarks) if right_landmarks else False
             
             # UI Elements
@@ -852,7 +657,7 @@ def run_ml_training_session(camera_index: int = 0):
                 if right_confident:
                     wrist_pos = extract_wrist(right_landmarks)
                     if wrist_pos is not None:
-                        motion_buffer.append(wrist_pos)
+                        motion_buffer.add(wrist_pos[0], wrist_pos[1])
                 
                 # Check for end of recording (release fist)
                 if left_confident and not left_is_fist:
@@ -874,8 +679,7 @@ def run_ml_training_session(camera_index: int = 0):
                 
                 # Process motion
                 try:
-                    smoothed = smooth_sequence(list(motion_buffer), window=SMOOTHING_WINDOW)
-                    motion_features = compute_motion_features(smoothed)
+                    motion_features = motion_buffer.features()
                     
                     if motion_features is None:
                         stats.record(False, "motion_processing_failed")
@@ -886,7 +690,8 @@ def run_ml_training_session(camera_index: int = 0):
                             recorded_left_states, recorded_right_states, 
                             motion_features, target_gesture, 
                             svm_model, label_encoder, scaler, static_dynamic_data,
-                            gesture_templates, duration
+                            gesture_templates, duration, cascade,
+                            delta_weight=delta_weight
                         )
                         
                         stats.record(success, reason_msg)
@@ -948,6 +753,8 @@ def run_ml_training_session(camera_index: int = 0):
     finally:
         cap.release()
         cv2.destroyAllWindows()
+        print(f"[INFO] Hand ROI: {hand_roi.stats()}")
+        print(f"[INFO] Frame scheduler: {frame_scheduler.stats()}")
         print(f"\n📊 Final Statistics:")
         print(f"   Target: {target_gesture}")
         print(f"   {format_stats_line(stats)}")
@@ -982,20 +789,45 @@ if __name__ == "__main__":
     exit(main())
 
 
+def load_session_resources(models_dir='models', training_results_dir='training_results') -> Dict:
+    """Load the read-only models and templates a GestureTrainingSession needs.
+
+    The returned dict can be passed to any number of sessions so a
+    multi-session server keeps a single copy of the models in memory.
+    """
+    models, label_encoder, scaler, static_dynamic_data, delta_weight = load_models(models_dir)
+    templates = load_gesture_templates(training_results_dir)
+    return {
+        'models': models,
+        'label_encoder': label_encoder,
+        'scaler': scaler,
+        'static_dynamic_data': static_dynamic_data,
+        'delta_weight': delta_weight,
+        'templates': templates,
+        'cascade': GestureCascade(templates, stage_counter)
+    }
+
+
 class GestureTrainingSession:
     """Web-compatible gesture training session using ML models"""
     
-    def __init__(self, models_dir='models', training_results_dir='training_results'):
+    def __init__(self, models_dir='models', training_results_dir='training_results', resources: Optional[Dict] = None,
+                 continuous: bool = False):
+        """continuous: recognize right-hand gestures without the left-fist trigger"""
         self.models_dir = models_dir
         self.training_results_dir = training_results_dir
         
         self.session_active = False
         self.current_gesture = None
         self.templates = {}
+        self.cascade = None
         self.models = {}
         self.scaler = None
         self.static_dynamic_data = None
+        self.delta_weight = DELTA_WEIGHT
         self.stats = AttemptStats()
+        # Time source for recording durations; a replay sets it to the recorded timestamps
+        self.clock = time.time
         
         # Initialize MediaPipe
         self.mp_hands = mp.solutions.hands
@@ -1005,25 +837,53 @@ class GestureTrainingSession:
             min_detection_confidence=0.7,
             min_tracking_confidence=0.5
         )
+        # Learners' webcams send 720p/1080p frames; MediaPipe only sees the hand region
+        self.roi = HandROITracker.from_env(self.hands)
+        # Idle sessions (no fist, no right hand) only sample a few frames per second
+        self.scheduler = AdaptiveFrameScheduler.from_env()
+        # Rolling per-stage latencies (decode is recorded by the processors)
+        self.metrics = StageMetrics.from_env()
         
-        # Load models and templates
-        self._load_resources()
+        # Load models and templates (or reuse shared ones)
+        self._load_resources(resources)
         
         # Motion tracking
-        self.left_positions = deque(maxlen=BUFFER_SIZE)
+        self.left_positions = MotionAccumulator(window=SMOOTHING_WINDOW, max_points=BUFFER_SIZE)
+        self.current_direction = None
         self.right_positions = deque(maxlen=BUFFER_SIZE)
         self.left_finger_states = []
         self.right_finger_states = []
         self.recording_start_time = None
+        
+        # Trigger-free mode: sliding windows over the right wrist trajectory
+        self.continuous = continuous
+        self.recognizer = self._build_recognizer() if continuous else None
+    
+    def _build_recognizer(self) -> ContinuousRecognizer:
+        def accept(label, right_states, motion_features, duration):
+            # Peek at the rules without counting: the attempt is counted once, against the target
+            compiled = self.cascade.compiled.get(label)
+            return compiled is not None and compiled.right_fingers == list(right_states)
+        
+        scorer = svm_scorer(self.models, self.label_encoder,
+                            lambda left, right, motion: prepare_features(left, right, motion, self.scaler,
+                                                                         delta_weight=self.delta_weight))
+        return ContinuousRecognizer(scorer, accept=accept, min_confidence=CONFIDENCE_THRESHOLD,
+                                    static_hold_seconds=STATIC_HOLD_SECONDS)
     
-    def _load_resources(self):
+    def _load_resources(self, resources: Optional[Dict] = None):
         """Load ML models and gesture templates"""
         try:
-            # Load ML models
-            self.models, self.label_encoder, self.scaler, self.static_dynamic_data = load_models(self.models_dir)
+            if resources is None:
+                resources = load_session_resources(self.models_dir, self.training_results_dir)
             
-            # Load gesture templates
-            self.templates = load_gesture_templates(self.training_results_dir)
+            self.models = resources['models']
+            self.label_encoder = resources['label_encoder']
+            self.scaler = resources['scaler']
+            self.static_dynamic_data = resources['static_dynamic_data']
+            self.delta_weight = resources['delta_weight']
+            self.templates = resources['templates']
+            self.cascade = resources.get('cascade') or GestureCascade(self.templates, stage_counter)
             
             print("GestureTrainingSession initialized with ML models")
             
@@ -1037,63 +897,102 @@ class GestureTrainingSession:
     
     def get_current_time(self) -> float:
         """Get current timestamp"""
-        return time.time()
+        return self.clock()
     
     def initialize_mediapipe(self):
         """Initialize MediaPipe (already done in __init__)"""
         pass
     
+    def warm_up(self, width: int = 640, height: int = 480):
+        """Run one blank frame through MediaPipe so the first real frame
+        does not pay for the lazy graph/TFLite start-up"""
+        self.hands.process(np.zeros((height, width, 3), dtype=np.uint8))
+    
+    def close(self):
+        """Release the per-session MediaPipe graph"""
+        self.hands.close()
+    
     def reset_session(self):
         """Reset current session"""
         self.session_active = False
         self.left_positions.clear()
+        self.current_direction = None
         self.right_positions.clear()
         self.left_finger_states = []
         self.right_finger_states = []
         self.recording_start_time = None
         self.stats.reset()
+        if self.recognizer is not None:
+            self.recognizer.reset()
+        self.scheduler.reset()
+    
+    def wants_frame(self, t: Optional[float] = None) -> bool:
+        """Whether the next frame should be decoded and processed (False: skip it while idle)"""
+        return self.scheduler.should_process(self.get_current_time() if t is None else t)
     
     def process_frame(self, frame, gesture_template: Dict) -> Optional[Dict]:
-        """Process a single frame for gesture recognition"""
+        """Process a single BGR frame (OpenCV capture) for gesture recognition"""
+        # Convert to RGB for MediaPipe
+        return self.process_rgb_frame(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), gesture_template)
+    
+    def process_rgb_frame(self, rgb_frame, gesture_template: Dict) -> Optional[Dict]:
+        """Process a single RGB frame for gesture recognition (no color conversion)"""
         try:
-            # Convert to RGB for MediaPipe
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
             # Process with MediaPipe
-            results = self.hands.process(rgb_frame)
+            with self.metrics.span('mediapipe'):
+                results = self.roi.process(rgb_frame)
+            
+            # One (hands, 21, 3) array per frame; features for all hands in one pass
+            with self.metrics.span('landmarks'):
+                hands, labels, _ = results_to_array(results)
+        except Exception as e:
+            print(f"Error processing frame: {e}")
+            return None
+        return self.process_landmarks(hands, labels, gesture_template)
+    
+    def process_landmarks(self, hands: np.ndarray, labels: List[str], gesture_template: Dict) -> Optional[Dict]:
+        """Run the session on one frame's (hands, 21, 3) landmarks and handedness labels.
+        
+        Landmarks tracked by the client (FRAME_LANDMARKS) enter here directly,
+        without image decoding or MediaPipe.
+        """
+        try:
+            if self.continuous:
+                return self._process_continuous(hands, labels, gesture_template)
             
-            if not results.multi_hand_landmarks:
+            if len(hands) == 0:
+                self.scheduler.observe(self.get_current_time(), self.session_active)
                 return None
             
-            # Process each detected hand
-            left_hand = None
-            right_hand = None
+            with self.metrics.span('features'):
+                hand_states = finger_states(hands)
+                hand_fists = fist_mask(hands)
             
-            for hand_landmarks, handedness in zip(results.multi_hand_landmarks, results.multi_handedness):
-                hand_label = handedness.classification[0].label
-                
-                if hand_label == "Left":
-                    left_hand = hand_landmarks
-                elif hand_label == "Right":
-                    right_hand = hand_landmarks
+            left_index = labels.index("Left") if "Left" in labels else None
+            right_index = labels.index("Right") if "Right" in labels else None
             
             # Extract features
-            current_time = time.time()
+            current_time = self.get_current_time()
+            
+            # A left fist or a right hand brings the scheduler back to full rate
+            left_fist_seen = left_index is not None and bool(hand_fists[left_index])
+            self.scheduler.observe(current_time, self.session_active or left_fist_seen or right_index is not None)
             
             # Track left hand (trigger hand)
-            if left_hand:
-                left_states = get_finger_states(left_hand, "Left")
-                left_wrist = extract_wrist(left_hand)
-                self.left_positions.append(left_wrist)
+            if left_index is not None:
+                left_fist = bool(hand_fists[left_index])
+                left_x, left_y = wrist_xy(hands[left_index])
+                self.left_positions.add(left_x, left_y)
                 
                 # Check if fist is closed (start recording)
-                if is_fist(left_hand) and not self.session_active:
+                if left_fist and not self.session_active:
                     self.session_active = True
                     self.recording_start_time = current_time
                     self.left_finger_states = []
                     self.right_finger_states = []
                     self.left_positions.clear()
                     self.right_positions.clear()
+                    self.current_direction = None
                     
                     return {
                         'type': 'status_update',
@@ -1101,7 +1000,7 @@ class GestureTrainingSession:
                     }
                 
                 # Check if fist is opened (stop recording)
-                elif not is_fist(left_hand) and self.session_active:
+                elif not left_fist and self.session_active:
                     if len(self.left_positions) >= MIN_FRAMES_TO_PROCESS:
                         # Process the recorded gesture
                         return self._evaluate_gesture(gesture_template)
@@ -1113,20 +1012,72 @@ class GestureTrainingSession:
                         }
             
             # Record finger states during active session
-            if self.session_active and right_hand:
-                right_states = get_finger_states(right_hand, "Right")
-                self.right_finger_states.append(right_states)
+            if self.session_active and right_index is not None:
+                self.right_finger_states.append(hand_states[right_index].tolist())
                 
                 # Keep only last few frames for averaging
                 if len(self.right_finger_states) > 5:
                     self.right_finger_states = self.right_finger_states[-5:]
             
+            # Live direction feedback while recording, sent only when it changes
+            if self.session_active:
+                direction = self.left_positions.direction(MIN_DELTA_MAG)
+                if direction is not None and direction != self.current_direction:
+                    self.current_direction = direction
+                    return {
+                        'type': 'status_update',
+                        'status': f'Recording - direction: {direction}',
+                        'details': {
+                            'direction': direction,
+                            'path_length': round(self.left_positions.path_length, 4)
+                        }
+                    }
+            
             return None
             
         except Exception as e:
             print(f"Error processing frame: {e}")
             return None
     
+    def _process_continuous(self, hands: np.ndarray, labels: List[str], gesture_template: Dict) -> Optional[Dict]:
+        """Feed the right hand to the recognizer; evaluate each command it fires against the target"""
+        wrist, right_states = None, None
+        if "Right" in labels:
+            with self.metrics.span('features'):
+                right_index = labels.index("Right")
+                wrist = wrist_xy(hands[right_index])
+                right_states = finger_states(hands[right_index]).tolist()
+        
+        now = self.get_current_time()
+        self.scheduler.observe(now, wrist is not None or self.recognizer.moving)
+        event = self.recognizer.push(now, wrist, right_states)
+        if event is None:
+            return None
+        
+        with self.metrics.span('evaluate'):
+            success, reason, message = evaluate_with_ml(
+                [0, 0, 0, 0, 0], event['right_states'], event['motion_features'],
+                gesture_template['pose_label'],
+                self.models, self.label_encoder,
+                self.scaler, self.static_dynamic_data,
+                self.templates, event['duration'],
+                self.cascade, self.metrics, self.delta_weight
+            )
+        self.stats.record(success, reason)
+        
+        return {
+            'type': 'gesture_result',
+            'success': success,
+            'message': message,
+            'reason': reason,
+            'details': {
+                'detected': event['gesture'],
+                'confidence': round(event['confidence'], 4),
+                'kind': event['kind'],
+                'latency_ms': event['latency_ms']
+            }
+        }
+    
     def _evaluate_gesture(self, gesture_template: Dict) -> Dict:
         """Evaluate recorded gesture using ML models"""
         try:
@@ -1145,18 +1096,19 @@ class GestureTrainingSession:
             
             # Compute motion features
             if len(self.left_positions) >= 2:
-                smoothed_positions = smooth_sequence(list(self.left_positions))
-                motion_features = compute_motion_features(smoothed_positions)
+                motion_features = self.left_positions.features()
                 
                 if motion_features:
                     # Evaluate with ML
-                    success, reason, message = evaluate_with_ml(
-                        left_states, right_states, motion_features,
-                        gesture_template['pose_label'],
-                        self.models, self.label_encoder, 
-                        self.scaler, self.static_dynamic_data,
-                        self.templates, time.time() - self.recording_start_time
-                    )
+                    with self.metrics.span('evaluate'):
+                        success, reason, message = evaluate_with_ml(
+                            left_states, right_states, motion_features,
+                            gesture_template['pose_label'],
+                            self.models, self.label_encoder, 
+                            self.scaler, self.static_dynamic_data,
+                            self.templates, self.get_current_time() - self.recording_start_time,
+                            self.cascade, self.metrics, self.delta_weight
+                        )
                     
                     self.stats.record(success, reason)
                     
@@ -2,30 +2,83 @@
 """
 Web-integrated gesture practice processor
 Nhận frames từ web qua stdin, xử lý MediaPipe, trả kết quả qua stdout
+
+Frames arrive as length-prefixed binary messages (see frame_protocol.py);
+JSON command lines, including the legacy base64 'frame' command, still work.
+A client that runs hand tracking itself sends FRAME_LANDMARKS messages
+instead of images; they go straight to the session's state machine.
+
+Per-stage latency (decode, mediapipe, landmarks, features, evaluate, svm and
+the whole frame, see stage_metrics.py) is reported in a 'metrics' message
+with count/mean/p50/p95/p99 per stage: on a {"type": "metrics"} command
+(add "reset": true to start a new window afterwards) and, with
+--metrics-every N or GESTURE_METRICS_EVERY=N, every N processed frames.
+
+{"type": "profile", "duration": 5, "interval_ms": 10} samples every thread's
+Python stack for up to a minute while frames keep being processed, then
+sends a 'profile' message whose 'stacks' field is collapsed-stack text for
+a flame graph (see stack_sampler.py).
+
+Zygote mode (POSIX only): `web_gesture_processor.py --zygote <socket>` imports
+cv2/mediapipe and loads the models and templates once, then listens on a Unix
+socket. It keeps --spares forked children that have already built and warmed
+their own MediaPipe tracker and wait in accept(). Each connection is one
+practice session: a spare takes the connection as its stdin/stdout, reads a
+first {"type": "open", "gesture": "<pose_label>"} line and from then on speaks
+the normal protocol, while the zygote forks a replacement spare. 'ready' and
+the first feedback arrive in milliseconds instead of seconds. On SIGTERM,
+SIGINT or end of its stdin the zygote terminates every child it forked,
+idle spares and running sessions alike. practicePythonService.js uses this
+mode when PRACTICE_ZYGOTE=1.
 """
 
 import sys
 import json
 import base64
-import cv2
-import numpy as np
 import os
-from training_session_web import GestureTrainingSession
-import io
-from PIL import Image
+import argparse
+import select
+import signal
+import socket
+import threading
+import time
+from training_session_web import GestureTrainingSession, load_session_resources
+from frame_protocol import (FRAME_LANDMARKS, LatestFrameQueue, ProtocolError, decode_frame, decode_jpeg,
+                            decode_landmarks, read_message)
+from stage_metrics import parse_metrics_every
+from stack_sampler import StackSampler
+
+# Frames kept waiting while MediaPipe is busy; older ones are dropped
+DEFAULT_MAX_PENDING_FRAMES = int(os.environ.get('GESTURE_MAX_PENDING_FRAMES', '1'))
+# Zygote mode: forked sessions kept warm and waiting for a connection
+DEFAULT_SPARES = int(os.environ.get('GESTURE_ZYGOTE_SPARES', '2'))
+ZYGOTE_REAP_TIMEOUT = 2.0  # Seconds children get to exit on SIGTERM before SIGKILL
+# Send a 'metrics' message every N processed frames (0: only on request)
+DEFAULT_METRICS_EVERY = int(os.environ.get('GESTURE_METRICS_EVERY', '0'))
+
+def pipeline_dirs():
+    """Absolute paths to models and training_results"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(script_dir, 'code', 'models'), os.path.join(script_dir, 'code', 'training_results')
 
 class WebGestureProcessor:
-    def __init__(self, gesture_name):
+    def __init__(self, gesture_name, max_pending_frames=DEFAULT_MAX_PENDING_FRAMES, resources=None,
+                 training_session=None, metrics_every=DEFAULT_METRICS_EVERY):
         self.gesture_name = gesture_name
+        self.output_lock = threading.Lock()
+        self.queue = LatestFrameQueue(max_pending_frames)
+        self.frames_processed = 0
+        self.metrics_every = max(0, int(metrics_every))
+        self.profiler = None
         
         # Configure absolute paths to models and training_results
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        models_dir = os.path.join(script_dir, 'code', 'models')
-        training_results_dir = os.path.join(script_dir, 'code', 'training_results')
+        models_dir, training_results_dir = pipeline_dirs()
         
-        self.training_session = GestureTrainingSession(
+        # Zygote spares hand in a session they built (and warmed) before the learner connected
+        self.training_session = training_session or GestureTrainingSession(
             models_dir=models_dir,
-            training_results_dir=training_results_dir
+            training_results_dir=training_results_dir,
+            resources=resources
         )
         self.session_active = False
         
@@ -37,6 +90,9 @@ class WebGestureProcessor:
             
         # Initialize MediaPipe
         self.training_session.initialize_mediapipe()
+        # Tell the client when processing drops to the idle rate or returns to full rate
+        self.training_session.scheduler.on_change = lambda state, fps: self.send_message(
+            'scheduler', {'state': state, 'effective_fps': fps})
         
         # Stats
         self.stats = {
@@ -54,7 +110,9 @@ class WebGestureProcessor:
             'timestamp': self.training_session.get_current_time(),
             **data
         }
-        print(json.dumps(message), flush=True)
+        # Reader and processing threads both report through stdout
+        with self.output_lock:
+            print(json.dumps(message), flush=True)
     
     def send_ready(self):
         self.send_message('ready', {
@@ -95,66 +153,361 @@ class WebGestureProcessor:
         })
     
     def process_frame(self, frame_data):
-        """Process single frame from web"""
+        """Process a legacy base64 data-URL frame from a JSON command"""
         try:
-            # Decode base64 image
-            image_data = base64.b64decode(frame_data.split(',')[1])  # Remove data:image/jpeg;base64,
-            image = Image.open(io.BytesIO(image_data))
-            
-            # Convert PIL to OpenCV format
-            frame = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-            
-            # Process with training session logic
-            result = self.training_session.process_frame(frame, self.gesture_template)
-            
-            if result:
-                if result['type'] == 'status_update':
-                    self.send_status(result['status'], result.get('details'))
-                elif result['type'] == 'gesture_result':
-                    self.send_result(result)
-                    
+            with self.training_session.metrics.span('decode'):
+                # Decode base64 image (remove data:image/jpeg;base64,)
+                image_data = base64.b64decode(frame_data.split(',')[1])
+                rgb_frame = decode_jpeg(image_data)
+            self.process_rgb_frame(rgb_frame)
+        except Exception as e:
+            self.send_error(f"Frame processing error: {str(e)}")
+    
+    def process_binary_frame(self, frame):
+        """Process a length-prefixed binary frame (JPEG bytes, raw RGB or client landmarks)"""
+        try:
+            if frame.kind == FRAME_LANDMARKS:
+                with self.training_session.metrics.span('decode'):
+                    hands, labels, _ = decode_landmarks(frame.width, frame.payload)
+                self.forward_result(self.training_session.process_landmarks(hands, labels, self.gesture_template))
+            else:
+                with self.training_session.metrics.span('decode'):
+                    rgb_frame = decode_frame(frame.kind, frame.width, frame.height, frame.payload)
+                self.process_rgb_frame(rgb_frame)
         except Exception as e:
             self.send_error(f"Frame processing error: {str(e)}")
     
+    def process_rgb_frame(self, rgb_frame):
+        """Run the training session on an RGB frame and forward its result"""
+        self.forward_result(self.training_session.process_rgb_frame(rgb_frame, self.gesture_template))
+    
+    def forward_result(self, result):
+        if result:
+            if result['type'] == 'status_update':
+                self.send_status(result['status'], result.get('details'))
+            elif result['type'] == 'gesture_result':
+                self.send_result(result)
+    
+    def handle_command(self, command):
+        """Handle a JSON command. Returns False when the session should stop."""
+        if command['type'] == 'frame':
+            self.process_frame(command['data'])
+        elif command['type'] == 'reset':
+            self.training_session.reset_session()
+            self.stats = {'correct': 0, 'wrong': 0, 'total': 0}
+            self.send_message('reset', {'message': 'Session reset'})
+        elif command['type'] == 'stats':
+            self.send_queue_stats()
+        elif command['type'] == 'metrics':
+            self.send_metrics()
+            if command.get('reset'):
+                self.training_session.metrics.reset()
+        elif command['type'] == 'profile':
+            self.start_profile(command)
+        elif command['type'] == 'stop':
+            return False
+        return True
+    
+    def send_queue_stats(self):
+        self.send_message('queue_stats', {
+            **self.queue.stats(),
+            'frames_processed': self.frames_processed,
+            'hand_roi': self.training_session.roi.stats(),
+            'scheduler': self.training_session.scheduler.stats()
+        })
+    
+    def send_metrics(self):
+        """Per-stage latency percentiles over the session's rolling windows"""
+        self.send_message('metrics', {
+            'frames_processed': self.frames_processed,
+            'stages': self.training_session.metrics.snapshot()
+        })
+    
+    def start_profile(self, command):
+        """Sample stacks on a background thread; the 'profile' message follows when it ends"""
+        if self.profiler is not None and self.profiler.running:
+            self.send_error("A profile is already running")
+            return
+        try:
+            self.profiler = StackSampler.from_command(
+                command, on_done=lambda profile: self.send_message('profile', profile))
+        except ValueError as e:
+            self.send_error(str(e))
+            return
+        self.profiler.start()
+    
+    def read_stdin(self):
+        """Reader thread: move stdin messages into the ingestion queue as fast as they arrive"""
+        stream = sys.stdin.buffer
+        while True:
+            try:
+                message = read_message(stream)
+                if message is None:
+                    break
+                
+                kind, body = message
+                if kind == 'frame':
+                    self.queue.put_frame(body)
+                elif body.get('type') == 'frame':
+                    # Legacy base64 frames are subject to dropping as well
+                    self.queue.put_frame(body)
+                else:
+                    self.queue.put_command(body)
+                    if body.get('type') == 'stop':
+                        return
+                    
+            except json.JSONDecodeError:
+                self.send_error("Invalid JSON command")
+            except ProtocolError as e:
+                # The stream is out of sync (e.g. an unread oversized payload): nothing after it can be trusted
+                self.send_error(f"Protocol error: {str(e)}")
+                break
+            except Exception as e:
+                self.send_error(f"Stdin read error: {str(e)}")
+                break
+        
+        # End of input behaves like an explicit stop
+        self.queue.put_command({'type': 'stop'})
+    
     def run(self):
-        """Main loop - read frames from stdin"""
+        """Main loop - always process the freshest queued frame, commands in order"""
         self.send_message('info', {'message': f'Ready to process {self.gesture_name} gestures'})
         
+        reader = threading.Thread(target=self.read_stdin, name='stdin-reader', daemon=True)
+        reader.start()
+        
         try:
-            for line in sys.stdin:
-                line = line.strip()
-                if not line:
-                    continue
-                    
+            while True:
+                kind, item = self.queue.get()
                 try:
-                    command = json.loads(line)
-                    
-                    if command['type'] == 'frame':
-                        self.process_frame(command['data'])
-                    elif command['type'] == 'reset':
-                        self.training_session.reset_session()
-                        self.stats = {'correct': 0, 'wrong': 0, 'total': 0}
-                        self.send_message('reset', {'message': 'Session reset'})
-                    elif command['type'] == 'stop':
+                    if kind == 'command' and not self.handle_command(item):
                         break
-                        
-                except json.JSONDecodeError:
-                    self.send_error("Invalid JSON command")
+                    if kind == 'frame':
+                        is_image = isinstance(item, dict) or item.kind != FRAME_LANDMARKS
+                        if is_image and not self.training_session.wants_frame():
+                            continue  # Idle: skipped before decoding
+                        with self.training_session.metrics.span('frame'):
+                            if isinstance(item, dict):
+                                self.process_frame(item['data'])
+                            else:
+                                self.process_binary_frame(item)
+                        self.frames_processed += 1
+                        if self.metrics_every and self.frames_processed % self.metrics_every == 0:
+                            self.send_metrics()
                 except Exception as e:
                     self.send_error(f"Command processing error: {str(e)}")
                     
         except KeyboardInterrupt:
             pass
         finally:
-            self.send_message('shutdown', {'message': 'Session ended'})
+            self.send_message('shutdown', {
+                'message': 'Session ended',
+                'queue': {**self.queue.stats(), 'frames_processed': self.frames_processed}
+            })
+
+def run_forked_session(conn, training_session, max_pending_frames):
+    """Spare side of the zygote: serve one session on conn, then exit"""
+    exit_code = 0
+    try:
+        started = time.time()
+        # The connection becomes this process's stdin/stdout
+        os.dup2(conn.fileno(), 0)
+        os.dup2(conn.fileno(), 1)
+        conn.close()
+        sys.stdout = os.fdopen(1, 'w', encoding='utf-8', closefd=False)
+        
+        message = read_message(sys.stdin.buffer)
+        if message is None or message[0] != 'command' or message[1].get('type') != 'open':
+            print(json.dumps({'type': 'error', 'error': "First message must be {'type': 'open', 'gesture': ...}"}),
+                  flush=True)
+            exit_code = 1
+            return
+        command = message[1]
+        try:
+            metrics_every = parse_metrics_every(command.get('metrics_every', DEFAULT_METRICS_EVERY))
+        except ValueError as e:
+            print(json.dumps({'type': 'error', 'error': str(e)}), flush=True)
+            exit_code = 1
+            return
+        processor = WebGestureProcessor(command.get('gesture'),
+                                        max_pending_frames=command.get('max_pending_frames', max_pending_frames),
+                                        training_session=training_session,
+                                        metrics_every=metrics_every)
+        print(f"[zygote] session {os.getpid()} ready in {(time.time() - started) * 1000:.1f} ms", file=sys.stderr)
+        processor.run()
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else 1
+    except Exception as e:
+        print(f"[zygote] session {os.getpid()} failed: {e}", file=sys.stderr)
+        exit_code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+        finally:
+            os._exit(exit_code)  # Never fall back into the zygote's loop
+
+def run_spare(listener, notify_fd, resources, max_pending_frames):
+    """Pre-forked spare: build and warm a tracker, then wait for one connection"""
+    try:
+        models_dir, training_results_dir = pipeline_dirs()
+        training_session = GestureTrainingSession(models_dir=models_dir, training_results_dir=training_results_dir,
+                                                  resources=resources)
+        training_session.warm_up()
+        os.write(notify_fd, f"warm {os.getpid()}\n".encode())
+        conn, _ = listener.accept()  # Every idle spare waits here; the kernel hands the connection to one
+        listener.close()
+        os.write(notify_fd, f"taken {os.getpid()}\n".encode())
+    except BaseException as e:
+        print(f"[zygote] spare {os.getpid()} failed: {e}", file=sys.stderr)
+        os._exit(1)
+    run_forked_session(conn, training_session, max_pending_frames)
+
+def serve_zygote(socket_path, max_pending_frames=DEFAULT_MAX_PENDING_FRAMES, spares=DEFAULT_SPARES):
+    """Load everything once, keep `spares` forked sessions warm, replace each one as it is taken"""
+    if not hasattr(os, 'fork'):
+        print(json.dumps({'type': 'error', 'error': 'Zygote mode needs os.fork (not available on Windows)'}))
+        sys.exit(1)
+    
+    # Zygote stdout only carries its own JSON status lines
+    out = sys.stdout
+    sys.stdout = sys.stderr
+    # Import-time and model-loading work happens once, before any fork.
+    # MediaPipe graphs start threads, so they are only ever created in children
+    resources = load_session_resources(*pipeline_dirs())
+    
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(64)
+    notify_read, notify_write = os.pipe()
+    idle = set()
+    children = set()  # Every live forked process: idle spares and running sessions
+    # SIGTERM unwinds through the finally below, so no child outlives the zygote
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
+    def fork_spare():
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            os.close(notify_read)
+            run_spare(listener, notify_write, resources, max_pending_frames)
+        idle.add(pid)
+        children.add(pid)
+    
+    for _ in range(max(1, spares)):
+        fork_spare()
+    
+    pending = b''
+    warm = set()
+    announced = False
+    # The parent going away (our stdin pipe closed) shuts the zygote down as well
+    stdin_fd = None if sys.stdin is None or sys.stdin.isatty() else sys.stdin.fileno()
+    watched = [notify_read] + ([stdin_fd] if stdin_fd is not None else [])
+    try:
+        while True:
+            readable, _, _ = select.select(watched, [], [], 1.0)
+            if stdin_fd in readable and not os.read(stdin_fd, 4096):
+                break
+            if notify_read in readable:
+                pending += os.read(notify_read, 4096)
+                *lines, pending = pending.split(b'\n')
+                for line in lines:
+                    event, pid = line.decode().split()
+                    pid = int(pid)
+                    if event == 'warm':
+                        warm.add(pid)
+                    else:
+                        idle.discard(pid)
+                        warm.discard(pid)
+                        print(json.dumps({'type': 'session_started', 'pid': pid}), file=out, flush=True)
+            
+            if not announced and warm:
+                # First warm spare: sessions can now start without any start-up cost
+                announced = True
+                print(json.dumps({'type': 'zygote_ready', 'pid': os.getpid(), 'socket': socket_path,
+                                  'spares': len(idle), 'gestures': sorted(resources['templates'])}),
+                      file=out, flush=True)
+            
+            # Reap finished sessions; a spare that died while idle is replaced too
+            while True:
+                try:
+                    pid, _ = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    break
+                if pid == 0:
+                    break
+                idle.discard(pid)
+                warm.discard(pid)
+                children.discard(pid)
+            
+            while len(idle) < max(1, spares):
+                fork_spare()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        listener.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        reap_children(children)
+
+def reap_children(children, timeout=ZYGOTE_REAP_TIMEOUT):
+    """SIGTERM every forked child, wait for them, SIGKILL the ones still alive after timeout"""
+    for pid in children:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            pass
+    deadline = time.time() + timeout
+    remaining = set(children)
+    while remaining:
+        for pid in list(remaining):
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done = pid
+            if done:
+                remaining.discard(pid)
+        if not remaining or time.time() >= deadline:
+            break
+        time.sleep(0.05)
+    for pid in remaining:
+        try:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        except OSError:
+            pass
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Web gesture practice processor")
+    parser.add_argument('gesture_name', nargs='?')
+    parser.add_argument('--max-pending-frames', type=int, default=DEFAULT_MAX_PENDING_FRAMES,
+                        help='Frames kept waiting while a frame is being processed (default: %(default)s)')
+    parser.add_argument('--zygote', metavar='SOCKET',
+                        help='Preload once and serve each connection on this Unix socket from a pre-forked process')
+    parser.add_argument('--spares', type=int, default=DEFAULT_SPARES,
+                        help='Zygote mode: warm session processes kept waiting (default: %(default)s)')
+    parser.add_argument('--metrics-every', type=int, default=DEFAULT_METRICS_EVERY,
+                        help="Send a per-stage latency 'metrics' message every N processed frames, 0 = only on "
+                             "request (default: %(default)s)")
+    return parser.parse_args()
 
 def main():
     if len(sys.argv) < 2:
         print(json.dumps({'type': 'error', 'error': 'Usage: python web_gesture_processor.py <gesture_name>'}))
         sys.exit(1)
     
-    gesture_name = sys.argv[1]
-    processor = WebGestureProcessor(gesture_name)
+    args = parse_args()
+    if args.zygote:
+        serve_zygote(args.zygote, max_pending_frames=args.max_pending_frames, spares=args.spares)
+        return
+    if not args.gesture_name:
+        print(json.dumps({'type': 'error', 'error': 'Usage: python web_gesture_processor.py <gesture_name>'}))
+        sys.exit(1)
+    
+    processor = WebGestureProcessor(args.gesture_name, max_pending_frames=args.max_pending_frames,
+                                    metrics_every=args.metrics_every)
     processor.run()
 
 if __name__ == "__main__":